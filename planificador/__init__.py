@@ -0,0 +1,4 @@
+"""
+Planificador de despliegue IoT LoRa
+Motor importable para el Set Cover Problem de gateways y el despliegue de sensores
+"""
@@ -0,0 +1,109 @@
+"""
+Pipeline de planificación por etapas desde la línea de comandos
+
+Uso (desde la raíz del repositorio):
+    python -m planificador                       # todas las etapas
+    python -m planificador resolucion reporte    # solo esas (y sus dependencias)
+    python -m planificador figuras --previsualizacion
+    python -m planificador --forzar resolucion   # recalcular aunque esté en caché
+    python -m planificador --forzar resolucion --perfilar resolucion --perfil muestreo
+    python -m planificador --listar
+"""
+
+import argparse
+import sys
+
+from .configuracion import cargar_config
+from .instrumentacion import MODOS_PERFIL, instrumentacion_desde_config
+from .pipeline import (ETAPAS, claves_pipeline, config_con, ejecutar_pipeline,
+                       orden_etapas, resumen_pipeline)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m planificador',
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument('etapas', nargs='*', metavar='etapa',
+                        help=f"Etapas a obtener ({', '.join(ETAPAS)}); por defecto, todas")
+    parser.add_argument('--config', default=None, help='Ruta a config.json')
+    parser.add_argument('--directorio', default=None,
+                        help='Carpeta de artefactos (por defecto, results/cache/pipeline)')
+    parser.add_argument('--forzar', nargs='*', metavar='etapa', default=None,
+                        help='Recalcular estas etapas (sin nombres: todas las pedidas)')
+    parser.add_argument('--previsualizacion', action='store_true',
+                        help='Figuras a baja resolución (visualizacion.dpi_previsualizacion)')
+    parser.add_argument('--perfilar', nargs='*', metavar='etapa', default=None,
+                        help='Perfilar estas etapas (sin nombres: todas); reemplaza '
+                             'instrumentacion.perfilar')
+    parser.add_argument('--perfil', choices=MODOS_PERFIL, default=None,
+                        help='Perfilador: cprofile (exacto, más costoso) o muestreo de la pila')
+    parser.add_argument('--listar', action='store_true',
+                        help='Mostrar las etapas, sus secciones de config.json y sus claves')
+    args = parser.parse_args(argv)
+
+    config = cargar_config(args.config)
+    if args.previsualizacion:
+        config = config_con(config, **{'visualizacion.modo': 'previsualizacion'})
+
+    try:
+        orden = orden_etapas(args.etapas)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.listar:
+        claves = claves_pipeline(config, orden)
+        for nombre in orden:
+            etapa = ETAPAS[nombre]
+            print(f"{nombre:<12}{claves[nombre]:<18}{etapa.descripcion}")
+            print(f"{'':<12}secciones: {', '.join(etapa.secciones)}"
+                  + (f" | depende de: {', '.join(etapa.dependencias)}" if etapa.dependencias
+                     else ""))
+        return 0
+
+    forzar = ()
+    if args.forzar is not None:
+        forzar = args.forzar or True
+
+    def al_terminar(artefacto):
+        origen = 'caché' if artefacto.desde_cache else f"{artefacto.tiempo_s:.2f} s"
+        print(f"✓ {artefacto.etapa:<12} [{origen}]")
+        for ruta in artefacto.publicados:
+            print(f"    → {ruta}")
+
+    perfilar = None
+    if args.perfilar is not None:
+        perfilar = args.perfilar or True
+    instrumentacion = instrumentacion_desde_config(config, origen='pipeline', perfilar=perfilar,
+                                                   modo_perfil=args.perfil)
+
+    print("=" * 80)
+    print("PIPELINE DE PLANIFICACIÓN")
+    print("=" * 80)
+    artefactos = ejecutar_pipeline(config, args.etapas, args.directorio, forzar=forzar,
+                                   al_terminar=al_terminar, instrumentacion=instrumentacion)
+
+    print()
+    for linea in resumen_pipeline(artefactos):
+        print(linea)
+    if 'resolucion' in artefactos:
+        solucion = artefactos['resolucion'].metadatos
+        print(f"\nSet Cover: {solucion['estado']} ({solucion['solver']}), "
+              f"{len(solucion['seleccion'])} gateways")
+        for k, (x, y) in enumerate(solucion['gateways'], 1):
+            print(f"  Gateway {k}: ({x:.1f} m, {y:.1f} m)")
+    if 'asignacion' in artefactos:
+        print()
+        for linea in artefactos['asignacion'].metadatos['resumen']:
+            print(linea)
+    if 'exportacion' in artefactos:
+        exportacion = artefactos['exportacion'].metadatos
+        print(f"\nExportados {exportacion['n_sensores']:,} sensores "
+              f"({', '.join(exportacion['formatos'])}):")
+        for linea in exportacion['resumen']:
+            print(linea)
+    if instrumentacion.activa and instrumentacion.archivo:
+        print(f"\nInstrumentación ({instrumentacion.ejecucion}): '{instrumentacion.archivo}'")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Ampliación de un despliegue existente: gateways adicionales mínimos
+
+Con los gateways ya instalados fijos, solo importan los puntos de demanda
+y sensores que ninguno de ellos cubre. El Set Cover se plantea sobre ese
+residuo (todos los candidatos × puntos y sensores residuales), que suele
+ser una fracción mínima del campo:
+
+- La cobertura de los puntos de demanda sale de una matriz de pérdidas en
+  results/cache (ver `perdidas.MatrizPerdidas.desde_cache`): las filas de
+  los gateways instalados y las columnas residuales se umbralizan sin
+  recalcular path-loss. Un gateway instalado fuera de la grilla de
+  candidatos se evalúa directamente.
+- Los sensores usan los mismos márgenes de enlace que la asignación
+  (ver `asignacion.margenes_enlace`).
+
+Todos los enlaces (matriz en caché, gateways fuera de la grilla y
+sensores) usan la obstrucción de la asignación: el sorteo por coordenadas
+(o el ráster). El sorteo secuencial del notebook depende del orden de los
+enlaces en la matriz y no puede evaluarse para un enlace suelto, así que
+mezclarlo daría, para un mismo enlace, condiciones distintas según por
+dónde se evalúe.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .asignacion import margenes_desde_config
+from .bitset import MatrizBits
+from .cobertura import OBSTRUCCION_COORDENADAS, cobertura_desde_config, obstruccion_desde_config
+from .configuracion import ruta_proyecto
+from .grid import grid_desde_config
+from .perdidas import perdidas_desde_config
+from .propagacion import ModeloPropagacion
+from .resolucion import resolver_set_cover
+
+DIRECTORIO_CACHE = 'results/cache'
+
+# Resolución (m) con la que un gateway instalado se identifica con un candidato
+_TOLERANCIA_M = 0.01
+
+
+@dataclass
+class ResultadoAmpliacion:
+    """
+    Gateways adicionales para cubrir el residuo de un despliegue existente.
+
+    Atributos:
+        fijos: Coordenadas (G, 2) de los gateways instalados
+        seleccion: Índices en I de los candidatos agregados
+        nuevos: Coordenadas (K, 2) de los gateways agregados
+        puntos_residuales: Índices en J de los puntos sin cobertura de los fijos
+        sensores_residuales: Índices de los sensores sin enlace viable a los fijos
+        puntos_sin_solucion, sensores_sin_solucion: Residuo que ningún
+            candidato cubre (queda fuera del Set Cover)
+        estado: Estado del Set Cover residual
+        cota_inferior: Cota inferior del número de gateways adicionales
+        tiempo_residuo_s: Carga de la cobertura y cálculo del residuo
+        tiempo_resolucion_s: Set Cover residual (presolve + solver)
+    """
+    fijos: np.ndarray
+    seleccion: list
+    nuevos: np.ndarray
+    puntos_residuales: np.ndarray
+    sensores_residuales: np.ndarray
+    puntos_sin_solucion: np.ndarray
+    sensores_sin_solucion: np.ndarray
+    estado: str
+    cota_inferior: float
+    tiempo_residuo_s: float
+    tiempo_resolucion_s: float
+
+    @property
+    def n_nuevos(self):
+        return len(self.seleccion)
+
+
+def _filas_candidatas(I_coords, coords):
+    """Fila de I de cada coordenada (o -1 si no coincide con ningún candidato)."""
+    clave = {tuple(c): k for k, c in enumerate(np.round(I_coords / _TOLERANCIA_M).astype(np.int64))}
+    return np.array([clave.get(tuple(c), -1)
+                     for c in np.round(coords / _TOLERANCIA_M).astype(np.int64)], dtype=np.int64)
+
+
+def ampliar_despliegue(config, gateways_fijos, sensores=None, directorio=None,
+                       opciones_solver=None, I_coords=None, J_coords=None):
+    """
+    Mínimo número de gateways adicionales que, junto con los instalados,
+    cubren todos los puntos de demanda (y los sensores, si se indican).
+
+    Args:
+        config: Configuración (bloques de propagación, escenario, grilla)
+        gateways_fijos: Coordenadas (G, 2) de los gateways instalados
+        sensores: Coordenadas (S, 2) opcionales de sensores a cubrir
+        directorio: Carpeta de la matriz de pérdidas en caché (por defecto,
+            results/cache); False para no usar caché
+        opciones_solver: Bloque `solver` para el Set Cover residual
+        I_coords, J_coords: Candidatos y puntos de demanda (por defecto, la
+            grilla de config.json con I = J, como en el notebook)
+
+    Returns:
+        ResultadoAmpliacion
+    """
+    inicio = time.perf_counter()
+    if J_coords is None:
+        J_coords = grid_desde_config(config)
+    if I_coords is None:
+        I_coords = J_coords
+    I_coords = np.asarray(I_coords, dtype=float)
+    fijos = np.asarray(gateways_fijos, dtype=float).reshape(-1, 2)
+    if directorio is None:
+        directorio = ruta_proyecto(DIRECTORIO_CACHE)
+    modelo = ModeloPropagacion.desde_config(config)
+    obstruccion = obstruccion_desde_config(config, OBSTRUCCION_COORDENADAS)
+    perdidas = perdidas_desde_config(config, I_coords, J_coords, directorio=directorio or None,
+                                     obstruccion=obstruccion)
+
+    # Puntos cubiertos por los instalados: filas de la matriz en caché para los
+    # que son candidatos, cálculo directo (misma obstrucción) para el resto
+    filas = _filas_candidatas(I_coords, fijos)
+    cubiertos = np.zeros(len(J_coords), dtype=bool)
+    if np.any(filas >= 0):
+        cubiertos |= perdidas.viables(modelo, filas=filas[filas >= 0]).any(axis=0)
+    if np.any(filas < 0):
+        directa = cobertura_desde_config(config, fijos[filas < 0], J_coords,
+                                         obstruccion=obstruccion)
+        cubiertos |= directa.a.astype(bool).any(axis=0)
+    puntos_residuales = np.flatnonzero(~cubiertos)
+    a_puntos = perdidas.viables(modelo, columnas=puntos_residuales)
+
+    sensores_residuales = np.empty(0, dtype=np.int64)
+    a_sensores = np.zeros((len(I_coords), 0), dtype=bool)
+    if sensores is not None and len(sensores):
+        sensores = np.asarray(sensores, dtype=float).reshape(-1, 2)
+        margen_fijos, _ = margenes_desde_config(config, sensores, fijos, obstruccion=obstruccion)
+        sensores_residuales = np.flatnonzero(~np.any(margen_fijos >= 0, axis=1))
+        if len(sensores_residuales):
+            margen, _ = margenes_desde_config(config, sensores[sensores_residuales], I_coords,
+                                              obstruccion=obstruccion)
+            a_sensores = (margen >= 0).T
+
+    # Lo que ningún candidato cubre no tiene solución: se informa y se excluye
+    cubrible_p = a_puntos.any(axis=0)
+    cubrible_s = a_sensores.any(axis=0)
+    a = MatrizBits.desde_denso(np.concatenate([a_puntos[:, cubrible_p],
+                                               a_sensores[:, cubrible_s]], axis=1))
+    tiempo_residuo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    if a.shape[1]:
+        resultado = resolver_set_cover(a, opciones_solver or config.get('solver', {}))
+        estado, seleccion, cota = (resultado.estado, resultado.seleccion,
+                                   resultado.cota_inferior)
+    else:
+        estado, seleccion, cota = 'Optimal', [], 0.0
+    return ResultadoAmpliacion(fijos=fijos, seleccion=list(seleccion),
+                               nuevos=I_coords[np.asarray(seleccion, dtype=np.int64)],
+                               puntos_residuales=puntos_residuales,
+                               sensores_residuales=sensores_residuales,
+                               puntos_sin_solucion=puntos_residuales[~cubrible_p],
+                               sensores_sin_solucion=sensores_residuales[~cubrible_s],
+                               estado=estado, cota_inferior=cota,
+                               tiempo_residuo_s=tiempo_residuo,
+                               tiempo_resolucion_s=time.perf_counter() - inicio)
+
+
+def ampliacion_desde_config(config, gateways_fijos=None, sensores=None, **kwargs):
+    """
+    Ampliación con el bloque `ampliacion` de config.json: gateways
+    instalados por defecto y opciones del solver, superpuestas al bloque
+    `solver`.
+    """
+    opciones = config.get('ampliacion', {})
+    if gateways_fijos is None:
+        gateways_fijos = opciones.get('gateways_instalados', [])
+    kwargs.setdefault('opciones_solver', {**config.get('solver', {}), **opciones.get('solver', {})})
+    return ampliar_despliegue(config, gateways_fijos, sensores, **kwargs)
+
+
+def resumen_ampliacion(resultado):
+    """Líneas de texto con el residuo y los gateways a agregar."""
+    lineas = [
+        f"Gateways instalados: {len(resultado.fijos)}",
+        f"Residuo: {len(resultado.puntos_residuales):,} puntos de demanda y "
+        f"{len(resultado.sensores_residuales):,} sensores sin cobertura",
+    ]
+    if len(resultado.puntos_sin_solucion) or len(resultado.sensores_sin_solucion):
+        lineas.append(f"  Sin ningún candidato viable: {len(resultado.puntos_sin_solucion):,} "
+                      f"puntos y {len(resultado.sensores_sin_solucion):,} sensores")
+    lineas.append(f"Gateways adicionales: {resultado.n_nuevos} ({resultado.estado}, "
+                  f"cota inferior {resultado.cota_inferior:g})")
+    for k, (x, y) in enumerate(resultado.nuevos, 1):
+        lineas.append(f"  Nuevo gateway {k}: ({x:.1f} m, {y:.1f} m)")
+    lineas.append(f"Tiempo: {resultado.tiempo_residuo_s * 1000:.0f} ms residuo + "
+                  f"{resultado.tiempo_resolucion_s * 1000:.0f} ms Set Cover")
+    return lineas
@@ -0,0 +1,504 @@
+"""
+Asignación sensor → gateway con límite de capacidad por gateway
+
+Reemplaza el bucle por sensor de humidity_sensor_deployment.py (distancia a
+cada gateway, `argmin` y radio fijo de 750 m):
+
+- Los márgenes de enlace de todos los pares sensor–gateway se calculan de
+  una vez con el modelo path-loss del notebook (ver `cobertura`), con la
+  misma obstrucción y terreno que la matriz de cobertura.
+- La capacidad de cada gateway se expresa en mensajes por hora: la fracción
+  de tiempo en aire utilizable de sus canales dividida por el tiempo en aire
+  de un mensaje LoRa. Cada sensor demanda `mensajes_por_hora`.
+- La asignación maximiza el número de sensores asignados y luego el margen
+  total sujeto a las capacidades (problema de transporte) con una subasta
+  de Bertsekas vectorizada: en cada ronda todos los sensores libres pujan a
+  la vez y cada gateway conserva las mejores pujas que caben en su
+  capacidad. El coste por ronda es O(S · G) en NumPy, sin bucles por sensor.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .cobertura import (MEMORIA_MAX_MB_DEFECTO, OBSTRUCCION_COORDENADAS, iterar_geometria,
+                        obstruccion_desde_config)
+from .propagacion import ModeloPropagacion
+from .terreno import terreno_desde_config
+
+SIN_ASIGNAR = -1
+
+# Duración de símbolo (s) a partir de la cual LoRa activa la optimización de
+# baja tasa de datos (SF11/SF12 con 125 kHz)
+_SIMBOLO_BAJA_TASA_S = 16e-3
+
+
+def tiempo_en_aire_s(payload_bytes, spreading_factor, ancho_banda_khz=125.0,
+                     tasa_codificacion=1, preambulo_simbolos=8,
+                     cabecera_explicita=True, crc=True):
+    """
+    Tiempo en aire de un paquete LoRa (Semtech AN1200.13).
+
+    Args:
+        payload_bytes: Bytes de carga útil
+        spreading_factor: SF (7-12); escalar o array
+        ancho_banda_khz: Ancho de banda en kHz
+        tasa_codificacion: 1-4 para CR 4/5 ... 4/8
+        preambulo_simbolos: Símbolos de preámbulo programados
+        cabecera_explicita: Cabecera explícita (modo LoRaWAN)
+        crc: CRC de carga útil activo
+
+    Returns:
+        Segundos (misma forma que `spreading_factor`)
+    """
+    sf = np.asarray(spreading_factor, dtype=float)
+    simbolo = 2.0 ** sf / (ancho_banda_khz * 1e3)
+    baja_tasa = (simbolo >= _SIMBOLO_BAJA_TASA_S).astype(float)
+    numerador = (8 * payload_bytes - 4 * sf + 28 + 16 * int(crc)
+                 - 20 * (0 if cabecera_explicita else 1))
+    simbolos = 8 + np.maximum(np.ceil(numerador / (4 * (sf - 2 * baja_tasa)))
+                              * (tasa_codificacion + 4), 0)
+    return (preambulo_simbolos + 4.25 + simbolos) * simbolo
+
+
+@dataclass(frozen=True)
+class ParametrosTrafico:
+    """
+    Tráfico de los sensores y capacidad de los gateways.
+
+    La capacidad de un gateway es `ocupacion_max` del tiempo de cada uno de
+    sus `canales` (el máximo útil de ALOHA puro es ~18 %) dividida por el
+    tiempo en aire de un mensaje, salvo que `capacidad_mensajes_hora` la fije
+    directamente.
+    """
+    mensajes_por_hora: float = 2.0
+    payload_bytes: int = 24
+    spreading_factor: int = 9
+    ancho_banda_khz: float = 125.0
+    tasa_codificacion: int = 1
+    preambulo_simbolos: int = 8
+    canales: int = 8
+    ocupacion_max: float = 0.18
+    capacidad_mensajes_hora: float = None
+
+    @classmethod
+    def desde_config(cls, config):
+        """Construye los parámetros a partir del bloque `asignacion` de config.json."""
+        bloque = config.get('asignacion', {})
+        return cls(**{campo: bloque[campo] for campo in cls.__dataclass_fields__
+                      if bloque.get(campo) is not None})
+
+    @property
+    def tiempo_en_aire_s(self):
+        """Tiempo en aire de un mensaje."""
+        return float(tiempo_en_aire_s(self.payload_bytes, self.spreading_factor,
+                                      self.ancho_banda_khz, self.tasa_codificacion,
+                                      self.preambulo_simbolos))
+
+    @property
+    def ciclo_trabajo_sensor(self):
+        """Fracción del tiempo que transmite cada sensor."""
+        return self.mensajes_por_hora * self.tiempo_en_aire_s / 3600.0
+
+    @property
+    def capacidad_gateway_mensajes_hora(self):
+        """Mensajes por hora que admite un gateway."""
+        if self.capacidad_mensajes_hora is not None:
+            return float(self.capacidad_mensajes_hora)
+        return self.ocupacion_max * self.canales * 3600.0 / self.tiempo_en_aire_s
+
+    @property
+    def sensores_por_gateway(self):
+        """Sensores que caben en un gateway."""
+        return int(math.floor(self.capacidad_gateway_mensajes_hora / self.mensajes_por_hora))
+
+
+def margenes_enlace(sensores, gateways, modelo, porcentaje_obstruido, semilla=42,
+                    memoria_max_mb=MEMORIA_MAX_MB_DEFECTO, obstruccion=OBSTRUCCION_COORDENADAS,
+                    terreno=None):
+    """
+    Margen de todos los enlaces sensor → gateway.
+
+    El margen es la potencia recibida menos el umbral (sensibilidad +
+    margen de desvanecimiento): el enlace es viable si es >= 0, igual que
+    `ModeloPropagacion.enlace_viable`.
+
+    Args:
+        sensores: Array (S, 2) de coordenadas de sensores
+        gateways: Array (G, 2) de coordenadas de gateways
+        modelo: ModeloPropagacion
+        porcentaje_obstruido, semilla, memoria_max_mb, obstruccion: Ver
+            `cobertura.iterar_geometria` (por defecto, obstrucción por
+            coordenadas: cada enlace físico tiene siempre la misma condición)
+        terreno: ModeloTerreno opcional
+
+    Returns:
+        Tupla (margen, distancia) de arrays (S, G) float32
+    """
+    sensores = np.asarray(sensores, dtype=float).reshape(-1, 2)
+    gateways = np.asarray(gateways, dtype=float).reshape(-1, 2)
+    margen = np.empty((len(sensores), len(gateways)), dtype=np.float32)
+    distancia = np.empty_like(margen)
+    # Los gateways son las filas: pocos, y cada fila recorre todos los sensores
+    for inicio, fin, d, obstruido in iterar_geometria(gateways, sensores, porcentaje_obstruido,
+                                                      semilla, memoria_max_mb, obstruccion):
+        perdida = modelo.path_loss(d, modelo.exponente(obstruido))
+        if terreno is not None:
+            perdida += terreno.perdidas(gateways[inicio:fin], sensores, memoria_max_mb)
+        margen[:, inicio:fin] = (modelo.potencia_tx_dbm - perdida - modelo.umbral_dbm).T
+        distancia[:, inicio:fin] = d.T
+    return margen, distancia
+
+
+class _Subasta:
+    """
+    Estado de la subasta: precio único por gateway y titulares de sus plazas.
+
+    La fila n_G de `valores` (G + 1, S) es la opción "sin asignar"
+    (beneficio 0, precio 0 y capacidad ilimitada). Se guarda por gateway
+    para que el paso inverso lea columnas contiguas.
+    """
+
+    def __init__(self, beneficio, capacidad):
+        self.n_S, self.n_G = beneficio.shape
+        self.valores = np.concatenate([beneficio.T, np.zeros((1, self.n_S))])
+        self.capacidad = np.minimum(capacidad, self.n_S)
+        self.precios = np.zeros(self.n_G + 1)
+        self.asignado = np.full(self.n_S, SIN_ASIGNAR, dtype=np.int64)
+        self.puja = np.zeros(self.n_S)
+        # Valor (sin descontar precio) de la opción actual; -inf si está libre
+        self.valor = np.full(self.n_S, -np.inf)
+        self.titulares = [np.empty(0, dtype=np.int64) for _ in range(self.n_G)]
+        self.rondas = 0
+
+    def ganancias(self):
+        """Valor neto de la opción actual de cada sensor (-inf si está libre)."""
+        # Un sensor libre tiene índice -1: el precio de la opción "sin asignar"
+        return self.valor - self.precios[self.asignado]
+
+    def ocupar(self, sensores, g, puja):
+        """Asigna los sensores al gateway g (o a "sin asignar") con su puja."""
+        self.asignado[sensores] = g
+        self.valor[sensores] = self.valores[g, sensores]
+        self.puja[sensores] = puja
+
+    def liberar(self, sensores):
+        """Deja libres los sensores indicados (y sus plazas)."""
+        origen = np.unique(self.asignado[sensores])
+        self.asignado[sensores] = SIN_ASIGNAR
+        self.valor[sensores] = -np.inf
+        for g in origen[(origen != SIN_ASIGNAR) & (origen != self.n_G)]:
+            self.titulares[g] = self.titulares[g][self.asignado[self.titulares[g]] == g]
+        return origen[(origen != SIN_ASIGNAR) & (origen != self.n_G)]
+
+    def liberar_descontentos(self, epsilon):
+        """Libera los sensores cuya opción actual está a más de epsilon de la mejor."""
+        mejor = (self.valores - self.precios[:, None]).max(axis=0)
+        self.liberar(np.flatnonzero((self.asignado != SIN_ASIGNAR)
+                                    & (self.ganancias() < mejor - epsilon)))
+
+    def ronda_directa(self, libres, epsilon):
+        """
+        Todos los sensores libres pujan a la vez por su mejor opción; cada
+        gateway conserva las pujas más altas que caben en su capacidad.
+
+        Returns:
+            Sensores expulsados (quedan libres)
+        """
+        n_G = self.n_G
+        neto = self.valores[:, libres] - self.precios[:, None]
+        columnas = np.arange(len(libres))
+        mejor = np.argmax(neto, axis=0)
+        v1 = neto[mejor, columnas]
+        neto[mejor, columnas] = -np.inf
+        oferta = self.precios[mejor] + (v1 - neto.max(axis=0)) + epsilon
+        self.ocupar(libres[mejor == n_G], n_G, 0.0)
+
+        expulsados_todos = []
+        orden = np.argsort(mejor, kind='stable')
+        cortes = np.searchsorted(mejor[orden], np.arange(n_G + 1))
+        for g in np.flatnonzero(np.diff(cortes)):
+            tramo = orden[cortes[g]:cortes[g + 1]]
+            self.ocupar(libres[tramo], g, oferta[tramo])
+            candidatos = np.concatenate([self.titulares[g], libres[tramo]])
+            exceso = len(candidatos) - self.capacidad[g]
+            if exceso > 0:
+                particion = np.argpartition(self.puja[candidatos], exceso)
+                expulsados = candidatos[particion[:exceso]]
+                candidatos = candidatos[particion[exceso:]]
+                self.asignado[expulsados] = SIN_ASIGNAR
+                self.valor[expulsados] = -np.inf
+                expulsados_todos.append(expulsados)
+            self.titulares[g] = candidatos
+            if len(candidatos) == self.capacidad[g]:
+                self.precios[g] = self.puja[candidatos].min()
+        if not expulsados_todos:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(expulsados_todos)
+
+    def paso_inverso(self, g, epsilon):
+        """
+        Baja el precio de un gateway con plazas libres y precio positivo
+        hasta atraer a los sensores que más ganan pasándose a él, que dejan
+        su opción anterior.
+
+        Returns:
+            Gateways que perdieron un sensor en el proceso
+        """
+        plazas = self.capacidad[g] - len(self.titulares[g])
+        delta = self.valores[g] - self.ganancias()
+        delta[self.titulares[g]] = -np.inf
+        corte = -np.inf
+        if plazas < self.n_S:
+            corte = np.partition(delta, self.n_S - plazas - 1)[self.n_S - plazas - 1]
+        precio = max(0.0, corte - epsilon) if np.isfinite(corte) else 0.0
+        movidos = np.flatnonzero(delta >= precio)
+        if len(movidos) > plazas:
+            movidos = movidos[np.argpartition(-delta[movidos], plazas - 1)[:plazas]]
+        origen = self.liberar(movidos)
+        self.ocupar(movidos, g, precio)
+        self.titulares[g] = np.concatenate([self.titulares[g], movidos])
+        self.precios[g] = precio
+        return origen
+
+    def fase(self, epsilon, max_rondas):
+        """
+        Subasta directa hasta asignar a todos y pasos inversos hasta que
+        ningún gateway con plazas libres tenga precio positivo.
+        """
+        self.liberar_descontentos(epsilon)
+        libres = np.flatnonzero(self.asignado == SIN_ASIGNAR)
+        while len(libres):
+            self.rondas += 1
+            if self.rondas > max_rondas:
+                raise RuntimeError(f"La subasta no convergió en {max_rondas} rondas")
+            libres = self.ronda_directa(libres, epsilon)
+        ocupacion = np.array([len(t) for t in self.titulares], dtype=np.int64)
+        pendientes = list(np.flatnonzero((ocupacion < self.capacidad)
+                                         & (self.precios[:self.n_G] > 0)))
+        while pendientes:
+            self.rondas += 1
+            if self.rondas > max_rondas:
+                raise RuntimeError(f"La subasta no convergió en {max_rondas} rondas")
+            for h in self.paso_inverso(pendientes.pop(), epsilon):
+                if self.precios[h] > 0 and h not in pendientes:
+                    pendientes.append(h)
+
+
+def subasta(beneficio, capacidad, epsilon=1e-3, factor=5.0, max_rondas=100000):
+    """
+    Asignación de beneficio máximo con capacidades (subasta directa e inversa).
+
+    Cada gateway g tiene un precio único p_g. Un sensor libre puja por el
+    gateway de mayor valor b_sg - p_g, ofreciendo p_g más la diferencia con
+    su segunda opción más épsilon; el gateway conserva las `capacidad[g]`
+    pujas más altas entre sus titulares y los nuevos postores, y su precio
+    pasa a ser la menor puja conservada cuando está lleno. La opción "sin
+    asignar" vale 0 y no tiene límite. Un gateway que queda con plazas
+    libres y precio positivo baja su precio para atraer sensores (paso
+    inverso), de modo que solo los gateways llenos tienen precio.
+
+    Épsilon empieza en una fracción del rango de beneficios y se divide por
+    `factor` en cada fase, conservando precios y las asignaciones que sigan
+    siendo aceptables: las guerras de precios entre opciones casi
+    equivalentes se resuelven con pasos grandes primero. El resultado está a
+    lo sumo a S · epsilon del óptimo.
+
+    Args:
+        beneficio: Array (S, G) de beneficios; -inf marca pares prohibidos.
+            Deben ser > 0 donde se permiten (si no, conviene no asignar)
+        capacidad: Sensores admitidos por gateway (G,)
+        epsilon: Incremento mínimo de puja de la última fase
+        factor: Reducción de épsilon entre fases
+        max_rondas: Límite total de rondas de puja y pasos inversos
+
+    Returns:
+        Tupla (gateway, precios, rondas): gateway asignado por sensor (S,)
+        o SIN_ASIGNAR, precios finales (G,) y rondas empleadas
+    """
+    capacidad = np.asarray(capacidad, dtype=np.int64)
+    beneficio = np.where(capacidad > 0, np.asarray(beneficio, dtype=float), -np.inf)
+    estado = _Subasta(beneficio, capacidad)
+    finitos = beneficio[np.isfinite(beneficio)]
+    eps = epsilon
+    if len(finitos):
+        eps = max(float(finitos.max()) / factor, epsilon)
+    while True:
+        estado.fase(eps, max_rondas)
+        if eps <= epsilon:
+            break
+        eps = max(eps / factor, epsilon)
+    asignado = estado.asignado
+    asignado[asignado == estado.n_G] = SIN_ASIGNAR
+    return asignado, estado.precios[:estado.n_G], estado.rondas
+
+
+@dataclass
+class ResultadoAsignacion:
+    """
+    Asignación de sensores a gateways.
+
+    Atributos:
+        gateway: Gateway asignado por sensor (S,) o SIN_ASIGNAR
+        margen_db: Margen del enlace asignado o, si no hay, el mejor (S,)
+        distancia_m: Distancia al gateway asignado o al de mejor margen (S,)
+        mejor_gateway: Gateway de mayor margen por sensor (S,)
+        capacidad: Sensores admitidos por gateway (G,)
+        precios_db: Precio final de cada gateway en la subasta (G,): 0 si le
+            sobra capacidad; si no, el margen que un sensor debe ceder para entrar
+        trafico: ParametrosTrafico usados
+        rondas: Rondas de la subasta
+        tiempo_s: Tiempo total (márgenes + subasta)
+    """
+    gateway: np.ndarray
+    margen_db: np.ndarray
+    distancia_m: np.ndarray
+    mejor_gateway: np.ndarray
+    capacidad: np.ndarray
+    precios_db: np.ndarray
+    trafico: ParametrosTrafico
+    rondas: int
+    tiempo_s: float
+
+    @property
+    def n_gateways(self):
+        return len(self.capacidad)
+
+    @property
+    def carga(self):
+        """Sensores asignados a cada gateway (G,)."""
+        asignados = self.gateway[self.gateway != SIN_ASIGNAR]
+        return np.bincount(asignados, minlength=self.n_gateways)
+
+    @property
+    def sin_cobertura(self):
+        """Índices de los sensores sin ningún enlace viable."""
+        return np.flatnonzero(self.margen_db < 0)
+
+    @property
+    def sin_capacidad(self):
+        """Índices de los sensores con enlace viable que no caben en ningún gateway."""
+        return np.flatnonzero((self.gateway == SIN_ASIGNAR) & (self.margen_db >= 0))
+
+    @property
+    def reasignados(self):
+        """Índices de los sensores asignados a un gateway distinto del de mejor margen."""
+        return np.flatnonzero((self.gateway != SIN_ASIGNAR)
+                              & (self.gateway != self.mejor_gateway))
+
+    def sensores_de(self, g):
+        """Índices de los sensores asignados al gateway g."""
+        return np.flatnonzero(self.gateway == g)
+
+
+def asignar_sensores(sensores, gateways, modelo, trafico, porcentaje_obstruido, semilla=42,
+                     capacidad=None, epsilon_db=1e-3, **kwargs):
+    """
+    Asigna cada sensor a un gateway viable respetando la capacidad.
+
+    Se maximiza primero el número de sensores asignados y después la suma
+    de márgenes: el beneficio de un enlace viable es su margen más una
+    constante mayor que cualquier ganancia de margen obtenible reubicando
+    sensores.
+
+    Args:
+        sensores: Array (S, 2) de coordenadas de sensores
+        gateways: Array (G, 2) de coordenadas de gateways
+        modelo: ModeloPropagacion
+        trafico: ParametrosTrafico
+        porcentaje_obstruido, semilla: Ver `margenes_enlace`
+        capacidad: Sensores por gateway (escalar o (G,)); por defecto,
+            `trafico.sensores_por_gateway`
+        epsilon_db: Incremento mínimo de puja (dB)
+        **kwargs: memoria_max_mb, obstruccion y terreno (ver `margenes_enlace`)
+
+    Returns:
+        ResultadoAsignacion
+    """
+    inicio = time.perf_counter()
+    margen, distancia = margenes_enlace(sensores, gateways, modelo, porcentaje_obstruido,
+                                        semilla, **kwargs)
+    n_S, n_G = margen.shape
+    if capacidad is None:
+        capacidad = trafico.sensores_por_gateway
+    capacidad = np.broadcast_to(np.asarray(capacidad, dtype=np.int64), (n_G,)).copy()
+
+    viable = margen >= 0
+    if viable.any():
+        rango = float(margen[viable].max() - margen[viable].min())
+        constante = (n_G + 1) * (rango + 1.0) + n_S * epsilon_db
+    else:
+        constante = 1.0
+    beneficio = np.where(viable, margen + constante, -np.inf)
+    gateway, precios, rondas = subasta(beneficio, capacidad, epsilon_db)
+
+    filas = np.arange(n_S)
+    mejor = (np.argmax(margen, axis=1) if n_G else np.zeros(n_S, dtype=np.int64))
+    columna = np.where(gateway == SIN_ASIGNAR, mejor, gateway)
+    return ResultadoAsignacion(gateway=gateway,
+                               margen_db=margen[filas, columna] if n_G else np.full(n_S, -np.inf),
+                               distancia_m=distancia[filas, columna] if n_G else np.full(n_S, np.inf),
+                               mejor_gateway=mejor, capacidad=capacidad, precios_db=precios,
+                               trafico=trafico, rondas=rondas,
+                               tiempo_s=time.perf_counter() - inicio)
+
+
+def _opciones_enlace(config, kwargs):
+    """Completa obstrucción, terreno, semilla y memoria de los enlaces con config.json."""
+    if 'obstruccion' not in kwargs:
+        kwargs['obstruccion'] = obstruccion_desde_config(config, OBSTRUCCION_COORDENADAS)
+    if 'terreno' not in kwargs:
+        kwargs['terreno'] = terreno_desde_config(config)
+    kwargs.setdefault('semilla', config['escenario'].get('semilla_obstruccion', 42))
+    kwargs.setdefault('memoria_max_mb',
+                      config.get('calculo', {}).get('memoria_max_mb', MEMORIA_MAX_MB_DEFECTO))
+    return kwargs
+
+
+def margenes_desde_config(config, sensores, gateways, **kwargs):
+    """
+    Márgenes y distancias sensor → gateway (ver `margenes_enlace`) con los
+    bloques `propagacion`, `escenario`, `terreno` y `calculo` de config.json.
+    """
+    return margenes_enlace(sensores, gateways, ModeloPropagacion.desde_config(config),
+                           config['escenario']['porcentaje_area_obstruida'],
+                           **_opciones_enlace(config, kwargs))
+
+
+def asignacion_desde_config(config, sensores, gateways, **kwargs):
+    """
+    Asigna sensores a gateways con los parámetros de config.json.
+
+    Lee los bloques `propagacion`, `escenario` (obstrucción; el sorteo por
+    coordenadas salvo patrón 'raster'), `terreno`, `calculo` y `asignacion`.
+    """
+    kwargs = _opciones_enlace(config, kwargs)
+    kwargs.setdefault('epsilon_db', config.get('asignacion', {}).get('epsilon_db', 1e-3))
+    return asignar_sensores(sensores, gateways, ModeloPropagacion.desde_config(config),
+                            ParametrosTrafico.desde_config(config),
+                            config['escenario']['porcentaje_area_obstruida'], **kwargs)
+
+
+def resumen_asignacion(resultado):
+    """Líneas de texto con la carga y capacidad de cada gateway."""
+    t = resultado.trafico
+    carga = resultado.carga
+    lineas = [
+        f"Tráfico por sensor: {t.mensajes_por_hora:g} mensajes/h de {t.payload_bytes} bytes, "
+        f"SF{t.spreading_factor}/{t.ancho_banda_khz:g} kHz "
+        f"(tiempo en aire {t.tiempo_en_aire_s * 1000:.1f} ms, "
+        f"ciclo de trabajo {t.ciclo_trabajo_sensor * 100:.3f} %)",
+        f"Capacidad por gateway: {t.capacidad_gateway_mensajes_hora:,.0f} mensajes/h",
+        f"{'Gateway':<10}{'Sensores':>10}{'Capacidad':>11}{'Carga':>9}{'Precio (dB)':>13}",
+    ]
+    for g in range(resultado.n_gateways):
+        ocupacion = carga[g] / resultado.capacidad[g] if resultado.capacidad[g] else 0.0
+        lineas.append(f"{g + 1:<10}{carga[g]:>10,}{resultado.capacidad[g]:>11,}"
+                      f"{ocupacion * 100:>8.1f}%{resultado.precios_db[g]:>13.2f}")
+    lineas.append(f"Sin enlace viable: {len(resultado.sin_cobertura):,} | "
+                  f"sin capacidad: {len(resultado.sin_capacidad):,} | "
+                  f"fuera de su gateway de mejor margen: {len(resultado.reasignados):,}")
+    lineas.append(f"Subasta: {resultado.rondas} rondas, {resultado.tiempo_s:.2f} s")
+    return lineas
@@ -0,0 +1,242 @@
+"""
+Barrido de parámetros: N_optimo en función de potencia, margen, obstrucción
+y tamaño de celda
+
+Cada escenario es config.json con algunos valores reemplazados. Los
+escenarios se ejecutan en procesos de trabajo (ver `paralelo`) en dos fases:
+
+1. Una tarea por matriz de pérdidas distinta (geometría + exponentes +
+   obstrucción, ver `perdidas.clave_perdidas`), guardada en un caché común.
+2. Una tarea por escenario: umbraliza la matriz de pérdidas con su
+   presupuesto de enlace, aplica presolve y resuelve.
+
+Los escenarios que solo cambian potencia, sensibilidad o margen comparten la
+matriz de la fase 1. Los puntos de demanda de cada tamaño de celda se
+comparten con los trabajadores como .npy mapeados en memoria. Los resultados
+se escriben a un único CSV a medida que terminan; un escenario que falla o
+excede el tiempo queda registrado con su error y el barrido continúa.
+"""
+
+import copy
+import csv
+import itertools
+import os
+import tempfile
+import time
+
+from .cobertura import MEMORIA_MAX_MB_DEFECTO, obstruccion_desde_config
+from .configuracion import ruta_proyecto
+from .grid import grid_desde_config
+from .paralelo import compartido, ejecutar_tareas, guardar_compartidos
+from .perdidas import MatrizPerdidas, clave_perdidas
+from .propagacion import ModeloPropagacion
+from .resolucion import resolver_set_cover
+from .terreno import terreno_desde_config
+
+# Nombres cortos aceptados en las grillas → rutas en config.json
+ALIAS = {
+    'potencia_tx_dbm': ('propagacion.potencia_tx_dbm',),
+    'sensibilidad_rx_dbm': ('propagacion.sensibilidad_rx_dbm',),
+    'margen_desvanecimiento_db': ('propagacion.margen_desvanecimiento_db',),
+    'porcentaje_area_obstruida': ('escenario.porcentaje_area_obstruida',),
+    'semilla_obstruccion': ('escenario.semilla_obstruccion',),
+    'celda_m': ('discretizacion.celda_x_m', 'discretizacion.celda_y_m'),
+}
+
+COLUMNAS_RESULTADO = [
+    'estado', 'N_optimo', 'cota_inferior', 'gap_relativo', 'solver',
+    'n_I', 'n_J', 'enlaces_viables', 'densidad', 'puntos_sin_cobertura',
+    't_perdidas_s', 't_cobertura_s', 't_presolve_s', 't_resolucion_s', 't_total_s',
+    'sensores', 'error',
+]
+
+
+def _asignar(config, ruta, valor):
+    nodo = config
+    claves = ruta.split('.')
+    for clave in claves[:-1]:
+        nodo = nodo[clave]
+    if claves[-1] not in nodo:
+        raise KeyError(f"'{ruta}' no existe en config.json")
+    nodo[claves[-1]] = valor
+
+
+def expandir_escenarios(config, grilla):
+    """
+    Producto cartesiano de los valores de `grilla` aplicado sobre `config`.
+
+    Args:
+        config: Configuración base
+        grilla: Diccionario parámetro → lista de valores; el parámetro es un
+            nombre de `ALIAS` o una ruta con puntos ('propagacion.potencia_tx_dbm')
+
+    Returns:
+        Lista de (parametros, config_escenario), con `parametros` el
+        diccionario parámetro → valor del escenario
+    """
+    nombres = list(grilla)
+    escenarios = []
+    for valores in itertools.product(*(grilla[n] for n in nombres)):
+        config_escenario = copy.deepcopy(config)
+        for nombre, valor in zip(nombres, valores):
+            for ruta in ALIAS.get(nombre, (nombre,)):
+                _asignar(config_escenario, ruta, valor)
+        escenarios.append((dict(zip(nombres, valores)), config_escenario))
+    return escenarios
+
+
+def _clave_grid(config):
+    c, d = config['campo'], config['discretizacion']
+    return f"grid_{c['dimension_x_m']}x{c['dimension_y_m']}_{d['celda_x_m']}x{d['celda_y_m']}"
+
+
+def _argumentos_perdidas(config):
+    escenario = config['escenario']
+    calculo = config.get('calculo', {})
+    return (ModeloPropagacion.desde_config(config), escenario['porcentaje_area_obstruida'],
+            escenario.get('semilla_obstruccion', 42),
+            calculo.get('memoria_max_mb', MEMORIA_MAX_MB_DEFECTO),
+            calculo.get('tipo_perdidas', 'float32'), obstruccion_desde_config(config),
+            terreno_desde_config(config))
+
+
+def _tarea_perdidas(config, nombre_grid, directorio_cache):
+    """Fase 1: calcula (o encuentra en caché) la matriz de pérdidas."""
+    J = compartido(nombre_grid)
+    modelo, porcentaje, semilla, memoria, dtype, obstruccion, terreno = _argumentos_perdidas(config)
+    MatrizPerdidas.desde_cache(directorio_cache, J, J, modelo, porcentaje, semilla, memoria,
+                               dtype, obstruccion, terreno)
+    return True
+
+
+def _tarea_escenario(config, nombre_grid, directorio_cache):
+    """Fase 2: cobertura por umbral + presolve + resolución de un escenario."""
+    inicio = time.perf_counter()
+    J = compartido(nombre_grid)
+    modelo, porcentaje, semilla, memoria, dtype, obstruccion, terreno = _argumentos_perdidas(config)
+    clave = clave_perdidas(J, J, modelo, porcentaje, semilla, dtype, obstruccion, terreno)
+    ruta = os.path.join(directorio_cache, f"perdidas_{clave}")
+    cobertura = MatrizPerdidas.cargar(ruta).cobertura(modelo, memoria)
+    t_cobertura = time.perf_counter() - inicio
+
+    a = cobertura.a
+    sin_cobertura = len(a.columnas_sin_cobertura())
+    resultado = resolver_set_cover(a, config.get('solver'))
+    return {
+        'estado': resultado.estado,
+        'N_optimo': (resultado.n_seleccionados
+                     if resultado.estado in ('Optimal', 'Feasible') else ''),
+        'cota_inferior': resultado.cota_inferior,
+        'gap_relativo': resultado.gap,
+        'solver': resultado.solver,
+        'n_I': len(J),
+        'n_J': len(J),
+        'enlaces_viables': cobertura.enlaces_viables,
+        'densidad': cobertura.densidad,
+        'puntos_sin_cobertura': sin_cobertura,
+        't_cobertura_s': t_cobertura,
+        't_presolve_s': resultado.tiempo_presolve_s,
+        't_resolucion_s': resultado.tiempo_resolucion_s,
+        'sensores': ' '.join(str(i) for i in resultado.seleccion),
+    }
+
+
+def ejecutar_barrido(config, grilla, ruta_salida, procesos=None, tiempo_limite=None,
+                     directorio_cache=None, al_terminar=None):
+    """
+    Ejecuta el barrido y escribe una fila por escenario en `ruta_salida` (CSV).
+
+    Args:
+        config: Configuración base
+        grilla: Diccionario parámetro → lista de valores (ver `expandir_escenarios`)
+        ruta_salida: Archivo CSV de resultados
+        procesos: Número de procesos de trabajo (por defecto, todos los núcleos)
+        tiempo_limite: Segundos máximos por tarea (None = sin límite)
+        directorio_cache: Carpeta del caché de matrices de pérdidas (por
+            defecto, una carpeta temporal que se elimina al terminar)
+        al_terminar: Función (fila) llamada al terminar cada escenario
+
+    Returns:
+        Lista de filas (diccionarios) en el orden de los escenarios
+    """
+    escenarios = expandir_escenarios(config, grilla)
+    nombres = list(grilla)
+    filas = [None] * len(escenarios)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directorio_cache = directorio_cache or os.path.join(tmp, 'cache')
+        os.makedirs(directorio_cache, exist_ok=True)
+
+        # Puntos de demanda compartidos: uno por tamaño de celda distinto
+        grids = {}
+        for _, c in escenarios:
+            grids.setdefault(_clave_grid(c), c)
+        puntos = {n: grid_desde_config(c) for n, c in grids.items()}
+        rutas = guardar_compartidos(puntos, os.path.join(tmp, 'compartidos'))
+
+        # Fase 1: una matriz de pérdidas por clave distinta (las claves se
+        # calculan aquí, lo que crea el MDE antes de repartir las tareas)
+        claves = {}
+        for k, (_, c) in enumerate(escenarios):
+            J = puntos[_clave_grid(c)]
+            modelo, porcentaje, semilla, _, dtype, obstruccion, terreno = _argumentos_perdidas(c)
+            claves.setdefault(clave_perdidas(J, J, modelo, porcentaje, semilla, dtype,
+                                             obstruccion, terreno),
+                              []).append(k)
+        grupos = list(claves.values())
+        tareas = [(escenarios[g[0]][1], _clave_grid(escenarios[g[0]][1]), directorio_cache)
+                  for g in grupos]
+        fallos_perdidas = {}
+        t_perdidas = {}
+        for r in ejecutar_tareas(_tarea_perdidas, tareas, procesos, tiempo_limite, rutas):
+            for k in grupos[r.indice]:
+                t_perdidas[k] = r.tiempo_s / len(grupos[r.indice])
+                if not r.exito:
+                    fallos_perdidas[k] = r.error
+
+        directorio = os.path.dirname(os.path.abspath(ruta_salida))
+        os.makedirs(directorio, exist_ok=True)
+        with open(ruta_salida, 'w', newline='', encoding='utf-8') as f:
+            escritor = csv.DictWriter(f, fieldnames=['escenario'] + nombres + COLUMNAS_RESULTADO)
+            escritor.writeheader()
+
+            def registrar(k, datos):
+                fila = {'escenario': k, **escenarios[k][0], **datos,
+                        't_perdidas_s': t_perdidas.get(k, 0.0)}
+                fila = {c: round(v, 6) if isinstance(v, float) else v for c, v in fila.items()}
+                filas[k] = fila
+                escritor.writerow(fila)
+                f.flush()
+                if al_terminar is not None:
+                    al_terminar(fila)
+
+            for k, error in fallos_perdidas.items():
+                registrar(k, {'estado': 'Error',
+                              'error': f"Matriz de pérdidas: {error.strip().splitlines()[0]}"})
+
+            # Fase 2: un escenario por tarea
+            indices = [k for k in range(len(escenarios)) if k not in fallos_perdidas]
+            tareas = [(escenarios[k][1], _clave_grid(escenarios[k][1]), directorio_cache)
+                      for k in indices]
+            for r in ejecutar_tareas(_tarea_escenario, tareas, procesos, tiempo_limite, rutas):
+                k = indices[r.indice]
+                if r.exito:
+                    registrar(k, {**r.valor, 't_total_s': r.tiempo_s})
+                else:
+                    registrar(k, {'estado': 'Error', 't_total_s': r.tiempo_s,
+                                  'error': r.error.strip().splitlines()[0]})
+    return filas
+
+
+def barrido_desde_config(config, ruta_salida=None, **kwargs):
+    """
+    Barrido con el bloque `barrido` de config.json (parametros, procesos,
+    tiempo_limite_s, salida); los argumentos explícitos tienen prioridad.
+    La salida de config.json es relativa a la raíz del repositorio.
+    """
+    opciones = config.get('barrido', {})
+    kwargs.setdefault('procesos', opciones.get('procesos'))
+    kwargs.setdefault('tiempo_limite', opciones.get('tiempo_limite_s'))
+    grilla = kwargs.pop('grilla', None) or opciones['parametros']
+    return ejecutar_barrido(config, grilla, ruta_salida or ruta_proyecto(opciones['salida']),
+                            **kwargs)
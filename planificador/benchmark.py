@@ -0,0 +1,535 @@
+"""
+Benchmark de escalado: tiempo y memoria de cada etapa en campos sintéticos
+
+Cada escenario es config.json con el tamaño de celda de demanda, el de la
+grilla de candidatos y el porcentaje de obstrucción reemplazados (de ~840 a
+más de 100.000 puntos de demanda en el campo de 2000 m × 1040 m). Las etapas
+se miden por separado, en el orden del pipeline:
+
+    perdidas → cobertura → modelo_mps, modelo_pulp → resolucion
+             → asignacion → exportacion → reporte → figuras
+
+Todo se calcula desde cero en una carpeta temporal: no se usa la caché de
+matrices de pérdidas ni la del pipeline. La memoria es el pico de
+`tracemalloc` dentro de la etapa (NumPy registra ahí sus arreglos); no
+incluye páginas de archivos mapeados en memoria ni el proceso de CBC, y
+`tracemalloc` encarece las etapas con muchos objetos de Python (PuLP), por
+lo que los tiempos comparables se obtienen con `memoria=False`.
+
+Cada escenario agrega una línea JSON al historial con la revisión de git,
+la máquina y los tiempos por etapa. Con el historial se comparan revisiones
+(`comparar_revisiones`) y se estiman exponentes de escalado
+t ∝ n^b por etapa (`exponentes_escalado`). Un escenario de calentamiento
+sin registrar precede a los medidos, para que importaciones diferidas y
+cachés de primera llamada no inflen el escenario más pequeño.
+"""
+
+import copy
+import datetime
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from .configuracion import DIRECTORIO_RAIZ, ruta_proyecto
+
+ETAPAS_BENCHMARK = ['perdidas', 'cobertura', 'modelo_mps', 'modelo_pulp', 'resolucion',
+                    'asignacion', 'exportacion', 'reporte', 'figuras']
+
+HISTORIAL_DEFECTO = 'results/benchmarks/historial.jsonl'
+
+# Por encima de este número de enlaces viables el modelo PuLP no se construye
+PULP_MAX_NO_CEROS_DEFECTO = 2_000_000
+
+UMBRAL_REGRESION_DEFECTO = 1.25
+
+# Tiempos por debajo de este valor no se comparan ni entran en el ajuste de
+# exponentes (ruido del reloj)
+TIEMPO_MINIMO_COMPARACION_S = 0.05
+
+# Tamaños distintos mínimos para ajustar un exponente de escalado
+TAMANOS_MINIMOS_ESCALADO = 3
+
+VARIABLES_ESCALADO = ('n_J', 'enlaces_totales', 'enlaces_viables')
+
+
+def revision_git(directorio=DIRECTORIO_RAIZ):
+    """
+    Revisión corta de git y si el árbol tiene cambios sin confirmar.
+
+    Returns:
+        (revision, modificado); ('desconocida', None) fuera de un repositorio
+    """
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=directorio,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        cambios = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                 cwd=directorio, capture_output=True, text=True,
+                                 check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocida', None
+    return revision, bool(cambios)
+
+
+def info_maquina():
+    """Plataforma, procesador y versiones de Python y NumPy."""
+    return {
+        'plataforma': platform.platform(),
+        'procesador': platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+    }
+
+
+def nombre_escenario(celda_m, celda_candidatos_m, porcentaje):
+    """Clave estable del escenario en el historial, p. ej. 'celda10_cand50_obs35'."""
+    candidatos = 'J' if celda_candidatos_m is None else f"{celda_candidatos_m:g}"
+    return f"celda{celda_m:g}_cand{candidatos}_obs{porcentaje:g}"
+
+
+def expandir_escenarios(config, escalas, porcentajes):
+    """
+    Producto de escalas y porcentajes de obstrucción aplicado sobre `config`.
+
+    Args:
+        config: Configuración base
+        escalas: Lista de [celda_m, celda_candidatos_m]; celda_candidatos_m
+            None usa los puntos de demanda como candidatos (I = J)
+        porcentajes: Porcentajes de área obstruida
+
+    Returns:
+        Lista de (nombre, parametros, config_escenario)
+    """
+    escenarios = []
+    for celda_m, celda_candidatos_m in escalas:
+        for porcentaje in porcentajes:
+            config_escenario = copy.deepcopy(config)
+            config_escenario['discretizacion']['celda_x_m'] = celda_m
+            config_escenario['discretizacion']['celda_y_m'] = celda_m
+            config_escenario['escenario']['porcentaje_area_obstruida'] = porcentaje
+            parametros = {'celda_m': celda_m, 'celda_candidatos_m': celda_candidatos_m,
+                          'porcentaje_area_obstruida': porcentaje}
+            escenarios.append((nombre_escenario(celda_m, celda_candidatos_m, porcentaje),
+                               parametros, config_escenario))
+    return escenarios
+
+
+class _Medidor:
+    """Tiempo y pico de memoria de las etapas pedidas de un escenario."""
+
+    def __init__(self, etapas, memoria):
+        self.etapas = etapas
+        self.memoria = memoria
+        self.resultados = {}
+
+    def medir(self, nombre, funcion, *args):
+        """Ejecuta `funcion(*args)` y, si la etapa fue pedida, registra su costo."""
+        if nombre not in self.etapas:
+            return funcion(*args)
+        if self.memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        try:
+            valor = funcion(*args)
+            tiempo = time.perf_counter() - inicio
+            pico = tracemalloc.get_traced_memory()[1] if self.memoria else None
+        finally:
+            if self.memoria:
+                tracemalloc.stop()
+        self.resultados[nombre] = {
+            'tiempo_s': round(tiempo, 4),
+            'memoria_pico_mb': None if pico is None else round(pico / 2**20, 2),
+        }
+        return valor
+
+    def omitir(self, nombre, motivo):
+        if nombre in self.etapas:
+            self.resultados[nombre] = {'omitida': motivo}
+
+
+def _modelo_pulp(a):
+    """Formulación PuLP del Set Cover (una restricción por punto de demanda)."""
+    from pulp import LpAffineExpression, LpBinary, LpMinimize, LpProblem, LpVariable, lpSum
+
+    from .bitset import desempaquetar
+    n_I, n_J = a.shape
+    problema = LpProblem('set_cover', LpMinimize)
+    x = [LpVariable(f"x_{i}", cat=LpBinary) for i in range(n_I)]
+    problema += lpSum(x)
+    columnas = a.transpuesta()
+    for j in range(n_J):
+        filas = np.flatnonzero(desempaquetar(columnas.fila(j), n_I))
+        problema += LpAffineExpression([(x[i], 1) for i in filas]) >= 1, f"Cobertura_punto_{j}"
+    return problema
+
+
+def _pulp_disponible():
+    try:
+        import pulp  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def ejecutar_escenario(config, parametros, etapas=None, memoria=True,
+                       pulp_max_no_ceros=PULP_MAX_NO_CEROS_DEFECTO, directorio=None):
+    """
+    Mide las etapas de un escenario.
+
+    Las etapas no pedidas de las que otra depende (pérdidas, cobertura,
+    resolución, asignación) se ejecutan igual, sin medirlas.
+
+    Args:
+        config: Configuración del escenario (ver `expandir_escenarios`)
+        parametros: Diccionario con celda_candidatos_m (None = I = J)
+        etapas: Nombres de `ETAPAS_BENCHMARK` a medir (por defecto, todas)
+        memoria: Si True, mide el pico de memoria con tracemalloc
+        pulp_max_no_ceros: Enlaces viables máximos para construir el modelo PuLP
+        directorio: Carpeta donde crear la carpeta temporal (MPS, reporte, figura)
+
+    Returns:
+        Diccionario con n_I, n_J, enlaces, estado de la solución y 'etapas'
+        (etapa → {'tiempo_s', 'memoria_pico_mb'} u {'omitida': motivo})
+    """
+    from .asignacion import asignacion_desde_config
+    from .cobertura import OBSTRUCCION_COORDENADAS, obstruccion_desde_config
+    from .exportacion import exportar_despliegue, tabla_desde_asignacion
+    from .grid import generar_puntos_demanda, grid_desde_config
+    from .mps import escribir_mps
+    from .perdidas import perdidas_desde_config
+    from .pipeline import (figura_despliegue, lineas_reporte, metadatos_asignacion,
+                           metadatos_cobertura, metadatos_resolucion)
+    from .propagacion import ModeloPropagacion
+    from .resolucion import resolver_set_cover
+
+    etapas = list(ETAPAS_BENCHMARK) if etapas is None else list(etapas)
+    medidor = _Medidor(etapas, memoria)
+    J = grid_desde_config(config)
+    celda_candidatos = parametros.get('celda_candidatos_m')
+    if celda_candidatos is None:
+        I = J
+    else:
+        I = generar_puntos_demanda(config['campo']['dimension_x_m'],
+                                   config['campo']['dimension_y_m'],
+                                   celda_candidatos, celda_candidatos)
+    registro = {'n_I': len(I), 'n_J': len(J), 'enlaces_totales': len(I) * len(J)}
+
+    with tempfile.TemporaryDirectory(dir=directorio) as tmp:
+        # Misma obstrucción que la etapa 'cobertura' del pipeline y la asignación
+        obstruccion = obstruccion_desde_config(config, OBSTRUCCION_COORDENADAS)
+        perdidas = medidor.medir('perdidas', lambda: perdidas_desde_config(
+            config, I, J, obstruccion=obstruccion))
+        cobertura = medidor.medir('cobertura', perdidas.cobertura,
+                                  ModeloPropagacion.desde_config(config))
+        meta_cobertura = metadatos_cobertura(perdidas, cobertura)
+        del perdidas
+        a = cobertura.a
+        registro['enlaces_viables'] = cobertura.enlaces_viables
+
+        if 'modelo_mps' in etapas:
+            medidor.medir('modelo_mps', escribir_mps, os.path.join(tmp, 'set_cover.mps'), a)
+        if not _pulp_disponible():
+            medidor.omitir('modelo_pulp', 'PuLP no instalado')
+        elif cobertura.enlaces_viables > pulp_max_no_ceros:
+            medidor.omitir('modelo_pulp',
+                           f"{cobertura.enlaces_viables:,} enlaces > {pulp_max_no_ceros:,}")
+        elif 'modelo_pulp' in etapas:
+            medidor.medir('modelo_pulp', _modelo_pulp, a)
+
+        if not {'resolucion', 'asignacion', 'exportacion', 'reporte', 'figuras'} & set(etapas):
+            registro['etapas'] = medidor.resultados
+            return registro
+        resultado = medidor.medir('resolucion', resolver_set_cover, a, config.get('solver'))
+        meta_resolucion = metadatos_resolucion(resultado, I)
+        registro.update(estado=resultado.estado, solver=resultado.solver,
+                        n_gateways=len(resultado.seleccion),
+                        tiempo_presolve_s=round(resultado.tiempo_presolve_s, 4))
+        gateways = np.asarray(meta_resolucion['gateways'], dtype=float).reshape(-1, 2)
+        if not len(gateways):
+            for nombre in ('asignacion', 'exportacion', 'reporte', 'figuras'):
+                medidor.omitir(nombre, f"sin solución ({resultado.estado})")
+            registro['etapas'] = medidor.resultados
+            return registro
+
+        # Un sensor por punto de demanda, para que la asignación escale con J
+        if not {'asignacion', 'exportacion', 'reporte', 'figuras'} & set(etapas):
+            registro['etapas'] = medidor.resultados
+            return registro
+        asignacion = medidor.medir('asignacion', asignacion_desde_config, config, J, gateways)
+
+        def exportar():
+            tabla = tabla_desde_asignacion(asignacion, J, gateways)
+            exportar_despliegue(tabla, os.path.join(tmp, 'exportacion'))
+
+        def escribir_reporte():
+            lineas = lineas_reporte(config, len(J), meta_cobertura, meta_resolucion,
+                                    metadatos_asignacion(asignacion), a)
+            with open(os.path.join(tmp, 'reporte.txt'), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lineas) + '\n')
+
+        def dibujar():
+            figura = figura_despliegue(config, J, gateways, J, asignacion.gateway)
+            figura.savefig(os.path.join(tmp, 'despliegue.png'), dpi=dpi_desde_config(config),
+                           bbox_inches='tight')
+            plt.close(figura)
+
+        if 'exportacion' in etapas:
+            medidor.medir('exportacion', exportar)
+        if 'reporte' in etapas:
+            medidor.medir('reporte', escribir_reporte)
+        if 'figuras' in etapas:
+            # matplotlib se importa fuera de la medición: solo cuesta la primera vez
+            import matplotlib.pyplot as plt
+
+            from .renderizado import dpi_desde_config
+            medidor.medir('figuras', dibujar)
+
+    registro['etapas'] = medidor.resultados
+    return registro
+
+
+def ejecutar_benchmark(config, escalas=None, porcentajes=None, etapas=None, memoria=True,
+                       ruta_historial=None, al_terminar=None, calentamiento=None):
+    """
+    Ejecuta la suite y agrega un registro por escenario al historial.
+
+    Antes de medir se ejecuta una vez, sin registrar, el escenario más
+    pequeño: importaciones diferidas (PuLP, matplotlib...) y cachés de
+    primera llamada no se cargan así al primer escenario medido.
+
+    Args:
+        config: Configuración base; el bloque `benchmark` da los valores por
+            defecto de los demás argumentos y `benchmark.solver` se superpone
+            al bloque `solver` en cada escenario
+        escalas: Lista de [celda_m, celda_candidatos_m] (ver `expandir_escenarios`)
+        porcentajes: Porcentajes de área obstruida
+        etapas: Etapas a medir (por defecto, `ETAPAS_BENCHMARK`)
+        memoria: Si True, mide el pico de memoria de cada etapa
+        ruta_historial: Archivo JSON lines (None = benchmark.historial)
+        al_terminar: Función (registro) llamada al terminar cada escenario
+        calentamiento: Si True, ejecuta el escenario de calentamiento (None =
+            benchmark.calentamiento, por defecto True)
+
+    Returns:
+        Lista de registros en el orden de los escenarios
+    """
+    opciones = config.get('benchmark', {})
+    escalas = escalas if escalas is not None else opciones.get('escalas', [[50, None]])
+    porcentajes = (porcentajes if porcentajes is not None
+                   else opciones.get('porcentajes_obstruccion', [35]))
+    etapas = etapas or opciones.get('etapas') or ETAPAS_BENCHMARK
+    desconocidas = set(etapas) - set(ETAPAS_BENCHMARK)
+    if desconocidas:
+        raise ValueError(f"Etapas desconocidas: {', '.join(sorted(desconocidas))} "
+                         f"(disponibles: {', '.join(ETAPAS_BENCHMARK)})")
+    calentamiento = (calentamiento if calentamiento is not None
+                     else opciones.get('calentamiento', True))
+    ruta_historial = ruta_proyecto(ruta_historial or opciones.get('historial', HISTORIAL_DEFECTO))
+    os.makedirs(os.path.dirname(ruta_historial), exist_ok=True)
+
+    base = copy.deepcopy(config)
+    base['solver'] = {**base.get('solver', {}), **opciones.get('solver', {})}
+    revision, modificado = revision_git()
+    maquina = info_maquina()
+    escenarios = expandir_escenarios(base, escalas, porcentajes)
+    if calentamiento and escenarios:
+        _, parametros, config_escenario = max(
+            escenarios, key=lambda e: (e[1]['celda_m'], e[1]['celda_candidatos_m'] or 0))
+        try:
+            ejecutar_escenario(config_escenario, parametros, etapas, memoria=False,
+                               pulp_max_no_ceros=opciones.get('pulp_max_no_ceros',
+                                                              PULP_MAX_NO_CEROS_DEFECTO))
+        except Exception:  # el error se registra al medir el escenario
+            pass
+    registros = []
+    for nombre, parametros, config_escenario in escenarios:
+        registro = {
+            'revision': revision,
+            'modificado': modificado,
+            'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+            'maquina': maquina,
+            'escenario': nombre,
+            'parametros': parametros,
+            'memoria_medida': bool(memoria),
+        }
+        inicio = time.perf_counter()
+        try:
+            registro.update(ejecutar_escenario(
+                config_escenario, parametros, etapas, memoria,
+                opciones.get('pulp_max_no_ceros', PULP_MAX_NO_CEROS_DEFECTO)))
+        except Exception as error:  # el escenario queda registrado y la suite continúa
+            registro['error'] = f"{type(error).__name__}: {error}"
+        registro['tiempo_total_s'] = round(time.perf_counter() - inicio, 3)
+        with open(ruta_historial, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        registros.append(registro)
+        if al_terminar is not None:
+            al_terminar(registro)
+    return registros
+
+
+def cargar_historial(ruta=None):
+    """Registros del historial (lista de diccionarios; [] si no existe)."""
+    ruta = ruta_proyecto(ruta or HISTORIAL_DEFECTO)
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, encoding='utf-8') as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def _revisiones(registros):
+    """Revisiones en orden de primera aparición."""
+    return list(dict.fromkeys(r['revision'] for r in registros))
+
+
+def _ultimos_por_escenario(registros, revision):
+    """Último registro sin error de cada escenario en `revision`."""
+    ultimos = {}
+    for registro in registros:
+        if registro['revision'] == revision and 'error' not in registro:
+            ultimos[registro['escenario']] = registro
+    return ultimos
+
+
+def _tiempo(registro, etapa):
+    return registro.get('etapas', {}).get(etapa, {}).get('tiempo_s')
+
+
+def comparar_revisiones(registros, revision=None, revision_base=None,
+                        umbral=UMBRAL_REGRESION_DEFECTO):
+    """
+    Compara los tiempos por escenario y etapa entre dos revisiones.
+
+    Args:
+        registros: Historial (ver `cargar_historial`)
+        revision: Revisión a evaluar (por defecto, la última del historial)
+        revision_base: Revisión de referencia (por defecto, la anterior a `revision`)
+        umbral: Razón de tiempos a partir de la cual se marca una regresión
+
+    Returns:
+        (revision_base, revision, filas); cada fila es un diccionario con
+        escenario, etapa, tiempo_base_s, tiempo_s, razon y regresion (bool).
+        revision_base es None si el historial tiene una sola revisión.
+    """
+    revisiones = _revisiones(registros)
+    if not revisiones:
+        return None, None, []
+    revision = revision or revisiones[-1]
+    if revision_base is None:
+        anteriores = revisiones[:revisiones.index(revision)] if revision in revisiones else []
+        if not anteriores:
+            return None, revision, []
+        revision_base = anteriores[-1]
+    actuales = _ultimos_por_escenario(registros, revision)
+    bases = _ultimos_por_escenario(registros, revision_base)
+    filas = []
+    for escenario in actuales:
+        if escenario not in bases:
+            continue
+        for etapa in ETAPAS_BENCHMARK:
+            t_base, t = _tiempo(bases[escenario], etapa), _tiempo(actuales[escenario], etapa)
+            if t_base is None or t is None or max(t_base, t) < TIEMPO_MINIMO_COMPARACION_S:
+                continue
+            razon = t / max(t_base, 1e-9)
+            filas.append({'escenario': escenario, 'etapa': etapa, 'tiempo_base_s': t_base,
+                          'tiempo_s': t, 'razon': razon, 'regresion': razon > umbral})
+    return revision_base, revision, filas
+
+
+def exponentes_escalado(registros, revision=None, variable='n_J'):
+    """
+    Exponente b de t ∝ variable^b por etapa, ajustado en escala log-log.
+
+    Args:
+        registros: Historial (ver `cargar_historial`)
+        revision: Revisión (por defecto, la última del historial)
+        variable: 'n_J', 'enlaces_totales' (n_I × n_J) o 'enlaces_viables'
+
+    Returns:
+        Diccionario etapa → (b, número de escenarios usados); solo cuentan los
+        tiempos de al menos `TIEMPO_MINIMO_COMPARACION_S` y b es NaN con menos
+        de `TAMANOS_MINIMOS_ESCALADO` tamaños distintos
+    """
+    if variable not in VARIABLES_ESCALADO:
+        raise ValueError(f"variable debe ser una de {VARIABLES_ESCALADO}")
+    revisiones = _revisiones(registros)
+    if not revisiones:
+        return {}
+    ultimos = _ultimos_por_escenario(registros, revision or revisiones[-1])
+    exponentes = {}
+    for etapa in ETAPAS_BENCHMARK:
+        tiempos = [(r.get(variable), _tiempo(r, etapa)) for r in ultimos.values()]
+        if not any(t is not None for _, t in tiempos):
+            continue
+        puntos = [(n, t) for n, t in tiempos
+                  if n and t is not None and t >= TIEMPO_MINIMO_COMPARACION_S]
+        b = math.nan
+        if len({n for n, _ in puntos}) >= TAMANOS_MINIMOS_ESCALADO:
+            x, t = np.log(np.array(puntos, dtype=float)).T
+            b = float(np.polyfit(x, t, 1)[0])
+        exponentes[etapa] = (b, len(puntos))
+    return exponentes
+
+
+def resumen_benchmark(registros):
+    """Líneas de texto con tamaño, tiempo y memoria de cada etapa por escenario."""
+    abreviadas = {'perdidas': 'pérd.', 'cobertura': 'cob.', 'modelo_mps': 'MPS',
+                  'modelo_pulp': 'PuLP', 'resolucion': 'resol.', 'asignacion': 'asig.',
+                  'exportacion': 'export.', 'reporte': 'rep.', 'figuras': 'fig.'}
+    # Escenario, n_I, n_J y enlaces ocupan el mismo ancho en todas las filas;
+    # la fila de memoria lo deja en blanco para alinear sus celdas con las de tiempo
+    prefijo = f"{'Escenario':<24}{'n_I':>7}{'n_J':>9}{'Enlaces':>12}  "
+    lineas = [prefijo + ''.join(f"{abreviadas[e]:>9}" for e in ETAPAS_BENCHMARK)]
+    for registro in registros:
+        if 'error' in registro:
+            lineas.append(f"{registro['escenario']:<24}ERROR {registro['error']}")
+            continue
+        celdas_t, celdas_m = [], []
+        for etapa in ETAPAS_BENCHMARK:
+            medida = registro['etapas'].get(etapa)
+            if medida is None:
+                celdas_t.append(f"{'':>9}")
+                celdas_m.append(f"{'':>9}")
+            elif 'omitida' in medida:
+                celdas_t.append(f"{'omit.':>9}")
+                celdas_m.append(f"{'':>9}")
+            else:
+                celdas_t.append(f"{medida['tiempo_s']:>8.2f}s")
+                mb = medida['memoria_pico_mb']
+                celdas_m.append(f"{'':>9}" if mb is None else f"{mb:>7.0f}MB")
+        lineas.append(f"{registro['escenario']:<24}{registro['n_I']:>7,}{registro['n_J']:>9,}"
+                      f"{registro.get('enlaces_viables', 0):>12,}  " + ''.join(celdas_t))
+        if registro.get('memoria_medida'):
+            lineas.append(' ' * len(prefijo) + ''.join(celdas_m))
+    return lineas
+
+
+def resumen_comparacion(revision_base, revision, filas, umbral=UMBRAL_REGRESION_DEFECTO):
+    """Líneas de texto con las regresiones de `comparar_revisiones`."""
+    if revision_base is None:
+        return [f"Sin revisión anterior en el historial para comparar con {revision}"]
+    regresiones = [f for f in filas if f['regresion']]
+    lineas = [f"Revisión {revision} frente a {revision_base}: {len(filas)} tiempos "
+              f"comparados, {len(regresiones)} regresiones (> {umbral:g}×)"]
+    for f in sorted(regresiones, key=lambda f: -f['razon']):
+        lineas.append(f"  {f['escenario']:<24}{f['etapa']:<13}{f['tiempo_base_s']:>9.2f} s → "
+                      f"{f['tiempo_s']:>9.2f} s ({f['razon']:.2f}×)")
+    return lineas
+
+
+def resumen_exponentes(registros, revision=None):
+    """Líneas de texto con los exponentes de escalado frente a n_J y a n_I × n_J."""
+    por_puntos = exponentes_escalado(registros, revision, 'n_J')
+    por_enlaces = exponentes_escalado(registros, revision, 'enlaces_totales')
+    lineas = [f"{'Etapa':<13}{'b (n_J)':>9}{'b (n_I·n_J)':>13}{'Escenarios':>12}"]
+    for etapa, (b, n) in por_puntos.items():
+        b_enlaces = por_enlaces.get(etapa, (math.nan, 0))[0]
+        lineas.append(f"{etapa:<13}{b:>9.2f}{b_enlaces:>13.2f}{n:>12}")
+    return lineas
@@ -0,0 +1,311 @@
+"""
+Matriz de cobertura empaquetada en bits (filas de palabras uint64)
+
+Cada fila i es el conjunto de puntos de demanda que cubre el candidato i:
+la columna j ocupa el bit j % 64 de la palabra j // 64. Un enlace ocupa
+1 bit en lugar de los 8 bytes de `np.zeros((n_I, n_J), dtype=int)`.
+Las operaciones de conjuntos (OR/AND de filas, popcount, conteos por
+columna) trabajan sobre las palabras sin desempaquetar la matriz completa.
+"""
+
+import json
+import os
+
+import numpy as np
+
+BITS_POR_PALABRA = 64
+
+# Palabras procesadas por bloque en operaciones fila a fila (~64 MB de uint64)
+PALABRAS_POR_BLOQUE = 8 * 1024 * 1024
+
+# Bloque menor para operaciones que desempaquetan (16 M bits → 16 MB de bool)
+PALABRAS_POR_BLOQUE_DESEMPAQUETADO = 256 * 1024
+
+_POPCOUNT_BYTE = np.array([bin(b).count('1') for b in range(256)], dtype=np.uint8)
+
+
+def n_palabras(n_columnas):
+    """Palabras uint64 necesarias para n_columnas bits."""
+    return (n_columnas + BITS_POR_PALABRA - 1) // BITS_POR_PALABRA
+
+
+def empaquetar(bloque):
+    """
+    Empaqueta un array booleano (..., n) en palabras uint64 (..., n_palabras(n)).
+
+    Args:
+        bloque: Array booleano cuyo último eje son las columnas
+
+    Returns:
+        Array de palabras uint64 (little-endian)
+    """
+    bloque = np.asarray(bloque, dtype=bool)
+    n = bloque.shape[-1]
+    empaquetado = np.packbits(bloque, axis=-1, bitorder='little')
+    bytes_ = np.zeros(bloque.shape[:-1] + (n_palabras(n) * 8,), dtype=np.uint8)
+    bytes_[..., :empaquetado.shape[-1]] = empaquetado
+    return bytes_.view('<u8')
+
+
+def desempaquetar(palabras, n_columnas):
+    """Inverso de `empaquetar`: devuelve el array booleano (..., n_columnas)."""
+    bytes_ = np.ascontiguousarray(palabras, dtype='<u8').view(np.uint8)
+    return np.unpackbits(bytes_, axis=-1, count=n_columnas, bitorder='little').astype(bool)
+
+
+def popcount(palabras, axis=-1):
+    """
+    Cuenta bits activos sumando a lo largo de `axis`.
+
+    Usa np.bitwise_count (NumPy >= 2.0) o una tabla de 256 entradas por byte.
+    """
+    palabras = np.asarray(palabras, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(palabras).sum(axis=axis, dtype=np.int64)
+    por_byte = _POPCOUNT_BYTE[np.ascontiguousarray(palabras).view(np.uint8)]
+    por_palabra = por_byte.reshape(palabras.shape + (8,)).sum(axis=-1, dtype=np.int64)
+    return por_palabra.sum(axis=axis)
+
+
+def mascara_completa(n_columnas):
+    """Vector empaquetado con los n_columnas bits activos (y el relleno a cero)."""
+    return empaquetar(np.ones(n_columnas, dtype=bool))
+
+
+def indices_activos(vector, n_columnas):
+    """Índices de columna con bit activo en un vector empaquetado."""
+    return np.flatnonzero(desempaquetar(vector, n_columnas))
+
+
+class MatrizBits:
+    """
+    Matriz binaria n_filas × n_columnas con filas empaquetadas en uint64.
+
+    `palabras` puede ser un array en memoria o un np.memmap (ver `guardar`,
+    `cargar` y `vacia(..., ruta=...)`).
+    """
+
+    def __init__(self, palabras, n_columnas):
+        if palabras.ndim != 2 or palabras.shape[1] != n_palabras(n_columnas):
+            raise ValueError(f"Forma {palabras.shape} incompatible con {n_columnas} columnas")
+        self.palabras = palabras
+        self.n_columnas = int(n_columnas)
+
+    # ------------------------------------------------------------------
+    # Construcción y persistencia
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def vacia(cls, n_filas, n_columnas, ruta=None):
+        """
+        Matriz de ceros. Si se indica `ruta`, se crea directamente como
+        archivo .npy mapeado en memoria (para matrices mayores que la RAM).
+        """
+        forma = (n_filas, n_palabras(n_columnas))
+        if ruta is None:
+            palabras = np.zeros(forma, dtype='<u8')
+        else:
+            _guardar_metadatos(ruta, n_columnas)
+            palabras = np.lib.format.open_memmap(_ruta_npy(ruta), mode='w+',
+                                                 dtype='<u8', shape=forma)
+        return cls(palabras, n_columnas)
+
+    @classmethod
+    def desde_denso(cls, a):
+        """Empaqueta una matriz densa (0/1 o booleana)."""
+        a = np.asarray(a)
+        return cls(empaquetar(a != 0), a.shape[1])
+
+    def guardar(self, ruta):
+        """Guarda las palabras en `<ruta>.npy` y las dimensiones en `<ruta>.json`."""
+        np.save(_ruta_npy(ruta), np.asarray(self.palabras))
+        _guardar_metadatos(ruta, self.n_columnas)
+
+    @classmethod
+    def cargar(cls, ruta, mmap=True):
+        """
+        Carga una matriz guardada con `guardar`.
+
+        Args:
+            ruta: Ruta base (sin extensión)
+            mmap: Si True, las palabras se mapean en memoria (solo lectura)
+        """
+        with open(_ruta_json(ruta), 'r', encoding='utf-8') as f:
+            n_columnas = json.load(f)['n_columnas']
+        palabras = np.load(_ruta_npy(ruta), mmap_mode='r' if mmap else None)
+        return cls(palabras, n_columnas)
+
+    def flush(self):
+        """Sincroniza a disco si la matriz está mapeada en memoria."""
+        if isinstance(self.palabras, np.memmap):
+            self.palabras.flush()
+
+    # ------------------------------------------------------------------
+    # Acceso
+    # ------------------------------------------------------------------
+
+    @property
+    def n_filas(self):
+        return self.palabras.shape[0]
+
+    @property
+    def shape(self):
+        return (self.n_filas, self.n_columnas)
+
+    @property
+    def nbytes(self):
+        return self.palabras.nbytes
+
+    def asignar_filas(self, inicio, bloque):
+        """Empaqueta un bloque booleano (b, n_columnas) en las filas [inicio, inicio+b)."""
+        self.palabras[inicio:inicio + len(bloque)] = empaquetar(bloque)
+
+    def fila(self, i):
+        """Vector empaquetado de la fila i."""
+        return self.palabras[i]
+
+    def a_denso(self, filas=None, dtype=np.uint8):
+        """Desempaqueta (todas o algunas) filas a una matriz densa."""
+        palabras = self.palabras if filas is None else self.palabras[filas]
+        return desempaquetar(palabras, self.n_columnas).astype(dtype)
+
+    def _bloques(self, filas=None, palabras_por_bloque=PALABRAS_POR_BLOQUE):
+        """Itera bloques de palabras (en memoria) acotados por `palabras_por_bloque`."""
+        paso = max(1, palabras_por_bloque // max(self.palabras.shape[1], 1))
+        if filas is None:
+            for inicio in range(0, self.n_filas, paso):
+                yield np.asarray(self.palabras[inicio:inicio + paso])
+        else:
+            filas = np.asarray(filas)
+            for inicio in range(0, len(filas), paso):
+                yield np.asarray(self.palabras[filas[inicio:inicio + paso]])
+
+    # ------------------------------------------------------------------
+    # Operaciones de conjuntos
+    # ------------------------------------------------------------------
+
+    def union(self, filas=None):
+        """OR de las filas indicadas (todas por defecto): puntos cubiertos por el conjunto."""
+        resultado = np.zeros(self.palabras.shape[1], dtype='<u8')
+        for bloque in self._bloques(filas):
+            resultado |= np.bitwise_or.reduce(bloque, axis=0)
+        return resultado
+
+    def interseccion(self, filas=None):
+        """AND de las filas indicadas: puntos cubiertos por todas ellas."""
+        resultado = mascara_completa(self.n_columnas)
+        for bloque in self._bloques(filas):
+            resultado &= np.bitwise_and.reduce(bloque, axis=0)
+        return resultado
+
+    def contar_cubiertos(self, mascara=None, filas=None):
+        """
+        Popcount por fila de (fila & mascara).
+
+        Con `mascara` = vector de puntos aún no cubiertos, da cuántos puntos
+        nuevos cubriría cada candidato (la ganancia del greedy).
+
+        Args:
+            mascara: Vector empaquetado de columnas a contar (todas si None)
+            filas: Subconjunto de filas (todas si None)
+
+        Returns:
+            Array int64 con un conteo por fila
+        """
+        conteos = []
+        for bloque in self._bloques(filas):
+            conteos.append(popcount(bloque if mascara is None else bloque & mascara, axis=1))
+        return np.concatenate(conteos) if conteos else np.zeros(0, dtype=np.int64)
+
+    def conteo_columnas(self, filas=None):
+        """
+        Número de filas (del subconjunto) que cubren cada columna.
+
+        Equivale a np.sum(a[filas, :], axis=0) sobre la matriz densa,
+        desempaquetando solo un bloque de filas a la vez.
+        """
+        conteo = np.zeros(self.n_columnas, dtype=np.int64)
+        for bloque in self._bloques(filas, PALABRAS_POR_BLOQUE_DESEMPAQUETADO):
+            conteo += desempaquetar(bloque, self.n_columnas).sum(axis=0, dtype=np.int64)
+        return conteo
+
+    def producto(self, v, filas=None):
+        """
+        Producto matriz-vector A @ v (p. ej. Σ_j a_ij u_j para multiplicadores u).
+
+        Args:
+            v: Vector de longitud n_columnas
+            filas: Subconjunto de filas (todas si None)
+
+        Returns:
+            Array float64 con un valor por fila
+        """
+        v = np.asarray(v, dtype=np.float64)
+        resultados = [desempaquetar(bloque, self.n_columnas) @ v
+                      for bloque in self._bloques(filas, PALABRAS_POR_BLOQUE_DESEMPAQUETADO)]
+        return np.concatenate(resultados) if resultados else np.zeros(0)
+
+    def columnas_sin_cobertura(self, filas=None):
+        """Índices de columnas que ninguna fila (del subconjunto) cubre."""
+        cubiertas = self.union(filas)
+        return np.flatnonzero(~desempaquetar(cubiertas, self.n_columnas))
+
+    def cubre_todo(self, filas=None):
+        """True si las filas indicadas cubren todas las columnas."""
+        return bool(np.array_equal(self.union(filas), mascara_completa(self.n_columnas)))
+
+    def total(self):
+        """Número total de bits activos (np.sum(a))."""
+        return int(self.contar_cubiertos().sum())
+
+    def subconjunto(self, filas=None, columnas=None):
+        """
+        Nueva MatrizBits (en memoria) restringida a filas y/o columnas.
+
+        La selección de columnas reempaqueta bloque a bloque.
+        """
+        if columnas is None:
+            palabras = np.array(self.palabras if filas is None else self.palabras[np.asarray(filas)])
+            return MatrizBits(palabras, self.n_columnas)
+        columnas = np.asarray(columnas)
+        n_filas = self.n_filas if filas is None else len(filas)
+        resultado = MatrizBits.vacia(n_filas, len(columnas))
+        inicio = 0
+        for bloque in self._bloques(filas, PALABRAS_POR_BLOQUE_DESEMPAQUETADO):
+            denso = desempaquetar(bloque, self.n_columnas)[:, columnas]
+            resultado.asignar_filas(inicio, denso)
+            inicio += len(bloque)
+        return resultado
+
+    def transpuesta(self):
+        """Matriz transpuesta (columnas → filas), construida por bloques."""
+        resultado = MatrizBits.vacia(self.n_columnas, self.n_filas)
+        # Columnas por pasada: el bloque booleano (paso × n_filas) ocupa ~64 MB
+        paso = max(1, 4 * PALABRAS_POR_BLOQUE_DESEMPAQUETADO // max(n_palabras(self.n_filas), 1))
+        for inicio in range(0, self.n_columnas, paso):
+            fin = min(inicio + paso, self.n_columnas)
+            columnas = np.zeros((fin - inicio, self.n_filas), dtype=bool)
+            pos = 0
+            for bloque in self._bloques(palabras_por_bloque=PALABRAS_POR_BLOQUE_DESEMPAQUETADO):
+                denso = desempaquetar(bloque, self.n_columnas)[:, inicio:fin]
+                columnas[:, pos:pos + len(bloque)] = denso.T
+                pos += len(bloque)
+            resultado.asignar_filas(inicio, columnas)
+        return resultado
+
+
+def _ruta_npy(ruta):
+    return ruta if str(ruta).endswith('.npy') else f"{ruta}.npy"
+
+
+def _ruta_json(ruta):
+    base = str(ruta)[:-4] if str(ruta).endswith('.npy') else str(ruta)
+    return f"{base}.json"
+
+
+def _guardar_metadatos(ruta, n_columnas):
+    directorio = os.path.dirname(_ruta_json(ruta))
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(_ruta_json(ruta), 'w', encoding='utf-8') as f:
+        json.dump({'n_columnas': int(n_columnas), 'bits_por_palabra': BITS_POR_PALABRA}, f)
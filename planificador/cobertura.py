@@ -0,0 +1,360 @@
+"""
+Motor de cálculo de la matriz de cobertura a_ij por bloques de filas
+
+Reemplaza el doble bucle `for i ... for j ...` del notebook: distancia,
+path-loss y viabilidad se calculan con broadcasting de NumPy sobre bloques
+de filas cuyo tamaño se ajusta a un presupuesto de memoria de trabajo.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .bitset import MatrizBits
+from .instrumentacion import registrar_cobertura
+from .mapa_obstruccion import MapaObstruccion, mapa_desde_config
+from .propagacion import ModeloPropagacion
+from .terreno import terreno_desde_config
+
+# Bytes de memoria temporal por enlace (i, j) dentro de un bloque:
+# aleatorio float64, dx/dy/distancia float64, exponente y path-loss float64, máscaras bool
+BYTES_POR_ENLACE = 64
+
+MEMORIA_MAX_MB_DEFECTO = 256
+
+# Modelos de sorteo de la máscara de obstrucción (ver `iterar_geometria`)
+OBSTRUCCION_SECUENCIAL = 'secuencial'
+OBSTRUCCION_COORDENADAS = 'coordenadas'
+
+# patron_obstruccion de config.json que usa un MapaObstruccion
+PATRON_RASTER = 'raster'
+
+# Resolución de las coordenadas en la clave de obstrucción por enlace (cm)
+_CENTIMETROS = 100.0
+
+
+def filas_por_bloque(n_J, memoria_max_mb=MEMORIA_MAX_MB_DEFECTO):
+    """Número de filas de I que caben en el presupuesto de memoria (mínimo 1)."""
+    return max(1, int(memoria_max_mb * 1024 * 1024 // (BYTES_POR_ENLACE * max(n_J, 1))))
+
+
+def _mezclar(x, temporal=None):
+    """
+    Finalizador splitmix64 sobre uint64 (aritmética módulo 2^64).
+
+    Opera en el lugar sobre `x` si es un array (con `temporal` del mismo
+    tamaño como buffer opcional).
+    """
+    with np.errstate(over='ignore'):
+        if np.ndim(x) == 0:
+            x = np.uint64(x)
+            x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            return x ^ (x >> np.uint64(31))
+        if temporal is None:
+            temporal = np.empty_like(x)
+        for desplazamiento, factor in ((30, 0xBF58476D1CE4E5B9), (27, 0x94D049BB133111EB)):
+            np.right_shift(x, np.uint64(desplazamiento), out=temporal)
+            x ^= temporal
+            x *= np.uint64(factor)
+        np.right_shift(x, np.uint64(31), out=temporal)
+        x ^= temporal
+        return x
+
+
+def _clave_coordenadas(coords):
+    """Clave uint64 por coordenada, redondeada al centímetro."""
+    c = np.round(np.asarray(coords, dtype=float).reshape(-1, 2) * _CENTIMETROS).astype(np.int64)
+    x = c[:, 0].astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    y = c[:, 1].astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    return _mezclar((x << np.uint64(32)) | y)
+
+
+def obstruccion_por_coordenadas(I_coords, J_coords, porcentaje_obstruido, semilla=42):
+    """
+    Máscara de obstrucción (n_I, n_J) determinista por par de coordenadas.
+
+    Cada enlace i → j se sortea con un hash de (semilla, posición de i,
+    posición de j), sin estado secuencial: el mismo enlace físico tiene la
+    misma obstrucción en cualquier subconjunto o resolución de la grilla.
+    Las obstrucciones siguen siendo independientes con probabilidad p.
+
+    Args:
+        I_coords, J_coords: Coordenadas (n_I, 2) y (n_J, 2)
+        porcentaje_obstruido: Probabilidad de obstrucción por enlace (en %)
+        semilla: Semilla del hash
+
+    Returns:
+        Array booleano (n_I, n_J)
+    """
+    semilla = _mezclar(np.uint64(int(semilla) & 0xFFFFFFFFFFFFFFFF))
+    clave_i = _mezclar(_clave_coordenadas(I_coords) ^ semilla)
+    with np.errstate(over='ignore'):
+        clave_j = _clave_coordenadas(J_coords) * np.uint64(0x9E3779B97F4A7C15)
+    enlace = _mezclar(clave_i[:, None] ^ clave_j[None, :])
+    # Hash uniforme en [0, 2^64): obstruido si cae bajo p · 2^64
+    p = min(max(porcentaje_obstruido / 100.0, 0.0), 1.0)
+    if p >= 1.0:
+        return np.ones(enlace.shape, dtype=bool)
+    return enlace < np.uint64(int(p * 2.0**64))
+
+
+def obstruccion_enlaces(I_coords, J_coords, porcentaje_obstruido, semillas):
+    """
+    Obstrucción de los enlaces I_coords[k] → J_coords[k] para varias semillas.
+
+    Usa el mismo hash que `obstruccion_por_coordenadas`: la fila r coincide,
+    en esos enlaces, con la máscara por coordenadas de semilla `semillas[r]`.
+
+    Args:
+        I_coords, J_coords: Coordenadas (n, 2) de los extremos de cada enlace
+        porcentaje_obstruido: Probabilidad de obstrucción por enlace (en %)
+        semillas: Secuencia de semillas enteras (una por realización)
+
+    Returns:
+        Array booleano (len(semillas), n)
+    """
+    semillas = np.array([int(s) & 0xFFFFFFFFFFFFFFFF for s in semillas], dtype=np.uint64)
+    clave_i = _clave_coordenadas(I_coords)
+    with np.errstate(over='ignore'):
+        clave_j = _clave_coordenadas(J_coords) * np.uint64(0x9E3779B97F4A7C15)
+    p = min(max(porcentaje_obstruido / 100.0, 0.0), 1.0)
+    if p >= 1.0:
+        return np.ones((len(semillas), len(clave_i)), dtype=bool)
+    enlace = _mezclar(semillas)[:, None] ^ clave_i[None, :]
+    temporal = np.empty_like(enlace)
+    _mezclar(enlace, temporal)
+    enlace ^= clave_j[None, :]
+    _mezclar(enlace, temporal)
+    return enlace < np.uint64(int(p * 2.0**64))
+
+
+def iterar_geometria(I_coords, J_coords, porcentaje_obstruido, semilla=42,
+                     memoria_max_mb=MEMORIA_MAX_MB_DEFECTO, obstruccion=OBSTRUCCION_SECUENCIAL):
+    """
+    Recorre distancias y obstrucciones de los enlaces por bloques de filas.
+
+    Con obstruccion='secuencial' la máscara se genera con un único
+    RandomState(semilla) consumido en orden de filas, por lo que coincide
+    exactamente con `np.random.seed(semilla); np.random.rand(n_I, n_J) < p`
+    del notebook. Con 'coordenadas' cada enlace se sortea por sus
+    coordenadas (ver `obstruccion_por_coordenadas`), lo que permite
+    calcular cualquier subconjunto de enlaces de forma consistente. Con un
+    MapaObstruccion la condición se obtiene recorriendo el trayecto sobre
+    el ráster (y `porcentaje_obstruido` y `semilla` no se usan); la mitad
+    del presupuesto de memoria se reserva para el trazado.
+
+    Args:
+        I_coords: Array (n_I, 2) de ubicaciones candidatas
+        J_coords: Array (n_J, 2) de puntos de demanda
+        porcentaje_obstruido: Probabilidad de obstrucción por enlace (en %)
+        semilla: Semilla de la máscara aleatoria de obstrucción
+        memoria_max_mb: Presupuesto de memoria de trabajo por bloque
+        obstruccion: 'secuencial', 'coordenadas' o un MapaObstruccion
+
+    Yields:
+        Tuplas (inicio, fin, distancia, obstruido) con las filas [inicio, fin)
+    """
+    mapa = obstruccion if isinstance(obstruccion, MapaObstruccion) else None
+    if mapa is None and obstruccion not in (OBSTRUCCION_SECUENCIAL, OBSTRUCCION_COORDENADAS):
+        raise ValueError(f"Modelo de obstrucción desconocido: '{obstruccion}'")
+    if mapa is not None:
+        memoria_max_mb = memoria_max_mb / 2
+    I_coords = np.asarray(I_coords, dtype=float)
+    J_coords = np.asarray(J_coords, dtype=float)
+    n_I, n_J = len(I_coords), len(J_coords)
+    rng = np.random.RandomState(semilla) if obstruccion == OBSTRUCCION_SECUENCIAL else None
+    p = porcentaje_obstruido / 100.0
+    paso = filas_por_bloque(n_J, memoria_max_mb)
+
+    for inicio in range(0, n_I, paso):
+        fin = min(inicio + paso, n_I)
+        if rng is not None:
+            obstruido = rng.rand(fin - inicio, n_J) < p
+        elif mapa is not None:
+            obstruido = mapa.obstruidos(I_coords[inicio:fin], J_coords, memoria_max_mb)
+        else:
+            obstruido = obstruccion_por_coordenadas(I_coords[inicio:fin], J_coords,
+                                                    porcentaje_obstruido, semilla)
+        dx = I_coords[inicio:fin, 0, None] - J_coords[None, :, 0]
+        dy = I_coords[inicio:fin, 1, None] - J_coords[None, :, 1]
+        distancia = np.sqrt(dx**2 + dy**2)
+        del dx, dy
+        yield inicio, fin, distancia, obstruido
+
+
+def iterar_bloques(I_coords, J_coords, modelo, porcentaje_obstruido, semilla=42,
+                   memoria_max_mb=MEMORIA_MAX_MB_DEFECTO, obstruccion=OBSTRUCCION_SECUENCIAL,
+                   terreno=None):
+    """
+    Recorre la matriz de cobertura por bloques de filas.
+
+    Args:
+        I_coords, J_coords, porcentaje_obstruido, semilla, memoria_max_mb,
+            obstruccion: Ver `iterar_geometria`
+        modelo: ModeloPropagacion
+        terreno: ModeloTerreno opcional; su pérdida por difracción se suma
+            a la de cada enlace
+
+    Yields:
+        Tuplas (inicio, fin, viable, obstruido) con las filas [inicio, fin)
+    """
+    for inicio, fin, distancia, obstruido in iterar_geometria(
+            I_coords, J_coords, porcentaje_obstruido, semilla, memoria_max_mb, obstruccion):
+        extra = None
+        if terreno is not None:
+            extra = terreno.perdidas(np.asarray(I_coords)[inicio:fin], J_coords, memoria_max_mb)
+        yield inicio, fin, modelo.enlace_viable(distancia, obstruido, extra), obstruido
+
+
+@dataclass
+class ResultadoCobertura:
+    """Matriz de cobertura (densa o MatrizBits) y estadísticas de enlaces."""
+    a: object
+    enlaces_obstruidos: object
+    enlaces_totales: int
+    enlaces_viables_abierto: int
+    enlaces_viables_obstruido: int
+
+    @property
+    def enlaces_viables(self):
+        return self.enlaces_viables_abierto + self.enlaces_viables_obstruido
+
+    @property
+    def densidad(self):
+        """Fracción de enlaces viables (0-1)."""
+        return self.enlaces_viables / self.enlaces_totales if self.enlaces_totales else 0.0
+
+
+def _acumular(bloques, asignar_a, asignar_obstruidos):
+    """Vuelca los bloques en los destinos y acumula las estadísticas de enlaces."""
+    viables_abierto = 0
+    viables_obstruido = 0
+    for inicio, fin, viable, obstruido in bloques:
+        asignar_a(inicio, viable)
+        if asignar_obstruidos is not None:
+            asignar_obstruidos(inicio, obstruido)
+        n_viables_obstruido = int(np.count_nonzero(viable & obstruido))
+        viables_obstruido += n_viables_obstruido
+        viables_abierto += int(np.count_nonzero(viable)) - n_viables_obstruido
+    return viables_abierto, viables_obstruido
+
+
+def calcular_matriz_cobertura(I_coords, J_coords, modelo, porcentaje_obstruido, semilla=42,
+                              memoria_max_mb=MEMORIA_MAX_MB_DEFECTO, dtype=np.uint8,
+                              guardar_obstrucciones=False, obstruccion=OBSTRUCCION_SECUENCIAL,
+                              terreno=None):
+    """
+    Calcula la matriz binaria a_ij (1 si el enlace i→j es viable).
+
+    Args:
+        I_coords, J_coords: Coordenadas de candidatos y puntos de demanda
+        modelo: ModeloPropagacion
+        porcentaje_obstruido: Probabilidad de obstrucción por enlace (en %)
+        semilla: Semilla de la máscara de obstrucción
+        memoria_max_mb: Presupuesto de memoria de trabajo por bloque
+        dtype: Tipo de la matriz resultante (uint8 ocupa 1 byte por enlace)
+        guardar_obstrucciones: Si True, conserva la máscara completa de obstrucción
+        obstruccion: Modelo de obstrucción ('secuencial', 'coordenadas' o un
+            MapaObstruccion, ver `iterar_geometria`)
+        terreno: ModeloTerreno opcional (ver `iterar_bloques`)
+
+    Returns:
+        ResultadoCobertura
+    """
+    n_I, n_J = len(I_coords), len(J_coords)
+    a = np.zeros((n_I, n_J), dtype=dtype)
+    enlaces_obstruidos = np.zeros((n_I, n_J), dtype=bool) if guardar_obstrucciones else None
+
+    def asignar_a(inicio, bloque):
+        a[inicio:inicio + len(bloque)] = bloque
+
+    def asignar_obstruidos(inicio, bloque):
+        enlaces_obstruidos[inicio:inicio + len(bloque)] = bloque
+
+    bloques = iterar_bloques(I_coords, J_coords, modelo, porcentaje_obstruido, semilla,
+                             memoria_max_mb, obstruccion, terreno)
+    viables_abierto, viables_obstruido = _acumular(
+        bloques, asignar_a, asignar_obstruidos if guardar_obstrucciones else None)
+
+    return ResultadoCobertura(a=a, enlaces_obstruidos=enlaces_obstruidos,
+                              enlaces_totales=n_I * n_J,
+                              enlaces_viables_abierto=viables_abierto,
+                              enlaces_viables_obstruido=viables_obstruido)
+
+
+def calcular_matriz_cobertura_bits(I_coords, J_coords, modelo, porcentaje_obstruido, semilla=42,
+                                   memoria_max_mb=MEMORIA_MAX_MB_DEFECTO,
+                                   guardar_obstrucciones=False, ruta=None,
+                                   obstruccion=OBSTRUCCION_SECUENCIAL, terreno=None):
+    """
+    Igual que `calcular_matriz_cobertura`, pero empaqueta cada bloque en bits.
+
+    Nunca se materializa la matriz densa: el pico de memoria es un bloque de
+    filas más n_I × n_J / 8 bytes de resultado (o nada, si se usa `ruta`).
+
+    Args:
+        ruta: Ruta base opcional; la matriz se escribe en `<ruta>.npy` mapeada
+            en memoria y la máscara de obstrucción en `<ruta>_obstruidos.npy`
+        obstruccion: Modelo de obstrucción (ver `iterar_geometria`)
+        terreno: ModeloTerreno opcional (ver `iterar_bloques`)
+
+    Returns:
+        ResultadoCobertura con `a` y `enlaces_obstruidos` como MatrizBits
+    """
+    n_I, n_J = len(I_coords), len(J_coords)
+    a = MatrizBits.vacia(n_I, n_J, ruta=ruta)
+    enlaces_obstruidos = None
+    if guardar_obstrucciones:
+        enlaces_obstruidos = MatrizBits.vacia(
+            n_I, n_J, ruta=None if ruta is None else f"{ruta}_obstruidos")
+
+    bloques = iterar_bloques(I_coords, J_coords, modelo, porcentaje_obstruido, semilla,
+                             memoria_max_mb, obstruccion, terreno)
+    viables_abierto, viables_obstruido = _acumular(
+        bloques, a.asignar_filas,
+        enlaces_obstruidos.asignar_filas if guardar_obstrucciones else None)
+    a.flush()
+    if enlaces_obstruidos is not None:
+        enlaces_obstruidos.flush()
+
+    return ResultadoCobertura(a=a, enlaces_obstruidos=enlaces_obstruidos,
+                              enlaces_totales=n_I * n_J,
+                              enlaces_viables_abierto=viables_abierto,
+                              enlaces_viables_obstruido=viables_obstruido)
+
+
+def obstruccion_desde_config(config, aleatoria=OBSTRUCCION_SECUENCIAL):
+    """
+    Modelo de obstrucción de `escenario.patron_obstruccion`: un
+    MapaObstruccion para 'raster' (ver `mapa_desde_config`) y el sorteo
+    `aleatoria` ('secuencial', el del notebook, o 'coordenadas') en otro caso.
+    """
+    if config['escenario'].get('patron_obstruccion') == PATRON_RASTER:
+        return mapa_desde_config(config)
+    return aleatoria
+
+
+def cobertura_desde_config(config, I_coords, J_coords, empaquetada=False, **kwargs):
+    """
+    Calcula la matriz de cobertura con los parámetros de config.json.
+
+    Con `empaquetada=True` devuelve la matriz como MatrizBits.
+
+    Lee los bloques `propagacion`, `escenario` (porcentaje, semilla y patrón
+    de obstrucción), `obstruccion_raster`, `terreno` y `calculo`
+    (presupuesto de memoria).
+    """
+    escenario = config['escenario']
+    if 'obstruccion' not in kwargs:
+        kwargs['obstruccion'] = obstruccion_desde_config(config)
+    if 'terreno' not in kwargs:
+        kwargs['terreno'] = terreno_desde_config(config)
+    kwargs.setdefault('semilla', escenario.get('semilla_obstruccion', 42))
+    kwargs.setdefault('memoria_max_mb',
+                      config.get('calculo', {}).get('memoria_max_mb', MEMORIA_MAX_MB_DEFECTO))
+    calcular = calcular_matriz_cobertura_bits if empaquetada else calcular_matriz_cobertura
+    resultado = calcular(I_coords, J_coords, ModeloPropagacion.desde_config(config),
+                         escenario['porcentaje_area_obstruida'], **kwargs)
+    registrar_cobertura(resultado)
+    return resultado
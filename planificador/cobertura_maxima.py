@@ -0,0 +1,395 @@
+"""
+Cobertura máxima con presupuesto: los k sitios que cubren más demanda
+
+Cuando la compra limita el despliegue a k gateways, las restricciones
+Σ_i a_ij x_i >= 1 del Set Cover no sirven (el modelo es infactible o
+ignora el presupuesto). Aquí se maximiza la demanda cubierta
+(Σ_j w_j y_j, opcionalmente ponderada por densidad de sensores) con
+Σ_i x_i <= k:
+
+- Greedy perezoso: la función de cobertura es submodular, así que la
+  ganancia marginal de un candidato solo puede bajar al agregar sitios.
+  Las ganancias se guardan en una cola de prioridad y solo se recalcula la
+  del tope; si sigue siendo la mayor, se elige sin evaluar el resto. Una
+  sola pasada da la curva cobertura-vs-k para k = 1..K (los k primeros
+  sitios del orden greedy), con garantía (1 - 1/e).
+- Cota superior por k: para cualquier conjunto S, OPT_k <= f(S) + suma de
+  las k mayores ganancias marginales respecto de S. Las ganancias de la
+  cola son cotas de las actuales, así que la cota sale gratis en cada paso.
+- Refinamiento exacto opcional (ILP con CBC vía PuLP) para los k
+  indicados, con la solución greedy como arranque.
+"""
+
+import heapq
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .bitset import desempaquetar, mascara_completa, popcount
+from .configuracion import ruta_proyecto
+from .grid import grid_desde_config
+from .mps import ruta_cbc
+from .perdidas import perdidas_desde_config
+from .propagacion import ModeloPropagacion
+
+DIRECTORIO_CACHE = 'results/cache'
+
+# Sensores por bloque al asignar cada sensor a su punto de demanda más cercano
+_SENSORES_POR_BLOQUE = 4096
+
+
+@dataclass
+class RefinamientoILP:
+    """
+    Solución exacta (o la mejor encontrada) para un presupuesto k.
+
+    Atributos:
+        k: Presupuesto de gateways
+        seleccion: Índices de fila (candidatos) elegidos, ordenados
+        valor: Peso cubierto por la selección
+        cota_superior: Cota superior del óptimo (el valor si es óptima)
+        estado: 'Optimal' o 'Feasible' (límite de tiempo alcanzado)
+        valor_greedy: Peso cubierto por los k primeros sitios greedy
+        tiempo_s: Tiempo de construcción y resolución del ILP
+    """
+    k: int
+    seleccion: list
+    valor: float
+    cota_superior: float
+    estado: str
+    valor_greedy: float
+    tiempo_s: float
+
+    @property
+    def mejora(self):
+        """Peso adicional cubierto respecto del greedy."""
+        return self.valor - self.valor_greedy
+
+
+@dataclass
+class ResultadoCoberturaMaxima:
+    """
+    Curva cobertura-vs-k del greedy perezoso (y refinamientos ILP).
+
+    Atributos:
+        orden: Candidatos en el orden en que se agregan; los k primeros son
+            la solución greedy con presupuesto k
+        curva: Peso cubierto por los k primeros sitios, k = 1..len(orden)
+        puntos_cubiertos: Puntos de demanda cubiertos, k = 1..len(orden)
+        cota_superior: Cota superior del óptimo para cada k
+        peso_total: Peso de todos los puntos de demanda
+        peso_cubrible: Peso de los puntos que algún candidato cubre
+        evaluaciones: Ganancias marginales recalculadas (sin la inicial)
+        tiempo_s: Tiempo del greedy (sin el cálculo de la cobertura)
+        refinamientos: Lista de RefinamientoILP
+        coordenadas: Coordenadas (n_I, 2) de los candidatos, si se conocen
+    """
+    orden: list
+    curva: np.ndarray
+    puntos_cubiertos: np.ndarray
+    cota_superior: np.ndarray
+    peso_total: float
+    peso_cubrible: float
+    evaluaciones: int
+    tiempo_s: float
+    refinamientos: list = field(default_factory=list)
+    coordenadas: np.ndarray = None
+
+    @property
+    def k_max(self):
+        return len(self.orden)
+
+    @property
+    def sitios(self):
+        """Coordenadas de los sitios en el orden greedy."""
+        return self.coordenadas[np.asarray(self.orden, dtype=np.int64)]
+
+    def fraccion(self, k):
+        """Fracción del peso total cubierta con presupuesto k (greedy)."""
+        if k <= 0 or not self.peso_total:
+            return 0.0
+        return float(self.curva[min(k, self.k_max) - 1] / self.peso_total)
+
+    def seleccion(self, k):
+        """Mejor selección conocida para presupuesto k (ILP si se refinó)."""
+        for refinamiento in self.refinamientos:
+            if refinamiento.k == k:
+                return refinamiento.seleccion
+        return sorted(self.orden[:k])
+
+
+def pesos_por_sensores(J_coords, sensores, peso_base=0.0):
+    """
+    Peso de cada punto de demanda según la densidad de sensores.
+
+    Cada sensor suma 1 al punto de demanda más cercano; `peso_base` se suma
+    a todos los puntos (con 0, solo cuentan los puntos con sensores).
+
+    Args:
+        J_coords: Coordenadas (n_J, 2) de los puntos de demanda
+        sensores: Coordenadas (S, 2) de los sensores
+        peso_base: Peso mínimo de cada punto
+
+    Returns:
+        Array float64 (n_J,)
+    """
+    J_coords = np.asarray(J_coords, dtype=np.float64)
+    sensores = np.asarray(sensores, dtype=np.float64).reshape(-1, 2)
+    cercano = np.empty(len(sensores), dtype=np.int64)
+    for inicio in range(0, len(sensores), _SENSORES_POR_BLOQUE):
+        bloque = sensores[inicio:inicio + _SENSORES_POR_BLOQUE]
+        d2 = ((bloque[:, None, :] - J_coords[None, :, :]) ** 2).sum(axis=-1)
+        cercano[inicio:inicio + len(bloque)] = np.argmin(d2, axis=1)
+    return peso_base + np.bincount(cercano, minlength=len(J_coords)).astype(np.float64)
+
+
+def _ganancia(A, i, sin_cubrir, pesos):
+    """Peso de los puntos aún no cubiertos que cubre el candidato i."""
+    nuevos = A.fila(i) & sin_cubrir
+    if pesos is None:
+        return float(popcount(nuevos))
+    return float(desempaquetar(nuevos, A.n_columnas) @ pesos)
+
+
+def greedy_perezoso(A, k_max, pesos=None):
+    """
+    Curva cobertura-vs-k para k = 1..k_max en una sola pasada.
+
+    Se detiene antes de k_max si ningún candidato agrega peso.
+
+    Args:
+        A: MatrizBits (candidatos × puntos de demanda)
+        k_max: Presupuesto máximo K
+        pesos: Peso opcional por punto de demanda (por defecto, 1)
+
+    Returns:
+        ResultadoCoberturaMaxima
+    """
+    inicio = time.perf_counter()
+    n_filas, n_columnas = A.shape
+    if pesos is not None:
+        pesos = np.asarray(pesos, dtype=np.float64)
+        ganancias = A.producto(pesos)
+        cubrible = desempaquetar(A.union(), n_columnas)
+        peso_total, peso_cubrible = float(pesos.sum()), float(pesos[cubrible].sum())
+    else:
+        ganancias = A.contar_cubiertos().astype(np.float64)
+        peso_total, peso_cubrible = float(n_columnas), float(popcount(A.union()))
+
+    # Cola de (-ganancia, candidato, paso en que se calculó) y copia densa de
+    # las ganancias (cotas de las actuales) para la cota superior
+    cola = [(-g, i, 0) for i, g in enumerate(ganancias) if g > 0]
+    heapq.heapify(cola)
+    cotas_ganancia = np.where(ganancias > 0, ganancias, 0.0)
+
+    sin_cubrir = mascara_completa(n_columnas)
+    orden, curva, puntos = [], [], []
+    cota = np.full(k_max, np.inf)
+    cubierto, evaluaciones = 0.0, 0
+    while len(orden) < k_max and cola:
+        menos_ganancia, i, paso = heapq.heappop(cola)
+        if paso != len(orden):
+            ganancia = _ganancia(A, i, sin_cubrir, pesos)
+            evaluaciones += 1
+            cotas_ganancia[i] = ganancia
+            if ganancia > 0:
+                heapq.heappush(cola, (-ganancia, i, len(orden)))
+            continue
+
+        # f(S) + suma de las k mayores cotas de ganancia, para todo k
+        mayores = -np.sort(-np.partition(cotas_ganancia, max(n_filas - k_max, 0))[-k_max:])
+        acumuladas = np.cumsum(np.pad(mayores, (0, k_max - len(mayores))))
+        cota = np.minimum(cota, cubierto + acumuladas)
+
+        orden.append(i)
+        cotas_ganancia[i] = 0.0
+        sin_cubrir &= ~A.fila(i)
+        cubierto += -menos_ganancia
+        curva.append(cubierto)
+        puntos.append(n_columnas - int(popcount(sin_cubrir)))
+
+    k = len(orden)
+    return ResultadoCoberturaMaxima(
+        orden=orden, curva=np.array(curva), puntos_cubiertos=np.array(puntos, dtype=np.int64),
+        cota_superior=np.maximum(np.minimum(cota[:k], peso_cubrible), np.array(curva)),
+        peso_total=peso_total, peso_cubrible=peso_cubrible, evaluaciones=evaluaciones,
+        tiempo_s=time.perf_counter() - inicio)
+
+
+def refinar_ilp(A, k, pesos=None, inicial=None, cota_superior=None, tiempo_limite=None,
+                msg=False):
+    """
+    Cobertura máxima exacta con presupuesto k, escrita como mínimo peso sin
+    cubrir para conservar las filas de cobertura del Set Cover:
+    min Σ_j w_j z_j  s.a.  Σ_i a_ij x_i + z_j >= 1,  Σ_i x_i <= k,  x binaria.
+
+    (Con `-max`, CBC evalúa el MIP start con el signo cambiado y lo descarta.)
+    Las columnas idénticas (mismo conjunto de candidatos) se agrupan sumando
+    sus pesos y las de peso nulo o sin candidatos se descartan. Con `z`
+    continua en [0, 1] el óptimo sigue siendo entero.
+
+    Args:
+        A: MatrizBits (candidatos × puntos de demanda)
+        k: Presupuesto de gateways
+        pesos: Peso opcional por punto de demanda
+        inicial: Solución de arranque (p. ej. los k primeros sitios greedy)
+        cota_superior: Cota conocida del óptimo (se informa si CBC no prueba
+            optimalidad antes del límite de tiempo)
+        tiempo_limite: Segundos para CBC (None = sin límite)
+        msg: Si True, muestra la salida de CBC
+
+    Returns:
+        RefinamientoILP
+    """
+    from pulp import COIN_CMD, LpAffineExpression, LpBinary, LpMinimize, LpProblem, LpVariable, lpSum
+
+    inicio = time.perf_counter()
+    n_filas, n_columnas = A.shape
+    pesos = np.ones(n_columnas) if pesos is None else np.asarray(pesos, dtype=np.float64)
+    inicial = sorted(inicial or [])
+    cubrible = desempaquetar(A.union(), n_columnas)
+    valor_inicial = float(desempaquetar(A.union(inicial), n_columnas) @ pesos) if inicial else 0.0
+
+    a = A.a_denso(dtype=bool)
+    utiles = (pesos > 0) & cubrible
+    columnas, grupo = np.unique(a[:, utiles].T, axis=0, return_inverse=True)
+    peso_grupo = np.bincount(grupo.ravel(), weights=pesos[utiles], minlength=len(columnas))
+
+    problema = LpProblem('cobertura_maxima', LpMinimize)
+    # PuLP 3 crea las variables desde el problema (LpVariable directo es obsoleto)
+    nueva_variable = getattr(problema, 'add_variable', LpVariable)
+    x = [nueva_variable(f"x{i}", cat=LpBinary) for i in range(n_filas)]
+    z = [nueva_variable(f"z{c}", lowBound=0, upBound=1) for c in range(len(columnas))]
+    problema += LpAffineExpression(zip(z, peso_grupo))
+    for c, columna in enumerate(columnas):
+        problema += LpAffineExpression([(x[i], 1) for i in np.flatnonzero(columna)] + [(z[c], 1)]) >= 1
+    problema += lpSum(x) <= k
+    if inicial:
+        cubiertas = columnas[:, inicial].any(axis=1)
+        for i, variable in enumerate(x):
+            variable.setInitialValue(0)
+        for i in inicial:
+            x[i].setInitialValue(1)
+        for c, variable in enumerate(z):
+            variable.setInitialValue(0 if cubiertas[c] else 1)
+    problema.solve(COIN_CMD(path=ruta_cbc(), msg=msg, timeLimit=tiempo_limite,
+                            warmStart=bool(inicial)))
+
+    seleccion = sorted(i for i, variable in enumerate(x) if (variable.varValue or 0) > 0.5)
+    valor = float(desempaquetar(A.union(seleccion), n_columnas) @ pesos) if seleccion else 0.0
+    estado = 'Optimal' if problema.sol_status == 1 else 'Feasible'
+    if valor < valor_inicial:
+        seleccion, valor = inicial, valor_inicial
+    if estado == 'Optimal':
+        cota = valor
+    elif cota_superior is not None:
+        cota = float(cota_superior)
+    else:
+        cota = float(pesos[cubrible].sum())
+    return RefinamientoILP(k=int(k), seleccion=seleccion, valor=valor, cota_superior=max(cota, valor),
+                           estado=estado, valor_greedy=valor_inicial,
+                           tiempo_s=time.perf_counter() - inicio)
+
+
+def cobertura_maxima(A, k_max, pesos=None, k_refinar=(), tiempo_limite=None):
+    """
+    Curva greedy para k = 1..k_max y refinamiento ILP para los k indicados.
+
+    En matrices densas (cada punto al alcance de cientos de candidatos) la
+    relajación lineal es muy débil y CBC rara vez cierra el gap dentro del
+    límite de tiempo; la cota submodular del greedy suele ser más útil.
+
+    Args:
+        A: MatrizBits (candidatos × puntos de demanda)
+        k_max: Presupuesto máximo K
+        pesos: Peso opcional por punto de demanda
+        k_refinar: Presupuestos a resolver de forma exacta (<= k_max)
+        tiempo_limite: Segundos de CBC por cada refinamiento
+
+    Returns:
+        ResultadoCoberturaMaxima
+    """
+    resultado = greedy_perezoso(A, k_max, pesos)
+    for k in sorted(set(int(k) for k in k_refinar)):
+        if k < 1:
+            continue
+        if k > resultado.k_max:
+            # El greedy ya cubrió todo lo cubrible con menos sitios
+            continue
+        valor, cota = resultado.curva[k - 1], resultado.cota_superior[k - 1]
+        if valor >= cota:
+            # La cota submodular ya certifica el greedy: no hace falta CBC
+            resultado.refinamientos.append(RefinamientoILP(
+                k=k, seleccion=sorted(resultado.orden[:k]), valor=float(valor),
+                cota_superior=float(cota), estado='Optimal', valor_greedy=float(valor),
+                tiempo_s=0.0))
+            continue
+        resultado.refinamientos.append(refinar_ilp(
+            A, k, pesos, inicial=resultado.orden[:k], cota_superior=cota,
+            tiempo_limite=tiempo_limite))
+    return resultado
+
+
+def cobertura_maxima_desde_config(config, sensores=None, k_max=None, k_refinar=None,
+                                  directorio=None, I_coords=None, J_coords=None):
+    """
+    Cobertura máxima con el bloque `cobertura_maxima` de config.json.
+
+    La matriz de cobertura se obtiene umbralizando la matriz de pérdidas en
+    caché (results/cache, la misma del notebook). Si se indican sensores,
+    los puntos de demanda se ponderan por su densidad (ver
+    `pesos_por_sensores`).
+
+    Args:
+        config: Configuración
+        sensores: Coordenadas (S, 2) opcionales para ponderar la demanda
+        k_max, k_refinar: Reemplazan a los del bloque
+        directorio: Carpeta de la caché (False para no usarla)
+        I_coords, J_coords: Candidatos y puntos (por defecto, la grilla con I = J)
+
+    Returns:
+        ResultadoCoberturaMaxima (con las coordenadas de los candidatos)
+    """
+    opciones = config.get('cobertura_maxima', {})
+    if J_coords is None:
+        J_coords = grid_desde_config(config)
+    if I_coords is None:
+        I_coords = J_coords
+    if directorio is None:
+        directorio = ruta_proyecto(DIRECTORIO_CACHE)
+    modelo = ModeloPropagacion.desde_config(config)
+    perdidas = perdidas_desde_config(config, I_coords, J_coords, directorio=directorio or None)
+    A = perdidas.cobertura(modelo).a
+
+    pesos = None
+    if sensores is not None and len(sensores):
+        pesos = pesos_por_sensores(J_coords, sensores, opciones.get('peso_base', 0.0))
+    solver = {**config.get('solver', {}), **opciones.get('solver', {})}
+    resultado = cobertura_maxima(
+        A, k_max or opciones.get('k_max', 8), pesos,
+        k_refinar=opciones.get('k_refinar', []) if k_refinar is None else k_refinar,
+        tiempo_limite=solver.get('tiempo_limite_s'))
+    resultado.coordenadas = np.asarray(I_coords, dtype=float)
+    return resultado
+
+
+def resumen_cobertura_maxima(resultado):
+    """Líneas de texto con la curva cobertura-vs-k y los refinamientos."""
+    lineas = [
+        f"Peso total: {resultado.peso_total:g} (cubrible: {resultado.peso_cubrible:g})",
+        f"Greedy perezoso: {resultado.k_max} sitios, {resultado.evaluaciones:,} ganancias "
+        f"recalculadas, {resultado.tiempo_s * 1000:.1f} ms",
+        f"{'k':>3} {'Cubierto':>12} {'%':>7} {'Cota sup.':>12} {'Gap':>7}",
+    ]
+    for k in range(1, resultado.k_max + 1):
+        valor, cota = resultado.curva[k - 1], resultado.cota_superior[k - 1]
+        gap = (cota - valor) / cota if cota else 0.0
+        lineas.append(f"{k:>3} {valor:>12g} {100 * resultado.fraccion(k):>6.1f}% "
+                      f"{cota:>12g} {100 * gap:>6.2f}%")
+    if resultado.k_max and resultado.curva[-1] >= resultado.peso_cubrible:
+        lineas.append(f"Todo lo cubrible queda cubierto con {resultado.k_max} sitios")
+    for r in resultado.refinamientos:
+        lineas.append(f"ILP k = {r.k}: {r.valor:g} ({r.estado}, cota {r.cota_superior:g}), "
+                      f"greedy {r.valor_greedy:g} (+{r.mejora:g}), {r.tiempo_s:.1f} s")
+    return lineas
@@ -0,0 +1,31 @@
+"""
+Carga de configuración del proyecto (config.json)
+"""
+
+import json
+import os
+
+# Raíz del repositorio y ruta por defecto de config.json
+DIRECTORIO_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_CONFIG = os.path.join(DIRECTORIO_RAIZ, 'config.json')
+
+
+def cargar_config(ruta=None):
+    """
+    Carga el archivo de configuración JSON.
+
+    Args:
+        ruta: Ruta al archivo config.json (por defecto, el de la raíz del repositorio)
+
+    Returns:
+        Diccionario con la configuración
+    """
+    with open(ruta or RUTA_CONFIG, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def ruta_proyecto(ruta, directorio_base=None):
+    """Resuelve una ruta relativa de config.json contra la raíz del repositorio."""
+    if os.path.isabs(ruta):
+        return ruta
+    return os.path.join(directorio_base or DIRECTORIO_RAIZ, ruta)
@@ -0,0 +1,461 @@
+"""
+Exportación masiva del despliegue por bloques de filas
+
+Todos los sensores y gateways, con su asignación, distancia y margen de
+enlace, en CSV, columnas .npy (una por archivo, legibles con
+`np.load(..., mmap_mode='r')`), Parquet (si pyarrow está instalado) y
+GeoJSON. Las tablas son arreglos por columna (`TablaDespliegue`) y cada
+formato se escribe en bloques de `filas_por_bloque` filas, de modo que la
+memoria adicional no depende del número de sensores.
+
+La guía de instalación es una vista resumida de la misma tabla
+(`resumen_tabla`): carga, distancias y márgenes por gateway y los sensores
+más críticos; la lista completa está en los archivos exportados.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .asignacion import SIN_ASIGNAR
+from .configuracion import ruta_proyecto
+
+FORMATOS = ('csv', 'npy', 'parquet', 'geojson')
+FORMATOS_DEFECTO = ('csv', 'npy', 'geojson')
+
+FILAS_POR_BLOQUE_DEFECTO = 50000
+DIRECTORIO_EXPORTACION = 'results/exports'
+SENSORES_CRITICOS_DEFECTO = 10
+
+# Códigos de la columna 'estado' de los sensores
+ESTADOS = ('asignado', 'sin_cobertura', 'sin_capacidad')
+ASIGNADO, SIN_COBERTURA, SIN_CAPACIDAD = range(len(ESTADOS))
+
+# Radio medio de la Tierra para la proyección local del campo a WGS84
+_RADIO_TIERRA_M = 6371008.8
+
+# Decimales por columna en CSV y GeoJSON (el resto de los reales, '%.6g')
+_DECIMALES = {'x_m': 2, 'y_m': 2, 'lon': 7, 'lat': 7, 'margen_db': 2, 'distancia_m': 1,
+              'pdr': 4, 'distancia_media_m': 1, 'distancia_max_m': 1, 'margen_min_db': 2,
+              'margen_mediano_db': 2}
+
+
+@dataclass
+class TablaDespliegue:
+    """
+    Sensores y gateways del despliegue, como arreglos por columna.
+
+    Atributos:
+        sensores: Columnas de la tabla de sensores (nombre → arreglo (S,)):
+            sensor, x_m, y_m, [lon, lat], gateway (1..G; 0 = sin asignar),
+            mejor_gateway, margen_db (del enlace asignado o, si no hay, del
+            mejor), distancia_m, estado y, si hubo simulación,
+            spreading_factor y pdr
+        gateways: Columnas de la tabla de gateways (nombre → arreglo (G,)):
+            gateway, x_m, y_m, [lon, lat], sensores, capacidad y distancia y
+            margen de sus sensores (NaN si no tiene)
+        categorias: Columna categórica → nombres de sus códigos
+        origen_wgs84: (lon, lat) de la esquina (0, 0) del campo, o None si
+            las coordenadas quedan en metros del campo
+    """
+    sensores: dict
+    gateways: dict
+    categorias: dict = field(default_factory=lambda: {'estado': ESTADOS})
+    origen_wgs84: tuple = None
+
+    @property
+    def n_sensores(self):
+        return len(self.sensores['sensor'])
+
+    @property
+    def n_gateways(self):
+        return len(self.gateways['gateway'])
+
+
+def a_wgs84(coordenadas, origen_wgs84):
+    """
+    Coordenadas del campo en metros → (lon, lat) en grados.
+
+    Proyección equirectangular local centrada en la esquina (0, 0): el error
+    es de centímetros en un campo de pocos kilómetros.
+
+    Args:
+        coordenadas: Arreglo (N, 2) en metros (x hacia el este, y hacia el norte)
+        origen_wgs84: (lon, lat) de la esquina (0, 0)
+    """
+    lon0, lat0 = origen_wgs84
+    coordenadas = np.asarray(coordenadas, dtype=float).reshape(-1, 2)
+    lat = lat0 + np.degrees(coordenadas[:, 1] / _RADIO_TIERRA_M)
+    lon = lon0 + np.degrees(coordenadas[:, 0] / (_RADIO_TIERRA_M * np.cos(np.radians(lat0))))
+    return lon, lat
+
+
+def _estadisticas_por_gateway(gateway, distancia, margen, n_gateways):
+    """Distancia media y máxima y margen mínimo y mediano de los sensores de cada gateway."""
+    asignados = gateway != SIN_ASIGNAR
+    g, d, m = gateway[asignados], distancia[asignados], margen[asignados]
+    cuenta = np.bincount(g, minlength=n_gateways)
+    con_sensores = cuenta > 0
+    nan = np.full(n_gateways, np.nan)
+    media, maxima, minimo, mediana = nan.copy(), nan.copy(), nan.copy(), nan.copy()
+    media[con_sensores] = (np.bincount(g, weights=d, minlength=n_gateways)[con_sensores]
+                           / cuenta[con_sensores])
+    np.fmax.at(maxima, g, d)
+    # Un solo ordenamiento por (gateway, margen): el mínimo es el primero de
+    # cada grupo y la mediana (inferior) el del medio
+    orden = np.lexsort((m, g))
+    inicio = np.concatenate([[0], np.cumsum(cuenta)[:-1]])
+    minimo[con_sensores] = m[orden[inicio[con_sensores]]]
+    mediana[con_sensores] = m[orden[inicio[con_sensores] + (cuenta[con_sensores] - 1) // 2]]
+    return media, maxima, minimo, mediana
+
+
+def tabla_despliegue(sensores, gateways, gateway, margen_db, distancia_m, mejor_gateway=None,
+                     capacidad=None, spreading_factor=None, pdr=None, origen_wgs84=None):
+    """
+    Tabla del despliegue a partir de los arreglos de la asignación.
+
+    Args:
+        sensores: Coordenadas (S, 2) de los sensores
+        gateways: Coordenadas (G, 2) de los gateways
+        gateway: Gateway asignado por sensor (S,) o SIN_ASIGNAR
+        margen_db: Margen del enlace asignado o, si no hay, el mejor (S,)
+        distancia_m: Distancia al gateway asignado o al de mejor margen (S,)
+        mejor_gateway: Gateway de mayor margen por sensor (S,), si se conoce
+        capacidad: Sensores admitidos por gateway (G,), si se conoce
+        spreading_factor, pdr: SF y tasa de entrega simulados por sensor (S,)
+        origen_wgs84: (lon, lat) de la esquina (0, 0) para agregar columnas lon/lat
+
+    Returns:
+        TablaDespliegue
+    """
+    sensores = np.asarray(sensores, dtype=float).reshape(-1, 2)
+    gateways = np.asarray(gateways, dtype=float).reshape(-1, 2)
+    gateway = np.asarray(gateway, dtype=np.int64)
+    margen_db = np.asarray(margen_db, dtype=np.float32)
+    distancia_m = np.asarray(distancia_m, dtype=np.float32)
+    n_S, n_G = len(sensores), len(gateways)
+
+    estado = np.full(n_S, ASIGNADO, dtype=np.uint8)
+    sin_asignar = gateway == SIN_ASIGNAR
+    estado[sin_asignar & (margen_db < 0)] = SIN_COBERTURA
+    estado[sin_asignar & (margen_db >= 0)] = SIN_CAPACIDAD
+
+    columnas_s = {'sensor': np.arange(n_S, dtype=np.int64),
+                  'x_m': sensores[:, 0], 'y_m': sensores[:, 1]}
+    columnas_g = {'gateway': np.arange(1, n_G + 1, dtype=np.int32),
+                  'x_m': gateways[:, 0], 'y_m': gateways[:, 1]}
+    if origen_wgs84 is not None:
+        columnas_s['lon'], columnas_s['lat'] = a_wgs84(sensores, origen_wgs84)
+        columnas_g['lon'], columnas_g['lat'] = a_wgs84(gateways, origen_wgs84)
+    # Gateways numerados desde 1 como en los reportes; 0 = sin asignar
+    columnas_s['gateway'] = np.where(sin_asignar, 0, gateway + 1).astype(np.int32)
+    if mejor_gateway is not None:
+        columnas_s['mejor_gateway'] = (np.asarray(mejor_gateway) + 1).astype(np.int32)
+    columnas_s['margen_db'] = margen_db
+    columnas_s['distancia_m'] = distancia_m
+    columnas_s['estado'] = estado
+    if spreading_factor is not None:
+        columnas_s['spreading_factor'] = np.asarray(spreading_factor, dtype=np.int8)
+    if pdr is not None:
+        columnas_s['pdr'] = np.asarray(pdr, dtype=np.float32)
+
+    columnas_g['sensores'] = np.bincount(gateway[~sin_asignar], minlength=n_G).astype(np.int64)
+    if capacidad is not None:
+        columnas_g['capacidad'] = np.asarray(capacidad, dtype=np.int64)
+    (columnas_g['distancia_media_m'], columnas_g['distancia_max_m'],
+     columnas_g['margen_min_db'], columnas_g['margen_mediano_db']) = \
+        _estadisticas_por_gateway(gateway, distancia_m, margen_db, n_G)
+    return TablaDespliegue(sensores=columnas_s, gateways=columnas_g,
+                           origen_wgs84=None if origen_wgs84 is None else tuple(origen_wgs84))
+
+
+def tabla_desde_asignacion(asignacion, sensores, gateways, simulacion=None, origen_wgs84=None):
+    """
+    Tabla del despliegue de un ResultadoAsignacion (y, opcionalmente, de su simulación).
+
+    Args:
+        asignacion: ResultadoAsignacion
+        sensores, gateways: Coordenadas (S, 2) y (G, 2)
+        simulacion: ResultadoSimulacion de la misma asignación, o None
+        origen_wgs84: (lon, lat) de la esquina (0, 0) del campo
+    """
+    return tabla_despliegue(
+        sensores, gateways, asignacion.gateway, asignacion.margen_db, asignacion.distancia_m,
+        mejor_gateway=asignacion.mejor_gateway, capacidad=asignacion.capacidad,
+        spreading_factor=None if simulacion is None else simulacion.spreading_factor,
+        pdr=None if simulacion is None else simulacion.pdr_sensor, origen_wgs84=origen_wgs84)
+
+
+def _bloques(columnas, filas_por_bloque):
+    """Rebanadas de todas las columnas cada `filas_por_bloque` filas (al menos una, vacía)."""
+    n = len(next(iter(columnas.values())))
+    for inicio in range(0, max(n, 1), filas_por_bloque):
+        yield {nombre: c[inicio:inicio + filas_por_bloque] for nombre, c in columnas.items()}
+
+
+def _formato(nombre, arreglo, categorias):
+    if nombre in categorias:
+        return '%s'
+    if np.issubdtype(arreglo.dtype, np.integer):
+        return '%d'
+    return f"%.{_DECIMALES[nombre]}f" if nombre in _DECIMALES else '%.6g'
+
+
+def _listas(bloque, categorias):
+    """Columnas de un bloque como listas de Python (categorías ya traducidas)."""
+    return [np.asarray(categorias[n], dtype=object)[c].tolist() if n in categorias else c.tolist()
+            for n, c in bloque.items()]
+
+
+def escribir_csv(ruta, columnas, categorias=None, filas_por_bloque=FILAS_POR_BLOQUE_DEFECTO):
+    """
+    CSV con una fila por elemento, escrito por bloques.
+
+    Args:
+        ruta: Archivo de salida
+        columnas: Nombre → arreglo (todas del mismo largo)
+        categorias: Columna → nombres de sus códigos (se escriben los nombres)
+        filas_por_bloque: Filas formateadas por escritura
+    """
+    categorias = categorias or {}
+    formato = ','.join(_formato(n, c, categorias) for n, c in columnas.items()) + '\n'
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(columnas) + '\n')
+        for bloque in _bloques(columnas, filas_por_bloque):
+            f.write(''.join(formato % fila for fila in zip(*_listas(bloque, categorias))))
+
+
+def escribir_npy(directorio, columnas, categorias=None,
+                 filas_por_bloque=FILAS_POR_BLOQUE_DEFECTO):
+    """
+    Una columna por archivo .npy (mapeado en disco mientras se llena) y un
+    `esquema.json` con los tipos, el número de filas y las categorías.
+
+    Args:
+        directorio: Carpeta de salida (se crea)
+        columnas: Nombre → arreglo (todas del mismo largo)
+        categorias: Columna → nombres de sus códigos
+        filas_por_bloque: Filas copiadas por bloque
+    """
+    os.makedirs(directorio, exist_ok=True)
+    n = len(next(iter(columnas.values())))
+    destinos = {nombre: np.lib.format.open_memmap(os.path.join(directorio, f"{nombre}.npy"),
+                                                  mode='w+', dtype=c.dtype, shape=(n,))
+                for nombre, c in columnas.items()}
+    for inicio in range(0, n, filas_por_bloque):
+        for nombre, c in columnas.items():
+            destinos[nombre][inicio:inicio + filas_por_bloque] = c[inicio:inicio + filas_por_bloque]
+    for destino in destinos.values():
+        destino.flush()
+    esquema = {'filas': n, 'columnas': {nombre: str(c.dtype) for nombre, c in columnas.items()},
+               'categorias': {nombre: list(v) for nombre, v in (categorias or {}).items()
+                              if nombre in columnas}}
+    with open(os.path.join(directorio, 'esquema.json'), 'w', encoding='utf-8') as f:
+        json.dump(esquema, f, indent=1, ensure_ascii=False)
+
+
+def escribir_parquet(ruta, columnas, categorias=None, filas_por_bloque=FILAS_POR_BLOQUE_DEFECTO):
+    """
+    Parquet con un grupo de filas por bloque (columnas categóricas como diccionario).
+
+    Raises:
+        ImportError: Si pyarrow no está instalado
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("El formato 'parquet' requiere pyarrow (pip install pyarrow)")
+    categorias = categorias or {}
+    escritor = None
+    try:
+        for bloque in _bloques(columnas, filas_por_bloque):
+            arreglos = [pa.DictionaryArray.from_arrays(pa.array(c.astype(np.int8)),
+                                                       pa.array(list(categorias[n])))
+                        if n in categorias else pa.array(c)
+                        for n, c in bloque.items()]
+            tabla = pa.Table.from_arrays(arreglos, names=list(bloque))
+            if escritor is None:
+                escritor = pq.ParquetWriter(ruta, tabla.schema)
+            escritor.write_table(tabla)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+def _plantilla_feature(tipo, columnas, coordenadas, categorias):
+    """Formato % de un Feature GeoJSON con las columnas como propiedades."""
+    x, y = coordenadas
+    propiedades = [f'"tipo":"{tipo}"'] + [
+        f'"{n}":"%s"' if n in categorias else f'"{n}":{_formato(n, c, categorias)}'
+        for n, c in columnas.items() if n not in ('x_m', 'y_m', 'lon', 'lat')]
+    geometria = (f'"geometry":{{"type":"Point","coordinates":'
+                 f'[{_formato(x, columnas[x], categorias)},{_formato(y, columnas[y], categorias)}]}}')
+    return '{"type":"Feature",' + geometria + ',"properties":{' + ','.join(propiedades) + '}}'
+
+
+def _json_estricto(texto):
+    # '%f' escribe NaN e infinito como nan/inf, que JSON no admite
+    return texto.replace(':nan', ':null').replace(':inf', ':null').replace(':-inf', ':null')
+
+
+def escribir_geojson(ruta, tabla, filas_por_bloque=FILAS_POR_BLOQUE_DEFECTO):
+    """
+    FeatureCollection con un punto por gateway y por sensor, escrita por bloques.
+
+    Con `tabla.origen_wgs84` las coordenadas son lon/lat (RFC 7946); sin él
+    quedan en metros del campo y el miembro "sistema_coordenadas" lo indica.
+    Las propiedades son las columnas de cada tabla más "tipo" ('gateway' o
+    'sensor').
+
+    Args:
+        ruta: Archivo de salida
+        tabla: TablaDespliegue
+        filas_por_bloque: Features formateados por escritura
+    """
+    coordenadas = ('lon', 'lat') if tabla.origen_wgs84 is not None else ('x_m', 'y_m')
+    cabecera = {'type': 'FeatureCollection',
+                'sistema_coordenadas': 'WGS84' if tabla.origen_wgs84 is not None else 'campo_m'}
+    if tabla.origen_wgs84 is not None:
+        cabecera['origen_wgs84'] = list(tabla.origen_wgs84)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(cabecera, ensure_ascii=False)[:-1] + ',"features":[\n')
+        separador = ''
+        for tipo, columnas in (('gateway', tabla.gateways), ('sensor', tabla.sensores)):
+            plantilla = _plantilla_feature(tipo, columnas, coordenadas, tabla.categorias)
+            orden = [n for n in columnas if n not in ('x_m', 'y_m', 'lon', 'lat')]
+            for bloque in _bloques(columnas, filas_por_bloque):
+                listas = _listas({n: bloque[n] for n in list(coordenadas) + orden},
+                                 tabla.categorias)
+                features = ',\n'.join(plantilla % fila for fila in zip(*listas))
+                if features:
+                    f.write(separador + _json_estricto(features))
+                    separador = ',\n'
+        f.write('\n]}\n')
+
+
+def archivos_exportacion(formatos=FORMATOS_DEFECTO, prefijo='despliegue'):
+    """
+    Archivos (o carpetas, para 'npy') que escribe `exportar_despliegue`.
+
+    Returns:
+        Diccionario formato → lista de nombres relativos al directorio
+    """
+    archivos = {}
+    for formato in formatos:
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato desconocido '{formato}'; disponibles: {FORMATOS}")
+        if formato == 'geojson':
+            archivos[formato] = [f"{prefijo}.geojson"]
+        else:
+            extension = '' if formato == 'npy' else f".{formato}"
+            archivos[formato] = [f"{prefijo}_{tabla}{extension}" for tabla in ('sensores', 'gateways')]
+    return archivos
+
+
+def exportar_despliegue(tabla, directorio, formatos=FORMATOS_DEFECTO, prefijo='despliegue',
+                        filas_por_bloque=FILAS_POR_BLOQUE_DEFECTO):
+    """
+    Escribe la tabla completa del despliegue en los formatos pedidos.
+
+    Args:
+        tabla: TablaDespliegue
+        directorio: Carpeta de salida (se crea)
+        formatos: Subconjunto de FORMATOS
+        prefijo: Prefijo de los nombres de archivo
+        filas_por_bloque: Filas escritas por bloque
+
+    Returns:
+        Diccionario formato → lista de rutas escritas
+    """
+    os.makedirs(directorio, exist_ok=True)
+    escritores = {'csv': escribir_csv, 'npy': escribir_npy, 'parquet': escribir_parquet}
+    rutas = {}
+    for formato, nombres in archivos_exportacion(formatos, prefijo).items():
+        rutas[formato] = [os.path.join(directorio, nombre) for nombre in nombres]
+        if formato == 'geojson':
+            escribir_geojson(rutas[formato][0], tabla, filas_por_bloque)
+            continue
+        for ruta, columnas in zip(rutas[formato], (tabla.sensores, tabla.gateways)):
+            escritores[formato](ruta, columnas, tabla.categorias, filas_por_bloque)
+    return rutas
+
+
+def opciones_exportacion(config):
+    """Bloque `exportacion` de config.json con los valores por defecto completos."""
+    opciones = config.get('exportacion', {})
+    return {
+        'formatos': tuple(opciones.get('formatos') or FORMATOS_DEFECTO),
+        'directorio': opciones.get('directorio', DIRECTORIO_EXPORTACION),
+        'filas_por_bloque': opciones.get('filas_por_bloque', FILAS_POR_BLOQUE_DEFECTO),
+        'origen_wgs84': opciones.get('origen_wgs84'),
+        'sensores_criticos': opciones.get('sensores_criticos', SENSORES_CRITICOS_DEFECTO),
+    }
+
+
+def exportacion_desde_config(config, tabla, prefijo='despliegue', directorio=None):
+    """
+    Exporta la tabla según el bloque `exportacion` de config.json.
+
+    Args:
+        config: Configuración
+        tabla: TablaDespliegue (construida con `exportacion.origen_wgs84` si
+            se quieren coordenadas geográficas)
+        prefijo: Prefijo de los nombres de archivo
+        directorio: Carpeta de salida (por defecto, `exportacion.directorio`)
+
+    Returns:
+        Diccionario formato → lista de rutas escritas
+    """
+    opciones = opciones_exportacion(config)
+    return exportar_despliegue(tabla, directorio or ruta_proyecto(opciones['directorio']),
+                               opciones['formatos'], prefijo, opciones['filas_por_bloque'])
+
+
+def _linea_sensor(tabla, s):
+    c = tabla.sensores
+    destino = f"GW{c['gateway'][s]}" if c['gateway'][s] else "sin asignar"
+    return (f"Sensor {c['sensor'][s]:>6}: ({c['x_m'][s]:7.1f}, {c['y_m'][s]:7.1f}) → {destino}, "
+            f"{c['distancia_m'][s]:6.1f} m, margen {c['margen_db'][s]:5.1f} dB")
+
+
+def resumen_tabla(tabla, n_criticos=SENSORES_CRITICOS_DEFECTO):
+    """
+    Líneas de texto que resumen la tabla: estadísticas por gateway y los
+    sensores de menor margen, sin enlace o sin capacidad (hasta `n_criticos`
+    de cada grupo).
+    """
+    g = tabla.gateways
+    lineas = [f"{'Gateway':<9}{'X (m)':>9}{'Y (m)':>9}{'Sensores':>10}{'Dist. media':>13}"
+              f"{'Dist. máx':>11}{'Margen mín':>12}{'Margen med.':>13}"]
+    for k in range(tabla.n_gateways):
+        linea = (f"GW{g['gateway'][k]:<7}{g['x_m'][k]:>9.1f}{g['y_m'][k]:>9.1f}"
+                 f"{g['sensores'][k]:>10,}")
+        if g['sensores'][k]:
+            linea += (f"{g['distancia_media_m'][k]:>11.1f} m{g['distancia_max_m'][k]:>9.1f} m"
+                      f"{g['margen_min_db'][k]:>9.1f} dB{g['margen_mediano_db'][k]:>10.1f} dB")
+        lineas.append(linea)
+
+    estado, margen = tabla.sensores['estado'], tabla.sensores['margen_db']
+    grupos = [('Sensores asignados de menor margen', ASIGNADO),
+              ('Sensores sin enlace viable (margen al mejor gateway)', SIN_COBERTURA),
+              ('Sensores sin capacidad en sus gateways', SIN_CAPACIDAD)]
+    for titulo, codigo in grupos:
+        indices = np.flatnonzero(estado == codigo)
+        if not len(indices) or (codigo == ASIGNADO and not n_criticos):
+            continue
+        # Los n de menor margen sin ordenar toda la tabla
+        n = min(n_criticos, len(indices))
+        if n < len(indices):
+            indices = indices[np.argpartition(margen[indices], n - 1)[:n]]
+        indices = indices[np.argsort(margen[indices], kind='stable')]
+        total = int(np.count_nonzero(estado == codigo))
+        lineas.append(f"{titulo} ({n} de {total:,}):" if codigo == ASIGNADO
+                      else f"{titulo} ({total:,}):")
+        lineas += [f"  {_linea_sensor(tabla, s)}" for s in indices]
+        if total > n and codigo != ASIGNADO:
+            lineas.append(f"  ... y {total - n:,} más (lista completa en los archivos exportados)")
+    return lineas
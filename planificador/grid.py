@@ -0,0 +1,45 @@
+"""
+Discretización del campo en puntos de demanda (conjunto J)
+"""
+
+import numpy as np
+
+
+def _centros(longitud, celda):
+    """
+    Centros de celda a lo largo de un eje: C/2, C/2 + C, ... mientras < L.
+
+    Se acumula igual que el bucle `while x < L_x: ... x += C_x` del notebook
+    (np.add.accumulate suma en orden), de modo que las coordenadas son
+    idénticas bit a bit incluso con tamaños de celda no enteros.
+    """
+    n_max = int(np.ceil(longitud / celda)) + 1
+    pasos = np.full(n_max, float(celda))
+    pasos[0] = celda / 2
+    centros = np.add.accumulate(pasos)
+    return centros[centros < longitud]
+
+
+def generar_puntos_demanda(L_x, L_y, C_x, C_y):
+    """
+    Genera los centros de las celdas de demanda en orden fila a fila (x rápido).
+
+    Args:
+        L_x, L_y: Dimensiones del campo en metros
+        C_x, C_y: Tamaño de celda en metros
+
+    Returns:
+        Array (n, 2) con las coordenadas (x, y) de cada punto de demanda
+    """
+    xs = _centros(L_x, C_x)
+    ys = _centros(L_y, C_y)
+    X, Y = np.meshgrid(xs, ys)
+    return np.column_stack([X.ravel(), Y.ravel()])
+
+
+def grid_desde_config(config):
+    """Puntos de demanda según los bloques `campo` y `discretizacion` de config.json."""
+    return generar_puntos_demanda(config['campo']['dimension_x_m'],
+                                  config['campo']['dimension_y_m'],
+                                  config['discretizacion']['celda_x_m'],
+                                  config['discretizacion']['celda_y_m'])
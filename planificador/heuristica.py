@@ -0,0 +1,282 @@
+"""
+Solver heurístico para el Set Cover con cota inferior Lagrangiana
+
+Combina:
+  - Greedy (por conteo de puntos nuevos o ponderado por multiplicadores)
+  - Optimización por subgradiente de la relajación Lagrangiana de las
+    restricciones de cobertura, que da una cota inferior válida
+  - Búsqueda local: eliminación de columnas redundantes y movimientos de
+    intercambio 2-por-1 (dos gateways reemplazados por uno)
+
+Trabaja directamente sobre MatrizBits (candidatos × puntos).
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .bitset import MatrizBits, desempaquetar, empaquetar, mascara_completa
+
+# Tolerancia para redondear la cota Lagrangiana al entero superior (L se
+# acumula en float64: el error de redondeo queda muy por debajo de este valor)
+_EPS = 1e-6
+
+# Hasta este número de enlaces se desempaqueta A una vez en float64 para los
+# productos A·u del subgradiente (256 MB); por encima se opera sobre los bits.
+# No se usa float32: su error en L (~1e-6) basta para redondear la cota al
+# entero equivocado y certificar como óptima una cobertura que no lo es
+MAX_ENLACES_DENSO = 32 * 1024 * 1024
+
+
+@dataclass
+class ResultadoHeuristica:
+    """
+    Cobertura factible con cota inferior certificada.
+
+    Atributos:
+        seleccion: Índices de fila (candidatos) elegidos, ordenados
+        cota_inferior: Cota inferior válida del óptimo (entera)
+        iteraciones: Iteraciones de subgradiente realizadas
+        tiempo_s: Tiempo total
+        historial: Lista de (tiempo_s, cota_superior, cota_inferior) en cada mejora
+    """
+    seleccion: list
+    cota_inferior: int
+    iteraciones: int
+    tiempo_s: float
+    historial: list = field(default_factory=list)
+
+    @property
+    def valor(self):
+        return len(self.seleccion)
+
+    @property
+    def gap(self):
+        """Gap relativo (UB - LB) / UB."""
+        return (self.valor - self.cota_inferior) / self.valor if self.valor else 0.0
+
+    @property
+    def optimo(self):
+        return self.valor <= self.cota_inferior
+
+
+def greedy(A, pesos=None, inicial=None, producto=None):
+    """
+    Greedy clásico: elige repetidamente el candidato que cubre más puntos nuevos.
+
+    Args:
+        A: MatrizBits (candidatos × puntos)
+        pesos: Peso opcional por punto; si se indica, se maximiza la suma de
+            pesos de los puntos nuevos (greedy Lagrangiano con u_j como pesos)
+        inicial: Candidatos ya elegidos
+        producto: Función v → A @ v (por defecto A.producto)
+
+    Returns:
+        Lista de candidatos elegidos (o None si algún punto no tiene cobertura)
+    """
+    seleccion = list(inicial or [])
+    n_columnas = A.n_columnas
+    sin_cubrir = mascara_completa(n_columnas)
+    if seleccion:
+        sin_cubrir &= ~A.union(seleccion)
+
+    while sin_cubrir.any():
+        nuevos = A.contar_cubiertos(sin_cubrir)
+        if pesos is None:
+            puntaje = nuevos.astype(np.float64)
+        else:
+            # Desempate por número de puntos para no elegir filas sin puntos nuevos
+            puntaje = (producto or A.producto)(
+                np.where(desempaquetar(sin_cubrir, n_columnas), pesos, 0.0))
+            puntaje = np.where(nuevos > 0, puntaje + 1e-9 * nuevos, -np.inf)
+        mejor = int(np.argmax(puntaje))
+        if nuevos[mejor] == 0:
+            return None
+        seleccion.append(mejor)
+        sin_cubrir &= ~A.fila(mejor)
+    return seleccion
+
+
+def eliminar_redundantes(A, seleccion, orden=None):
+    """
+    Quita candidatos cuyos puntos están todos cubiertos por otro elegido.
+
+    Args:
+        A: MatrizBits
+        seleccion: Cobertura factible
+        orden: Prioridad para intentar quitar (por defecto, los que cubren menos)
+
+    Returns:
+        Nueva lista sin columnas redundantes
+    """
+    seleccion = list(seleccion)
+    conteo = A.conteo_columnas(seleccion)
+    if orden is None:
+        tamanos = A.contar_cubiertos(filas=seleccion)
+        orden = [seleccion[k] for k in np.argsort(tamanos, kind='stable')]
+    for i in orden:
+        puntos = desempaquetar(A.fila(i), A.n_columnas)
+        if np.all(conteo[puntos] >= 2):
+            conteo[puntos] -= 1
+            seleccion.remove(i)
+    return sorted(seleccion)
+
+
+def intercambio_2_por_1(A, seleccion, max_pares=2000):
+    """
+    Búsqueda local: reemplaza pares de candidatos por uno solo que cubra
+    todos los puntos que solo ellos cubrían. Repite mientras mejore.
+
+    Args:
+        A: MatrizBits
+        seleccion: Cobertura factible
+        max_pares: Pares evaluados como máximo por pasada
+
+    Returns:
+        Cobertura factible con igual o menor número de candidatos
+    """
+    seleccion = sorted(seleccion)
+    mejora = True
+    while mejora and len(seleccion) >= 2:
+        mejora = False
+        conteo = A.conteo_columnas(seleccion)
+        filas = {i: desempaquetar(A.fila(i), A.n_columnas) for i in seleccion}
+        # Pares con mayor solapamiento primero (los más prometedores)
+        pares = [(i, k) for p, i in enumerate(seleccion) for k in seleccion[p + 1:]]
+        pares.sort(key=lambda par: -np.count_nonzero(filas[par[0]] & filas[par[1]]))
+        for i, k in pares[:max_pares]:
+            huerfanos = (conteo - filas[i] - filas[k]) == 0
+            objetivo = int(huerfanos.sum())
+            if objetivo == 0:
+                candidato = None
+            else:
+                cubre = A.contar_cubiertos(empaquetar(huerfanos))
+                mejores = np.flatnonzero(cubre == objetivo)
+                if len(mejores) == 0:
+                    continue
+                candidato = int(mejores[0])
+            seleccion = [s for s in seleccion if s not in (i, k)]
+            if candidato is not None and candidato not in seleccion:
+                seleccion.append(candidato)
+            seleccion.sort()
+            mejora = True
+            break
+    return seleccion
+
+
+def mejorar(A, seleccion):
+    """Aplica eliminación de redundantes e intercambios 2-por-1."""
+    return eliminar_redundantes(A, intercambio_2_por_1(A, eliminar_redundantes(A, seleccion)))
+
+
+def resolver_lagrangiano(A, max_iteraciones=1000, tiempo_limite=None, paso_inicial=2.0,
+                         paciencia=20, paso_minimo=0.005, frecuencia_heuristica=10,
+                         inicial=None):
+    """
+    Heurística Lagrangiana para min Σ x_i s.a. Σ_i a_ij x_i ≥ 1.
+
+    Relaja las restricciones de cobertura con multiplicadores u_j ≥ 0:
+        L(u) = Σ_j u_j + Σ_i min(0, 1 - Σ_j a_ij u_j)
+    Cualquier L(u) es cota inferior del óptimo; los u se ajustan por
+    subgradiente (paso de Polyak con la mejor cota superior). Periódicamente
+    se construye una cobertura con greedy ponderado por u y búsqueda local.
+
+    Args:
+        A: MatrizBits (candidatos × puntos) o matriz densa
+        max_iteraciones: Límite de iteraciones de subgradiente
+        tiempo_limite: Segundos máximos (None = sin límite)
+        paso_inicial: Factor λ inicial del paso
+        paciencia: Iteraciones sin mejora de cota antes de dividir λ por 2
+        paso_minimo: Se detiene cuando λ cae por debajo de este valor
+        frecuencia_heuristica: Cada cuántas iteraciones se intenta mejorar la cota superior
+        inicial: Candidatos de una solución previa (arranque en caliente); se
+            completa con greedy y compite con la solución greedy desde cero
+
+    Returns:
+        ResultadoHeuristica (seleccion vacía y cota infinita si es infactible)
+    """
+    inicio = time.perf_counter()
+    A = A if isinstance(A, MatrizBits) else MatrizBits.desde_denso(A)
+    n_I, n_J = A.shape
+    if n_J == 0:
+        return ResultadoHeuristica([], 0, 0, time.perf_counter() - inicio)
+
+    if n_I * n_J <= MAX_ENLACES_DENSO:
+        denso = A.a_denso(dtype=np.float64)
+        producto = lambda v: denso @ v
+        cobertura_x = lambda x: denso[x].sum(axis=0)
+    else:
+        producto = A.producto
+        cobertura_x = lambda x: A.conteo_columnas(np.flatnonzero(x))
+
+    historial = []
+    mejor = greedy(A)
+    if mejor is None:
+        return ResultadoHeuristica([], math.inf, 0, time.perf_counter() - inicio)
+    mejor = mejorar(A, mejor)
+    if inicial is not None and len(inicial):
+        previa = mejorar(A, greedy(A, inicial=inicial))
+        if len(previa) < len(mejor):
+            mejor = previa
+    cota_inf = 1
+    historial.append((time.perf_counter() - inicio, len(mejor), cota_inf))
+
+    # u_j inicial: 1 / (mayor número de puntos que cubre un candidato de j)
+    tamanos = A.contar_cubiertos().astype(np.float64)
+    maximo_por_punto = np.zeros(n_J)
+    for i in np.argsort(tamanos):
+        maximo_por_punto[desempaquetar(A.fila(i), n_J)] = tamanos[i]
+    u = 1.0 / np.maximum(maximo_por_punto, 1.0)
+
+    lam = paso_inicial
+    sin_mejora = 0
+    mejor_L = -math.inf
+    iteracion = 0
+    for iteracion in range(1, max_iteraciones + 1):
+        costos_reducidos = 1.0 - producto(u)
+        x = costos_reducidos < 0
+        L = u.sum() + costos_reducidos[x].sum()
+        if L > mejor_L + _EPS:
+            mejor_L = L
+            sin_mejora = 0
+            nueva_cota = max(cota_inf, math.ceil(L - _EPS))
+            if nueva_cota > cota_inf:
+                cota_inf = nueva_cota
+                historial.append((time.perf_counter() - inicio, len(mejor), cota_inf))
+        else:
+            sin_mejora += 1
+            if sin_mejora >= paciencia:
+                lam /= 2
+                sin_mejora = 0
+
+        if iteracion % frecuencia_heuristica == 0:
+            # Cobertura Lagrangiana: columnas con costo reducido negativo + greedy con pesos u
+            candidata = greedy(A, pesos=u, inicial=list(np.flatnonzero(x)), producto=producto)
+            if candidata is not None:
+                candidata = eliminar_redundantes(A, candidata)
+                # Los intercambios 2-por-1 solo se intentan si la candidata está
+                # cerca de la incumbente (a pocos intercambios de mejorarla)
+                if len(candidata) <= len(mejor) + 2:
+                    candidata = mejorar(A, candidata)
+                if len(candidata) < len(mejor):
+                    mejor = candidata
+                    historial.append((time.perf_counter() - inicio, len(mejor), cota_inf))
+
+        if len(mejor) <= cota_inf or lam < paso_minimo:
+            break
+        if tiempo_limite is not None and time.perf_counter() - inicio > tiempo_limite:
+            break
+
+        # Subgradiente g_j = 1 - Σ_i a_ij x_i (sin empujar u_j = 0 hacia negativo)
+        g = 1.0 - cobertura_x(x)
+        g[(u <= 0) & (g < 0)] = 0.0
+        norma = float(g @ g)
+        if norma == 0:
+            # x es una cobertura exacta: la cota es L y la solución x es factible
+            break
+        u = np.maximum(0.0, u + lam * (len(mejor) - L) / norma * g)
+
+    return ResultadoHeuristica(sorted(int(i) for i in mejor), int(cota_inf), iteracion,
+                               time.perf_counter() - inicio, historial)
@@ -0,0 +1,479 @@
+"""
+Instrumentación por etapas en eventos JSON lines
+
+Cada etapa medida emite un evento con tiempo de reloj y de CPU (del proceso
+y de los subprocesos terminados, p. ej. CBC), pico de memoria residente,
+forma, tipo y tamaño de los arreglos registrados y las métricas que la
+etapa agregue (densidad de cobertura, estadísticas del solver...). Medir
+una etapa cuesta unas pocas llamadas al sistema, de modo que la
+instrumentación puede quedar activa siempre; el perfilado (cProfile o
+muestreo de la pila) es opcional y se pide por etapa.
+
+    instrumentacion = instrumentacion_desde_config(config, origen='pipeline')
+    with instrumentacion.etapa('grilla'):
+        J = grid_desde_config(config)
+        registrar_arreglo('J', J)
+
+`registrar`, `registrar_arreglo` y `registrar_cobertura` agregan datos a la
+etapa en curso y no hacen nada fuera de una: el motor las llama (matriz de
+pérdidas, cobertura, Set Cover) sin saber si alguien mide. En notebooks y
+scripts planos, `iniciar` y `terminar` abren y cierran una etapa sin `with`.
+
+El pico de memoria residente se reinicia al entrar a cada etapa de primer
+nivel escribiendo en /proc/self/clear_refs (Linux); donde no se puede, es
+el máximo del proceso desde su inicio (`rss_pico_acumulado`).
+"""
+
+import cProfile
+import datetime
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+
+from .configuracion import ruta_proyecto
+
+ARCHIVO_DEFECTO = 'results/logs/instrumentacion.jsonl'
+
+MODOS_PERFIL = ('cprofile', 'muestreo')
+
+INTERVALO_MUESTREO_DEFECTO_S = 0.005
+TOP_PERFIL_DEFECTO = 15
+
+# Etapas en curso (la última es la que reciben `registrar` y `registrar_arreglo`)
+_PILA = []
+
+
+def _reiniciar_pico_rss():
+    """Reinicia el pico de memoria residente del proceso (Linux); True si se pudo."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _pico_rss_mb():
+    """Pico de memoria residente del proceso (VmHWM, o ru_maxrss si no hay /proc)."""
+    try:
+        with open('/proc/self/status') as f:
+            for linea in f:
+                if linea.startswith('VmHWM:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo / 2**20 if sys.platform == 'darwin' else maximo / 1024
+
+
+def _pico_rss_subprocesos_mb():
+    """Mayor pico de memoria residente entre los subprocesos ya esperados."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return maximo / 2**20 if sys.platform == 'darwin' else maximo / 1024
+
+
+def _cpu_subprocesos_s():
+    tiempos = os.times()
+    return tiempos.children_user + tiempos.children_system
+
+
+def describir_arreglo(arreglo):
+    """Forma, tipo y megabytes de un arreglo (o de un objeto con `shape`/`nbytes`)."""
+    if arreglo is None:
+        return None
+    forma = getattr(arreglo, 'shape', None)
+    dtype = getattr(arreglo, 'dtype', None)
+    nbytes = getattr(arreglo, 'nbytes', None)
+    return {
+        'forma': list(forma) if forma is not None else None,
+        'dtype': str(dtype) if dtype is not None else type(arreglo).__name__,
+        'mb': round(nbytes / 2**20, 3) if nbytes is not None else None,
+        'mapeado': isinstance(getattr(arreglo, 'palabras', getattr(arreglo, 'valores', arreglo)),
+                              np.memmap),
+    }
+
+
+def _json(valor):
+    """Convierte escalares y arreglos de NumPy para json.dumps."""
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    raise TypeError(f"{type(valor).__name__} no es serializable")
+
+
+def registrar(**metricas):
+    """Agrega métricas (valores serializables en JSON) a la etapa en curso."""
+    if _PILA:
+        _PILA[-1].metricas.update(metricas)
+
+
+def registrar_arreglo(nombre, arreglo):
+    """Agrega forma, tipo y tamaño de un arreglo a la etapa en curso."""
+    if _PILA:
+        _PILA[-1].arreglos[nombre] = describir_arreglo(arreglo)
+
+
+def registrar_cobertura(cobertura):
+    """Arreglos `a` y `enlaces_obstruidos`, enlaces y densidad de un ResultadoCobertura."""
+    if not _PILA:
+        return
+    registrar_arreglo('a', cobertura.a)
+    registrar_arreglo('enlaces_obstruidos', cobertura.enlaces_obstruidos)
+    registrar(enlaces_totales=cobertura.enlaces_totales,
+              enlaces_viables=cobertura.enlaces_viables, densidad=cobertura.densidad)
+
+
+class _Muestreo:
+    """Muestreo periódico de la pila de un hilo (perfil estadístico barato)."""
+
+    def __init__(self, hilo, intervalo):
+        self.hilo = hilo
+        self.intervalo = intervalo
+        self.propias = Counter()
+        self.acumuladas = Counter()
+        self.muestras = 0
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def _muestrear(self):
+        while not self._detener.wait(self.intervalo):
+            marco = sys._current_frames().get(self.hilo)
+            if marco is None:
+                continue
+            self.muestras += 1
+            vistas = set()
+            propia = True
+            while marco is not None:
+                codigo = marco.f_code
+                funcion = f"{os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno}" \
+                          f"({codigo.co_name})"
+                if propia:
+                    self.propias[funcion] += 1
+                    propia = False
+                if funcion not in vistas:
+                    self.acumuladas[funcion] += 1
+                    vistas.add(funcion)
+                marco = marco.f_back
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self, top):
+        self._detener.set()
+        self._hilo.join()
+        muestras = max(self.muestras, 1)
+        return {
+            'modo': 'muestreo',
+            'muestras': self.muestras,
+            'intervalo_s': self.intervalo,
+            'funciones': [{'funcion': f, 'fraccion_propia': round(n / muestras, 4),
+                           'fraccion_acumulada': round(self.acumuladas[f] / muestras, 4)}
+                          for f, n in self.propias.most_common(top)],
+        }
+
+
+class _Perfil:
+    """cProfile de una etapa; guarda el .prof si hay carpeta de perfiles."""
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta
+        self.perfil = cProfile.Profile()
+
+    def iniciar(self):
+        self.perfil.enable()
+
+    def detener(self, top):
+        self.perfil.disable()
+        if self.ruta:
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+            self.perfil.dump_stats(self.ruta)
+        estadisticas = pstats.Stats(self.perfil, stream=io.StringIO()).stats
+        filas = sorted(estadisticas.items(), key=lambda e: -e[1][3])[:top]
+        return {
+            'modo': 'cprofile',
+            'archivo': self.ruta,
+            'funciones': [{'funcion': f"{os.path.basename(archivo)}:{linea}({nombre})",
+                           'llamadas': llamadas, 't_propio_s': round(propio, 4),
+                           't_acumulado_s': round(acumulado, 4)}
+                          for (archivo, linea, nombre), (_, llamadas, propio, acumulado, _)
+                          in filas],
+        }
+
+
+class _Etapa:
+    """Datos de una etapa en curso."""
+
+    def __init__(self, nombre, atributos):
+        self.nombre = nombre
+        self.atributos = atributos
+        self.arreglos = {}
+        self.metricas = {}
+        self.medida = None
+
+
+class Instrumentacion:
+    """
+    Emisor de eventos JSON lines por etapa.
+
+    Atributos:
+        archivo: Archivo JSON lines de salida (None = solo en memoria)
+        origen: Programa que emite ('pipeline', 'notebook', nombre del script)
+        perfilar: Etapas a perfilar (True = todas)
+        modo_perfil: 'cprofile' o 'muestreo'
+        intervalo_muestreo_s: Período del muestreo de la pila
+        top_perfil: Funciones informadas por perfil
+        directorio_perfiles: Carpeta de los .prof de cProfile (None = no guardar)
+        activa: Si False, las etapas no miden ni emiten nada
+        ejecucion: Identificador de esta ejecución en todos sus eventos
+        medidas: Diccionario etapa → último evento de esa etapa
+    """
+
+    def __init__(self, archivo=None, origen='', perfilar=(), modo_perfil='cprofile',
+                 intervalo_muestreo_s=INTERVALO_MUESTREO_DEFECTO_S,
+                 top_perfil=TOP_PERFIL_DEFECTO, directorio_perfiles=None, activa=True):
+        if modo_perfil not in MODOS_PERFIL:
+            raise ValueError(f"modo_perfil debe ser uno de {MODOS_PERFIL}: '{modo_perfil}'")
+        self.archivo = archivo
+        self.origen = origen
+        self.perfilar = perfilar if perfilar is True else set(perfilar or ())
+        self.modo_perfil = modo_perfil
+        self.intervalo_muestreo_s = intervalo_muestreo_s
+        self.top_perfil = top_perfil
+        self.directorio_perfiles = directorio_perfiles
+        self.activa = activa
+        self.ejecucion = f"{datetime.datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+        self.medidas = {}
+        self._abiertas = []
+
+    def evento(self, tipo, **datos):
+        """Emite un evento {'tipo', 'ejecucion', 'origen', 'fecha', **datos}."""
+        evento = {'tipo': tipo, 'ejecucion': self.ejecucion, 'origen': self.origen,
+                  'fecha': datetime.datetime.now().isoformat(timespec='milliseconds'), **datos}
+        linea = json.dumps(evento, ensure_ascii=False, default=_json)
+        if self.activa and self.archivo:
+            directorio = os.path.dirname(self.archivo)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            with open(self.archivo, 'a', encoding='utf-8') as f:
+                f.write(linea + '\n')
+        # El evento devuelto es el mismo que se escribió (tipos de NumPy convertidos)
+        return json.loads(linea)
+
+    def _perfilador(self, nombre):
+        if not (self.perfilar is True or nombre in self.perfilar):
+            return None
+        if self.modo_perfil == 'muestreo':
+            return _Muestreo(threading.get_ident(), self.intervalo_muestreo_s)
+        ruta = None
+        if self.directorio_perfiles:
+            ruta = os.path.join(self.directorio_perfiles, f"{self.ejecucion}_{nombre}.prof")
+        return _Perfil(ruta)
+
+    @contextmanager
+    def etapa(self, nombre, **atributos):
+        """
+        Mide el bloque como una etapa y emite su evento al salir (también si falla).
+
+        Args:
+            nombre: Nombre de la etapa
+            **atributos: Datos fijos del evento (p. ej. desde_cache=True)
+
+        Yields:
+            El objeto de la etapa; tras el bloque, `.medida` es el evento emitido
+        """
+        actual = _Etapa(nombre, atributos)
+        if not self.activa:
+            yield actual
+            return
+        reiniciado = not _PILA and _reiniciar_pico_rss()
+        rss_subprocesos = _pico_rss_subprocesos_mb()
+        perfilador = self._perfilador(nombre)
+        _PILA.append(actual)
+        error = None
+        inicio_cpu, inicio_cpu_hijos = time.process_time(), _cpu_subprocesos_s()
+        inicio = time.perf_counter()
+        if perfilador is not None:
+            perfilador.iniciar()
+        try:
+            yield actual
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            perfil = perfilador.detener(self.top_perfil) if perfilador is not None else None
+            t_pared = time.perf_counter() - inicio
+            t_cpu = time.process_time() - inicio_cpu
+            t_cpu_hijos = _cpu_subprocesos_s() - inicio_cpu_hijos
+            _PILA.pop()
+            rss = _pico_rss_mb()
+            rss_hijos = _pico_rss_subprocesos_mb()
+            datos = {
+                'etapa': nombre,
+                **atributos,
+                't_pared_s': round(t_pared, 4),
+                't_cpu_s': round(t_cpu, 4),
+                't_cpu_subprocesos_s': round(t_cpu_hijos, 4),
+                'rss_pico_mb': None if rss is None else round(rss, 1),
+                'rss_pico_acumulado': not reiniciado,
+                'rss_pico_subprocesos_mb': (round(rss_hijos, 1) if rss_hijos is not None
+                                            and rss_hijos > (rss_subprocesos or 0) else None),
+                'arreglos': actual.arreglos,
+                'metricas': actual.metricas,
+            }
+            if perfil is not None:
+                datos['perfil'] = perfil
+            if error is not None:
+                datos['error'] = error
+            actual.medida = self.evento('etapa', **datos)
+            self.medidas[nombre] = actual.medida
+
+    def iniciar(self, nombre, **atributos):
+        """
+        Abre una etapa sin bloque `with` (celdas de notebook, scripts planos).
+
+        Cada `iniciar` se cierra con `terminar`; las etapas abiertas se anidan.
+        """
+        contexto = self.etapa(nombre, **atributos)
+        actual = contexto.__enter__()
+        self._abiertas.append((contexto, actual))
+        return actual
+
+    def terminar(self):
+        """Cierra la última etapa abierta con `iniciar` y devuelve su evento."""
+        contexto, actual = self._abiertas.pop()
+        contexto.__exit__(None, None, None)
+        return actual.medida
+
+
+def instrumentacion_desde_config(config, origen='', perfilar=None, modo_perfil=None):
+    """
+    Instrumentación según el bloque `instrumentacion` de config.json.
+
+    Args:
+        config: Configuración
+        origen: Programa que emite los eventos
+        perfilar: Etapas a perfilar (reemplaza instrumentacion.perfilar)
+        modo_perfil: 'cprofile' o 'muestreo' (reemplaza instrumentacion.modo_perfil)
+    """
+    opciones = config.get('instrumentacion', {})
+    archivo = opciones.get('archivo', ARCHIVO_DEFECTO)
+    directorio_perfiles = opciones.get('directorio_perfiles')
+    return Instrumentacion(
+        archivo=ruta_proyecto(archivo) if archivo else None,
+        origen=origen,
+        perfilar=perfilar if perfilar is not None else opciones.get('perfilar', []),
+        modo_perfil=modo_perfil or opciones.get('modo_perfil', 'cprofile'),
+        intervalo_muestreo_s=opciones.get('intervalo_muestreo_s', INTERVALO_MUESTREO_DEFECTO_S),
+        top_perfil=opciones.get('top_perfil', TOP_PERFIL_DEFECTO),
+        directorio_perfiles=ruta_proyecto(directorio_perfiles) if directorio_perfiles else None,
+        activa=opciones.get('activa', True))
+
+
+def cargar_eventos(ruta=None, ejecucion=None):
+    """
+    Eventos de un archivo JSON lines.
+
+    Args:
+        ruta: Archivo (por defecto, el de `ARCHIVO_DEFECTO`)
+        ejecucion: Solo los de esta ejecución ('ultima' = la última del archivo)
+    """
+    ruta = ruta_proyecto(ruta or ARCHIVO_DEFECTO)
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, encoding='utf-8') as f:
+        eventos = [json.loads(linea) for linea in f if linea.strip()]
+    if ejecucion == 'ultima' and eventos:
+        ejecucion = eventos[-1]['ejecucion']
+    if ejecucion is not None:
+        eventos = [e for e in eventos if e['ejecucion'] == ejecucion]
+    return eventos
+
+
+def resumen_instrumentacion(medidas):
+    """
+    Líneas de texto con tiempos, memoria, arreglos y estadísticas del solver.
+
+    Args:
+        medidas: Eventos de etapa (lista, o diccionario etapa → evento)
+    """
+    medidas = list(medidas.values()) if isinstance(medidas, dict) else list(medidas)
+    lineas = [f"{'Etapa':<14}{'Pared (s)':>10}{'CPU (s)':>10}{'Subproc. (s)':>14}"
+              f"{'RSS pico (MB)':>15}"]
+    for m in medidas:
+        rss = '-' if m.get('rss_pico_mb') is None else f"{m['rss_pico_mb']:,.0f}" + \
+            ('*' if m.get('rss_pico_acumulado') else '')
+        lineas.append(f"{m['etapa']:<14}{m['t_pared_s']:>10.2f}{m['t_cpu_s']:>10.2f}"
+                      f"{m['t_cpu_subprocesos_s']:>14.2f}{rss:>15}"
+                      + (f"  ERROR {m['error']}" if 'error' in m else ''))
+    if any(m.get('rss_pico_acumulado') for m in medidas):
+        lineas.append("  * pico del proceso desde su inicio (no se pudo reiniciar por etapa)")
+    for m in medidas:
+        for nombre, a in m.get('arreglos', {}).items():
+            if a is None:
+                continue
+            forma = '×'.join(str(n) for n in a['forma']) if a['forma'] else '-'
+            mb = f"{a['mb']:,.1f} MB" if a['mb'] is not None else '-'
+            lineas.append(f"  {m['etapa']}.{nombre}: {forma} {a['dtype']}, {mb}"
+                          + (" (mapeado)" if a.get('mapeado') else ''))
+        if 'densidad' in m.get('metricas', {}):
+            lineas.append(f"  {m['etapa']}: densidad {m['metricas']['densidad'] * 100:.2f}%")
+        solver = m.get('metricas', {}).get('solver')
+        if solver:
+            lineas += _lineas_solver(m['etapa'], solver)
+        perfil = m.get('perfil')
+        if perfil:
+            lineas.append(f"  {m['etapa']}: perfil {perfil['modo']}"
+                          + (f" → {perfil['archivo']}" if perfil.get('archivo') else ''))
+            for f in perfil['funciones'][:5]:
+                valor = (f"{f['t_acumulado_s']:.2f} s" if 't_acumulado_s' in f
+                         else f"{f['fraccion_propia'] * 100:.0f}%")
+                lineas.append(f"      {valor:>9}  {f['funcion']}")
+    return lineas
+
+
+def _lineas_solver(etapa, estadisticas):
+    def numero(valor, formato):
+        return '-' if valor is None else format(valor, formato)
+
+    lineas = []
+    presolve = estadisticas.get('presolve')
+    if presolve:
+        lineas.append(f"  {etapa}: modelo reducido {presolve['filas']} candidatos × "
+                      f"{presolve['columnas']} puntos, {presolve['fijados']} fijados")
+    bnb = estadisticas.get('bnb')
+    if bnb:
+        lineas.append(f"  {etapa}: ramificación {bnb['estado']}, {bnb['nodos']:,} nodos "
+                      f"en {bnb['tiempo_s']:.2f} s")
+    cbc = estadisticas.get('cbc')
+    if cbc:
+        lineas.append(f"  {etapa}: CBC {cbc.get('resultado') or '-'} | "
+                      f"nodos {numero(cbc.get('nodos'), ',')} | "
+                      f"iteraciones {numero(cbc.get('iteraciones'), ',')} | "
+                      f"cota raíz LP {numero(cbc.get('cota_raiz_lp'), '.4g')}, "
+                      f"tras cortes {numero(cbc.get('cota_raiz_cortes'), '.4g')}")
+    heuristica = estadisticas.get('heuristica')
+    if heuristica:
+        lineas.append(f"  {etapa}: heurística, {heuristica['iteraciones']:,} iteraciones")
+    incumbentes = estadisticas.get('incumbentes')
+    if incumbentes:
+        lineas.append(f"  {etapa}: incumbentes " + ', '.join(
+            f"{numero(u, 'g')} a {t:.2f} s" for t, u, _ in incumbentes[:8])
+            + (' ...' if len(incumbentes) > 8 else ''))
+    return lineas
@@ -0,0 +1,357 @@
+"""
+Mapa ráster de obstrucción y trazado de rayos vectorizado
+
+Con `patron_obstruccion: "raster"` la condición de cada enlace deja de ser
+un sorteo independiente: se recorre el segmento i → j sobre un ráster con la
+fracción obstruida de cada celda (vegetación densa, construcciones) y el
+enlace se considera obstruido si la fracción media a lo largo del trayecto
+alcanza `fraccion_minima`. Enlaces vecinos atraviesan las mismas celdas y
+por lo tanto tienen condiciones coherentes.
+
+El ráster puede derivarse de una imagen (Terreno.png, Place.png) o generarse
+con correlación espacial (ruido blanco suavizado con un filtro gaussiano y
+umbralizado para obstruir el porcentaje de área del escenario).
+
+El trazado procesa todos los enlaces de un bloque de filas a la vez:
+
+1. Con la tabla de sumas acumuladas (summed-area table) del ráster se
+   resuelven en O(1) los enlaces cuyo rectángulo envolvente está totalmente
+   libre o totalmente obstruido.
+2. Los restantes se ordenan por número de muestras y se muestrean en lotes
+   de tamaño acotado por el presupuesto de memoria.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+
+from .configuracion import ruta_proyecto
+
+# Bytes de memoria temporal por muestra de trayecto (t, x, y, índices, valores)
+BYTES_POR_MUESTRA = 40
+
+# Bytes de memoria temporal por enlace de un bloque de filas: esquinas int32 y
+# sumas float64 del rectángulo envolvente, o índices, extremos y número de
+# muestras de un trayecto mixto
+BYTES_POR_ENLACE_TRAYECTO = 80
+
+FRACCION_MINIMA_DEFECTO = 0.25
+
+FUENTE_SINTETICA = 'sintetica'
+FUENTE_IMAGEN = 'imagen'
+
+
+def tabla_integral(valores):
+    """Summed-area table con una fila y columna de ceros al inicio (float64)."""
+    integral = np.zeros((valores.shape[0] + 1, valores.shape[1] + 1))
+    np.cumsum(valores, axis=0, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+    return integral
+
+
+def suma_rectangulos(integral, f0, f1, c0, c1):
+    """Suma de las celdas [f0, f1) × [c0, c1) para arrays de índices (broadcasting)."""
+    return integral[f1, c1] - integral[f0, c1] - integral[f1, c0] + integral[f0, c0]
+
+
+def _promediar_celdas(imagen, n_filas, n_columnas):
+    """Promedio de `imagen` (2D) sobre una grilla de n_filas × n_columnas celdas."""
+    integral = tabla_integral(imagen.astype(np.float64))
+    f = np.round(np.linspace(0, imagen.shape[0], n_filas + 1)).astype(np.int64)
+    c = np.round(np.linspace(0, imagen.shape[1], n_columnas + 1)).astype(np.int64)
+    f1 = np.maximum(f[1:], f[:-1] + 1)
+    c1 = np.maximum(c[1:], c[:-1] + 1)
+    suma = suma_rectangulos(integral, f[:-1, None], f1[:, None], c[None, :-1], c1[None, :])
+    return suma / ((f1 - f[:-1])[:, None] * (c1 - c[:-1])[None, :])
+
+
+def _umbralizar(puntaje, porcentaje):
+    """Obstruye la fracción `porcentaje` de celdas con mayor puntaje (1.0 / 0.0)."""
+    if porcentaje is None:
+        return (puntaje >= 0.5).astype(np.float32)
+    p = min(max(porcentaje / 100.0, 0.0), 1.0)
+    if p <= 0.0:
+        return np.zeros(puntaje.shape, dtype=np.float32)
+    umbral = np.quantile(puntaje, 1.0 - p)
+    return (puntaje >= umbral).astype(np.float32)
+
+
+class MapaObstruccion:
+    """
+    Ráster de fracción obstruida (0-1) sobre el campo.
+
+    Atributos:
+        valores: Array float32 (n_filas, n_columnas); la fila 0 es y = origen_y
+        resolucion_m: Lado de cada celda en metros
+        origen: Coordenadas (x, y) de la esquina inferior izquierda
+        fraccion_minima: Fracción media del trayecto a partir de la cual el
+            enlace se considera obstruido
+        paso_m: Distancia entre muestras a lo largo del trayecto
+    """
+
+    def __init__(self, valores, resolucion_m, origen=(0.0, 0.0),
+                 fraccion_minima=FRACCION_MINIMA_DEFECTO, paso_m=None):
+        self.valores = np.ascontiguousarray(valores, dtype=np.float32)
+        if self.valores.ndim != 2:
+            raise ValueError(f"El ráster debe ser 2D, no {self.valores.shape}")
+        self.resolucion_m = float(resolucion_m)
+        self.origen = (float(origen[0]), float(origen[1]))
+        self.fraccion_minima = float(fraccion_minima)
+        self.paso_m = float(paso_m) if paso_m else self.resolucion_m
+        self._integral = None
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def sintetico(cls, dimension_x_m, dimension_y_m, resolucion_m, porcentaje_obstruido,
+                  longitud_correlacion_m=100.0, semilla=42, **kwargs):
+        """
+        Ráster binario con correlación espacial.
+
+        Ruido blanco suavizado con un filtro gaussiano de desviación
+        `longitud_correlacion_m` (vía FFT, con un borde para evitar el
+        efecto periódico) y umbralizado para obstruir `porcentaje_obstruido`
+        del área.
+
+        Args:
+            dimension_x_m, dimension_y_m: Dimensiones del campo
+            resolucion_m: Lado de la celda
+            porcentaje_obstruido: Porcentaje del área obstruida
+            longitud_correlacion_m: Escala típica de las manchas de obstrucción
+            semilla: Semilla del ruido
+            **kwargs: fraccion_minima, paso_m
+
+        Returns:
+            MapaObstruccion
+        """
+        n_columnas = max(1, int(np.ceil(dimension_x_m / resolucion_m)))
+        n_filas = max(1, int(np.ceil(dimension_y_m / resolucion_m)))
+        sigma = max(longitud_correlacion_m / resolucion_m, 0.0)
+        borde = int(np.ceil(3 * sigma))
+        rng = np.random.RandomState(semilla)
+        ruido = rng.standard_normal((n_filas + 2 * borde, n_columnas + 2 * borde))
+        if sigma > 0:
+            fy = np.fft.fftfreq(ruido.shape[0])[:, None]
+            fx = np.fft.rfftfreq(ruido.shape[1])[None, :]
+            filtro = np.exp(-2 * np.pi**2 * sigma**2 * (fx**2 + fy**2))
+            ruido = np.fft.irfft2(np.fft.rfft2(ruido) * filtro, s=ruido.shape)
+        puntaje = ruido[borde:borde + n_filas, borde:borde + n_columnas]
+        return cls(_umbralizar(puntaje, porcentaje_obstruido), resolucion_m, **kwargs)
+
+    @classmethod
+    def desde_imagen(cls, ruta, dimension_x_m, dimension_y_m, resolucion_m,
+                     porcentaje_obstruido=None, recorte_px=None, **kwargs):
+        """
+        Ráster derivado de una imagen aérea o de una máscara.
+
+        La imagen (o su recorte) se estira sobre el rectángulo del campo y se
+        promedia por celda. Las zonas oscuras (arboledas densas, sombras de
+        construcciones) puntúan como obstruidas: se obstruye el
+        `porcentaje_obstruido` de celdas más oscuras, o las de luminancia
+        < 0.5 si es None (máscara en blanco y negro).
+
+        Args:
+            ruta: Archivo de imagen (PNG)
+            dimension_x_m, dimension_y_m: Dimensiones del campo
+            resolucion_m: Lado de la celda
+            porcentaje_obstruido: Porcentaje del área obstruida (o None)
+            recorte_px: (x0, y0, x1, y1) en píxeles de la imagen, opcional
+            **kwargs: fraccion_minima, paso_m
+
+        Returns:
+            MapaObstruccion
+        """
+        import matplotlib.image as mpimg
+
+        imagen = np.asarray(mpimg.imread(ruta), dtype=np.float64)
+        if imagen.max() > 1.0:
+            imagen = imagen / 255.0
+        if imagen.ndim == 3:
+            imagen = imagen[:, :, :3] @ np.array([0.299, 0.587, 0.114])
+        if recorte_px is not None:
+            x0, y0, x1, y1 = (int(v) for v in recorte_px)
+            imagen = imagen[y0:y1, x0:x1]
+        n_columnas = max(1, int(np.ceil(dimension_x_m / resolucion_m)))
+        n_filas = max(1, int(np.ceil(dimension_y_m / resolucion_m)))
+        # Fila 0 de la imagen es el norte (y máximo)
+        luminancia = _promediar_celdas(imagen[::-1], n_filas, n_columnas)
+        return cls(_umbralizar(1.0 - luminancia, porcentaje_obstruido), resolucion_m, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Acceso
+    # ------------------------------------------------------------------
+
+    @property
+    def shape(self):
+        return self.valores.shape
+
+    @property
+    def integral(self):
+        """Summed-area table del ráster (se calcula una vez)."""
+        if self._integral is None:
+            self._integral = tabla_integral(self.valores)
+        return self._integral
+
+    @property
+    def fraccion_area(self):
+        """Fracción del área obstruida."""
+        return float(self.valores.mean())
+
+    @property
+    def huella(self):
+        """Cadena hexadecimal que identifica ráster y parámetros (para cachés)."""
+        h = hashlib.sha256(self.valores.tobytes())
+        h.update(json.dumps([self.valores.shape, self.resolucion_m, self.origen,
+                             self.fraccion_minima, self.paso_m]).encode())
+        return h.hexdigest()[:16]
+
+    def guardar(self, ruta):
+        """Guarda el ráster como .npy y los parámetros como .json."""
+        np.save(f"{ruta}.npy", self.valores)
+        with open(f"{ruta}.json", 'w', encoding='utf-8') as f:
+            json.dump({'resolucion_m': self.resolucion_m, 'origen': self.origen,
+                       'fraccion_minima': self.fraccion_minima, 'paso_m': self.paso_m}, f)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Carga un ráster escrito con `guardar`."""
+        with open(f"{ruta}.json", 'r', encoding='utf-8') as f:
+            parametros = json.load(f)
+        return cls(np.load(f"{ruta}.npy"), **parametros)
+
+    # ------------------------------------------------------------------
+    # Trazado de rayos
+    # ------------------------------------------------------------------
+
+    def _a_celdas(self, coords):
+        """Coordenadas en unidades de celda, dentro del ráster."""
+        n_filas, n_columnas = self.valores.shape
+        c = (np.asarray(coords, dtype=np.float64).reshape(-1, 2) - self.origen) / self.resolucion_m
+        c[:, 0] = np.clip(c[:, 0], 0.0, np.nextafter(n_columnas, 0))
+        c[:, 1] = np.clip(c[:, 1], 0.0, np.nextafter(n_filas, 0))
+        return c
+
+    def _muestrear(self, x0, y0, x1, y1, muestras):
+        """Fracción media sobre `muestras` puntos equiespaciados de cada segmento."""
+        k_max = int(muestras[-1])
+        k = np.arange(k_max, dtype=np.float32)
+        t = (k[None, :] + 0.5) / muestras[:, None].astype(np.float32)
+        validas = k[None, :] < muestras[:, None]
+        t = np.minimum(t, 1.0)
+        n_filas, n_columnas = self.valores.shape
+        columnas = np.minimum((x0[:, None] + t * (x1 - x0)[:, None]).astype(np.int32), n_columnas - 1)
+        filas = np.minimum((y0[:, None] + t * (y1 - y0)[:, None]).astype(np.int32), n_filas - 1)
+        del t
+        valores = self.valores[filas, columnas]
+        valores[~validas] = 0.0
+        return valores.sum(axis=1) / muestras
+
+    def fraccion_trayecto(self, I_coords, J_coords, memoria_max_mb=256):
+        """
+        Fracción obstruida media a lo largo de cada segmento i → j.
+
+        Se recorre por bloques de filas de I: el rectángulo envolvente de
+        cada enlace del bloque y las muestras de sus trayectos mixtos caben
+        en `memoria_max_mb` (además del resultado n_I × n_J en float32).
+
+        Args:
+            I_coords: Array (n_I, 2) de orígenes
+            J_coords: Array (n_J, 2) de destinos
+            memoria_max_mb: Presupuesto de memoria de trabajo por bloque
+
+        Returns:
+            Array float32 (n_I, n_J)
+        """
+        ci, cj = self._a_celdas(I_coords), self._a_celdas(J_coords)
+        n_I, n_J = len(ci), len(cj)
+        fraccion = np.zeros((n_I, n_J), dtype=np.float32)
+        presupuesto = memoria_max_mb * 1024 * 1024
+        paso = max(1, int(presupuesto // (BYTES_POR_ENLACE_TRAYECTO * max(n_J, 1))))
+        maximo = max(1, int(presupuesto // BYTES_POR_MUESTRA))
+        for inicio in range(0, n_I, paso):
+            fin = min(inicio + paso, n_I)
+            self._fraccion_bloque(ci[inicio:fin], cj, fraccion[inicio:fin], maximo)
+        return fraccion
+
+    def _fraccion_bloque(self, ci, cj, fraccion, maximo):
+        """Llena `fraccion` (len(ci), n_J) con lotes de a lo sumo `maximo` muestras."""
+        n_J = len(cj)
+
+        # 1. Rectángulo envolvente de cada segmento vía summed-area table
+        celda_i, celda_j = ci.astype(np.int32), cj.astype(np.int32)
+        c0 = np.minimum(celda_i[:, None, 0], celda_j[None, :, 0])
+        c1 = np.maximum(celda_i[:, None, 0], celda_j[None, :, 0]) + 1
+        f0 = np.minimum(celda_i[:, None, 1], celda_j[None, :, 1])
+        f1 = np.maximum(celda_i[:, None, 1], celda_j[None, :, 1]) + 1
+        suma = suma_rectangulos(self.integral, f0, f1, c0, c1)
+        area = (c1 - c0) * (f1 - f0)
+        del c0, c1, f0, f1
+        llenos = suma >= area - 1e-6
+        fraccion[llenos] = 1.0
+        mixtos = np.flatnonzero((suma > 1e-6) & ~llenos)
+        del suma, area, llenos
+        if len(mixtos) == 0:
+            return
+
+        # 2. Muestreo de los segmentos mixtos, ordenados por número de muestras
+        fila, columna = np.divmod(mixtos, n_J)
+        x0, y0 = ci[fila, 0], ci[fila, 1]
+        x1, y1 = cj[columna, 0], cj[columna, 1]
+        del fila, columna
+        longitud = np.hypot(x1 - x0, y1 - y0) * self.resolucion_m
+        muestras = np.maximum(1, np.ceil(longitud / self.paso_m)).astype(np.int64)
+        del longitud
+        orden = np.argsort(muestras, kind='stable')
+        mixtos, muestras = mixtos[orden], muestras[orden]
+        x0, y0, x1, y1 = (v[orden].astype(np.float32) for v in (x0, y0, x1, y1))
+        del orden
+
+        plana = fraccion.reshape(-1)
+        inicio = 0
+        while inicio < len(mixtos):
+            # Lote con n · k_max <= maximo (muestras crecientes dentro del lote)
+            fin = min(len(mixtos), inicio + max(1, maximo // int(muestras[inicio])))
+            fin = min(fin, inicio + max(1, maximo // int(muestras[fin - 1])))
+            lote = slice(inicio, fin)
+            plana[mixtos[lote]] = self._muestrear(x0[lote], y0[lote], x1[lote], y1[lote],
+                                                  muestras[lote])
+            inicio = fin
+
+    def obstruidos(self, I_coords, J_coords, memoria_max_mb=256):
+        """Máscara (n_I, n_J) de enlaces con fracción obstruida >= fraccion_minima."""
+        return self.fraccion_trayecto(I_coords, J_coords, memoria_max_mb) >= self.fraccion_minima
+
+
+def mapa_desde_config(config, directorio_base=None):
+    """
+    Ráster con el bloque `obstruccion_raster` de config.json.
+
+    Lee `fuente` ('sintetica' o 'imagen'), `resolucion_m`,
+    `longitud_correlacion_m`, `imagen`, `recorte_px`, `fraccion_minima` y
+    `paso_muestreo_m`; el porcentaje de área y la semilla vienen de
+    `escenario`. Las rutas relativas de `imagen` se resuelven contra
+    `directorio_base` (por defecto, la raíz del repositorio).
+    """
+    opciones = config.get('obstruccion_raster', {})
+    campo, escenario = config['campo'], config['escenario']
+    parametros = {
+        'fraccion_minima': opciones.get('fraccion_minima', FRACCION_MINIMA_DEFECTO),
+        'paso_m': opciones.get('paso_muestreo_m'),
+    }
+    resolucion = opciones.get('resolucion_m', 10.0)
+    fuente = opciones.get('fuente', FUENTE_SINTETICA)
+    if fuente == FUENTE_SINTETICA:
+        return MapaObstruccion.sintetico(
+            campo['dimension_x_m'], campo['dimension_y_m'], resolucion,
+            escenario['porcentaje_area_obstruida'],
+            opciones.get('longitud_correlacion_m', 100.0),
+            escenario.get('semilla_obstruccion', 42), **parametros)
+    if fuente == FUENTE_IMAGEN:
+        ruta = ruta_proyecto(opciones['imagen'], directorio_base)
+        return MapaObstruccion.desde_imagen(
+            ruta, campo['dimension_x_m'], campo['dimension_y_m'], resolucion,
+            escenario['porcentaje_area_obstruida'], opciones.get('recorte_px'), **parametros)
+    raise ValueError(f"Fuente de ráster desconocida: '{fuente}'")
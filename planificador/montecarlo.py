@@ -0,0 +1,313 @@
+"""
+Análisis Monte Carlo de robustez frente a la realización de obstrucciones
+
+La matriz de cobertura depende de un único sorteo de obstrucciones
+(semilla 42). Aquí se generan muchas realizaciones independientes:
+
+- Evaluación de ubicaciones fijas de gateways: solo los enlaces gateway →
+  punto importan. Un enlace viable aun obstruido, o no viable aun en campo
+  abierto, no depende del sorteo; solo los enlaces "inciertos" (viables
+  únicamente sin obstrucción) se sortean, por tramos de realizaciones.
+- Re-resolución: para un subconjunto de realizaciones se construye la
+  matriz completa con la máscara de esa realización y se resuelve el Set
+  Cover en procesos de trabajo (ver `paralelo`).
+
+La realización r es la máscara de obstrucción por coordenadas (ver
+`cobertura.obstruccion_por_coordenadas`) con semilla
+`semilla_realizacion(semilla, r)`: la evaluación y la re-resolución de r
+ven el mismo sorteo (un gateway en un sitio candidato tiene los mismos
+enlaces obstruidos en ambas), y los resultados son reproducibles y no
+dependen del presupuesto de memoria (que solo divide las realizaciones en
+tramos). Con `escenario.patron_obstruccion = 'raster'` la obstrucción es
+la del mapa y no hay enlaces inciertos; el terreno (bloque `terreno`) suma
+su pérdida por difracción en ambos casos.
+"""
+
+import os
+import tempfile
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .cobertura import (MEMORIA_MAX_MB_DEFECTO, OBSTRUCCION_COORDENADAS, cobertura_desde_config,
+                        obstruccion_desde_config, obstruccion_enlaces)
+from .mapa_obstruccion import MapaObstruccion
+from .paralelo import compartido, ejecutar_tareas, guardar_compartidos
+from .propagacion import ModeloPropagacion
+from .resolucion import resolver_set_cover
+from .terreno import terreno_desde_config
+
+# Bytes por enlace incierto y realización en un tramo: hash uint64 y su
+# temporal, máscara bool
+BYTES_POR_SORTEO = 17
+
+
+@dataclass
+class ResultadoUbicacion:
+    """
+    Cobertura de una ubicación fija de gateways sobre todas las realizaciones.
+
+    Atributos:
+        nombre: Identificador de la ubicación
+        gateways: Array (G, 2) de coordenadas
+        probabilidad_por_punto: Fracción de realizaciones en que cada punto
+            de demanda queda cubierto (n_J,)
+        fraccion_cubierta: Fracción de puntos cubiertos en cada realización (R,)
+        probabilidad_analitica: Probabilidad exacta por punto bajo
+            obstrucción independiente por enlace (n_J,), para contrastar
+        enlaces_inciertos: Enlaces gateway → punto que dependen del sorteo
+    """
+    nombre: str
+    gateways: np.ndarray
+    probabilidad_por_punto: np.ndarray
+    fraccion_cubierta: np.ndarray
+    probabilidad_analitica: np.ndarray
+    enlaces_inciertos: int
+
+    @property
+    def realizaciones(self):
+        return len(self.fraccion_cubierta)
+
+    @property
+    def probabilidad_cobertura_total(self):
+        """Fracción de realizaciones con todos los puntos cubiertos."""
+        return float(np.mean(self.fraccion_cubierta >= 1.0)) if self.realizaciones else 0.0
+
+    @property
+    def probabilidad_cobertura_total_analitica(self):
+        return float(np.prod(self.probabilidad_analitica))
+
+
+@dataclass
+class ResultadoMonteCarlo:
+    """Resultados por ubicación y N_optimo de las realizaciones re-resueltas."""
+    puntos: np.ndarray
+    ubicaciones: list
+    realizaciones: int
+    semilla: int
+    resoluciones: list = field(default_factory=list)
+
+    def distribucion_n_optimo(self):
+        """Diccionario N → número de realizaciones re-resueltas con ese óptimo."""
+        conteo = {}
+        for r in self.resoluciones:
+            if r.get('N_optimo') not in (None, ''):
+                conteo[r['N_optimo']] = conteo.get(r['N_optimo'], 0) + 1
+        return dict(sorted(conteo.items()))
+
+
+def semilla_realizacion(semilla, r):
+    """Semilla entera de la máscara de obstrucción de la realización r."""
+    return int(np.random.SeedSequence([semilla, r]).generate_state(1)[0])
+
+
+def _estado_enlaces(gateways, puntos, modelo, obstruccion=OBSTRUCCION_COORDENADAS,
+                    terreno=None, memoria_max_mb=MEMORIA_MAX_MB_DEFECTO):
+    """Máscaras (G, n_J): viable en toda realización (seguro) y viable solo en abierto (incierto)."""
+    dx = gateways[:, 0, None] - puntos[None, :, 0]
+    dy = gateways[:, 1, None] - puntos[None, :, 1]
+    distancia = np.sqrt(dx**2 + dy**2)
+    extra = None if terreno is None else terreno.perdidas(gateways, puntos, memoria_max_mb)
+    if isinstance(obstruccion, MapaObstruccion):
+        obstruido = obstruccion.obstruidos(gateways, puntos, memoria_max_mb)
+        return modelo.enlace_viable(distancia, obstruido, extra), np.zeros(distancia.shape, bool)
+    seguro = modelo.enlace_viable(distancia, True, extra)
+    incierto = modelo.enlace_viable(distancia, False, extra) & ~seguro
+    return seguro, incierto
+
+
+def evaluar_ubicacion(gateways, puntos, modelo, porcentaje_obstruido, realizaciones,
+                      semilla=0, nombre='', memoria_max_mb=MEMORIA_MAX_MB_DEFECTO,
+                      obstruccion=OBSTRUCCION_COORDENADAS, terreno=None):
+    """
+    Cobertura de una ubicación fija de gateways en `realizaciones` sorteos.
+
+    Args:
+        gateways: Coordenadas (G, 2) de los gateways
+        puntos: Coordenadas (n_J, 2) de los puntos de demanda
+        modelo: ModeloPropagacion
+        porcentaje_obstruido: Probabilidad de obstrucción por enlace (en %)
+        realizaciones: Número de realizaciones
+        semilla: Semilla de las realizaciones (ver `semilla_realizacion`)
+        nombre: Identificador de la ubicación
+        memoria_max_mb: Presupuesto de memoria por tramo de sorteos
+        obstruccion: 'coordenadas' o un MapaObstruccion (sin sorteo)
+        terreno: ModeloTerreno opcional
+
+    Returns:
+        ResultadoUbicacion
+    """
+    gateways = np.asarray(gateways, dtype=float).reshape(-1, 2)
+    puntos = np.asarray(puntos, dtype=float)
+    n_J = len(puntos)
+    p = porcentaje_obstruido / 100.0
+
+    seguro, incierto = _estado_enlaces(gateways, puntos, modelo, obstruccion, terreno,
+                                       memoria_max_mb)
+    cubierto_seguro = seguro.any(axis=0)
+    # Enlaces que dependen del sorteo, solo hacia puntos sin enlace seguro,
+    # ordenados por punto para reducir por tramos contiguos
+    g_inc, j_inc = np.nonzero(incierto & ~cubierto_seguro[None, :])
+    orden = np.argsort(j_inc, kind='stable')
+    g_inc, j_inc = g_inc[orden], j_inc[orden]
+    n_inc = len(j_inc)
+
+    # Probabilidad exacta: P(j cubierto) = 1 - p^(enlaces inciertos de j)
+    inciertos_por_punto = np.bincount(j_inc, minlength=n_J)
+    analitica = np.where(cubierto_seguro, 1.0,
+                         np.where(inciertos_por_punto > 0, 1.0 - p ** inciertos_por_punto, 0.0))
+
+    veces_cubierto = np.zeros(n_J, dtype=np.int64)
+    fraccion = np.empty(realizaciones, dtype=np.float64)
+    base_cubiertos = int(np.count_nonzero(cubierto_seguro))
+    # Puntos con al menos un enlace incierto y el inicio de sus enlaces
+    puntos_inc, inicios_inc = np.unique(j_inc, return_index=True)
+
+    tramo = max(1, int(memoria_max_mb * 1024 * 1024 // (BYTES_POR_SORTEO * max(n_inc, 1))))
+    veces_cubierto[cubierto_seguro] = realizaciones
+    fraccion[:] = base_cubiertos / n_J if n_J else 1.0
+    for inicio in range(0, realizaciones, tramo):
+        if n_inc == 0:
+            break
+        fin = min(inicio + tramo, realizaciones)
+        semillas = [semilla_realizacion(semilla, r) for r in range(inicio, fin)]
+        abierto = ~obstruccion_enlaces(gateways[g_inc], puntos[j_inc], porcentaje_obstruido,
+                                       semillas)
+        # Punto cubierto si algún enlace incierto quedó en campo abierto
+        cubre = np.logical_or.reduceat(abierto, inicios_inc, axis=1)
+        veces_cubierto[puntos_inc] += cubre.sum(axis=0)
+        fraccion[inicio:fin] = (base_cubiertos + cubre.sum(axis=1)) / n_J
+
+    return ResultadoUbicacion(nombre=nombre, gateways=gateways,
+                              probabilidad_por_punto=veces_cubierto / max(realizaciones, 1),
+                              fraccion_cubierta=fraccion, probabilidad_analitica=analitica,
+                              enlaces_inciertos=n_inc)
+
+
+def _tarea_resolver(config, r, semilla):
+    """Matriz completa de la realización r + Set Cover (en un trabajador)."""
+    puntos = compartido('puntos')
+    cobertura = cobertura_desde_config(
+        config, puntos, puntos, empaquetada=True,
+        obstruccion=obstruccion_desde_config(config, OBSTRUCCION_COORDENADAS),
+        semilla=semilla_realizacion(semilla, r))
+    resultado = resolver_set_cover(cobertura.a, config.get('solver'))
+    return {
+        'realizacion': r,
+        'estado': resultado.estado,
+        'N_optimo': (resultado.n_seleccionados
+                     if resultado.estado in ('Optimal', 'Feasible') else ''),
+        'cota_inferior': resultado.cota_inferior,
+        'densidad': cobertura.densidad,
+        'sensores': ' '.join(str(i) for i in resultado.seleccion),
+    }
+
+
+def resolver_realizaciones(config, puntos, indices, semilla=0, procesos=None,
+                           tiempo_limite=None, al_terminar=None):
+    """
+    Re-resuelve el Set Cover para las realizaciones `indices` en paralelo.
+
+    Returns:
+        Lista de diccionarios (realizacion, estado, N_optimo, cota_inferior,
+        densidad, sensores, error, t_total_s) ordenada por realización
+    """
+    filas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = guardar_compartidos({'puntos': puntos}, tmp)
+        tareas = [(config, int(r), semilla) for r in indices]
+        for res in ejecutar_tareas(_tarea_resolver, tareas, procesos, tiempo_limite, rutas):
+            if res.exito:
+                fila = {**res.valor, 'error': ''}
+            else:
+                fila = {'realizacion': int(indices[res.indice]), 'estado': 'Error',
+                        'N_optimo': '', 'error': res.error.strip().splitlines()[0]}
+            fila['t_total_s'] = res.tiempo_s
+            filas.append(fila)
+            if al_terminar is not None:
+                al_terminar(fila)
+    return sorted(filas, key=lambda f: f['realizacion'])
+
+
+def montecarlo_desde_config(config, puntos, ubicaciones=None, realizaciones=None,
+                            resolver=None, semilla=None, procesos=None, tiempo_limite=None,
+                            al_terminar=None):
+    """
+    Análisis completo con el bloque `montecarlo` de config.json.
+
+    Args:
+        config: Configuración (bloques propagacion, escenario, calculo, solver,
+            montecarlo)
+        puntos: Coordenadas (n_J, 2) de los puntos de demanda
+        ubicaciones: Diccionario nombre → coordenadas de gateways (por defecto,
+            montecarlo.ubicaciones)
+        realizaciones: Número de realizaciones evaluadas
+        resolver: Cuántas de ellas se re-resuelven (las primeras)
+        semilla: Semilla de las realizaciones (ver `semilla_realizacion`)
+        procesos, tiempo_limite: Ver `paralelo.ejecutar_tareas`
+        al_terminar: Función (fila) llamada al terminar cada re-resolución
+
+    Returns:
+        ResultadoMonteCarlo
+    """
+    opciones = config.get('montecarlo', {})
+    ubicaciones = ubicaciones or opciones.get('ubicaciones', {})
+    realizaciones = realizaciones if realizaciones is not None else opciones.get('realizaciones', 1000)
+    resolver = resolver if resolver is not None else opciones.get('resolver', 0)
+    semilla = semilla if semilla is not None else opciones.get('semilla', 0)
+    tiempo_limite = tiempo_limite if tiempo_limite is not None else opciones.get('tiempo_limite_s')
+
+    modelo = ModeloPropagacion.desde_config(config)
+    porcentaje = config['escenario']['porcentaje_area_obstruida']
+    memoria = config.get('calculo', {}).get('memoria_max_mb', MEMORIA_MAX_MB_DEFECTO)
+    obstruccion = obstruccion_desde_config(config, OBSTRUCCION_COORDENADAS)
+    terreno = terreno_desde_config(config, modelo)
+    resultados = [evaluar_ubicacion(coords, puntos, modelo, porcentaje, realizaciones, semilla,
+                                    nombre, memoria, obstruccion, terreno)
+                  for nombre, coords in ubicaciones.items()]
+    resoluciones = []
+    if resolver:
+        resoluciones = resolver_realizaciones(config, puntos, range(min(resolver, realizaciones)),
+                                              semilla, procesos, tiempo_limite, al_terminar)
+    return ResultadoMonteCarlo(puntos=np.asarray(puntos), ubicaciones=resultados,
+                               realizaciones=realizaciones, semilla=semilla,
+                               resoluciones=resoluciones)
+
+
+def resumen_montecarlo(resultado):
+    """Líneas de texto con la distribución de cobertura por ubicación y de N_optimo."""
+    lineas = [f"Realizaciones: {resultado.realizaciones:,} (semilla {resultado.semilla})"]
+    for u in resultado.ubicaciones:
+        prob = u.probabilidad_por_punto
+        lineas += [
+            f"Ubicación '{u.nombre}' ({len(u.gateways)} gateways, "
+            f"{u.enlaces_inciertos:,} enlaces inciertos):",
+            f"  P(cobertura total): {100 * u.probabilidad_cobertura_total:.2f}% "
+            f"(analítica {100 * u.probabilidad_cobertura_total_analitica:.2f}%)",
+            f"  Fracción cubierta por realización: media {100 * np.mean(u.fraccion_cubierta):.2f}%, "
+            f"mínimo {100 * np.min(u.fraccion_cubierta):.2f}%, "
+            f"percentil 5 {100 * np.percentile(u.fraccion_cubierta, 5):.2f}%",
+            f"  P(cobertura) por punto: mínimo {100 * prob.min():.2f}%, "
+            f"percentil 5 {100 * np.percentile(prob, 5):.2f}%, mediana {100 * np.median(prob):.2f}%",
+            f"  Puntos con P < 99%: {int(np.count_nonzero(prob < 0.99))} de {len(prob)}",
+        ]
+    if resultado.resoluciones:
+        distribucion = resultado.distribucion_n_optimo()
+        errores = sum(r['estado'] == 'Error' for r in resultado.resoluciones)
+        lineas.append(f"N_optimo en {len(resultado.resoluciones)} realizaciones re-resueltas: "
+                      + ', '.join(f"N={n}: {c}" for n, c in distribucion.items())
+                      + (f" ({errores} con error)" if errores else ''))
+    return lineas
+
+
+def guardar_probabilidades(resultado, ruta):
+    """CSV con x, y y la probabilidad de cobertura de cada punto por ubicación."""
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(directorio, exist_ok=True)
+    columnas = [resultado.puntos[:, 0], resultado.puntos[:, 1]]
+    cabecera = ['x_m', 'y_m']
+    for u in resultado.ubicaciones:
+        columnas += [u.probabilidad_por_punto, u.probabilidad_analitica]
+        cabecera += [f"p_{u.nombre}", f"p_analitica_{u.nombre}"]
+    np.savetxt(ruta, np.column_stack(columnas), delimiter=',', fmt='%.6g',
+               header=','.join(cabecera), comments='')
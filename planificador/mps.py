@@ -0,0 +1,525 @@
+"""
+Escritura directa del modelo Set Cover en formato MPS y resolución con CBC
+
+Genera el mismo modelo que la formulación PuLP del notebook
+(Set_Cover_Sensor_Optimization_PathLoss: min Σ x_i, Σ a_ij x_i ≥ 1, x binaria)
+a partir de los no ceros de la matriz de cobertura, sin construir una
+LpAffineExpression por coeficiente. Las líneas de COLUMNS se arman como
+registros de ancho fijo en un buffer uint8, bloque a bloque.
+"""
+
+import math
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .bitset import MatrizBits, desempaquetar
+
+NOMBRE_PROBLEMA = 'Set_Cover_Sensor_Optimization_PathLoss'
+NOMBRE_OBJETIVO = 'Minimizar_numero_de_sensores'
+
+# No ceros procesados por bloque al escribir COLUMNS
+NO_CEROS_POR_BLOQUE = 2_000_000
+
+# CBC no revisa el límite de tiempo durante el LP raíz ni el preprocesamiento;
+# pasado límite × factor + holgura, el proceso se termina desde aquí
+FACTOR_CORTE_DURO = 1.2
+HOLGURA_CORTE_DURO_S = 5.0
+
+# Objetivo que CBC usa para "sin solución entera"
+_SIN_SOLUCION = 1e49
+
+_NUMERO = r'([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)'
+_RE_INCUMBENTE = re.compile(r'(?:Integer solution of|MIPStart provided solution with cost) ' + _NUMERO)
+_RE_MEJOR_SOLUCION = re.compile(_NUMERO + r' best solution')
+_RE_COTA = re.compile(r'(?:best possible|Lower bound:|Continuous objective value is)\s*' + _NUMERO)
+
+# Estadísticas del resumen final de CBC (ver `estadisticas_cbc`)
+_RE_ESTADISTICAS = {
+    'nodos': re.compile(r'Enumerated nodes:\s*(\d+)'),
+    'iteraciones': re.compile(r'Total iterations:\s*(\d+)'),
+    'tiempo_cpu_s': re.compile(r'Time \(CPU seconds\):\s*' + _NUMERO),
+    'cota_raiz_lp': re.compile(r'Continuous objective value is\s*' + _NUMERO),
+    'cota_raiz_cortes': re.compile(r'Cuts at root node changed objective from\s*'
+                                   + _NUMERO + r'\s*to\s*' + _NUMERO),
+}
+_RE_RESULTADO = re.compile(r'Result - (.+)')
+# Búsqueda cortada antes del resumen: "took N iterations and M nodes"
+_RE_BUSQUEDA = re.compile(r'took (\d+) iterations and (\d+) nodes')
+
+_UNO = b'1.000000000000e+00'
+
+
+def nombres_variables(n, indices=None):
+    """Nombres x_<i> (con índices originales si se indican, como en el notebook)."""
+    indices = np.arange(n) if indices is None else np.asarray(indices)
+    return [f"x_{i}" for i in indices]
+
+
+def nombres_restricciones(n, indices=None):
+    """Nombres Cobertura_punto_<j>."""
+    indices = np.arange(n) if indices is None else np.asarray(indices)
+    return [f"Cobertura_punto_{j}" for j in indices]
+
+
+def iterar_no_ceros(a, orden=None, no_ceros_por_bloque=NO_CEROS_POR_BLOQUE):
+    """
+    Recorre los no ceros (i, j) de la matriz en orden de filas.
+
+    Acepta MatrizBits, matrices densas de NumPy u objetos CSR con
+    `indptr`/`indices` (p. ej. scipy.sparse.csr_matrix).
+
+    Args:
+        a: Matriz de cobertura
+        orden: Permutación opcional de filas (no soportada para CSR)
+
+    Yields:
+        Pares de arrays (filas, columnas) ordenados por fila y luego columna;
+        con `orden`, las filas son posiciones dentro de la permutación
+    """
+    if hasattr(a, 'indptr') and hasattr(a, 'indices'):
+        if orden is not None:
+            raise ValueError("La permutación de filas no está soportada para matrices CSR")
+        indptr = np.asarray(a.indptr, dtype=np.int64)
+        filas = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        for inicio in range(0, len(filas), no_ceros_por_bloque):
+            yield (filas[inicio:inicio + no_ceros_por_bloque],
+                   np.asarray(a.indices[inicio:inicio + no_ceros_por_bloque]))
+        return
+
+    n_filas, n_columnas = a.shape
+    paso = max(1, no_ceros_por_bloque // max(n_columnas, 1))
+    for inicio in range(0, n_filas, paso):
+        filas = slice(inicio, inicio + paso) if orden is None else orden[inicio:inicio + paso]
+        if isinstance(a, MatrizBits):
+            bloque = desempaquetar(np.asarray(a.palabras[filas]), n_columnas)
+        else:
+            bloque = np.asarray(a[filas]) != 0
+        filas, columnas = np.nonzero(bloque)
+        yield filas + inicio, columnas
+
+
+def _tabla_nombres(nombres, ancho):
+    """Array uint8 (n, ancho) con los nombres rellenados con espacios."""
+    tabla = np.full((len(nombres), ancho), ord(' '), dtype=np.uint8)
+    if len(nombres):
+        codificados = np.array([n.encode('ascii') for n in nombres], dtype=f'S{ancho}')
+        crudo = codificados.view(np.uint8).reshape(len(nombres), ancho)
+        tabla = np.where(crudo == 0, np.uint8(ord(' ')), crudo)
+    return tabla
+
+
+def _lineas_columnas(filas, columnas, tabla_x, tabla_c):
+    """Bytes de las líneas `    x_i  fila  1.0e+00` para un bloque de no ceros."""
+    ancho_x, ancho_c = tabla_x.shape[1], tabla_c.shape[1]
+    sufijo = b'  ' + _UNO + b'\n'
+    largo = 4 + ancho_x + 2 + ancho_c + len(sufijo)
+    buffer = np.full((len(filas), largo), ord(' '), dtype=np.uint8)
+    buffer[:, 4:4 + ancho_x] = tabla_x[filas]
+    buffer[:, 6 + ancho_x:6 + ancho_x + ancho_c] = tabla_c[columnas]
+    buffer[:, largo - len(sufijo):] = np.frombuffer(sufijo, dtype=np.uint8)
+    return buffer.tobytes()
+
+
+def escribir_mps(ruta, a, variables=None, restricciones=None, nombre=NOMBRE_PROBLEMA,
+                 orden_pulp=True):
+    """
+    Escribe el modelo Set Cover en formato MPS desde los no ceros de `a`.
+
+    Args:
+        ruta: Archivo .mps de salida
+        a: Matriz de cobertura (candidatos × puntos): MatrizBits, densa o CSR
+        variables: Nombres de las variables (por defecto x_0, x_1, ...)
+        restricciones: Nombres de las restricciones (por defecto Cobertura_punto_j)
+        nombre: Nombre del problema
+        orden_pulp: Si True, las columnas se escriben ordenadas por nombre, como
+            hace PuLP, para que CBC recorra el mismo modelo y desempate igual
+            (no disponible para entradas CSR)
+
+    Returns:
+        Número de no ceros escritos
+    """
+    n_I, n_J = a.shape
+    variables = variables or nombres_variables(n_I)
+    restricciones = restricciones or nombres_restricciones(n_J)
+    es_csr = hasattr(a, 'indptr')
+    orden = None
+    if orden_pulp and not es_csr:
+        orden = np.array(sorted(range(n_I), key=variables.__getitem__), dtype=np.int64)
+    ancho_x = max([len(v) for v in variables] + [1])
+    ancho_c = max([len(r) for r in restricciones] + [len(NOMBRE_OBJETIVO)])
+    tabla_x = _tabla_nombres(variables, ancho_x)
+    if orden is not None:
+        tabla_x = tabla_x[orden]
+    tabla_c = _tabla_nombres(restricciones + [NOMBRE_OBJETIVO], ancho_c)
+    fila_objetivo = n_J
+    no_ceros = 0
+
+    with open(ruta, 'wb') as f:
+        f.write(f"*SENSE:Minimize\nNAME          {nombre}\nROWS\n N  {NOMBRE_OBJETIVO}\n"
+                .encode('ascii'))
+        f.write(''.join(f" G  {r}\n" for r in restricciones).encode('ascii'))
+        f.write(b"COLUMNS\n    MARKER                 'MARKER'                 'INTORG'\n")
+
+        # Cada variable lleva su entrada de objetivo (coeficiente 1) después de
+        # sus coeficientes de cobertura; las variables sin no ceros solo esa.
+        siguiente = 0
+        for filas, columnas in iterar_no_ceros(a, orden):
+            no_ceros += len(filas)
+            hasta = int(filas[-1]) if len(filas) else siguiente - 1
+            objetivo = np.arange(siguiente, hasta)
+            f_todas = np.concatenate([filas, objetivo])
+            c_todas = np.concatenate([columnas, np.full(len(objetivo), fila_objetivo)])
+            orden = np.argsort(f_todas, kind='stable')
+            f.write(_lineas_columnas(f_todas[orden], c_todas[orden], tabla_x, tabla_c))
+            siguiente = max(siguiente, hasta)
+        resto = np.arange(siguiente, n_I)
+        f.write(_lineas_columnas(resto, np.full(len(resto), fila_objetivo), tabla_x, tabla_c))
+
+        f.write(b"    MARKER                 'MARKER'                 'INTEND'\nRHS\n")
+        f.write(''.join(f"    RHS       {r}   1.000000000000e+00\n" for r in restricciones)
+                .encode('ascii'))
+        f.write(b"BOUNDS\n")
+        f.write(''.join(f" BV BND       {v}\n" for v in variables).encode('ascii'))
+        f.write(b"ENDATA\n")
+    return no_ceros
+
+
+@dataclass
+class ResultadoCBC:
+    """
+    Resultado de una ejecución de CBC sobre un archivo MPS.
+
+    Atributos:
+        estado: 'Optimal', 'Feasible' (detenido por tiempo o gap con solución),
+            'Infeasible', 'Unbounded' o 'Not Solved'
+        objetivo: Valor de la mejor solución
+        seleccion: Índices de fila elegidos
+        tiempo_escritura_s, tiempo_resolucion_s: Tiempos de escritura del MPS y de CBC
+        cota_inferior: Mejor cota inferior conocida (redondeada al entero superior)
+        incumbentes: Lista de (tiempo_s, incumbente, cota) leída de la salida de CBC
+    """
+    estado: str
+    objetivo: float
+    seleccion: list
+    tiempo_escritura_s: float
+    tiempo_resolucion_s: float
+    salida: str = field(default='', repr=False)
+    cota_inferior: float = float('nan')
+    incumbentes: list = field(default_factory=list)
+
+    @property
+    def estadisticas(self):
+        """Nodos, iteraciones y cotas de la raíz leídos de la salida (ver `estadisticas_cbc`)."""
+        return {**estadisticas_cbc(self.salida),
+                'tiempo_escritura_s': round(self.tiempo_escritura_s, 4)}
+
+    @property
+    def gap(self):
+        """Gap relativo (objetivo - cota) / objetivo."""
+        if math.isnan(self.cota_inferior) or math.isnan(self.objetivo):
+            return float('nan')
+        if not self.objetivo:
+            return 0.0
+        return max(0.0, (self.objetivo - self.cota_inferior) / self.objetivo)
+
+
+def estadisticas_cbc(salida):
+    """
+    Estadísticas de la búsqueda leídas de la salida de CBC.
+
+    Args:
+        salida: Texto completo de la salida de CBC
+
+    Returns:
+        Diccionario con resultado (texto de 'Result - ...'), nodos,
+        iteraciones, tiempo_cpu_s, cota_raiz_lp (relajación lineal) y
+        cota_raiz_cortes (tras los cortes de la raíz); None si la salida no
+        lo informa (p. ej. CBC terminado por el límite duro)
+    """
+    estadisticas = {'resultado': None}
+    for nombre, patron in _RE_ESTADISTICAS.items():
+        m = patron.search(salida)
+        estadisticas[nombre] = float(m.groups()[-1]) if m else None
+    # CBC informa ±DBL_MAX como cota cuando la raíz se resolvió sin cortes
+    for nombre in ('cota_raiz_lp', 'cota_raiz_cortes'):
+        if estadisticas[nombre] is not None and abs(estadisticas[nombre]) > 1e300:
+            estadisticas[nombre] = None
+    for nombre in ('nodos', 'iteraciones'):
+        if estadisticas[nombre] is not None:
+            estadisticas[nombre] = int(estadisticas[nombre])
+    if estadisticas['nodos'] is None:
+        busquedas = _RE_BUSQUEDA.findall(salida)
+        if busquedas:
+            estadisticas['iteraciones'], estadisticas['nodos'] = map(int, busquedas[-1])
+    m = _RE_RESULTADO.search(salida)
+    if m:
+        estadisticas['resultado'] = m.group(1).strip()
+    return estadisticas
+
+
+def ruta_cbc():
+    """
+    Ejecutable de CBC: el incluido en PuLP o, si no está (PuLP 4 ya no lo
+    trae; se instala con `pip install pulp[cbc]`), `cbc` del PATH.
+
+    La ruta del incluido se lee del atributo de clase: instanciar
+    PULP_CBC_CMD emite un DeprecationWarning desde PuLP 3.
+    """
+    try:
+        from pulp.apis import coin_api
+    except ImportError:
+        coin_api = None
+    if coin_api is not None:
+        incluido = getattr(coin_api, 'PULP_CBC_CMD', None)
+        ruta = getattr(incluido, 'pulp_cbc_path', None)
+        if ruta and os.path.exists(ruta):
+            return ruta
+    return shutil.which('cbc') or 'cbc'
+
+
+def leer_solucion_cbc(ruta, variables):
+    """
+    Interpreta el archivo de solución de CBC.
+
+    Returns:
+        (estado, objetivo, índices de variables con valor 1)
+    """
+    posicion = {v: k for k, v in enumerate(variables)}
+    with open(ruta, 'r', encoding='utf-8') as f:
+        cabecera = f.readline().strip()
+        seleccion = []
+        for linea in f:
+            partes = linea.replace('**', ' ').split()
+            if len(partes) >= 3 and partes[1] in posicion and float(partes[2]) > 0.5:
+                seleccion.append(posicion[partes[1]])
+
+    objetivo = float(cabecera.rsplit(' ', 1)[-1]) if 'objective value' in cabecera else float('nan')
+    if cabecera.startswith('Optimal'):
+        estado = 'Optimal'
+    elif 'nfeasible' in cabecera:
+        estado = 'Infeasible'
+    elif cabecera.startswith('Unbounded'):
+        estado = 'Unbounded'
+    elif cabecera.startswith('Stopped') and 'no integer solution' not in cabecera \
+            and objetivo < _SIN_SOLUCION:
+        estado = 'Feasible'
+    else:
+        estado = 'Not Solved'
+    if estado == 'Not Solved':
+        seleccion = []
+    return estado, objetivo, sorted(seleccion)
+
+
+def escribir_arranque(ruta, variables, seleccion):
+    """Archivo de solución inicial (MIP start) para la opción -mips de CBC."""
+    elegidas = set(int(k) for k in seleccion)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write(f"Feasible - objective value {float(len(elegidas)):.8f}\n")
+        for k, nombre in enumerate(variables):
+            f.write(f"{k:>7} {nombre} {1 if k in elegidas else 0:>15} {0:>23}\n")
+
+
+def _leer_lineas(descriptor, cola):
+    """Reenvía a `cola` las líneas leídas de `descriptor` (None al terminar)."""
+    pendiente = b''
+    while True:
+        try:
+            datos = os.read(descriptor, 65536)
+        except OSError:
+            # EIO: el pseudo-terminal se cierra al terminar CBC
+            datos = b''
+        if not datos:
+            break
+        pendiente += datos
+        *lineas, pendiente = pendiente.split(b'\n')
+        for linea in lineas:
+            cola.put(linea.decode('utf-8', 'replace') + '\n')
+    if pendiente:
+        cola.put(pendiente.decode('utf-8', 'replace'))
+    os.close(descriptor)
+    cola.put(None)
+
+
+def _lanzar(comando):
+    """
+    Lanza CBC con la salida conectada a un pseudo-terminal (POSIX) para que
+    escriba línea a línea; con una tubería la salida llega en bloques y las
+    marcas de tiempo de las incumbentes se pierden.
+
+    Returns:
+        (proceso, descriptor de lectura)
+    """
+    try:
+        import pty
+        lectura, escritura = pty.openpty()
+    except (ImportError, OSError):
+        proceso = subprocess.Popen(comando, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        return proceso, proceso.stdout.fileno()
+    proceso = subprocess.Popen(comando, stdout=escritura, stderr=escritura,
+                               stdin=subprocess.DEVNULL, close_fds=True)
+    os.close(escritura)
+    return proceso, lectura
+
+
+def resolver_cbc(a, variables=None, restricciones=None, msg=False, opciones=None,
+                 directorio=None, tiempo_limite=None, gap_relativo=None,
+                 solucion_inicial=None, al_evento=None):
+    """
+    Escribe el MPS desde los no ceros de `a` y lo resuelve con CBC.
+
+    La salida de CBC se lee línea a línea mientras resuelve: cada nueva
+    incumbente o cota se registra con su marca de tiempo (y se notifica a
+    `al_evento`). Con `tiempo_limite`, si CBC no se detiene a tiempo (p. ej.
+    durante el LP raíz, donde no revisa el reloj) el proceso se termina y se
+    devuelve la mejor solución conocida (la inicial, si se entregó).
+
+    Args:
+        a: Matriz de cobertura (MatrizBits, densa o CSR)
+        variables, restricciones: Nombres (ver `escribir_mps`)
+        msg: Si True, muestra la salida de CBC
+        opciones: Lista de argumentos adicionales para CBC
+        directorio: Carpeta para los archivos temporales
+        tiempo_limite: Segundos de reloj para CBC (opción -sec)
+        gap_relativo: Gap relativo objetivo (opción -ratioGap)
+        solucion_inicial: Índices de fila de una cobertura factible (MIP start)
+        al_evento: Función (tiempo_s, incumbente, cota) llamada en cada mejora
+
+    Returns:
+        ResultadoCBC con la selección como índices de fila de `a`
+    """
+    variables = variables or nombres_variables(a.shape[0])
+    if a.shape[1] == 0:
+        # Sin restricciones (p. ej. todo resuelto por el presolve): x = 0 es óptimo
+        return ResultadoCBC('Optimal', 0.0, [], 0.0, 0.0, cota_inferior=0.0)
+
+    with tempfile.TemporaryDirectory(dir=directorio) as tmp:
+        ruta_mps = os.path.join(tmp, 'modelo.mps')
+        ruta_sol = os.path.join(tmp, 'modelo.sol')
+
+        inicio = time.perf_counter()
+        escribir_mps(ruta_mps, a, variables, restricciones)
+        tiempo_escritura = time.perf_counter() - inicio
+
+        comando = [ruta_cbc(), ruta_mps, '-timeMode', 'elapsed']
+        if tiempo_limite is not None:
+            comando += ['-sec', str(tiempo_limite)]
+        if gap_relativo is not None:
+            comando += ['-ratioGap', str(gap_relativo)]
+        if solucion_inicial is not None:
+            ruta_arranque = os.path.join(tmp, 'arranque.sol')
+            escribir_arranque(ruta_arranque, variables, solucion_inicial)
+            comando += ['-mips', ruta_arranque]
+        comando += list(opciones or []) + ['-solve', '-solution', ruta_sol]
+
+        incumbente = float(len(solucion_inicial)) if solucion_inicial is not None else math.inf
+        cota = -math.inf
+        eventos = []
+        lineas = []
+        cortado = False
+        limite_duro = None
+        if tiempo_limite is not None:
+            limite_duro = tiempo_limite * FACTOR_CORTE_DURO + HOLGURA_CORTE_DURO_S
+
+        inicio = time.perf_counter()
+        proceso, descriptor = _lanzar(comando)
+        cola = queue.Queue()
+        threading.Thread(target=_leer_lineas, args=(descriptor, cola), daemon=True).start()
+        while True:
+            try:
+                linea = cola.get(timeout=0.1)
+            except queue.Empty:
+                if limite_duro is not None and time.perf_counter() - inicio > limite_duro:
+                    proceso.kill()
+                    cortado = True
+                    break
+                continue
+            if linea is None:
+                break
+            lineas.append(linea)
+            if msg:
+                print(linea, end='')
+            t = time.perf_counter() - inicio
+            nueva_incumbente, nueva_cota = incumbente, cota
+            for m in _RE_INCUMBENTE.finditer(linea):
+                nueva_incumbente = min(nueva_incumbente, float(m.group(1)))
+            for m in _RE_MEJOR_SOLUCION.finditer(linea):
+                if float(m.group(1)) < _SIN_SOLUCION:
+                    nueva_incumbente = min(nueva_incumbente, float(m.group(1)))
+            for m in _RE_COTA.finditer(linea):
+                nueva_cota = max(nueva_cota, float(m.group(1)))
+            if nueva_incumbente < incumbente or nueva_cota > cota:
+                incumbente, cota = nueva_incumbente, nueva_cota
+                eventos.append((t, incumbente, cota))
+                if al_evento is not None:
+                    al_evento(t, incumbente, cota)
+        proceso.wait()
+        tiempo_resolucion = time.perf_counter() - inicio
+        salida = ''.join(lineas)
+
+        if cortado or not os.path.exists(ruta_sol):
+            if solucion_inicial is not None:
+                estado, objetivo, seleccion = 'Feasible', float(len(solucion_inicial)), \
+                    sorted(int(k) for k in solucion_inicial)
+            else:
+                estado, objetivo, seleccion = 'Not Solved', float('nan'), []
+        else:
+            estado, objetivo, seleccion = leer_solucion_cbc(ruta_sol, variables)
+
+    # CBC informa 'Optimal' también al detenerse por -ratioGap: sólo es óptimo
+    # probado si la cota (entera, costos unitarios) alcanza al objetivo
+    if estado == 'Optimal' and (gap_relativo is None or cota == -math.inf):
+        cota = objetivo
+    cota_inferior = float(math.ceil(cota - 1e-6)) if cota > -math.inf else float('nan')
+    if estado == 'Optimal' and cota_inferior < objetivo:
+        estado = 'Feasible'
+
+    return ResultadoCBC(estado, objetivo, seleccion, tiempo_escritura, tiempo_resolucion,
+                        salida, cota_inferior, eventos)
+
+
+def resolver_cbc_anytime(A, variables=None, restricciones=None, msg=False,
+                         tiempo_limite=None, gap_relativo=None, arranque=True,
+                         al_evento=None, inicial=None):
+    """
+    CBC en modo "anytime": construye una cobertura greedy (con búsqueda local)
+    sobre la matriz empaquetada, la entrega como MIP start y respeta el límite
+    de tiempo y el gap objetivo. Si se detiene antes de probar optimalidad,
+    devuelve estado 'Feasible' con la mejor incumbente y la cota inferior.
+
+    Args:
+        A: MatrizBits (candidatos × puntos)
+        variables, restricciones: Nombres (ver `escribir_mps`)
+        msg: Si True, muestra la salida de CBC
+        tiempo_limite: Segundos de reloj (None = sin límite)
+        gap_relativo: Gap relativo para detenerse (None = probar optimalidad)
+        arranque: Si True, entrega la solución greedy como MIP start
+        al_evento: Función (tiempo_s, incumbente, cota) llamada en cada mejora
+        inicial: Candidatos de una solución previa (arranque en caliente); se
+            completan con greedy y se usa la mejor de ambas soluciones
+
+    Returns:
+        ResultadoCBC
+    """
+    from .heuristica import greedy, mejorar
+
+    solucion_inicial = None
+    if arranque:
+        solucion_inicial = greedy(A) if A.n_columnas else []
+        if solucion_inicial is not None:
+            solucion_inicial = mejorar(A, solucion_inicial)
+        if solucion_inicial is not None and inicial is not None and len(inicial):
+            previa = mejorar(A, greedy(A, inicial=inicial))
+            if len(previa) < len(solucion_inicial):
+                solucion_inicial = previa
+    return resolver_cbc(A, variables, restricciones, msg=msg, tiempo_limite=tiempo_limite,
+                        gap_relativo=gap_relativo, solucion_inicial=solucion_inicial,
+                        al_evento=al_evento)
@@ -0,0 +1,248 @@
+"""
+Resolución multi-resolución (de grilla gruesa a fina) del Set Cover
+
+Con I = J el modelo crece como (área / celda²)²: una grilla de 5 m sobre el
+campo tiene ~83 mil puntos y ~7·10⁹ enlaces. En lugar de resolverla
+directamente:
+
+1. Se resuelve el Set Cover completo en la grilla más gruesa.
+2. En cada nivel más fino, los candidatos son solo los sitios elegidos en
+   el nivel anterior y los centros finos en su vecindario; las restricciones
+   iniciales son los puntos finos críticos (sin cobertura, o cubiertos por
+   un solo sitio de la solución anterior). La solución anterior se entrega
+   como arranque en caliente.
+3. La solución se verifica contra todos los puntos del nivel; los puntos
+   sin cobertura se agregan como restricciones (y, si ningún candidato los
+   cubre, como candidatos) y se vuelve a resolver.
+
+La obstrucción se sortea por coordenadas de enlace (ver
+`cobertura.obstruccion_por_coordenadas`), o se obtiene del ráster con
+`patron_obstruccion: "raster"`, para que el mismo enlace físico sea
+consistente entre niveles y subconjuntos. Al final se calcula una cota
+inferior del problema fino completo: todos los candidatos finos contra un
+subconjunto de sus puntos (toda cobertura total también cubre ese
+subconjunto), resuelta con la heurística Lagrangiana.
+"""
+
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .cobertura import (MEMORIA_MAX_MB_DEFECTO, OBSTRUCCION_COORDENADAS,
+                        calcular_matriz_cobertura_bits, obstruccion_desde_config)
+from .grid import generar_puntos_demanda
+from .heuristica import resolver_lagrangiano
+from .propagacion import ModeloPropagacion
+from .resolucion import resolver_set_cover
+from .terreno import terreno_desde_config
+
+
+@dataclass
+class NivelMultiresolucion:
+    """Resumen de un nivel: tamaño del modelo restringido y solución."""
+    celda_m: float
+    puntos_totales: int
+    puntos_modelo: int
+    candidatos: int
+    rondas: int
+    n_sitios: int
+    estado: str
+    tiempo_s: float
+
+
+@dataclass
+class ResultadoMultiresolucion:
+    """
+    Solución final verificada en la grilla más fina.
+
+    Atributos:
+        sitios: Coordenadas (N, 2) de los sitios elegidos
+        niveles: Lista de NivelMultiresolucion
+        puntos_sin_cobertura: Puntos finos no cubiertos (0 si la verificación pasó)
+        cota_inferior: Cota inferior del óptimo del problema fino completo
+        puntos_cota: Puntos usados para la cota inferior
+        tiempo_s: Tiempo total
+    """
+    sitios: np.ndarray
+    niveles: list = field(default_factory=list)
+    puntos_sin_cobertura: int = 0
+    cota_inferior: float = 0.0
+    puntos_cota: int = 0
+    tiempo_s: float = 0.0
+
+    @property
+    def n_sitios(self):
+        return len(self.sitios)
+
+    @property
+    def verificada(self):
+        return self.puntos_sin_cobertura == 0
+
+    @property
+    def gap(self):
+        """Distancia relativa máxima al óptimo fino completo: (N - cota) / N."""
+        return max(0.0, (self.n_sitios - self.cota_inferior) / self.n_sitios) if self.n_sitios else 0.0
+
+
+def _vecindario(sitios, puntos, radio):
+    """Índices de `puntos` a distancia <= radio de algún sitio."""
+    cerca = np.zeros(len(puntos), dtype=bool)
+    for x, y in sitios:
+        cerca |= (puntos[:, 0] - x) ** 2 + (puntos[:, 1] - y) ** 2 <= radio ** 2
+    return np.flatnonzero(cerca)
+
+
+def _sin_duplicados(coords):
+    """Coordenadas únicas conservando el orden de primera aparición."""
+    _, primeros = np.unique(np.round(coords, 6), axis=0, return_index=True)
+    return coords[np.sort(primeros)]
+
+
+def _indices_espaciados(indices, maximo):
+    """Hasta `maximo` elementos de `indices` equiespaciados (determinista)."""
+    if len(indices) <= maximo:
+        return indices
+    return indices[np.linspace(0, len(indices) - 1, maximo).astype(np.int64)]
+
+
+def resolver_multiresolucion(config, celdas_m, radio_celdas=1.5, max_rondas=20,
+                             max_puntos_cota=2000, opciones_cota=None, opciones_solver=None,
+                             al_nivel=None):
+    """
+    Resuelve el Set Cover de la grilla más fina de `celdas_m` por niveles.
+
+    Args:
+        config: Configuración (campo, propagacion, escenario, calculo, solver)
+        celdas_m: Tamaños de celda de grueso a fino (p. ej. [50, 25, 10, 5])
+        radio_celdas: Radio del vecindario de refinamiento, en celdas del
+            nivel anterior
+        max_rondas: Rondas máximas de verificación y re-resolución por nivel
+        max_puntos_cota: Puntos finos usados para la cota inferior (0 = sin cota)
+        opciones_cota: Opciones de `resolver_lagrangiano` para la cota
+            (max_iteraciones, tiempo_limite_s)
+        opciones_solver: Opciones de `resolver_set_cover` en cada ronda (por
+            defecto, el bloque `solver` de config.json)
+        al_nivel: Función (NivelMultiresolucion) llamada al terminar cada nivel
+
+    Returns:
+        ResultadoMultiresolucion
+    """
+    inicio_total = time.perf_counter()
+    campo = config['campo']
+    escenario = config['escenario']
+    modelo = ModeloPropagacion.desde_config(config)
+    porcentaje = escenario['porcentaje_area_obstruida']
+    semilla = escenario.get('semilla_obstruccion', 42)
+    memoria = config.get('calculo', {}).get('memoria_max_mb', MEMORIA_MAX_MB_DEFECTO)
+    obstruccion = obstruccion_desde_config(config, OBSTRUCCION_COORDENADAS)
+    # Cada ronda verifica la selección contra todos los puntos del nivel: el
+    # caché por sitio del terreno evita recalcular los sitios que se repiten
+    terreno = terreno_desde_config(config, modelo)
+    if opciones_solver is None:
+        opciones_solver = config.get('solver')
+
+    def matriz(candidatos, puntos):
+        return calcular_matriz_cobertura_bits(candidatos, puntos, modelo, porcentaje, semilla,
+                                              memoria, obstruccion=obstruccion,
+                                              terreno=terreno).a
+
+    resultado = ResultadoMultiresolucion(sitios=np.empty((0, 2)))
+    sitios = None
+    puntos = filas = None
+    for nivel, celda in enumerate(celdas_m):
+        inicio = time.perf_counter()
+        puntos = generar_puntos_demanda(campo['dimension_x_m'], campo['dimension_y_m'],
+                                        celda, celda)
+        if sitios is None:
+            candidatos = puntos
+            filas = np.arange(len(puntos))
+            inicial = None
+        else:
+            radio = radio_celdas * celdas_m[nivel - 1]
+            # Los sitios anteriores van primero: son el arranque en caliente
+            candidatos = _sin_duplicados(np.vstack([sitios, puntos[_vecindario(sitios, puntos, radio)]]))
+            inicial = list(range(len(sitios)))
+            conteo = matriz(sitios, puntos).conteo_columnas()
+            filas = np.flatnonzero(conteo <= 1)
+
+        estado = 'Not Solved'
+        seleccion = np.empty((0, 2))
+        for ronda in range(1, max_rondas + 1):
+            a = matriz(candidatos, puntos[filas])
+            sin_candidato = a.columnas_sin_cobertura()
+            if len(sin_candidato):
+                # Ningún candidato los cubre: el propio punto pasa a ser candidato
+                candidatos = _sin_duplicados(np.vstack([candidatos, puntos[filas[sin_candidato]]]))
+                a = matriz(candidatos, puntos[filas])
+            solucion = resolver_set_cover(a, opciones_solver, solucion_inicial=inicial)
+            estado = solucion.estado
+            if estado not in ('Optimal', 'Feasible'):
+                break
+            seleccion = candidatos[solucion.seleccion]
+            inicial = solucion.seleccion
+            faltantes = matriz(seleccion, puntos).columnas_sin_cobertura() if len(seleccion) \
+                else np.arange(len(puntos))
+            if len(faltantes) == 0:
+                break
+            filas = np.union1d(filas, faltantes)
+
+        sitios = seleccion
+        registro = NivelMultiresolucion(celda_m=celda, puntos_totales=len(puntos),
+                                        puntos_modelo=len(filas), candidatos=len(candidatos),
+                                        rondas=ronda, n_sitios=len(sitios), estado=estado,
+                                        tiempo_s=time.perf_counter() - inicio)
+        resultado.niveles.append(registro)
+        if al_nivel is not None:
+            al_nivel(registro)
+        if estado not in ('Optimal', 'Feasible'):
+            break
+
+    resultado.sitios = sitios
+    resultado.puntos_sin_cobertura = len(matriz(sitios, puntos).columnas_sin_cobertura()) \
+        if len(sitios) else len(puntos)
+
+    if max_puntos_cota and len(sitios):
+        # Cota: todos los candidatos finos contra los puntos del último modelo restringido
+        opciones_cota = opciones_cota or {}
+        subconjunto = _indices_espaciados(filas, max_puntos_cota)
+        cota = resolver_lagrangiano(matriz(puntos, puntos[subconjunto]),
+                                    max_iteraciones=opciones_cota.get('max_iteraciones', 300),
+                                    tiempo_limite=opciones_cota.get('tiempo_limite_s', 120))
+        resultado.cota_inferior = float(cota.cota_inferior)
+        resultado.puntos_cota = len(subconjunto)
+    resultado.tiempo_s = time.perf_counter() - inicio_total
+    return resultado
+
+
+def multiresolucion_desde_config(config, **kwargs):
+    """Resolución con el bloque `multiresolucion` de config.json."""
+    opciones = config.get('multiresolucion', {})
+    kwargs.setdefault('radio_celdas', opciones.get('radio_celdas', 1.5))
+    kwargs.setdefault('max_rondas', opciones.get('max_rondas', 20))
+    kwargs.setdefault('max_puntos_cota', opciones.get('max_puntos_cota', 2000))
+    kwargs.setdefault('opciones_cota', opciones.get('cota'))
+    # Cada ronda es un modelo pequeño: el bloque propio ajusta el tiempo por ronda
+    kwargs.setdefault('opciones_solver', {**config.get('solver', {}), **opciones.get('solver', {})})
+    celdas = kwargs.pop('celdas_m', None) or opciones.get('celdas_m', [50, 25, 10])
+    return resolver_multiresolucion(config, celdas, **kwargs)
+
+
+def resumen_multiresolucion(resultado):
+    """Líneas de texto con el detalle por nivel, la verificación y el gap."""
+    lineas = [f"{'Celda (m)':>10} {'Puntos':>9} {'En modelo':>10} {'Candidatos':>11} "
+              f"{'Rondas':>7} {'N':>4} {'Estado':>10} {'Tiempo (s)':>11}"]
+    for n in resultado.niveles:
+        lineas.append(f"{n.celda_m:10g} {n.puntos_totales:9,} {n.puntos_modelo:10,} "
+                      f"{n.candidatos:11,} {n.rondas:7d} {n.n_sitios:4d} {n.estado:>10} "
+                      f"{n.tiempo_s:11.2f}")
+    lineas.append(f"Verificación en la grilla más fina: "
+                  + ("todos los puntos cubiertos" if resultado.verificada
+                     else f"{resultado.puntos_sin_cobertura} puntos sin cobertura"))
+    if resultado.puntos_cota:
+        lineas.append(f"Cota inferior del problema fino completo: {resultado.cota_inferior:g} "
+                      f"({resultado.puntos_cota:,} puntos × todos los candidatos finos)")
+        lineas.append(f"N = {resultado.n_sitios}, gap máximo respecto del óptimo fino: "
+                      f"{100 * resultado.gap:.1f}%")
+    lineas.append(f"Tiempo total: {resultado.tiempo_s:.1f} s")
+    return lineas
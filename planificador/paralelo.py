@@ -0,0 +1,207 @@
+"""
+Ejecución de tareas en procesos de trabajo tolerante a fallos
+
+Cada trabajador es un proceso de larga vida conectado al proceso principal
+por su propia tubería: recibe una tarea, responde con el resultado y espera
+la siguiente. Así el proceso principal puede terminar a un trabajador que
+excede el tiempo límite, o detectar uno que murió (segfault, falta de
+memoria), registrar el fallo de esa tarea y reemplazarlo sin afectar al
+resto; con un pool estándar una caída invalida todas las tareas pendientes.
+
+Los arrays grandes comunes a todas las tareas (coordenadas de demanda,
+matrices) se escriben una vez como .npy y cada trabajador los mapea en
+memoria al arrancar (ver `compartido`), en lugar de serializarlos en cada
+tarea.
+"""
+
+import multiprocessing
+import os
+import signal
+import time
+import traceback
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+
+import numpy as np
+
+# Arrays compartidos del trabajador actual: nombre → array mapeado en memoria
+_COMPARTIDOS = {}
+
+
+def compartido(nombre):
+    """Array compartido `nombre` dentro de una tarea (ver `ejecutar_tareas`)."""
+    return _COMPARTIDOS[nombre]
+
+
+def guardar_compartidos(arrays, directorio):
+    """
+    Escribe los arrays a compartir como .npy en `directorio`.
+
+    Args:
+        arrays: Diccionario nombre → array
+        directorio: Carpeta de destino
+
+    Returns:
+        Diccionario nombre → ruta, para `ejecutar_tareas(compartidos=...)`
+    """
+    os.makedirs(directorio, exist_ok=True)
+    rutas = {}
+    for nombre, array in arrays.items():
+        rutas[nombre] = os.path.join(directorio, f"{nombre}.npy")
+        np.save(rutas[nombre], np.asarray(array))
+    return rutas
+
+
+@dataclass
+class ResultadoTarea:
+    """
+    Resultado de una tarea.
+
+    Atributos:
+        indice: Posición de la tarea en la lista de entrada
+        valor: Valor devuelto por la función (None si falló)
+        error: Descripción del fallo ('' si terminó bien)
+        tiempo_s: Tiempo de reloj de la tarea en el trabajador
+    """
+    indice: int
+    valor: object
+    error: str
+    tiempo_s: float
+
+    @property
+    def exito(self):
+        return not self.error
+
+
+def _bucle_trabajador(conexion, compartidos):
+    if hasattr(os, 'setpgrp'):
+        # Grupo de procesos propio: al terminar el trabajador también se
+        # terminan sus hijos (p. ej. CBC)
+        os.setpgrp()
+    for nombre, ruta in (compartidos or {}).items():
+        _COMPARTIDOS[nombre] = np.load(ruta, mmap_mode='r')
+    while True:
+        try:
+            mensaje = conexion.recv()
+        except EOFError:
+            break
+        if mensaje is None:
+            break
+        funcion, argumentos = mensaje
+        inicio = time.perf_counter()
+        try:
+            valor, error = funcion(*argumentos), ''
+        except Exception as e:
+            valor = None
+            error = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}"
+        conexion.send((valor, error, time.perf_counter() - inicio))
+    conexion.close()
+
+
+class _Trabajador:
+    def __init__(self, contexto, compartidos):
+        self.conexion, extremo = contexto.Pipe()
+        self.proceso = contexto.Process(target=_bucle_trabajador,
+                                        args=(extremo, compartidos), daemon=True)
+        self.proceso.start()
+        extremo.close()
+        self.indice = None
+        self.inicio = None
+
+    def asignar(self, indice, funcion, argumentos):
+        self.indice = indice
+        self.inicio = time.perf_counter()
+        self.conexion.send((funcion, argumentos))
+
+    def terminar(self):
+        if hasattr(os, 'killpg'):
+            try:
+                os.killpg(self.proceso.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        self.proceso.kill()
+        self.proceso.join()
+        self.conexion.close()
+
+
+def ejecutar_tareas(funcion, tareas, procesos=None, tiempo_limite=None, compartidos=None,
+                    contexto=None):
+    """
+    Ejecuta `funcion(*argumentos)` para cada tupla de `tareas` en paralelo.
+
+    Los resultados se entregan a medida que terminan (no en orden). Una
+    excepción, la muerte del proceso o exceder `tiempo_limite` producen un
+    ResultadoTarea con `error` y el trabajador se reemplaza; el resto de las
+    tareas continúa.
+
+    Args:
+        funcion: Función de nivel de módulo (serializable con pickle)
+        tareas: Lista de tuplas de argumentos
+        procesos: Número de trabajadores (por defecto, os.cpu_count())
+        tiempo_limite: Segundos máximos por tarea (None = sin límite)
+        compartidos: Diccionario nombre → ruta .npy (ver `guardar_compartidos`)
+        contexto: Contexto de multiprocessing (por defecto, el de la plataforma)
+
+    Yields:
+        ResultadoTarea
+    """
+    tareas = list(tareas)
+    if not tareas:
+        return
+    contexto = contexto or multiprocessing.get_context()
+    procesos = max(1, min(procesos or os.cpu_count() or 1, len(tareas)))
+    pendientes = list(range(len(tareas)))[::-1]
+    trabajadores = [_Trabajador(contexto, compartidos) for _ in range(procesos)]
+
+    try:
+        while True:
+            for t in trabajadores:
+                if t.indice is None and pendientes:
+                    indice = pendientes.pop()
+                    t.asignar(indice, funcion, tareas[indice])
+            ocupados = [t for t in trabajadores if t.indice is not None]
+            if not ocupados:
+                break
+
+            espera = None
+            if tiempo_limite is not None:
+                ahora = time.perf_counter()
+                espera = max(0.0, min(t.inicio + tiempo_limite - ahora for t in ocupados))
+            listos = wait([t.conexion for t in ocupados] + [t.proceso.sentinel for t in ocupados],
+                          timeout=espera)
+
+            for k, t in enumerate(trabajadores):
+                if t.indice is None:
+                    continue
+                transcurrido = time.perf_counter() - t.inicio
+                fallo = None
+                if t.conexion in listos:
+                    try:
+                        valor, error, tiempo = t.conexion.recv()
+                    except (EOFError, OSError):
+                        fallo = f"Proceso terminado (código {t.proceso.exitcode})"
+                    else:
+                        yield ResultadoTarea(t.indice, valor, error, tiempo)
+                        t.indice = None
+                        continue
+                elif t.proceso.sentinel in listos:
+                    t.proceso.join()
+                    fallo = f"Proceso terminado (código {t.proceso.exitcode})"
+                elif tiempo_limite is not None and transcurrido >= tiempo_limite:
+                    fallo = f"Tiempo límite excedido ({tiempo_limite:g} s)"
+                if fallo is not None:
+                    indice = t.indice
+                    t.terminar()
+                    trabajadores[k] = _Trabajador(contexto, compartidos)
+                    yield ResultadoTarea(indice, None, fallo, transcurrido)
+    finally:
+        for t in trabajadores:
+            if t.proceso.is_alive():
+                try:
+                    t.conexion.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+        for t in trabajadores:
+            t.proceso.join(timeout=1.0)
+            if t.proceso.is_alive():
+                t.proceso.kill()
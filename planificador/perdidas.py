@@ -0,0 +1,401 @@
+"""
+Matriz persistente de pérdidas por trayectoria PL_ij (dB)
+
+La pérdida de cada enlace depende solo de la geometría (I, J), de los
+exponentes y la pérdida de referencia del modelo, y de la máscara de
+obstrucción (porcentaje y semilla). La potencia de transmisión, la
+sensibilidad y el margen solo mueven el umbral de viabilidad, por lo que
+una nueva matriz de cobertura para otro presupuesto de enlace es una
+comparación vectorizada sobre la matriz guardada, sin recalcular
+distancias ni path-loss.
+
+Los valores se guardan como .npy mapeado en memoria (float32 por defecto;
+float16 reduce a la mitad el tamaño con una resolución de 0.125 dB en el
+rango habitual de 128-256 dB, redondeando hacia arriba para no sobreestimar
+la cobertura) junto a la máscara de obstrucción en bits.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .bitset import MatrizBits
+from .cobertura import (MEMORIA_MAX_MB_DEFECTO, OBSTRUCCION_SECUENCIAL, ResultadoCobertura,
+                        _acumular, filas_por_bloque, iterar_geometria, obstruccion_desde_config)
+from .instrumentacion import registrar_arreglo, registrar_cobertura
+from .mapa_obstruccion import MapaObstruccion
+from .propagacion import ModeloPropagacion
+from .terreno import terreno_desde_config
+
+TIPOS_PERDIDA = ('float16', 'float32', 'float64')
+
+PREFIJO_CACHE = 'perdidas'
+
+
+def _descripcion_obstruccion(obstruccion):
+    if isinstance(obstruccion, MapaObstruccion):
+        return f"raster_{obstruccion.huella}"
+    return obstruccion
+
+
+def clave_perdidas(I_coords, J_coords, modelo, porcentaje_obstruido, semilla=42,
+                   dtype=np.float32, obstruccion=OBSTRUCCION_SECUENCIAL, terreno=None):
+    """
+    Huella de los parámetros de los que depende PL_ij.
+
+    Incluye las coordenadas de I y J, los exponentes, la pérdida de
+    referencia, d0, la obstrucción (porcentaje, semilla y modelo o ráster),
+    el terreno (MDE, alturas de antena) y el tipo de dato; excluye potencia,
+    sensibilidad y margen.
+
+    Returns:
+        Cadena hexadecimal de 16 caracteres
+    """
+    h = hashlib.sha256()
+    for coords in (I_coords, J_coords):
+        coords = np.ascontiguousarray(coords, dtype='<f8')
+        h.update(str(coords.shape).encode())
+        h.update(coords.tobytes())
+    parametros = {
+        'exponente_abierto': float(modelo.exponente_abierto),
+        'exponente_obstruido': float(modelo.exponente_obstruido),
+        'perdida_referencia_db': float(modelo.perdida_referencia_db),
+        'd0': float(modelo.d0),
+        'porcentaje_obstruido': float(porcentaje_obstruido),
+        'semilla': int(semilla),
+        'dtype': np.dtype(dtype).name,
+    }
+    if obstruccion != OBSTRUCCION_SECUENCIAL:
+        # Las claves del modelo secuencial no cambian (cachés existentes)
+        parametros['obstruccion'] = _descripcion_obstruccion(obstruccion)
+    if terreno is not None:
+        parametros['terreno'] = terreno.huella
+    h.update(json.dumps(parametros, sort_keys=True).encode())
+    return h.hexdigest()[:16]
+
+
+def _redondear_hacia_arriba(perdida, dtype):
+    """
+    Convierte a `dtype` sin subestimar ninguna pérdida: con float16/float32
+    la cobertura derivada nunca incluye un enlace que no sea viable.
+    """
+    reducida = perdida.astype(dtype)
+    menor = reducida < perdida
+    reducida[menor] = np.nextafter(reducida[menor], np.asarray(np.inf, dtype=dtype))
+    return reducida
+
+
+class MatrizPerdidas:
+    """
+    Pérdidas PL_ij (n_I × n_J) y máscara de obstrucción de los enlaces.
+
+    Atributos:
+        valores: Array o np.memmap (n_I, n_J) con la pérdida en dB
+        obstruidos: MatrizBits con los enlaces obstruidos
+        metadatos: Parámetros geométricos y de obstrucción (ver `clave_perdidas`)
+    """
+
+    def __init__(self, valores, obstruidos, metadatos):
+        if obstruidos.shape != valores.shape:
+            raise ValueError(f"Forma de obstrucciones {obstruidos.shape} distinta de {valores.shape}")
+        self.valores = valores
+        self.obstruidos = obstruidos
+        self.metadatos = metadatos
+
+    # ------------------------------------------------------------------
+    # Construcción y persistencia
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def calcular(cls, I_coords, J_coords, modelo, porcentaje_obstruido, semilla=42,
+                 memoria_max_mb=MEMORIA_MAX_MB_DEFECTO, dtype=np.float32, ruta=None,
+                 obstruccion=OBSTRUCCION_SECUENCIAL, terreno=None):
+        """
+        Calcula PL_ij por bloques de filas (misma geometría y obstrucción que
+        `calcular_matriz_cobertura`).
+
+        Args:
+            I_coords, J_coords: Coordenadas de candidatos y puntos de demanda
+            modelo: ModeloPropagacion (solo se usan exponentes, PL(d0) y d0)
+            porcentaje_obstruido: Probabilidad de obstrucción por enlace (en %)
+            semilla: Semilla de la máscara de obstrucción
+            memoria_max_mb: Presupuesto de memoria de trabajo por bloque
+            dtype: float16, float32 o float64
+            ruta: Ruta base opcional; los valores se escriben en `<ruta>.npy`
+                mapeado en memoria, la obstrucción en `<ruta>_obstruidos.npy`
+                y los metadatos en `<ruta>.json` (al final, como marca de
+                archivo completo)
+            obstruccion: Modelo de obstrucción (ver `iterar_geometria`)
+            terreno: ModeloTerreno opcional; su pérdida por difracción se
+                suma a PL_ij
+
+        Returns:
+            MatrizPerdidas
+        """
+        dtype = np.dtype(dtype)
+        if dtype.name not in TIPOS_PERDIDA:
+            raise ValueError(f"Tipo {dtype.name} no soportado; use uno de {TIPOS_PERDIDA}")
+        n_I, n_J = len(I_coords), len(J_coords)
+        metadatos = {
+            'clave': clave_perdidas(I_coords, J_coords, modelo, porcentaje_obstruido,
+                                    semilla, dtype, obstruccion, terreno),
+            'n_filas': n_I,
+            'n_columnas': n_J,
+            'dtype': dtype.name,
+            'exponente_abierto': float(modelo.exponente_abierto),
+            'exponente_obstruido': float(modelo.exponente_obstruido),
+            'perdida_referencia_db': float(modelo.perdida_referencia_db),
+            'd0': float(modelo.d0),
+            'porcentaje_obstruido': float(porcentaje_obstruido),
+            'semilla': int(semilla),
+            'obstruccion': _descripcion_obstruccion(obstruccion),
+            'terreno': None if terreno is None else terreno.huella,
+        }
+
+        if ruta is None:
+            valores = np.empty((n_I, n_J), dtype=dtype)
+            obstruidos = MatrizBits.vacia(n_I, n_J)
+        else:
+            directorio = os.path.dirname(str(ruta))
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            valores = np.lib.format.open_memmap(f"{ruta}.npy", mode='w+', dtype=dtype,
+                                                shape=(n_I, n_J))
+            obstruidos = MatrizBits.vacia(n_I, n_J, ruta=f"{ruta}_obstruidos")
+
+        for inicio, fin, distancia, obstruido in iterar_geometria(
+                I_coords, J_coords, porcentaje_obstruido, semilla, memoria_max_mb, obstruccion):
+            perdida = modelo.path_loss(distancia, modelo.exponente(obstruido))
+            if terreno is not None:
+                perdida += terreno.perdidas(np.asarray(I_coords)[inicio:fin], J_coords,
+                                            memoria_max_mb)
+            valores[inicio:fin] = _redondear_hacia_arriba(perdida, dtype)
+            obstruidos.asignar_filas(inicio, obstruido)
+
+        if ruta is not None:
+            valores.flush()
+            obstruidos.flush()
+            with open(f"{ruta}.json", 'w', encoding='utf-8') as f:
+                json.dump(metadatos, f, indent=1)
+        return cls(valores, obstruidos, metadatos)
+
+    @classmethod
+    def cargar(cls, ruta, mmap=True):
+        """
+        Carga una matriz escrita con `calcular(..., ruta=ruta)`.
+
+        Args:
+            ruta: Ruta base (sin extensión)
+            mmap: Si True, los valores se mapean en memoria (solo lectura)
+        """
+        with open(f"{ruta}.json", 'r', encoding='utf-8') as f:
+            metadatos = json.load(f)
+        valores = np.load(f"{ruta}.npy", mmap_mode='r' if mmap else None)
+        obstruidos = MatrizBits.cargar(f"{ruta}_obstruidos", mmap=mmap)
+        return cls(valores, obstruidos, metadatos)
+
+    @classmethod
+    def desde_cache(cls, directorio, I_coords, J_coords, modelo, porcentaje_obstruido,
+                    semilla=42, memoria_max_mb=MEMORIA_MAX_MB_DEFECTO, dtype=np.float32,
+                    obstruccion=OBSTRUCCION_SECUENCIAL, terreno=None):
+        """
+        Carga la matriz de `directorio` si ya existe para estos parámetros
+        (según `clave_perdidas`); si no, la calcula y la guarda allí.
+
+        Returns:
+            MatrizPerdidas (mapeada en memoria)
+        """
+        clave = clave_perdidas(I_coords, J_coords, modelo, porcentaje_obstruido, semilla, dtype,
+                               obstruccion, terreno)
+        ruta = os.path.join(directorio, f"{PREFIJO_CACHE}_{clave}")
+        if os.path.exists(f"{ruta}.json"):
+            return cls.cargar(ruta)
+        cls.calcular(I_coords, J_coords, modelo, porcentaje_obstruido, semilla,
+                     memoria_max_mb, dtype, ruta=ruta, obstruccion=obstruccion, terreno=terreno)
+        return cls.cargar(ruta)
+
+    # ------------------------------------------------------------------
+    # Acceso
+    # ------------------------------------------------------------------
+
+    @property
+    def shape(self):
+        return self.valores.shape
+
+    @property
+    def nbytes(self):
+        return self.valores.nbytes + self.obstruidos.nbytes
+
+    def compatible(self, modelo):
+        """True si el modelo tiene los mismos exponentes, PL(d0) y d0 que la matriz."""
+        m = self.metadatos
+        return (float(modelo.exponente_abierto) == m['exponente_abierto']
+                and float(modelo.exponente_obstruido) == m['exponente_obstruido']
+                and float(modelo.perdida_referencia_db) == m['perdida_referencia_db']
+                and float(modelo.d0) == m['d0'])
+
+    def _bloques(self, memoria_max_mb=MEMORIA_MAX_MB_DEFECTO):
+        """Itera (inicio, fin, pérdidas float64) por bloques de filas."""
+        n_I, n_J = self.shape
+        paso = filas_por_bloque(n_J, memoria_max_mb)
+        for inicio in range(0, n_I, paso):
+            fin = min(inicio + paso, n_I)
+            yield inicio, fin, np.asarray(self.valores[inicio:fin], dtype=np.float64)
+
+    # ------------------------------------------------------------------
+    # Umbralización
+    # ------------------------------------------------------------------
+
+    def cobertura(self, modelo, memoria_max_mb=MEMORIA_MAX_MB_DEFECTO, ruta=None):
+        """
+        Matriz de cobertura para el presupuesto de enlace de `modelo`.
+
+        Aplica la misma condición que `ModeloPropagacion.enlace_viable`
+        (P_tx - PL >= Sens_rx + Margen) sobre las pérdidas guardadas. Con
+        float64 el resultado es idéntico al cálculo directo; con float32 o
+        float16 (redondeados hacia arriba) solo pueden perderse enlaces a
+        menos de la resolución del tipo de dato del umbral, nunca agregarse.
+
+        Args:
+            modelo: ModeloPropagacion con el nuevo presupuesto (los exponentes
+                deben coincidir con los de la matriz)
+            memoria_max_mb: Presupuesto de memoria de trabajo por bloque
+            ruta: Ruta base opcional para escribir la matriz de bits en disco
+
+        Returns:
+            ResultadoCobertura con `a` y `enlaces_obstruidos` como MatrizBits
+        """
+        if not self.compatible(modelo):
+            raise ValueError("El modelo no coincide con los exponentes/PL(d0) de la matriz de pérdidas")
+        n_I, n_J = self.shape
+        a = MatrizBits.vacia(n_I, n_J, ruta=ruta)
+
+        def bloques():
+            for inicio, fin, perdida in self._bloques(memoria_max_mb):
+                viable = modelo.potencia_tx_dbm - perdida >= modelo.umbral_dbm
+                obstruido = self.obstruidos.a_denso(np.arange(inicio, fin), dtype=bool)
+                yield inicio, fin, viable, obstruido
+
+        viables_abierto, viables_obstruido = _acumular(bloques(), a.asignar_filas, None)
+        a.flush()
+        resultado = ResultadoCobertura(a=a, enlaces_obstruidos=self.obstruidos,
+                                       enlaces_totales=n_I * n_J,
+                                       enlaces_viables_abierto=viables_abierto,
+                                       enlaces_viables_obstruido=viables_obstruido)
+        registrar_cobertura(resultado)
+        return resultado
+
+    def viables(self, modelo, filas=None, columnas=None):
+        """
+        Enlaces viables de un subbloque de la matriz, sin recorrerla entera.
+
+        Misma condición que `cobertura`; útil cuando solo interesan algunos
+        candidatos (filas) o puntos de demanda (columnas).
+
+        Args:
+            modelo: ModeloPropagacion compatible con la matriz
+            filas, columnas: Índices del subbloque (None = todos)
+
+        Returns:
+            Array booleano (len(filas), len(columnas))
+        """
+        if not self.compatible(modelo):
+            raise ValueError("El modelo no coincide con los exponentes/PL(d0) de la matriz de pérdidas")
+        valores = self.valores if filas is None else self.valores[np.asarray(filas, dtype=np.int64)]
+        if columnas is not None:
+            valores = valores[:, np.asarray(columnas, dtype=np.int64)]
+        return modelo.potencia_tx_dbm - np.asarray(valores, dtype=np.float64) >= modelo.umbral_dbm
+
+    def densidad_por_umbral(self, presupuestos_db, memoria_max_mb=MEMORIA_MAX_MB_DEFECTO):
+        """
+        Densidad de cobertura para una lista ordenada de presupuestos de enlace.
+
+        Un solo recorrido de la matriz: cada pérdida se ubica con
+        `np.searchsorted` en la lista de presupuestos y un histograma
+        acumulado da los enlaces viables (PL <= presupuesto) de todos los
+        umbrales a la vez. También se cuenta, por umbral, cuántos puntos de
+        demanda tienen al menos un enlace viable (a partir de la mínima
+        pérdida por columna).
+
+        Args:
+            presupuestos_db: Presupuestos P_tx - Sens_rx - Margen en dB, en
+                orden creciente
+            memoria_max_mb: Presupuesto de memoria de trabajo por bloque
+
+        Returns:
+            Diccionario con arrays 'presupuesto_db', 'enlaces_viables',
+            'densidad' (0-1) y 'puntos_cubribles'
+        """
+        presupuestos = np.asarray(presupuestos_db, dtype=np.float64)
+        if np.any(np.diff(presupuestos) < 0):
+            raise ValueError("Los presupuestos deben estar en orden creciente")
+        n_I, n_J = self.shape
+        k = len(presupuestos)
+        histograma = np.zeros(k + 1, dtype=np.int64)
+        perdida_minima = np.full(n_J, np.inf)
+        for _, _, perdida in self._bloques(memoria_max_mb):
+            # Primer presupuesto >= PL: el enlace es viable desde ese umbral en adelante
+            posicion = np.searchsorted(presupuestos, perdida.ravel(), side='left')
+            histograma += np.bincount(posicion, minlength=k + 1)
+            np.minimum(perdida_minima, perdida.min(axis=0), out=perdida_minima)
+
+        enlaces_viables = np.cumsum(histograma[:k])
+        puntos = np.bincount(np.searchsorted(presupuestos, perdida_minima, side='left'),
+                             minlength=k + 1)
+        total = n_I * n_J
+        return {
+            'presupuesto_db': presupuestos,
+            'enlaces_viables': enlaces_viables,
+            'densidad': enlaces_viables / total if total else np.zeros(k),
+            'puntos_cubribles': np.cumsum(puntos[:k]),
+        }
+
+
+def resumen_umbrales(barrido, n_puntos):
+    """
+    Líneas de texto con la densidad por presupuesto de `densidad_por_umbral`.
+
+    Args:
+        barrido: Diccionario devuelto por `MatrizPerdidas.densidad_por_umbral`
+        n_puntos: Número de puntos de demanda
+
+    Returns:
+        Lista de líneas
+    """
+    lineas = [f"{'Presupuesto (dB)':>17} {'Enlaces viables':>16} {'Densidad':>9} {'Puntos cubribles':>17}"]
+    for b, e, d, p in zip(barrido['presupuesto_db'], barrido['enlaces_viables'],
+                          barrido['densidad'], barrido['puntos_cubribles']):
+        lineas.append(f"{b:17.1f} {e:16,} {100 * d:8.2f}% {p:>9,} / {n_puntos:,}")
+    return lineas
+
+
+def perdidas_desde_config(config, I_coords, J_coords, directorio=None, **kwargs):
+    """
+    Matriz de pérdidas con los parámetros de config.json.
+
+    Lee `propagacion` (exponentes, PL(d0)), `escenario` (porcentaje, semilla
+    y patrón de obstrucción), `obstruccion_raster`, `terreno` y `calculo`
+    (presupuesto de memoria y `tipo_perdidas`).
+    Con `directorio` la matriz se reutiliza entre ejecuciones
+    (ver `MatrizPerdidas.desde_cache`).
+    """
+    escenario = config['escenario']
+    calculo = config.get('calculo', {})
+    kwargs.setdefault('semilla', escenario.get('semilla_obstruccion', 42))
+    kwargs.setdefault('memoria_max_mb', calculo.get('memoria_max_mb', MEMORIA_MAX_MB_DEFECTO))
+    kwargs.setdefault('dtype', calculo.get('tipo_perdidas', 'float32'))
+    if 'obstruccion' not in kwargs:
+        kwargs['obstruccion'] = obstruccion_desde_config(config)
+    if 'terreno' not in kwargs:
+        kwargs['terreno'] = terreno_desde_config(config)
+    modelo = ModeloPropagacion.desde_config(config)
+    if directorio is None:
+        perdidas = MatrizPerdidas.calcular(I_coords, J_coords, modelo,
+                                           escenario['porcentaje_area_obstruida'], **kwargs)
+    else:
+        perdidas = MatrizPerdidas.desde_cache(directorio, I_coords, J_coords, modelo,
+                                              escenario['porcentaje_area_obstruida'], **kwargs)
+    registrar_arreglo('perdidas', perdidas.valores)
+    return perdidas
@@ -0,0 +1,682 @@
+"""
+Pipeline por etapas con artefactos en disco y recálculo incremental
+
+    grilla → cobertura → resolucion → asignacion → reporte
+                                                 → figuras
+                                                 → exportacion
+
+Cada etapa lee algunas secciones de config.json y los artefactos de las
+etapas de las que depende, y escribe los suyos en
+`results/cache/pipeline/<etapa>_<clave>/`. La clave es un hash de las
+secciones que lee la etapa y de las claves de sus dependencias: un cambio
+en `visualizacion` solo vuelve a dibujar, uno en `reporte` solo reescribe el
+reporte y uno en `solver` reutiliza la grilla y la cobertura. El archivo
+`metadatos.json` se escribe al final, como marca de etapa completa.
+
+Las etapas importan el motor al ejecutarse: matplotlib solo se carga en
+'figuras' y PuLP solo si CBC se busca a través de él (ver
+`mps.ruta_cbc`), de modo que una corrida de resolución o de reporte sin
+pantalla arranca rápido.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .configuracion import ruta_proyecto
+from .instrumentacion import instrumentacion_desde_config, registrar_arreglo
+
+DIRECTORIO_PIPELINE = 'results/cache/pipeline'
+
+# Caché común de matrices de pérdidas (la misma del notebook y de la ampliación)
+DIRECTORIO_PERDIDAS = 'results/cache'
+
+ARCHIVO_METADATOS = 'metadatos.json'
+
+# Prefijo de los archivos de la etapa 'exportacion' (results/exports/pipeline_*)
+PREFIJO_EXPORTACION = 'pipeline'
+
+# Versión del formato de los artefactos: cambiarla invalida todas las etapas
+VERSION = 3
+
+# Secciones de las que depende la matriz de cobertura (y todo lo que usa márgenes de enlace)
+SECCIONES_ENLACE = ['campo', 'propagacion', 'escenario', 'obstruccion_raster', 'terreno',
+                    'calculo']
+
+
+@dataclass
+class Etapa:
+    """
+    Una etapa del pipeline.
+
+    Atributos:
+        nombre: Identificador de la etapa
+        secciones: Bloques de config.json que lee
+        dependencias: Etapas cuyos artefactos usa
+        funcion: Función (config, entradas, directorio) → metadatos (dict
+            serializable en JSON); `entradas` es el diccionario etapa → Artefacto
+            de sus dependencias y `directorio` la carpeta de sus archivos
+        salidas: Función (config) → {archivo del artefacto: ruta publicada}
+            con los archivos (o carpetas) que se copian a results/ al terminar
+        descripcion: Texto de ayuda para la línea de comandos
+    """
+    nombre: str
+    secciones: list
+    dependencias: list
+    funcion: object
+    salidas: object = None
+    descripcion: str = ''
+
+
+@dataclass
+class Artefacto:
+    """
+    Resultado de una etapa en disco.
+
+    Atributos:
+        etapa: Nombre de la etapa
+        clave: Hash de las secciones leídas y de las claves de las dependencias
+        directorio: Carpeta con los archivos de la etapa
+        metadatos: Contenido de metadatos.json
+        desde_cache: True si no hubo que ejecutarla
+        tiempo_s: Tiempo de ejecución (o de carga, si vino de la caché)
+        publicados: Rutas copiadas a results/
+    """
+    etapa: str
+    clave: str
+    directorio: str
+    metadatos: dict
+    desde_cache: bool = False
+    tiempo_s: float = 0.0
+    publicados: list = field(default_factory=list)
+
+    def ruta(self, archivo):
+        """Ruta de un archivo del artefacto."""
+        return os.path.join(self.directorio, archivo)
+
+
+# ----------------------------------------------------------------------
+# Etapas
+# ----------------------------------------------------------------------
+
+def _etapa_grilla(config, entradas, directorio):
+    """Puntos de demanda J (también candidatos I)."""
+    from .grid import grid_desde_config
+    J = grid_desde_config(config)
+    registrar_arreglo('J', J)
+    np.save(os.path.join(directorio, 'puntos.npy'), J)
+    return {'n_puntos': len(J)}
+
+
+def _etapa_cobertura(config, entradas, directorio):
+    """
+    Matriz de cobertura en bits, umbralizando la matriz de pérdidas común.
+
+    La obstrucción es la de la asignación, la ubicación y la ampliación (el
+    sorteo por coordenadas, o el ráster): así cada sensor en un punto de
+    demanda que el Set Cover da por cubierto tiene enlace viable. El sorteo
+    secuencial del notebook no puede evaluarse para enlaces sueltos.
+    """
+    from .cobertura import OBSTRUCCION_COORDENADAS, obstruccion_desde_config
+    from .perdidas import perdidas_desde_config
+    from .propagacion import ModeloPropagacion
+    J = np.load(entradas['grilla'].ruta('puntos.npy'))
+    perdidas = perdidas_desde_config(config, J, J, directorio=ruta_proyecto(DIRECTORIO_PERDIDAS),
+                                     obstruccion=obstruccion_desde_config(
+                                         config, OBSTRUCCION_COORDENADAS))
+    cobertura = perdidas.cobertura(ModeloPropagacion.desde_config(config),
+                                   ruta=os.path.join(directorio, 'cobertura'))
+    return metadatos_cobertura(perdidas, cobertura)
+
+
+def _etapa_resolucion(config, entradas, directorio):
+    """Set Cover de gateways: presolve + solver + postsolve."""
+    from .bitset import MatrizBits
+    from .resolucion import resolver_set_cover
+    J = np.load(entradas['grilla'].ruta('puntos.npy'))
+    a = MatrizBits.cargar(entradas['cobertura'].ruta('cobertura'))
+    return metadatos_resolucion(resolver_set_cover(a, config.get('solver')), J)
+
+
+def _etapa_asignacion(config, entradas, directorio):
+    """Sensores de humedad ubicados y asignados a los gateways de la solución."""
+    from .asignacion import asignacion_desde_config
+    from .ubicacion import ubicacion_desde_config
+    gateways = gateways_de(entradas['resolucion'])
+    ubicacion = ubicacion_desde_config(config, gateways)
+    sensores = ubicacion.coordenadas
+    asignacion = asignacion_desde_config(config, sensores, gateways)
+    np.savez(os.path.join(directorio, 'asignacion.npz'), sensores=sensores,
+             gateway=asignacion.gateway, margen_db=asignacion.margen_db,
+             distancia_m=asignacion.distancia_m, mejor_gateway=asignacion.mejor_gateway,
+             capacidad=asignacion.capacidad)
+    return metadatos_asignacion(asignacion, ubicacion)
+
+
+def _etapa_exportacion(config, entradas, directorio):
+    """Todos los sensores y gateways en CSV, columnas .npy, Parquet o GeoJSON."""
+    from .exportacion import exportar_despliegue, opciones_exportacion, resumen_tabla, \
+        tabla_despliegue
+    opciones = opciones_exportacion(config)
+    datos = np.load(entradas['asignacion'].ruta('asignacion.npz'))
+    tabla = tabla_despliegue(datos['sensores'], gateways_de(entradas['resolucion']),
+                             datos['gateway'], datos['margen_db'], datos['distancia_m'],
+                             mejor_gateway=datos['mejor_gateway'], capacidad=datos['capacidad'],
+                             origen_wgs84=opciones['origen_wgs84'])
+    rutas = exportar_despliegue(tabla, directorio, opciones['formatos'], PREFIJO_EXPORTACION,
+                                opciones['filas_por_bloque'])
+    return {'n_sensores': tabla.n_sensores,
+            'formatos': list(rutas),
+            'archivos': [os.path.basename(r) for lista in rutas.values() for r in lista],
+            'resumen': resumen_tabla(tabla, opciones['sensores_criticos'])}
+
+
+def _salidas_exportacion(config):
+    from .exportacion import archivos_exportacion, opciones_exportacion
+    opciones = opciones_exportacion(config)
+    return {nombre: os.path.join(opciones['directorio'], nombre)
+            for nombres in archivos_exportacion(opciones['formatos'],
+                                                PREFIJO_EXPORTACION).values()
+            for nombre in nombres}
+
+
+def _etapa_reporte(config, entradas, directorio):
+    """Reporte de texto de la optimización y del despliegue de sensores."""
+    from .bitset import MatrizBits
+    medidas = [entradas[e].metadatos['instrumentacion'] for e in ETAPAS['reporte'].dependencias
+               if 'instrumentacion' in entradas[e].metadatos]
+    lineas = lineas_reporte(config, entradas['grilla'].metadatos['n_puntos'],
+                            entradas['cobertura'].metadatos, entradas['resolucion'].metadatos,
+                            entradas['asignacion'].metadatos,
+                            MatrizBits.cargar(entradas['cobertura'].ruta('cobertura')), medidas)
+    with open(os.path.join(directorio, 'reporte.txt'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lineas) + '\n')
+    return {'lineas': len(lineas)}
+
+
+def _salidas_reporte(config):
+    opciones = config.get('reporte', {})
+    if not opciones.get('generar_reporte_detallado', True):
+        return {}
+    nombre = opciones.get('nombre_archivo', 'reporte_optimizacion.txt')
+    return {'reporte.txt': os.path.join('results/reports', nombre)}
+
+
+def _etapa_figuras(config, entradas, directorio):
+    """Mapa del despliegue: gateways, alcance, puntos de demanda y sensores por gateway."""
+    import matplotlib.pyplot as plt
+
+    from .renderizado import dpi_desde_config
+    datos = np.load(entradas['asignacion'].ruta('asignacion.npz'))
+    figura = figura_despliegue(config, np.load(entradas['grilla'].ruta('puntos.npy')),
+                               gateways_de(entradas['resolucion']), datos['sensores'],
+                               datos['gateway'])
+    dpi = dpi_desde_config(config)
+    figura.savefig(os.path.join(directorio, 'despliegue.png'), dpi=dpi, bbox_inches='tight')
+    plt.close(figura)
+    return {'dpi': dpi}
+
+
+ETAPAS = {etapa.nombre: etapa for etapa in [
+    Etapa('grilla', ['campo', 'discretizacion'], [], _etapa_grilla,
+          descripcion='Puntos de demanda J'),
+    Etapa('cobertura', SECCIONES_ENLACE, ['grilla'], _etapa_cobertura,
+          descripcion='Matriz de cobertura en bits (pérdidas en results/cache)'),
+    Etapa('resolucion', ['solver'], ['grilla', 'cobertura'], _etapa_resolucion,
+          descripcion='Set Cover de gateways'),
+    Etapa('asignacion', SECCIONES_ENLACE + ['ubicacion_sensores', 'asignacion'], ['resolucion'],
+          _etapa_asignacion,
+          descripcion='Sensores de humedad ubicados y asignados a los gateways'),
+    Etapa('reporte', ['campo', 'discretizacion', 'propagacion', 'escenario', 'reporte'],
+          ['grilla', 'cobertura', 'resolucion', 'asignacion'], _etapa_reporte,
+          salidas=_salidas_reporte, descripcion='Reporte de texto'),
+    Etapa('figuras', ['campo', 'discretizacion', 'propagacion', 'visualizacion'],
+          ['grilla', 'resolucion', 'asignacion'], _etapa_figuras,
+          salidas=lambda config: {'despliegue.png': 'results/visualizations/despliegue_pipeline.png'},
+          descripcion='Mapa del despliegue'),
+    Etapa('exportacion', ['exportacion'], ['resolucion', 'asignacion'], _etapa_exportacion,
+          salidas=_salidas_exportacion,
+          descripcion='Todos los sensores y gateways en CSV, .npy, Parquet o GeoJSON'),
+]}
+
+
+# ----------------------------------------------------------------------
+# Motor
+# ----------------------------------------------------------------------
+
+def _numero(valor):
+    """float serializable en JSON estricto (NaN e infinito → None)."""
+    valor = float(valor)
+    return valor if np.isfinite(valor) else None
+
+
+def clave_etapa(config, etapa, claves_dependencias):
+    """
+    Hash de las secciones de config.json que lee `etapa` y de las claves de
+    sus dependencias.
+
+    Returns:
+        Cadena hexadecimal de 16 caracteres
+    """
+    contenido = {
+        'etapa': etapa.nombre,
+        'version': VERSION,
+        'secciones': {s: config.get(s) for s in etapa.secciones},
+        'dependencias': {d: claves_dependencias[d] for d in etapa.dependencias},
+    }
+    texto = json.dumps(contenido, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode()).hexdigest()[:16]
+
+
+def orden_etapas(etapas=None):
+    """
+    Etapas a ejecutar (con sus dependencias) en orden topológico.
+
+    Args:
+        etapas: Nombres pedidos (por defecto, todas)
+
+    Returns:
+        Lista de nombres
+    """
+    pedidas = list(ETAPAS) if not etapas else list(etapas)
+    desconocidas = [e for e in pedidas if e not in ETAPAS]
+    if desconocidas:
+        raise ValueError(f"Etapas desconocidas: {desconocidas}; disponibles: {list(ETAPAS)}")
+    necesarias = set()
+    pendientes = list(pedidas)
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre not in necesarias:
+            necesarias.add(nombre)
+            pendientes.extend(ETAPAS[nombre].dependencias)
+    # ETAPAS está en orden topológico
+    return [nombre for nombre in ETAPAS if nombre in necesarias]
+
+
+def claves_pipeline(config, etapas=None):
+    """Clave de cada etapa pedida y de sus dependencias, sin ejecutar nada."""
+    claves = {}
+    for nombre in orden_etapas(etapas):
+        claves[nombre] = clave_etapa(config, ETAPAS[nombre], claves)
+    return claves
+
+
+def _leer_metadatos(directorio):
+    with open(os.path.join(directorio, ARCHIVO_METADATOS), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _publicar(etapa, config, artefacto):
+    if etapa.salidas is None:
+        return
+    for archivo, destino in etapa.salidas(config).items():
+        destino = ruta_proyecto(destino)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        if os.path.isdir(artefacto.ruta(archivo)):
+            # Columnas .npy: se reemplaza la carpeta entera (sin columnas viejas)
+            shutil.rmtree(destino, ignore_errors=True)
+            shutil.copytree(artefacto.ruta(archivo), destino)
+        else:
+            shutil.copyfile(artefacto.ruta(archivo), destino)
+        artefacto.publicados.append(destino)
+
+
+def ejecutar_pipeline(config, etapas=None, directorio=None, forzar=(), publicar=True,
+                      al_terminar=None, instrumentacion=None):
+    """
+    Ejecuta las etapas pedidas, reutilizando los artefactos cuya clave no cambió.
+
+    Cada etapa se mide con `instrumentacion` (un evento por etapa, también
+    las que vienen de la caché); la medida de las etapas calculadas se guarda
+    en sus metadatos bajo 'instrumentacion', para que el reporte la resuma.
+
+    Args:
+        config: Configuración
+        etapas: Nombres de las etapas a obtener (por defecto, todas); sus
+            dependencias se incluyen solas
+        directorio: Carpeta de artefactos (por defecto, results/cache/pipeline)
+        forzar: Etapas a recalcular aunque estén en la caché (True = todas)
+        publicar: Si True, copia las salidas de cada etapa a results/
+        al_terminar: Función (Artefacto) llamada al terminar cada etapa
+        instrumentacion: Instrumentacion (por defecto, la del bloque
+            `instrumentacion` de config.json con origen 'pipeline')
+
+    Returns:
+        Diccionario etapa → Artefacto
+    """
+    directorio = directorio or ruta_proyecto(DIRECTORIO_PIPELINE)
+    if instrumentacion is None:
+        instrumentacion = instrumentacion_desde_config(config, origen='pipeline')
+    artefactos = {}
+    claves = {}
+    for nombre in orden_etapas(etapas):
+        etapa = ETAPAS[nombre]
+        inicio = time.perf_counter()
+        clave = clave_etapa(config, etapa, claves)
+        claves[nombre] = clave
+        carpeta = os.path.join(directorio, f"{nombre}_{clave}")
+        completa = os.path.exists(os.path.join(carpeta, ARCHIVO_METADATOS))
+        if completa and not (forzar is True or nombre in forzar):
+            with instrumentacion.etapa(nombre, clave=clave, desde_cache=True):
+                artefacto = Artefacto(nombre, clave, carpeta, _leer_metadatos(carpeta),
+                                      desde_cache=True)
+        else:
+            # Una corrida interrumpida deja la carpeta sin metadatos: se rehace entera
+            shutil.rmtree(carpeta, ignore_errors=True)
+            os.makedirs(carpeta)
+            entradas = {d: artefactos[d] for d in etapa.dependencias}
+            with instrumentacion.etapa(nombre, clave=clave, desde_cache=False) as medida:
+                metadatos = {'etapa': nombre, 'clave': clave,
+                             **etapa.funcion(config, entradas, carpeta)}
+            if medida.medida is not None:
+                metadatos['instrumentacion'] = medida.medida
+            with open(os.path.join(carpeta, ARCHIVO_METADATOS), 'w', encoding='utf-8') as f:
+                json.dump(metadatos, f, indent=1, ensure_ascii=False)
+            artefacto = Artefacto(nombre, clave, carpeta, metadatos)
+        if publicar:
+            _publicar(etapa, config, artefacto)
+        artefacto.tiempo_s = time.perf_counter() - inicio
+        artefactos[nombre] = artefacto
+        if al_terminar is not None:
+            al_terminar(artefacto)
+    return artefactos
+
+
+def cargar_artefacto(config, etapa, directorio=None):
+    """
+    Artefacto ya calculado de `etapa` para esta configuración, sin ejecutar nada.
+
+    Returns:
+        Artefacto, o None si la etapa (con su clave actual) no está en disco
+    """
+    directorio = directorio or ruta_proyecto(DIRECTORIO_PIPELINE)
+    clave = claves_pipeline(config, [etapa])[etapa]
+    carpeta = os.path.join(directorio, f"{etapa}_{clave}")
+    if not os.path.exists(os.path.join(carpeta, ARCHIVO_METADATOS)):
+        return None
+    return Artefacto(etapa, clave, carpeta, _leer_metadatos(carpeta), desde_cache=True)
+
+
+def gateways_de(artefacto):
+    """
+    Coordenadas (G, 2) de los gateways de un artefacto de 'resolucion'.
+
+    Raises:
+        ValueError: Si el Set Cover no tiene solución
+    """
+    m = artefacto.metadatos
+    if m['estado'] not in ('Optimal', 'Feasible'):
+        raise ValueError(f"El Set Cover no tiene solución (estado: {m['estado']})")
+    return np.array(m['gateways'], dtype=float).reshape(-1, 2)
+
+
+def gateways_desde_config(config, directorio=None):
+    """
+    Gateways de la solución del Set Cover para esta configuración: se
+    resuelve solo si la grilla, la cobertura o el solver cambiaron desde la
+    última corrida.
+    """
+    artefactos = ejecutar_pipeline(config, ['resolucion'], directorio, publicar=False)
+    return gateways_de(artefactos['resolucion'])
+
+
+# ----------------------------------------------------------------------
+# Metadatos, reporte y figuras (también usados por `benchmark`)
+# ----------------------------------------------------------------------
+
+def metadatos_cobertura(perdidas, cobertura):
+    """Estadísticas de una matriz de cobertura (metadatos de la etapa 'cobertura')."""
+    return {
+        'clave_perdidas': perdidas.metadatos['clave'],
+        'enlaces_totales': cobertura.enlaces_totales,
+        'enlaces_viables_abierto': cobertura.enlaces_viables_abierto,
+        'enlaces_viables_obstruido': cobertura.enlaces_viables_obstruido,
+        'densidad': cobertura.densidad,
+        'puntos_sin_cobertura': len(cobertura.a.columnas_sin_cobertura()),
+    }
+
+
+def metadatos_resolucion(resultado, candidatos):
+    """
+    Solución del Set Cover (metadatos de la etapa 'resolucion').
+
+    Args:
+        resultado: ResultadoSetCover
+        candidatos: Coordenadas (n_I, 2) de los candidatos
+    """
+    coordenadas = candidatos[resultado.seleccion] if resultado.seleccion else np.empty((0, 2))
+    return {
+        'estado': resultado.estado,
+        'seleccion': [int(i) for i in resultado.seleccion],
+        'gateways': coordenadas.tolist(),
+        'cota_inferior': _numero(resultado.cota_inferior),
+        'gap': _numero(resultado.gap),
+        'solver': resultado.solver,
+        'tiempo_presolve_s': resultado.tiempo_presolve_s,
+        'tiempo_resolucion_s': resultado.tiempo_resolucion_s,
+        'incumbentes': [[float(t), float(u), _numero(c)] for t, u, c in resultado.incumbentes],
+        'estadisticas': resultado.estadisticas,
+    }
+
+
+def metadatos_asignacion(asignacion, ubicacion=None):
+    """
+    Carga de los gateways y resumen (metadatos de la etapa 'asignacion').
+
+    Args:
+        asignacion: ResultadoAsignacion
+        ubicacion: ResultadoUbicacion de los sensores, si se calculó
+    """
+    from .asignacion import resumen_asignacion
+    from .ubicacion import resumen_ubicacion
+    resumen = resumen_asignacion(asignacion)
+    if ubicacion is not None:
+        resumen = resumen_ubicacion(ubicacion) + resumen
+    return {
+        'n_sensores': len(asignacion.gateway),
+        'metodo': None if ubicacion is None else ubicacion.metodo,
+        'carga': asignacion.carga.tolist(),
+        'capacidad': asignacion.capacidad.tolist(),
+        'sin_cobertura': len(asignacion.sin_cobertura),
+        'sin_capacidad': len(asignacion.sin_capacidad),
+        'resumen': resumen,
+    }
+
+
+def lineas_reporte(config, n_J, cobertura, solucion, asignacion, a, medidas=None):
+    """
+    Líneas del reporte de texto.
+
+    Args:
+        config: Configuración (campo, discretizacion, propagacion, escenario, reporte)
+        n_J: Número de puntos de demanda
+        cobertura, solucion, asignacion: Metadatos de las etapas (ver
+            `metadatos_cobertura`, `metadatos_resolucion`, `metadatos_asignacion`)
+        a: MatrizBits de cobertura
+        medidas: Eventos de instrumentación de las etapas; se resumen en una
+            sección final si `reporte.incluir_instrumentacion` (por defecto, sí)
+
+    Returns:
+        Lista de líneas
+    """
+    from .propagacion import ModeloPropagacion
+    campo, d, p = config['campo'], config['discretizacion'], config['propagacion']
+    escenario = config['escenario']
+    modelo = ModeloPropagacion.desde_config(config)
+    R_abierto = float(modelo.rango_maximo(modelo.exponente_abierto))
+    R_obstruido = float(modelo.rango_maximo(modelo.exponente_obstruido))
+
+    separador = "-" * 80
+    lineas = [
+        "=" * 80,
+        "REPORTE DE OPTIMIZACIÓN DE GATEWAYS LoRa Y DESPLIEGUE DE SENSORES",
+        "Pipeline por etapas (python -m planificador)",
+        "=" * 80,
+        "",
+        separador, "1. PARÁMETROS DEL PROBLEMA", separador,
+        f"Dimensiones del campo: {campo['dimension_x_m']} m × {campo['dimension_y_m']} m "
+        f"({campo['area_total_m2'] / 10000:.1f} ha)",
+        f"Tamaño de celda: {d['celda_x_m']} m × {d['celda_y_m']} m ({n_J:,} puntos de demanda)",
+        f"Potencia TX: {p['potencia_tx_dbm']} dBm | Sensibilidad RX: {p['sensibilidad_rx_dbm']} dBm "
+        f"| Margen: {p['margen_desvanecimiento_db']} dB",
+        f"Rango máximo: {R_abierto:,.1f} m en campo abierto, {R_obstruido:,.1f} m obstruido",
+        f"Escenario: {escenario['tipo']}, {escenario['porcentaje_area_obstruida']}% obstruido "
+        f"(patrón {escenario['patron_obstruccion']})",
+        "",
+        separador, "2. MATRIZ DE COBERTURA", separador,
+        f"Enlaces viables: {cobertura['enlaces_viables_abierto'] + cobertura['enlaces_viables_obstruido']:,} "
+        f"de {cobertura['enlaces_totales']:,} ({cobertura['densidad'] * 100:.2f}%)",
+        f"  Campo abierto: {cobertura['enlaces_viables_abierto']:,} | "
+        f"obstruidos: {cobertura['enlaces_viables_obstruido']:,}",
+        f"Puntos sin ningún candidato: {cobertura['puntos_sin_cobertura']}",
+        f"Matriz de pérdidas: clave {cobertura['clave_perdidas']}",
+        "",
+        separador, "3. RESULTADOS DE LA OPTIMIZACIÓN", separador,
+        f"Estado de la solución: {solucion['estado']}",
+        f"Solver utilizado: {solucion['solver']}",
+        f"Tiempo: presolve {solucion['tiempo_presolve_s']:.2f} s, "
+        f"resolución {solucion['tiempo_resolucion_s']:.2f} s",
+    ]
+    if solucion['estado'] not in ('Optimal', 'Feasible'):
+        return lineas + ["", "=" * 80]
+    n_optimo = len(solucion['seleccion'])
+    gap = solucion['gap']
+    lineas += [
+        f"Cota inferior: {solucion['cota_inferior']:g}"
+        + (f" | gap relativo: {gap * 100:.2f}%" if gap is not None else ""),
+        f"N_óptimo (número mínimo de gateways): {n_optimo}",
+        "",
+        f"{'Gateway':<10} {'X (m)':<12} {'Y (m)':<12} {'Índice I':<10}",
+    ]
+    for k, (i, (x, y)) in enumerate(zip(solucion['seleccion'], solucion['gateways']), 1):
+        lineas.append(f"{k:<10} {x:<12.2f} {y:<12.2f} {i:<10}")
+
+    por_punto = a.conteo_columnas(solucion['seleccion'])
+    lineas += ["", separador, "4. ANÁLISIS DE COBERTURA", separador,
+               f"Cobertura por punto: mínima {por_punto.min()}, máxima {por_punto.max()}, "
+               f"promedio {por_punto.mean():.2f}"]
+    for k in range(1, int(por_punto.max()) + 1):
+        puntos = int(np.sum(por_punto == k))
+        lineas.append(f"  Puntos cubiertos por {k} gateway(s): {puntos} ({100 * puntos / n_J:.1f}%)")
+    if config.get('reporte', {}).get('incluir_matriz_cobertura'):
+        lineas.append("Puntos de demanda cubiertos por cada gateway (índices de J):")
+        for k, i in enumerate(solucion['seleccion'], 1):
+            cubiertos = np.flatnonzero(a.a_denso([i])[0])
+            lineas.append(f"  Gateway {k}: {' '.join(str(j) for j in cubiertos)}")
+
+    lineas += ["", separador, "5. SENSORES DE HUMEDAD", separador,
+               f"Sensores ubicados: {asignacion['n_sensores']}"]
+    lineas += asignacion['resumen']
+    if medidas and config.get('reporte', {}).get('incluir_instrumentacion', True):
+        from .instrumentacion import resumen_instrumentacion
+        lineas += ["", separador, "6. INSTRUMENTACIÓN (corrida que calculó cada etapa)",
+                   separador]
+        lineas += resumen_instrumentacion(medidas)
+    lineas += ["", "=" * 80, "FIN DEL REPORTE", "=" * 80]
+    return lineas
+
+
+def figura_despliegue(config, J, gateways, sensores, gateway):
+    """
+    Figura del despliegue con la capa de renderizado por lotes.
+
+    Args:
+        config: Configuración (campo, discretizacion, propagacion, visualizacion)
+        J: Puntos de demanda (n, 2)
+        gateways: Coordenadas (G, 2) de los gateways
+        sensores: Coordenadas (S, 2) de los sensores
+        gateway: Gateway asignado por sensor (S,) o SIN_ASIGNAR
+
+    Returns:
+        Figure de matplotlib
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.lines import Line2D
+    from matplotlib.patches import Patch
+
+    from .propagacion import ModeloPropagacion
+    from .renderizado import UMBRAL_RASTER_DEFECTO, capa_campo, dibujar_circulos, dibujar_puntos
+    opciones = config.get('visualizacion', {})
+    umbral_raster = opciones.get('umbral_raster', UMBRAL_RASTER_DEFECTO)
+    L_x, L_y = config['campo']['dimension_x_m'], config['campo']['dimension_y_m']
+    C_x, C_y = config['discretizacion']['celda_x_m'], config['discretizacion']['celda_y_m']
+    modelo = ModeloPropagacion.desde_config(config)
+    R_obstruido = float(modelo.rango_maximo(modelo.exponente_obstruido))
+    gateways = np.asarray(gateways, dtype=float).reshape(-1, 2)
+    colores = plt.get_cmap('tab10').colors
+
+    figura, ax = plt.subplots(figsize=(16, 10))
+    ax.set_xlim(-50, L_x + 50)
+    ax.set_ylim(-50, L_y + 50)
+    ax.set_aspect('equal')
+    capa_campo(ax, L_x, L_y, grilla=(C_x, C_y) if opciones.get('mostrar_grid') else None)
+    dibujar_puntos(ax, J, 'lightgray', s=10, alpha=0.5, zorder=1, umbral_raster=umbral_raster)
+    if opciones.get('mostrar_circulos_cobertura', True):
+        color_g = [colores[g % len(colores)] for g in range(len(gateways))]
+        dibujar_circulos(ax, gateways, R_obstruido, facecolors=color_g, edgecolors=color_g,
+                         alpha=opciones.get('alpha_cobertura', 0.1), linestyle='--', zorder=2)
+
+    leyenda = [Line2D([0], [0], marker='*', color='w', markerfacecolor='red',
+                      markeredgecolor='darkred', markersize=16,
+                      label=f'Gateways LoRa (N={len(gateways)})')]
+    for g in range(len(gateways)):
+        color = colores[g % len(colores)]
+        propios = gateway == g
+        dibujar_puntos(ax, sensores[propios], color, s=20, alpha=0.7, edgecolors='none',
+                       zorder=3, umbral_raster=umbral_raster)
+        leyenda.append(Line2D([0], [0], marker='o', color='w', markerfacecolor=color,
+                              markersize=8, label=f'Sensores GW{g + 1} ({int(propios.sum())})'))
+    sin_asignar = gateway < 0
+    if sin_asignar.any():
+        dibujar_puntos(ax, sensores[sin_asignar], 'gray', s=20, alpha=0.5, marker='x', zorder=3,
+                       umbral_raster=umbral_raster)
+        leyenda.append(Line2D([0], [0], marker='x', color='gray', linestyle='None', markersize=8,
+                              label=f'Sin asignar ({int(sin_asignar.sum())})'))
+    leyenda.append(Patch(facecolor='gray', alpha=0.2,
+                         label=f'Alcance con obstrucción ({R_obstruido:.0f} m)'))
+
+    ax.scatter(gateways[:, 0], gateways[:, 1], c='red', s=500, marker='*',
+               edgecolors='darkred', linewidth=2, zorder=5)
+    for g, (x, y) in enumerate(gateways, 1):
+        ax.text(x, y - 25, f'GW{g}', ha='center', va='top', fontsize=11, fontweight='bold',
+                bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.9))
+    ax.set_xlabel('X (metros)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Y (metros)', fontsize=12, fontweight='bold')
+    ax.set_title(f"{opciones.get('titulo', 'Despliegue LoRa')}\n{len(gateways)} gateways, "
+                 f"{len(sensores)} sensores de humedad | Campo: {L_x} m × {L_y} m",
+                 fontsize=14, fontweight='bold')
+    ax.legend(handles=leyenda, loc='upper right', fontsize=10, framealpha=0.9)
+    ax.grid(True, alpha=0.2)
+    figura.tight_layout()
+    return figura
+
+
+def resumen_pipeline(artefactos):
+    """Líneas de texto con el estado, la clave y el tiempo de cada etapa."""
+    lineas = [f"{'Etapa':<12}{'Origen':<12}{'Clave':<18}{'Tiempo (s)':>10}"]
+    for artefacto in artefactos.values():
+        origen = 'caché' if artefacto.desde_cache else 'calculada'
+        lineas.append(f"{artefacto.etapa:<12}{origen:<12}{artefacto.clave:<18}"
+                      f"{artefacto.tiempo_s:>10.2f}")
+    return lineas
+
+
+def config_con(config, **valores):
+    """
+    Copia de config.json con valores reemplazados por ruta con puntos,
+    p. ej. `config_con(config, **{'visualizacion.modo': 'previsualizacion'})`.
+    """
+    config = copy.deepcopy(config)
+    for ruta, valor in valores.items():
+        nodo = config
+        claves = ruta.split('.')
+        for clave in claves[:-1]:
+            nodo = nodo.setdefault(clave, {})
+        nodo[claves[-1]] = valor
+    return config
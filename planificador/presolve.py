@@ -0,0 +1,220 @@
+"""
+Presolve del Set Cover Problem sobre la matriz empaquetada
+
+Reducciones aplicadas hasta alcanzar un punto fijo:
+  1. Candidatos forzados: si un punto j solo lo cubre el candidato i, x_i = 1
+     y se eliminan i y todos los puntos que cubre.
+  2. Candidatos vacíos: se eliminan los que no cubren ningún punto restante.
+  3. Dominancia de puntos: si S_j ⊆ S_k (todo candidato que cubre j cubre k),
+     la restricción de k es redundante.
+  4. Dominancia de candidatos: si A_i ⊆ A_k (costos unitarios), i se elimina.
+
+Las dominancias se buscan por intersección de filas empaquetadas con salida
+anticipada: los puntos dominados por j son ∩_{i∈S_j} A_i, y los candidatos que
+dominan a i son ∩_{j∈A_i} S_j; en cuanto la intersección queda vacía se corta.
+"""
+
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .bitset import MatrizBits, desempaquetar, empaquetar
+
+# Filas combinadas por iteración en las intersecciones con salida anticipada
+FILAS_POR_INTERSECCION = 32
+
+
+@dataclass
+class ResultadoPresolve:
+    """
+    Problema reducido y mapa de postsolve hacia los índices originales.
+
+    Atributos:
+        matriz: MatrizBits reducida (candidatos × puntos restantes)
+        candidatos: Índices originales (en I) de las filas de `matriz`
+        puntos: Índices originales (en J) de las columnas de `matriz`
+        fijados: Índices originales de candidatos forzados a x_i = 1
+        puntos_sin_cobertura: Puntos que ningún candidato cubre (problema infactible)
+        estadisticas: Conteos de cada reducción, rondas y tiempo
+    """
+    matriz: MatrizBits
+    candidatos: np.ndarray
+    puntos: np.ndarray
+    fijados: np.ndarray
+    puntos_sin_cobertura: np.ndarray
+    estadisticas: dict = field(default_factory=dict)
+
+    @property
+    def factible(self):
+        return len(self.puntos_sin_cobertura) == 0
+
+    def reconstruir(self, seleccion_reducida):
+        """
+        Postsolve: índices originales de la solución completa.
+
+        Args:
+            seleccion_reducida: Índices de filas elegidas en la matriz reducida
+
+        Returns:
+            Lista ordenada de índices en I (fijados + seleccionados)
+        """
+        seleccion = self.candidatos[np.asarray(seleccion_reducida, dtype=np.int64)]
+        return sorted(int(i) for i in np.concatenate([self.fijados, seleccion]))
+
+
+def _interseccion_anticipada(palabras, filas, inicial):
+    """AND de `inicial` con las filas dadas, cortando cuando el resultado es vacío."""
+    resultado = inicial.copy()
+    for inicio in range(0, len(filas), FILAS_POR_INTERSECCION):
+        resultado &= np.bitwise_and.reduce(palabras[filas[inicio:inicio + FILAS_POR_INTERSECCION]],
+                                           axis=0)
+        if not resultado.any():
+            break
+    return resultado
+
+
+def presolve(a, max_rondas=50, dominancia=True):
+    """
+    Reduce una instancia de Set Cover.
+
+    Args:
+        a: Matriz de cobertura (MatrizBits o densa n_I × n_J)
+        max_rondas: Límite de rondas de reducción
+        dominancia: Si False, solo aplica forzados y candidatos vacíos
+
+    Returns:
+        ResultadoPresolve
+    """
+    inicio_t = time.perf_counter()
+    A = a if isinstance(a, MatrizBits) else MatrizBits.desde_denso(a)
+    AT = A.transpuesta()
+    n_I, n_J = A.shape
+
+    activos_I = np.ones(n_I, dtype=bool)
+    activos_J = np.ones(n_J, dtype=bool)
+    fijados = []
+    stats = {'candidatos_originales': n_I, 'puntos_originales': n_J,
+             'enlaces_originales': A.total(),
+             'candidatos_forzados': 0, 'puntos_cubiertos_por_forzados': 0,
+             'candidatos_vacios': 0, 'puntos_dominados': 0, 'candidatos_dominados': 0,
+             'rondas': 0}
+
+    # Puntos sin ningún candidato: se conservan (el solver reportará infactibilidad)
+    conteo_inicial = AT.contar_cubiertos()
+    sin_cobertura = np.flatnonzero(conteo_inicial == 0)
+
+    for _ in range(max_rondas):
+        stats['rondas'] += 1
+        cambios = 0
+        mI = empaquetar(activos_I)
+
+        # 1. Forzados: puntos cubiertos por un único candidato activo
+        conteo = AT.contar_cubiertos(mI)
+        for j in np.flatnonzero(activos_J & (conteo == 1)):
+            if not activos_J[j]:
+                continue
+            i = int(np.flatnonzero(desempaquetar(AT.fila(j) & mI, n_I))[0])
+            cubiertos = desempaquetar(A.fila(i), n_J) & activos_J
+            fijados.append(i)
+            activos_I[i] = False
+            mI = empaquetar(activos_I)
+            activos_J &= ~cubiertos
+            stats['candidatos_forzados'] += 1
+            stats['puntos_cubiertos_por_forzados'] += int(cubiertos.sum())
+            cambios += 1
+
+        # 2. Candidatos que no cubren ningún punto restante
+        mJ = empaquetar(activos_J)
+        tamano = A.contar_cubiertos(mJ)
+        vacios = activos_I & (tamano == 0)
+        activos_I &= ~vacios
+        stats['candidatos_vacios'] += int(vacios.sum())
+        cambios += int(vacios.sum())
+
+        if dominancia:
+            cambios += _dominancia_puntos(A, AT, activos_I, activos_J, stats)
+            cambios += _dominancia_candidatos(A, AT, activos_I, activos_J, stats)
+
+        if cambios == 0:
+            break
+
+    candidatos = np.flatnonzero(activos_I)
+    puntos = np.flatnonzero(activos_J)
+    reducida = A.subconjunto(candidatos, puntos)
+    stats.update({'candidatos_reducidos': len(candidatos), 'puntos_reducidos': len(puntos),
+                  'enlaces_reducidos': reducida.total(),
+                  'puntos_sin_cobertura': len(sin_cobertura),
+                  'tiempo_s': time.perf_counter() - inicio_t})
+
+    return ResultadoPresolve(matriz=reducida, candidatos=candidatos, puntos=puntos,
+                             fijados=np.array(fijados, dtype=np.int64),
+                             puntos_sin_cobertura=sin_cobertura, estadisticas=stats)
+
+
+def _dominancia_puntos(A, AT, activos_I, activos_J, stats):
+    """Elimina puntos k con S_j ⊆ S_k para algún j activo. Modifica activos_J."""
+    n_I, n_J = A.shape
+    mI = empaquetar(activos_I)
+    conteo = AT.contar_cubiertos(mI)
+    tamano = A.contar_cubiertos(empaquetar(activos_J))
+    eliminados = 0
+
+    for j in np.flatnonzero(activos_J)[np.argsort(conteo[activos_J], kind='stable')]:
+        if not activos_J[j] or conteo[j] == 0:
+            continue
+        cubridores = np.flatnonzero(desempaquetar(AT.fila(j) & mI, n_I))
+        cubridores = cubridores[np.argsort(tamano[cubridores], kind='stable')]
+        candidatos_k = activos_J.copy()
+        candidatos_k[j] = False
+        dominados = _interseccion_anticipada(A.palabras, cubridores, empaquetar(candidatos_k))
+        if dominados.any():
+            quitar = desempaquetar(dominados, n_J)
+            activos_J &= ~quitar
+            eliminados += int(quitar.sum())
+
+    stats['puntos_dominados'] += eliminados
+    return eliminados
+
+
+def _dominancia_candidatos(A, AT, activos_I, activos_J, stats):
+    """Elimina candidatos i con A_i ⊆ A_k para algún k activo. Modifica activos_I."""
+    n_I, n_J = A.shape
+    mJ = empaquetar(activos_J)
+    tamano = A.contar_cubiertos(mJ)
+    conteo = AT.contar_cubiertos(empaquetar(activos_I))
+    eliminados = 0
+
+    for i in np.flatnonzero(activos_I)[np.argsort(tamano[activos_I], kind='stable')]:
+        if not activos_I[i]:
+            continue
+        cubiertos = np.flatnonzero(desempaquetar(A.fila(i) & mJ, n_J))
+        cubiertos = cubiertos[np.argsort(conteo[cubiertos], kind='stable')]
+        candidatos_k = activos_I.copy()
+        candidatos_k[i] = False
+        dominadores = _interseccion_anticipada(AT.palabras, cubiertos, empaquetar(candidatos_k))
+        if dominadores.any():
+            activos_I[i] = False
+            eliminados += 1
+
+    stats['candidatos_dominados'] += eliminados
+    return eliminados
+
+
+def resumen_presolve(resultado):
+    """Líneas de texto con las estadísticas de reducción (para consola o reporte)."""
+    s = resultado.estadisticas
+    pct = lambda antes, despues: 100 * (1 - despues / antes) if antes else 0.0
+    return [
+        f"Candidatos: {s['candidatos_originales']} → {s['candidatos_reducidos']} "
+        f"({pct(s['candidatos_originales'], s['candidatos_reducidos']):.1f}% reducción)",
+        f"Puntos de demanda: {s['puntos_originales']} → {s['puntos_reducidos']} "
+        f"({pct(s['puntos_originales'], s['puntos_reducidos']):.1f}% reducción)",
+        f"Enlaces (no ceros): {s['enlaces_originales']:,} → {s['enlaces_reducidos']:,}",
+        f"Candidatos forzados (x_i = 1): {s['candidatos_forzados']} "
+        f"(cubren {s['puntos_cubiertos_por_forzados']} puntos)",
+        f"Puntos dominados eliminados: {s['puntos_dominados']}",
+        f"Candidatos dominados eliminados: {s['candidatos_dominados']}",
+        f"Candidatos vacíos eliminados: {s['candidatos_vacios']}",
+        f"Rondas: {s['rondas']} | Tiempo de presolve: {s['tiempo_s']:.3f} s",
+    ]
@@ -0,0 +1,95 @@
+"""
+Modelo de propagación path-loss (log-distance) vectorizado
+Misma aritmética que calcular_path_loss / link_es_viable del notebook
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class ModeloPropagacion:
+    """
+    Parámetros del enlace LoRa y modelo PL(d) = PL(d0) + 10 * n * log10(d/d0).
+
+    Las alturas de antena solo intervienen con un modelo de terreno (ver
+    `terreno.ModeloTerreno`).
+
+    Todas las funciones aceptan escalares o arrays de NumPy y devuelven
+    resultados con la forma obtenida por broadcasting.
+    """
+    potencia_tx_dbm: float
+    sensibilidad_rx_dbm: float
+    exponente_abierto: float
+    exponente_obstruido: float
+    perdida_referencia_db: float
+    margen_db: float
+    frecuencia_mhz: float = 915.0
+    d0: float = 1.0
+    altura_gateway_m: float = 4.0
+    altura_sensor_m: float = 1.0
+
+    @classmethod
+    def desde_config(cls, config):
+        """Construye el modelo a partir del bloque `propagacion` de config.json."""
+        p = config['propagacion']
+        return cls(potencia_tx_dbm=p['potencia_tx_dbm'],
+                   sensibilidad_rx_dbm=p['sensibilidad_rx_dbm'],
+                   exponente_abierto=p['exponente_path_loss_abierto'],
+                   exponente_obstruido=p['exponente_path_loss_obstruido'],
+                   perdida_referencia_db=p['perdida_referencia_1m_db'],
+                   margen_db=p['margen_desvanecimiento_db'],
+                   frecuencia_mhz=p.get('frecuencia_mhz', 915.0),
+                   altura_gateway_m=p.get('altura_gateway_m', 4.0),
+                   altura_sensor_m=p.get('altura_sensor_m', 1.0))
+
+    @property
+    def umbral_dbm(self):
+        """Potencia mínima recibida para considerar el enlace viable."""
+        return self.sensibilidad_rx_dbm + self.margen_db
+
+    @property
+    def presupuesto_db(self):
+        """Budget de enlace disponible (con margen)."""
+        return self.potencia_tx_dbm - self.sensibilidad_rx_dbm - self.margen_db
+
+    def exponente(self, es_obstruido):
+        """Exponente n por enlace según su condición de obstrucción."""
+        return np.where(es_obstruido, self.exponente_obstruido, self.exponente_abierto)
+
+    def path_loss(self, distancia_m, n):
+        """
+        Pérdida por trayectoria en dB.
+
+        Args:
+            distancia_m: Distancia(s) en metros (se satura inferiormente en d0)
+            n: Exponente(s) de path-loss
+
+        Returns:
+            Pérdida en dB
+        """
+        d = np.maximum(distancia_m, self.d0)
+        return self.perdida_referencia_db + 10 * n * np.log10(d / self.d0)
+
+    def rango_maximo(self, n):
+        """Distancia a la que la potencia recibida iguala el umbral."""
+        return 10 ** ((self.presupuesto_db - self.perdida_referencia_db) / (10 * n))
+
+    def enlace_viable(self, distancia_m, es_obstruido, perdida_adicional_db=None):
+        """
+        Determina la viabilidad de uno o varios enlaces.
+
+        Args:
+            distancia_m: Distancia(s) en metros
+            es_obstruido: Booleano(s) de obstrucción del enlace
+            perdida_adicional_db: Pérdida(s) extra opcional (p. ej. difracción
+                por terreno)
+
+        Returns:
+            Booleano(s): True si P_tx - PL(d) - L_extra >= Sens_rx + Margen
+        """
+        perdida = self.path_loss(distancia_m, self.exponente(es_obstruido))
+        if perdida_adicional_db is not None:
+            perdida = perdida + perdida_adicional_db
+        return self.potencia_tx_dbm - perdida >= self.umbral_dbm
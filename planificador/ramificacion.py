@@ -0,0 +1,212 @@
+"""
+Ramificación y acotamiento en proceso para Set Cover pequeños
+
+Para instancias chicas (como la grilla de 840 puntos, con óptimo 2) casi
+todo el tiempo de CBC se va en escribir el modelo, lanzar el proceso y
+leer la solución. Este solver exacto trabaja en memoria sobre los bits:
+
+- Cada fila (candidato) y cada columna (punto) es un entero de Python, así
+  que uniones, diferencias y popcount (`int.bit_count`) son operaciones
+  nativas sobre cientos de bits.
+- Cota superior: greedy + búsqueda local (ver `heuristica`).
+- Ramificación: el punto sin cubrir con menos candidatos debe quedar
+  cubierto por alguno de ellos; se prueba cada uno, de mayor a menor
+  ganancia, y los hermanos siguientes lo excluyen.
+- Cota inferior: puntos sin cubrir disjuntos (ningún candidato cubre dos de
+  ellos) exigen un gateway cada uno; se empaquetan de forma greedy
+  recorriendo los puntos de menos a más candidatos. También vale
+  ⌈sin cubrir / mayor ganancia de un candidato⌉.
+- Memoización: un conjunto de puntos cubiertos ya alcanzado con igual o
+  menor profundidad no se vuelve a explorar.
+
+`resolucion.resolver_set_cover` lo usa solo por debajo de un umbral de
+tamaño; si no prueba optimalidad dentro de sus límites, su incumbente pasa
+a CBC como arranque en caliente.
+"""
+
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .heuristica import greedy, mejorar
+
+# Umbrales por defecto (bloque solver.bnb de config.json)
+MAX_ELEMENTOS_DEFECTO = 4_000_000
+MAX_NODOS_DEFECTO = 100_000
+TIEMPO_LIMITE_DEFECTO_S = 2.0
+
+# Estados memorizados antes de vaciar la tabla (acota la memoria)
+MAX_ESTADOS_MEMO = 500_000
+
+
+@dataclass
+class ResultadoBnB:
+    """
+    Solución de la ramificación y acotamiento.
+
+    Atributos:
+        estado: 'Optimal', 'Feasible' (límite de nodos o tiempo) o 'Infeasible'
+        seleccion: Índices de fila (candidatos) elegidos, ordenados
+        cota_inferior: Cota inferior válida del óptimo
+        nodos: Nodos explorados
+        podas_memo: Nodos descartados por estado ya visitado
+        tiempo_s: Tiempo total
+        historial: Lista de (tiempo_s, incumbente, cota) en cada mejora
+    """
+    estado: str
+    seleccion: list
+    cota_inferior: int
+    nodos: int
+    podas_memo: int
+    tiempo_s: float
+    historial: list = field(default_factory=list)
+
+    @property
+    def optimo(self):
+        return self.estado == 'Optimal'
+
+
+def _enteros(bloque):
+    """Filas booleanas → un entero de Python por fila (bit k = columna k)."""
+    bytes_ = np.packbits(np.asarray(bloque, dtype=bool), axis=1, bitorder='little')
+    return [int.from_bytes(fila.tobytes(), 'little') for fila in bytes_]
+
+
+def _bits(x):
+    """Posiciones de los bits activos de x, de menor a mayor."""
+    while x:
+        bajo = x & -x
+        yield bajo.bit_length() - 1
+        x ^= bajo
+
+
+def resolver_bnb(A, inicial=None, max_nodos=MAX_NODOS_DEFECTO, tiempo_limite=TIEMPO_LIMITE_DEFECTO_S):
+    """
+    Set Cover exacto por ramificación y acotamiento sobre enteros de bits.
+
+    Args:
+        A: MatrizBits (candidatos × puntos)
+        inicial: Candidatos de una solución previa (arranque en caliente)
+        max_nodos: Nodos a explorar antes de detenerse (None = sin límite)
+        tiempo_limite: Segundos antes de detenerse (None = sin límite)
+
+    Returns:
+        ResultadoBnB; si se detiene antes de probar optimalidad, estado
+        'Feasible' con la mejor incumbente y la cota de la raíz
+    """
+    inicio = time.perf_counter()
+    n_filas, n_columnas = A.shape
+    if n_columnas == 0:
+        return ResultadoBnB('Optimal', [], 0, 0, 0, time.perf_counter() - inicio)
+
+    # Puntos renumerados de menos a más candidatos: el bit más bajo de un
+    # conjunto sin cubrir es el punto más restringido (el de ramificación) y
+    # recorrer sus bits en orden da la secuencia del empaquetado disjunto
+    a = A.a_denso(dtype=bool)
+    candidatos_por_punto = a.sum(axis=0)
+    if np.any(candidatos_por_punto == 0):
+        return ResultadoBnB('Infeasible', [], 0, 0, 0, time.perf_counter() - inicio)
+    orden = np.argsort(candidatos_por_punto, kind='stable')
+    filas = _enteros(a[:, orden])
+    columnas = _enteros(a[:, orden].T)
+    todos = (1 << n_columnas) - 1
+
+    def cota(sin_cubrir, permitidos):
+        """Cota inferior de gateways adicionales (n_filas + 1 si es infactible)."""
+        usados, disjuntos = 0, 0
+        for j in _bits(sin_cubrir):
+            columna = columnas[j] & permitidos
+            if not columna:
+                return n_filas + 1
+            if not columna & usados:
+                usados |= columna
+                disjuntos += 1
+        # Ningún candidato cubre más que la mayor ganancia
+        ganancia = max((filas[i] & sin_cubrir).bit_count() for i in _bits(permitidos))
+        return max(disjuntos, -(-sin_cubrir.bit_count() // ganancia))
+
+    seleccion = mejorar(A, greedy(A))
+    if inicial is not None and len(inicial):
+        previa = mejorar(A, greedy(A, inicial=inicial))
+        if len(previa) < len(seleccion):
+            seleccion = previa
+    mejor = list(seleccion)
+    todos_candidatos = (1 << n_filas) - 1
+    cota_raiz = cota(todos, todos_candidatos)
+    historial = [(time.perf_counter() - inicio, len(mejor), cota_raiz)]
+
+    # Estado → (profundidad, candidatos permitidos) de la primera visita: una
+    # visita posterior no más superficial y con menos candidatos no aporta
+    memo = {}
+    nodos = podas_memo = 0
+    detenido = False
+    camino = []
+
+    def explorar(sin_cubrir, permitidos):
+        nonlocal mejor, nodos, podas_memo, detenido
+        nodos += 1
+        if (max_nodos is not None and nodos > max_nodos) or \
+                (tiempo_limite is not None and time.perf_counter() - inicio > tiempo_limite):
+            detenido = True
+            return
+        profundidad = len(camino)
+        previo = memo.get(sin_cubrir)
+        if previo is not None and previo[0] <= profundidad and permitidos & ~previo[1] == 0:
+            podas_memo += 1
+            return
+        if len(memo) >= MAX_ESTADOS_MEMO:
+            memo.clear()
+        memo[sin_cubrir] = (profundidad, permitidos)
+
+        # Cada hijo elige un candidato del punto más restringido; los
+        # hermanos siguientes lo excluyen (no se repiten las mismas selecciones)
+        j = (sin_cubrir & -sin_cubrir).bit_length() - 1
+        hijos = sorted(((-(filas[i] & sin_cubrir).bit_count(), i)
+                        for i in _bits(columnas[j] & permitidos)))
+        for _, i in hijos:
+            resto = sin_cubrir & ~filas[i]
+            camino.append(i)
+            if not resto:
+                mejor = sorted(camino)
+                historial.append((time.perf_counter() - inicio, len(mejor), cota_raiz))
+            elif profundidad + 1 + cota(resto, permitidos) < len(mejor):
+                explorar(resto, permitidos)
+            camino.pop()
+            permitidos &= ~(1 << i)
+            # Ningún hermano mejora una incumbente de profundidad + 1 gateways,
+            # y una incumbente igual a la cota de la raíz ya es óptima
+            if detenido or profundidad + 1 >= len(mejor) or len(mejor) <= cota_raiz:
+                return
+
+    if cota_raiz < len(mejor):
+        explorar(todos, todos_candidatos)
+
+    if detenido:
+        return ResultadoBnB('Feasible', sorted(mejor), cota_raiz, nodos, podas_memo,
+                            time.perf_counter() - inicio, historial)
+    historial.append((time.perf_counter() - inicio, len(mejor), len(mejor)))
+    return ResultadoBnB('Optimal', sorted(mejor), len(mejor), nodos, podas_memo,
+                        time.perf_counter() - inicio, historial)
+
+
+def intentar_bnb(A, opciones=None, inicial=None):
+    """
+    Ramificación y acotamiento si la instancia está bajo el umbral de tamaño.
+
+    Args:
+        A: MatrizBits (candidatos × puntos), normalmente ya reducida
+        opciones: Bloque `solver.bnb` de config.json (max_elementos,
+            max_nodos, tiempo_limite_s); max_elementos = 0 lo desactiva
+        inicial: Solución previa para arranque en caliente
+
+    Returns:
+        ResultadoBnB, o None si la instancia supera el umbral
+    """
+    opciones = opciones or {}
+    n_filas, n_columnas = A.shape
+    if n_filas * n_columnas > opciones.get('max_elementos', MAX_ELEMENTOS_DEFECTO):
+        return None
+    return resolver_bnb(A, inicial=inicial,
+                        max_nodos=opciones.get('max_nodos', MAX_NODOS_DEFECTO),
+                        tiempo_limite=opciones.get('tiempo_limite_s', TIEMPO_LIMITE_DEFECTO_S))
@@ -0,0 +1,370 @@
+"""
+Capa de renderizado por lotes para los mapas de despliegue y cobertura
+
+Un artista por sensor, una línea por división de la grilla o un parche por
+círculo hacen que matplotlib dedique casi todo el tiempo a recorrer
+artistas. Aquí cada clase de elementos se dibuja de una vez:
+
+- Puntos: una sola colección (`scatter`). Por encima de `umbral_raster`
+  puntos se estampan como discos en una imagen RGBA del tamaño del eje,
+  calculada al dibujar con los píxeles reales de la salida (el costo es
+  O(puntos) y no depende de los artistas de matplotlib).
+- Círculos: una `EllipseCollection` en unidades de datos.
+- Grilla: una `LineCollection`.
+- Capas estáticas (contorno del campo, grilla, mapa de ubicación): se
+  renderizan una vez y se guardan como imagen en `results/cache/capas`,
+  identificadas por un hash de sus parámetros y del tamaño en píxeles.
+
+El modo 'previsualizacion' guarda a baja resolución para iterar rápido; el
+modo 'publicacion' conserva los 300 dpi de siempre.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.artist import Artist
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import EllipseCollection, LineCollection
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+
+from .configuracion import ruta_proyecto
+
+MODO_PREVISUALIZACION = 'previsualizacion'
+MODO_PUBLICACION = 'publicacion'
+
+DPI_PREVISUALIZACION = 72
+DPI_PUBLICACION = 300
+
+# Puntos a partir de los cuales una clase se estampa como imagen
+UMBRAL_RASTER_DEFECTO = 20_000
+
+DIRECTORIO_CAPAS = 'results/cache/capas'
+
+# Capas ya cargadas en este proceso (clave → imagen RGBA), de la menos a la
+# más recientemente usada; se descartan las más antiguas por encima del límite
+MEMORIA_CAPAS_MB = 128
+_CAPAS_EN_MEMORIA = OrderedDict()
+_bytes_capas = 0
+
+
+def dpi_desde_config(config, modo=None):
+    """
+    Resolución de salida según el bloque `visualizacion` de config.json.
+
+    Args:
+        config: Configuración
+        modo: 'previsualizacion' o 'publicacion' (por defecto, visualizacion.modo)
+
+    Returns:
+        dpi (int)
+    """
+    opciones = config.get('visualizacion', {})
+    modo = modo or opciones.get('modo', MODO_PUBLICACION)
+    if modo == MODO_PREVISUALIZACION:
+        return int(opciones.get('dpi_previsualizacion', DPI_PREVISUALIZACION))
+    if modo == MODO_PUBLICACION:
+        return int(opciones.get('dpi_publicacion', DPI_PUBLICACION))
+    raise ValueError(f"Modo de visualización desconocido: {modo!r}")
+
+
+def _clave(*partes):
+    """Hash corto de parámetros serializables en JSON."""
+    return hashlib.sha256(json.dumps(partes, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _capa_en_memoria(clave):
+    """Imagen de la capa si está en memoria (pasa a ser la más reciente)."""
+    imagen = _CAPAS_EN_MEMORIA.get(clave)
+    if imagen is not None:
+        _CAPAS_EN_MEMORIA.move_to_end(clave)
+    return imagen
+
+
+def _guardar_en_memoria(clave, imagen):
+    """Guarda la capa como la más reciente y descarta las más antiguas sobre el límite."""
+    global _bytes_capas
+    limite = MEMORIA_CAPAS_MB * 1024 * 1024
+    if clave in _CAPAS_EN_MEMORIA:
+        _CAPAS_EN_MEMORIA.move_to_end(clave)
+        return
+    if imagen.nbytes > limite:
+        return
+    _CAPAS_EN_MEMORIA[clave] = imagen
+    _bytes_capas += imagen.nbytes
+    while _bytes_capas > limite:
+        _, descartada = _CAPAS_EN_MEMORIA.popitem(last=False)
+        _bytes_capas -= descartada.nbytes
+
+
+def _dibujar_rgba(renderer, axes, rgba):
+    """Dibuja una imagen RGBA (fila 0 arriba) que cubre exactamente el eje."""
+    bbox = axes.bbox
+    gc = renderer.new_gc()
+    gc.set_clip_rectangle(bbox)
+    renderer.draw_image(gc, round(bbox.x0), round(bbox.y0), rgba)
+    gc.restore()
+
+
+def _tamano_px(axes):
+    """Ancho y alto del eje en píxeles de la salida actual."""
+    bbox = axes.bbox
+    return max(int(round(bbox.width)), 1), max(int(round(bbox.height)), 1)
+
+
+class PuntosRaster(Artist):
+    """
+    Puntos de una clase estampados como discos en una imagen del eje.
+
+    La imagen se arma en cada `draw` con la transformación y los dpi del
+    renderer, así que tiene la misma geometría que un `scatter` con
+    marcador 'o' y tamaño `s` (puntos²). Los puntos de la clase que se
+    solapan no acumulan transparencia.
+    """
+
+    def __init__(self, coords, color, s=20.0, alpha=1.0, zorder=3):
+        super().__init__()
+        self.coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.rgba = np.array(to_rgba(color, alpha)) * 255
+        self.s = float(s)
+        self.set_zorder(zorder)
+
+    def draw(self, renderer):
+        if not self.get_visible() or not len(self.coords):
+            return
+        ancho, alto = _tamano_px(self.axes)
+        radio = max(np.sqrt(self.s) / 2 * renderer.points_to_pixels(1.0), 0.5)
+        r = int(np.ceil(radio))
+        xy = self.axes.transData.transform(self.coords) - [self.axes.bbox.x0, self.axes.bbox.y0]
+        # Máscara con un borde de 2r: los centros a menos de r del eje y
+        # todos sus desplazamientos caen dentro sin comprobar límites
+        borde = 2 * r
+        ancho_m = ancho + 2 * borde
+        columna = np.floor(xy[:, 0]).astype(np.int64) + borde
+        fila = (alto - 1 - np.floor(xy[:, 1]).astype(np.int64)) + borde
+        dentro = (columna >= r) & (columna < ancho + 3 * r) & (fila >= r) & (fila < alto + 3 * r)
+        centros = np.unique(fila[dentro] * ancho_m + columna[dentro])
+        mascara = np.zeros((alto + 2 * borde) * ancho_m, dtype=bool)
+        dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+        disco = dx ** 2 + dy ** 2 <= radio ** 2
+        for desplazamiento in (dy[disco] * ancho_m + dx[disco]):
+            mascara[centros + desplazamiento] = True
+        mascara = mascara.reshape(alto + 2 * borde, ancho_m)[borde:borde + alto, borde:borde + ancho]
+        imagen = np.zeros((alto, ancho, 4), dtype=np.uint8)
+        imagen[mascara] = self.rgba.astype(np.uint8)
+        _dibujar_rgba(renderer, self.axes, imagen)
+        self.stale = False
+
+
+def dibujar_puntos(ax, coords, color, s=20.0, alpha=1.0, marker='o', zorder=3,
+                   umbral_raster=UMBRAL_RASTER_DEFECTO, **kwargs):
+    """
+    Todos los puntos de una clase como un único artista.
+
+    Args:
+        ax: Eje de matplotlib
+        coords: Array (n, 2) de coordenadas
+        color, s, alpha, marker, zorder: Como en `ax.scatter`
+        umbral_raster: Con más puntos (y marcador 'o') se usa `PuntosRaster`;
+            None = siempre `scatter`
+        **kwargs: Otros argumentos de `ax.scatter` (edgecolors, linewidth, label)
+
+    Returns:
+        El artista agregado
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if umbral_raster is not None and len(coords) > umbral_raster and marker == 'o':
+        return ax.add_artist(PuntosRaster(coords, color, s=s, alpha=alpha, zorder=zorder))
+    # Las colecciones densas se rasterizan también en salidas vectoriales
+    rasterizar = umbral_raster is not None and len(coords) > umbral_raster
+    return ax.scatter(coords[:, 0], coords[:, 1], color=color, s=s, alpha=alpha, marker=marker,
+                      zorder=zorder, rasterized=rasterizar, **kwargs)
+
+
+def dibujar_circulos(ax, centros, radio, **kwargs):
+    """
+    Círculos de radio en unidades de datos como una única colección.
+
+    Args:
+        ax: Eje de matplotlib
+        centros: Array (n, 2) de centros
+        radio: Radio común o uno por círculo (n,)
+        **kwargs: Estilo de la colección (facecolor, edgecolor, alpha,
+            linestyle, linewidth, zorder)
+
+    Returns:
+        EllipseCollection
+    """
+    centros = np.asarray(centros, dtype=np.float64).reshape(-1, 2)
+    diametro = np.broadcast_to(2.0 * np.asarray(radio, dtype=np.float64), (len(centros),))
+    coleccion = EllipseCollection(diametro, diametro, np.zeros(len(centros)), units='xy',
+                                  offsets=centros, offset_transform=ax.transData, **kwargs)
+    ax.add_collection(coleccion)
+    return coleccion
+
+
+def lineas_grilla(L_x, L_y, C_x, C_y, **kwargs):
+    """LineCollection con las divisiones verticales y horizontales de la grilla."""
+    xs = np.arange(0, L_x + C_x, C_x)
+    ys = np.arange(0, L_y + C_y, C_y)
+    verticales = [((x, 0.0), (x, float(ys[-1]))) for x in xs]
+    horizontales = [((0.0, y), (float(xs[-1]), y)) for y in ys]
+    return LineCollection(verticales + horizontales, **kwargs)
+
+
+def renderizar_capa(dibujar, xlim, ylim, ancho_px, alto_px, dpi):
+    """
+    Renderiza fuera de pantalla una capa transparente del tamaño del eje.
+
+    Args:
+        dibujar: Función que recibe un eje (límites ya fijados) y agrega artistas
+        xlim, ylim: Límites de datos del eje destino
+        ancho_px, alto_px: Tamaño del eje destino en píxeles
+        dpi: Resolución (los anchos de línea en puntos escalan con ella)
+
+    Returns:
+        Array uint8 (alto_px, ancho_px, 4) con la fila 0 arriba
+    """
+    figura = Figure(figsize=(ancho_px / dpi, alto_px / dpi), dpi=dpi)
+    figura.patch.set_alpha(0.0)
+    lienzo = FigureCanvasAgg(figura)
+    eje = figura.add_axes((0, 0, 1, 1))
+    eje.set_axis_off()
+    eje.patch.set_alpha(0.0)
+    eje.set_xlim(xlim)
+    eje.set_ylim(ylim)
+    dibujar(eje)
+    eje.set_xlim(xlim)
+    eje.set_ylim(ylim)
+    lienzo.draw()
+    imagen = np.asarray(lienzo.buffer_rgba())
+    return np.ascontiguousarray(imagen[:alto_px, :ancho_px])
+
+
+class CapaEstatica(Artist):
+    """
+    Capa que no cambia entre corridas, cacheada como imagen RGBA.
+
+    En cada `draw` se busca la imagen para (nombre, parámetros, límites,
+    tamaño en píxeles, dpi): primero en memoria, luego en `directorio`
+    (`<nombre>_<hash>.npy`) y, si no está, se renderiza con `dibujar`.
+    """
+
+    def __init__(self, nombre, parametros, dibujar, directorio=None, zorder=0):
+        super().__init__()
+        self.nombre = nombre
+        self.parametros = parametros
+        self.dibujar = dibujar
+        self.directorio = directorio
+        self.desde_cache = None
+        self.set_zorder(zorder)
+
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        ancho, alto = _tamano_px(self.axes)
+        dpi = renderer.points_to_pixels(72.0)
+        xlim, ylim = self.axes.get_xlim(), self.axes.get_ylim()
+        clave = _clave(self.nombre, self.parametros, xlim, ylim, ancho, alto, round(dpi, 3))
+        imagen = _capa_en_memoria(clave)
+        ruta = None
+        if self.directorio:
+            ruta = os.path.join(self.directorio, f"{self.nombre}_{clave}.npy")
+        self.desde_cache = imagen is not None
+        if imagen is None and ruta and os.path.exists(ruta):
+            imagen = np.load(ruta)
+            self.desde_cache = True
+        if imagen is None:
+            imagen = renderizar_capa(self.dibujar, xlim, ylim, ancho, alto, dpi)
+            if ruta:
+                os.makedirs(self.directorio, exist_ok=True)
+                np.save(ruta, imagen)
+        _guardar_en_memoria(clave, imagen)
+        _dibujar_rgba(renderer, self.axes, imagen)
+        self.stale = False
+
+
+def capa_estatica(ax, nombre, parametros, dibujar, directorio=None, zorder=0):
+    """
+    Agrega una capa estática cacheada al eje.
+
+    Args:
+        ax: Eje destino (sus límites deben quedar fijos antes de guardar)
+        nombre: Prefijo de los archivos de la capa
+        parametros: Todo lo que define su contenido (serializable en JSON)
+        dibujar: Función que recibe un eje y agrega los artistas de la capa
+        directorio: Carpeta de la caché en disco (por defecto,
+            results/cache/capas); False para usar solo la de memoria
+        zorder: Orden de dibujo
+
+    Returns:
+        CapaEstatica
+    """
+    if directorio is None:
+        directorio = ruta_proyecto(DIRECTORIO_CAPAS)
+    return ax.add_artist(CapaEstatica(nombre, parametros, dibujar, directorio or None, zorder))
+
+
+def capa_campo(ax, L_x, L_y, grilla=None, ancho_contorno=2, directorio=None, zorder=0,
+               **estilo_grilla):
+    """
+    Contorno del campo y, opcionalmente, la grilla de celdas como capa estática.
+
+    Args:
+        ax: Eje destino
+        L_x, L_y: Dimensiones del campo
+        grilla: (C_x, C_y) para dibujar las divisiones de las celdas
+        ancho_contorno: Ancho de línea del contorno (puntos)
+        directorio: Ver `capa_estatica`
+        zorder: Orden de dibujo
+        **estilo_grilla: Estilo de la LineCollection (color, linewidth, alpha)
+
+    Returns:
+        CapaEstatica
+    """
+    from matplotlib.patches import Rectangle
+    estilo = {'color': 'gray', 'linewidth': 0.3, 'alpha': 0.3, **estilo_grilla}
+
+    def dibujar(eje):
+        if grilla is not None:
+            eje.add_collection(lineas_grilla(L_x, L_y, grilla[0], grilla[1], **estilo))
+        eje.add_patch(Rectangle((0, 0), L_x, L_y, fill=False, edgecolor='black',
+                               linewidth=ancho_contorno))
+
+    return capa_estatica(ax, 'campo', [L_x, L_y, grilla, ancho_contorno, estilo], dibujar,
+                         directorio, zorder)
+
+
+def figura_en_cache(ruta_salida, parametros, dibujar, dpi, directorio=None, **kwargs_guardar):
+    """
+    Figura completamente estática (p. ej. el mapa de ubicación): se copia de
+    la caché si ya se generó con los mismos parámetros y dpi.
+
+    Args:
+        ruta_salida: PNG de destino
+        parametros: Todo lo que define la figura (serializable en JSON)
+        dibujar: Función sin argumentos que devuelve la Figure
+        dpi: Resolución de salida
+        directorio: Carpeta de la caché (por defecto, results/cache/capas)
+        **kwargs_guardar: Argumentos de `savefig`
+
+    Returns:
+        True si se reutilizó la caché
+    """
+    directorio = directorio or ruta_proyecto(DIRECTORIO_CAPAS)
+    clave = _clave(parametros, dpi, kwargs_guardar)
+    base, extension = os.path.splitext(os.path.basename(ruta_salida))
+    ruta_cache = os.path.join(directorio, f"{base}_{clave}{extension}")
+    os.makedirs(os.path.dirname(os.path.abspath(ruta_salida)), exist_ok=True)
+    if os.path.exists(ruta_cache):
+        shutil.copyfile(ruta_cache, ruta_salida)
+        return True
+    figura = dibujar()
+    figura.savefig(ruta_salida, dpi=dpi, **kwargs_guardar)
+    os.makedirs(directorio, exist_ok=True)
+    shutil.copyfile(ruta_salida, ruta_cache)
+    return False
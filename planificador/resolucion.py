@@ -0,0 +1,153 @@
+"""
+Resolución del Set Cover fuera del notebook: presolve + solver + postsolve
+
+Empaqueta la secuencia de las celdas de presolve y resolución del notebook
+en una sola llamada sobre una MatrizBits, para los módulos que resuelven
+muchas instancias (barridos de parámetros, descomposiciones, pipeline).
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .heuristica import resolver_lagrangiano
+from .instrumentacion import registrar
+from .mps import resolver_cbc_anytime
+from .presolve import presolve
+from .ramificacion import intentar_bnb
+
+
+@dataclass
+class ResultadoSetCover:
+    """
+    Solución del Set Cover en índices originales de I.
+
+    Atributos:
+        estado: 'Optimal', 'Feasible', 'Infeasible' o 'Not Solved'
+        seleccion: Índices originales (en I) elegidos, ordenados
+        cota_inferior: Cota inferior del óptimo (incluye candidatos forzados)
+        solver: Método utilizado
+        tiempo_presolve_s, tiempo_resolucion_s: Tiempos de cada etapa
+        incumbentes: Lista de (tiempo_s, incumbente, cota) del modelo reducido
+        estadisticas: Tamaño del modelo reducido y estadísticas de cada solver
+            usado ('bnb': nodos; 'cbc': ver `mps.estadisticas_cbc`;
+            'heuristica': iteraciones)
+    """
+    estado: str
+    seleccion: list
+    cota_inferior: float
+    solver: str
+    tiempo_presolve_s: float = 0.0
+    tiempo_resolucion_s: float = 0.0
+    incumbentes: list = field(default_factory=list)
+    estadisticas: dict = field(default_factory=dict)
+
+    @property
+    def n_seleccionados(self):
+        return len(self.seleccion)
+
+    @property
+    def gap(self):
+        """Gap relativo (N - cota) / N."""
+        if self.estado not in ('Optimal', 'Feasible') or math.isnan(self.cota_inferior):
+            return float('nan')
+        if not self.seleccion:
+            return 0.0
+        return max(0.0, (len(self.seleccion) - self.cota_inferior) / len(self.seleccion))
+
+
+def _finito(valor):
+    valor = float(valor)
+    return valor if math.isfinite(valor) else None
+
+
+def resolver_set_cover(a, opciones=None, al_evento=None, solucion_inicial=None):
+    """
+    Resuelve min Σx_i s.a. cobertura de todos los puntos de `a`.
+
+    Args:
+        a: MatrizBits (candidatos × puntos de demanda)
+        opciones: Bloque `solver` de config.json (metodo, presolve,
+            tiempo_limite_s, gap_relativo, arranque_heuristico, heuristica, bnb).
+            Los métodos 'cbc_mps' y 'pulp' usan el mismo modelo vía MPS directo;
+            por debajo del umbral de `bnb` se intenta antes la ramificación y
+            acotamiento en proceso (ver `ramificacion.intentar_bnb`).
+        al_evento: Función (tiempo_s, incumbente, cota) llamada en cada mejora
+        solucion_inicial: Índices (filas de `a`) de una solución previa para
+            arranque en caliente; no necesita ser factible
+
+    Returns:
+        ResultadoSetCover
+    """
+    opciones = opciones or {}
+    metodo = opciones.get('metodo', 'cbc_mps')
+
+    inicio = time.perf_counter()
+    pre = presolve(a, max_rondas=50 if opciones.get('presolve', True) else 0)
+    tiempo_presolve = time.perf_counter() - inicio
+    if not pre.factible:
+        return ResultadoSetCover('Infeasible', [], math.inf, metodo, tiempo_presolve)
+    estadisticas = {'presolve': {'filas': pre.matriz.shape[0], 'columnas': pre.matriz.shape[1],
+                                 'fijados': len(pre.fijados)}}
+
+    inicial = None
+    if solucion_inicial is not None:
+        # Índices originales → filas del problema reducido (los fijados ya están)
+        fila_reducida = {int(c): k for k, c in enumerate(pre.candidatos)}
+        inicial = [fila_reducida[int(i)] for i in solucion_inicial if int(i) in fila_reducida]
+
+    inicio = time.perf_counter()
+    bnb = None
+    if metodo != 'heuristica':
+        # Instancias pequeñas: ramificación y acotamiento en proceso, sin lanzar CBC
+        bnb = intentar_bnb(pre.matriz, opciones.get('bnb'), inicial=inicial)
+    if bnb is not None:
+        estadisticas['bnb'] = {'estado': bnb.estado, 'nodos': bnb.nodos,
+                               'podas_memo': bnb.podas_memo, 'tiempo_s': round(bnb.tiempo_s, 4)}
+    if bnb is not None and bnb.optimo:
+        estado, seleccion_reducida, cota, incumbentes = ('Optimal', bnb.seleccion,
+                                                         bnb.cota_inferior, bnb.historial)
+        solver = 'bnb'
+        if al_evento is not None:
+            for evento in incumbentes:
+                al_evento(*evento)
+    elif metodo == 'heuristica':
+        opciones_heuristica = opciones.get('heuristica', {})
+        resultado = resolver_lagrangiano(
+            pre.matriz,
+            max_iteraciones=opciones_heuristica.get('max_iteraciones', 1000),
+            tiempo_limite=opciones_heuristica.get('tiempo_limite_s'), inicial=inicial)
+        estado = 'Optimal' if resultado.optimo else 'Feasible'
+        seleccion_reducida, cota, incumbentes = (resultado.seleccion, resultado.cota_inferior,
+                                                 resultado.historial)
+        estadisticas['heuristica'] = {'iteraciones': resultado.iteraciones}
+        solver = 'heuristica'
+    else:
+        # Si la ramificación no terminó, su incumbente es el arranque de CBC
+        resultado = resolver_cbc_anytime(
+            pre.matriz, tiempo_limite=opciones.get('tiempo_limite_s'),
+            gap_relativo=opciones.get('gap_relativo'),
+            arranque=opciones.get('arranque_heuristico', True), al_evento=al_evento,
+            inicial=bnb.seleccion if bnb is not None and bnb.seleccion else inicial)
+        estado = resultado.estado
+        seleccion_reducida, cota, incumbentes = (resultado.seleccion, resultado.cota_inferior,
+                                                 resultado.incumbentes)
+        estadisticas['cbc'] = resultado.estadisticas
+        if np.isnan(cota):
+            cota = 0.0
+        if bnb is not None:
+            cota = max(cota, bnb.cota_inferior)
+        solver = 'cbc_mps'
+    tiempo_resolucion = time.perf_counter() - inicio
+    registrar(solver={**estadisticas, 'metodo': solver, 'estado': estado,
+                      'incumbentes': [[round(float(t), 4), _finito(u), _finito(c)]
+                                      for t, u, c in incumbentes]})
+
+    if estado not in ('Optimal', 'Feasible'):
+        return ResultadoSetCover(estado, [], float('nan'), solver, tiempo_presolve,
+                                 tiempo_resolucion, incumbentes, estadisticas)
+    return ResultadoSetCover(estado, pre.reconstruir(seleccion_reducida),
+                             float(cota) + len(pre.fijados), solver, tiempo_presolve,
+                             tiempo_resolucion, incumbentes, estadisticas)
@@ -0,0 +1,431 @@
+"""
+Simulación de eventos discretos del tráfico LoRa (ALOHA puro con captura)
+
+Valida la capacidad supuesta por la asignación sensor → gateway (ver
+`asignacion`) con el tráfico real de los sensores:
+
+- Cada sensor transmite `mensajes_por_hora` mensajes (llegadas de Poisson o
+  periódicas con fase aleatoria y jitter) en un canal elegido al azar. El
+  spreading factor es fijo o el menor que deja margen de enlace (ADR), y el
+  tiempo en aire sale de `asignacion.tiempo_en_aire_s` para cada SF.
+- Cada transmisión llega a todos los gateways donde su potencia puede
+  afectar a otra; los SF distintos se consideran ortogonales. En un gateway,
+  un paquete se recibe si supera la sensibilidad de su SF y supera por
+  `captura_db` a cada paquete que se le superpone en el mismo canal y SF
+  (efecto captura); si no, se pierde por colisión.
+- Los eventos de cada bloque de tiempo se ordenan por (gateway, canal, SF,
+  inicio): las llegadas ya salen en orden de tiempo y basta un ordenamiento
+  estable por la clave entera del grupo. Como todos los paquetes de un
+  grupo duran lo mismo, los que se superponen a cada paquete forman un
+  rango contiguo a su alrededor. El bloque arrastra los paquetes de su
+  borde, así que la memoria queda acotada por `max_eventos_bloque` y no
+  por la duración.
+
+Se informa la tasa de entrega (PDR) en el gateway asignado y en cualquier
+gateway, la ocupación de canal de cada gateway y el ciclo de trabajo de los
+sensores frente al límite regulatorio.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .asignacion import SIN_ASIGNAR, margenes_desde_config, tiempo_en_aire_s
+
+LLEGADAS_POISSON = 'poisson'
+LLEGADAS_PERIODICAS = 'periodico'
+SF_ADR = 'adr'
+
+SF_MIN, SF_MAX = 7, 12
+
+# SNR mínima de demodulación por SF (SX127x, dB): cada SF gana ~2,5 dB
+SNR_DEMODULACION_DB = np.array([-7.5, -10.0, -12.5, -15.0, -17.5, -20.0])
+
+# Eventos (paquete × gateway) por bloque de tiempo
+MAX_EVENTOS_BLOQUE_DEFECTO = 500_000
+
+
+@dataclass
+class ResultadoSimulacion:
+    """
+    Resultado de la simulación de tráfico.
+
+    Atributos:
+        duracion_s: Tiempo simulado
+        spreading_factor: SF de cada sensor (S,)
+        tiempo_aire_s: Tiempo en aire de un mensaje de cada sensor (S,)
+        gateway: Gateway asignado de cada sensor (S,) o SIN_ASIGNAR
+        paquetes_sensor: Mensajes transmitidos por sensor (S,)
+        entregados_sensor: Recibidos en el gateway asignado (S,)
+        entregados_cualquiera_sensor: Recibidos en al menos un gateway (S,)
+        paquetes_gateway: Mensajes de los sensores asignados a cada gateway (G,)
+        entregados_gateway: De ellos, recibidos por ese gateway (G,)
+        tiempo_aire_gateway_s: Tiempo en aire de las transmisiones
+            demodulables en cada gateway (G,)
+        canales: Canales por gateway
+        ciclo_trabajo_max: Límite de ciclo de trabajo por sensor
+        eventos: Pares paquete × gateway procesados
+        tiempo_s: Tiempo de cálculo
+    """
+    duracion_s: float
+    spreading_factor: np.ndarray
+    tiempo_aire_s: np.ndarray
+    gateway: np.ndarray
+    paquetes_sensor: np.ndarray
+    entregados_sensor: np.ndarray
+    entregados_cualquiera_sensor: np.ndarray
+    paquetes_gateway: np.ndarray
+    entregados_gateway: np.ndarray
+    tiempo_aire_gateway_s: np.ndarray
+    canales: int
+    ciclo_trabajo_max: float
+    eventos: int
+    tiempo_s: float
+
+    @property
+    def n_gateways(self):
+        return len(self.paquetes_gateway)
+
+    @property
+    def asignados(self):
+        """Máscara de los sensores con gateway asignado."""
+        return self.gateway != SIN_ASIGNAR
+
+    @property
+    def pdr(self):
+        """Tasa de entrega en el gateway asignado (sensores asignados)."""
+        paquetes = self.paquetes_sensor[self.asignados].sum()
+        return float(self.entregados_sensor[self.asignados].sum() / paquetes) if paquetes else 1.0
+
+    @property
+    def pdr_cualquiera(self):
+        """Tasa de entrega en cualquier gateway (sensores asignados)."""
+        paquetes = self.paquetes_sensor[self.asignados].sum()
+        entregados = self.entregados_cualquiera_sensor[self.asignados].sum()
+        return float(entregados / paquetes) if paquetes else 1.0
+
+    @property
+    def pdr_gateway(self):
+        """Tasa de entrega por gateway (G,)."""
+        return np.divide(self.entregados_gateway, self.paquetes_gateway,
+                         out=np.ones(self.n_gateways), where=self.paquetes_gateway > 0)
+
+    @property
+    def pdr_sensor(self):
+        """Tasa de entrega de cada sensor en su gateway asignado (S,)."""
+        return np.divide(self.entregados_sensor, self.paquetes_sensor,
+                         out=np.ones(len(self.paquetes_sensor)), where=self.paquetes_sensor > 0)
+
+    @property
+    def ocupacion_gateway(self):
+        """Fracción del tiempo de canal ocupada en cada gateway (G,)."""
+        return self.tiempo_aire_gateway_s / (self.duracion_s * self.canales)
+
+    @property
+    def ciclo_trabajo(self):
+        """Ciclo de trabajo medido de cada sensor (S,)."""
+        return self.paquetes_sensor * self.tiempo_aire_s / self.duracion_s
+
+    @property
+    def sobre_limite(self):
+        """Índices de los sensores que superan el ciclo de trabajo máximo."""
+        return np.flatnonzero(self.ciclo_trabajo > self.ciclo_trabajo_max)
+
+
+def spreading_factor_adr(margen_db, sf_referencia, margen_adr_db=0.0):
+    """
+    Menor SF cuyo margen de enlace es >= `margen_adr_db` (SF12 si ninguno).
+
+    Args:
+        margen_db: Margen (dB) con la sensibilidad del SF de referencia
+        sf_referencia: SF con el que se calcularon los márgenes
+        margen_adr_db: Margen mínimo exigido
+
+    Returns:
+        Array int64 de SF (misma forma que `margen_db`)
+    """
+    margen = np.asarray(margen_db, dtype=np.float64)[..., None]
+    ajuste = SNR_DEMODULACION_DB[sf_referencia - SF_MIN] - SNR_DEMODULACION_DB
+    viable = margen + ajuste >= margen_adr_db
+    return np.where(viable.any(axis=-1), SF_MIN + np.argmax(viable, axis=-1), SF_MAX)
+
+
+class _Trafico:
+    """Generador de transmisiones por bloque de tiempo."""
+
+    def __init__(self, n_sensores, mensajes_por_hora, canales, llegadas, jitter_s, rng):
+        self.n_sensores = n_sensores
+        self.tasa = mensajes_por_hora / 3600.0
+        self.periodo = 1.0 / self.tasa
+        self.canales = canales
+        self.llegadas = llegadas
+        self.jitter_s = jitter_s
+        self.rng = rng
+        if llegadas == LLEGADAS_PERIODICAS:
+            self.fase = rng.random(n_sensores) * self.periodo
+        elif llegadas != LLEGADAS_POISSON:
+            raise ValueError(f"Llegadas desconocidas: {llegadas!r}")
+
+    def bloque(self, inicio, fin):
+        """
+        Transmisiones con instante nominal en [inicio, fin): (sensor, t, canal).
+        Con llegadas de Poisson salen ordenadas por t.
+        """
+        if self.llegadas == LLEGADAS_POISSON:
+            # Superposición de procesos de Poisson de igual tasa: un único
+            # proceso con sensor uniforme; los instantes ordenados salen de la
+            # suma acumulada de exponenciales (estadísticos de orden uniformes)
+            n = self.rng.poisson(self.tasa * self.n_sensores * (fin - inicio))
+            espera = np.cumsum(self.rng.exponential(size=n + 1))
+            t = inicio + espera[:-1] * ((fin - inicio) / espera[-1])
+            sensor = self.rng.integers(0, self.n_sensores, n)
+        else:
+            primero = np.ceil((inicio - self.fase) / self.periodo)
+            conteo = (np.ceil((fin - self.fase) / self.periodo) - primero).astype(np.int64)
+            sensor = np.repeat(np.arange(self.n_sensores), conteo)
+            # k-ésimo período de cada sensor dentro del bloque
+            k = np.arange(len(sensor)) - np.repeat(np.cumsum(conteo) - conteo, conteo)
+            t = (self.fase[sensor] + (primero[sensor] + k) * self.periodo
+                 + self.rng.random(len(sensor)) * self.jitter_s)
+        canal = self.rng.integers(0, self.canales, len(sensor))
+        return sensor, t, canal
+
+
+def _interferencia_maxima(clave, potencia, duracion):
+    """
+    Mayor potencia de los paquetes que se superponen a cada uno.
+
+    Como `clave` está ordenada, si el evento i + k ya no se superpone al i
+    tampoco lo hace ninguno posterior: se recorren los desplazamientos
+    k = 1, 2, ... solo con los pares que siguen superpuestos.
+
+    Args:
+        clave: Tiempo de inicio desplazado por grupo (gateway, canal, SF),
+            ordenado: dos eventos de grupos distintos nunca se superponen
+        potencia: Potencia relativa (dB) de cada evento
+        duracion: Duración de cada evento (igual dentro de un grupo)
+
+    Returns:
+        Array float64 con -inf donde no hay superposición
+    """
+    maxima = np.full(len(clave), -np.inf)
+    i = np.flatnonzero(clave[1:] - clave[:-1] < duracion[:-1])
+    k = 1
+    while len(i):
+        j = i + k
+        maxima[i] = np.maximum(maxima[i], potencia[j])
+        maxima[j] = np.maximum(maxima[j], potencia[i])
+        k += 1
+        i = i[i + k < len(clave)]
+        i = i[clave[i + k] - clave[i] < duracion[i]]
+    return maxima
+
+
+def simular_trafico(margen_db, gateway, trafico, duracion_s, spreading_factor=None,
+                    llegadas=LLEGADAS_POISSON, jitter_s=0.0, captura_db=6.0,
+                    ciclo_trabajo_max=0.01, semilla=0,
+                    max_eventos_bloque=MAX_EVENTOS_BLOQUE_DEFECTO):
+    """
+    Simula el tráfico de subida de los sensores hacia todos los gateways.
+
+    Args:
+        margen_db: Márgenes de enlace (S, G) con la sensibilidad del SF de
+            `trafico` (ver `asignacion.margenes_enlace`)
+        gateway: Gateway asignado de cada sensor (S,) o SIN_ASIGNAR
+        trafico: ParametrosTrafico (mensajes, payload, SF, canales)
+        duracion_s: Tiempo a simular
+        spreading_factor: SF fijo, SF por sensor (S,) o 'adr' (menor SF con
+            margen hacia el gateway asignado o el de mejor margen); por
+            defecto, el de `trafico`
+        llegadas: 'poisson' o 'periodico' (fase uniforme + jitter)
+        jitter_s: Retardo aleatorio máximo de las llegadas periódicas
+        captura_db: Diferencia de potencia para que el paquete más fuerte
+            sobreviva a una colisión
+        ciclo_trabajo_max: Límite de ciclo de trabajo por sensor
+        semilla: Semilla del generador aleatorio
+        max_eventos_bloque: Pares paquete × gateway por bloque de tiempo
+
+    Returns:
+        ResultadoSimulacion
+    """
+    inicio_calculo = time.perf_counter()
+    margen_db = np.asarray(margen_db, dtype=np.float64)
+    n_S, n_G = margen_db.shape
+    gateway = np.asarray(gateway, dtype=np.int64)
+    filas = np.arange(n_S)
+    referencia = np.where(gateway == SIN_ASIGNAR,
+                          np.argmax(margen_db, axis=1) if n_G else 0, gateway)
+
+    sf_base = int(trafico.spreading_factor)
+    if spreading_factor is None:
+        spreading_factor = sf_base
+    if isinstance(spreading_factor, str):
+        if spreading_factor != SF_ADR:
+            raise ValueError(f"Spreading factor desconocido: {spreading_factor!r}")
+        sf = spreading_factor_adr(margen_db[filas, referencia], sf_base) if n_G \
+            else np.full(n_S, SF_MAX)
+    else:
+        sf = np.broadcast_to(np.asarray(spreading_factor, dtype=np.int64), (n_S,)).copy()
+    toa = tiempo_en_aire_s(trafico.payload_bytes, sf, trafico.ancho_banda_khz,
+                           trafico.tasa_codificacion, trafico.preambulo_simbolos)
+    toa_max = float(toa.max()) if n_S else 0.0
+
+    # Pares sensor → gateway donde la transmisión puede decodificarse o
+    # impedir la captura de otra (potencia relativa a la sensibilidad de su SF)
+    potencia = margen_db + (SNR_DEMODULACION_DB[sf_base - SF_MIN]
+                            - SNR_DEMODULACION_DB[sf - SF_MIN])[:, None]
+    par_sensor, par_gateway = np.nonzero(potencia >= -captura_db)
+    par_potencia = potencia[par_sensor, par_gateway]
+    pares_por_sensor = np.bincount(par_sensor, minlength=n_S)
+    primer_par = np.cumsum(pares_por_sensor) - pares_por_sensor
+    # Grupo (gateway, canal, SF) de cada evento = parte del par + canal · n_sf
+    n_sf = SF_MAX - SF_MIN + 1
+    tipo_grupo = np.uint16 if n_G * trafico.canales * n_sf <= np.iinfo(np.uint16).max \
+        else np.int64
+    par_grupo = (par_gateway * trafico.canales * n_sf + sf[par_sensor] - SF_MIN).astype(tipo_grupo)
+    par_asignado = par_gateway == gateway[par_sensor]
+    # Duración de los eventos de cada grupo (todos comparten SF)
+    toa_sf = tiempo_en_aire_s(trafico.payload_bytes, np.arange(SF_MIN, SF_MAX + 1),
+                              trafico.ancho_banda_khz, trafico.tasa_codificacion,
+                              trafico.preambulo_simbolos)
+    toa_grupo = np.tile(toa_sf, n_G * trafico.canales)
+
+    paquetes_sensor = np.zeros(n_S, dtype=np.int64)
+    entregados_sensor = np.zeros(n_S, dtype=np.int64)
+    entregados_cualquiera = np.zeros(n_S, dtype=np.int64)
+    ocupacion_grupo = np.zeros(n_G * trafico.canales * n_sf, dtype=np.int64)
+    eventos = 0
+
+    # Bloques de tiempo con ~max_eventos_bloque pares paquete × gateway
+    eventos_por_s = max(trafico.mensajes_por_hora / 3600.0 * max(len(par_sensor), 1), 1e-12)
+    ancho = max(max_eventos_bloque / eventos_por_s, 4 * toa_max + jitter_s, 1.0)
+    generador = _Trafico(n_S, trafico.mensajes_por_hora, trafico.canales, llegadas, jitter_s,
+                         np.random.default_rng(semilla))
+    arrastre = (np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=np.int64))
+
+    inicio = 0.0
+    while inicio < duracion_s:
+        fin = min(inicio + ancho, duracion_s)
+        ultimo = fin >= duracion_s
+        nuevos = generador.bloque(inicio, fin)
+        sensor, t, canal = (np.concatenate([a, b]) for a, b in zip(arrastre, nuevos))
+        if llegadas != LLEGADAS_POISSON:
+            orden = np.argsort(t, kind='stable')
+            sensor, t, canal = sensor[orden], t[orden], canal[orden]
+
+        # Se evalúan los paquetes cuyas posibles superposiciones ya están
+        # todas en el bloque; los del borde pasan al siguiente
+        evaluado = t >= inicio - toa_max
+        if not ultimo:
+            evaluado &= t < fin - toa_max
+            arrastre = tuple(a[t >= fin - 2 * toa_max] for a in (sensor, t, canal))
+
+        # Un evento por par (paquete, gateway alcanzado), en orden de t; el
+        # ordenamiento estable por grupo (radix sort con claves enteras
+        # chicas) deja cada grupo contiguo y ordenado por inicio
+        por_paquete = pares_por_sensor[sensor]
+        paquete = np.repeat(np.arange(len(sensor)), por_paquete)
+        par = np.repeat(primer_par[sensor] - (np.cumsum(por_paquete) - por_paquete),
+                        por_paquete) + np.arange(len(paquete))
+        grupo = par_grupo[par] + (canal * n_sf).astype(tipo_grupo)[paquete]
+        orden = np.argsort(grupo, kind='stable')
+        grupo, paquete, par = grupo[orden], paquete[orden], par[orden]
+        ev_potencia = par_potencia[par]
+        ev_toa = toa_grupo[grupo]
+        separacion = (fin - inicio) + 4 * toa_max + 2 * jitter_s + 1.0
+        clave = grupo * separacion + (t[paquete] - (inicio - 2 * toa_max))
+        interferencia = _interferencia_maxima(clave, ev_potencia, ev_toa)
+
+        # Estadísticas de los paquetes evaluados
+        ev_evaluado = evaluado[paquete]
+        eventos += int(ev_evaluado.sum())
+        paquetes_sensor += np.bincount(sensor[evaluado], minlength=n_S)
+        demodulable = ev_evaluado & (ev_potencia >= 0)
+        ocupacion_grupo += np.bincount(grupo[demodulable], minlength=len(toa_grupo))
+        recibido = np.flatnonzero(demodulable & (ev_potencia - interferencia >= captura_db))
+        en_asignado = recibido[par_asignado[par[recibido]]]
+        entregados_sensor += np.bincount(sensor[paquete[en_asignado]], minlength=n_S)
+        alguno = np.zeros(len(sensor), dtype=bool)
+        alguno[paquete[recibido]] = True
+        entregados_cualquiera += np.bincount(sensor[alguno], minlength=n_S)
+        inicio = fin
+
+    tiempo_aire_gateway = (ocupacion_grupo * toa_grupo).reshape(n_G, -1).sum(axis=1)
+    asignado = gateway != SIN_ASIGNAR
+    paquetes_gateway = np.bincount(gateway[asignado], weights=paquetes_sensor[asignado],
+                                   minlength=n_G).astype(np.int64)
+    entregados_gateway = np.bincount(gateway[asignado], weights=entregados_sensor[asignado],
+                                     minlength=n_G).astype(np.int64)
+    return ResultadoSimulacion(duracion_s=float(duracion_s), spreading_factor=sf,
+                               tiempo_aire_s=toa, gateway=gateway,
+                               paquetes_sensor=paquetes_sensor,
+                               entregados_sensor=entregados_sensor,
+                               entregados_cualquiera_sensor=entregados_cualquiera,
+                               paquetes_gateway=paquetes_gateway,
+                               entregados_gateway=entregados_gateway,
+                               tiempo_aire_gateway_s=tiempo_aire_gateway,
+                               canales=int(trafico.canales),
+                               ciclo_trabajo_max=float(ciclo_trabajo_max), eventos=eventos,
+                               tiempo_s=time.perf_counter() - inicio_calculo)
+
+
+def simulacion_desde_config(config, asignacion, sensores, gateways, margen_db=None, **kwargs):
+    """
+    Simula el tráfico de una asignación con el bloque `simulacion` de config.json.
+
+    Args:
+        config: Configuración (bloques propagacion, escenario, asignacion, simulacion)
+        asignacion: ResultadoAsignacion (gateway por sensor y tráfico)
+        sensores, gateways: Coordenadas (S, 2) y (G, 2) de la asignación
+        margen_db: Márgenes (S, G) ya calculados (por defecto, se calculan
+            con `asignacion.margenes_desde_config`)
+        **kwargs: Reemplazan opciones del bloque (duracion_s, llegadas, ...)
+
+    Returns:
+        ResultadoSimulacion
+    """
+    opciones = config.get('simulacion', {})
+    if margen_db is None:
+        margen_db, _ = margenes_desde_config(config, sensores, gateways)
+    kwargs.setdefault('duracion_s', opciones.get('duracion_h', 24 * 365) * 3600.0)
+    kwargs.setdefault('spreading_factor', opciones.get('spreading_factor'))
+    for clave, defecto in (('llegadas', LLEGADAS_POISSON), ('jitter_s', 0.0),
+                           ('captura_db', 6.0), ('ciclo_trabajo_max', 0.01), ('semilla', 0),
+                           ('max_eventos_bloque', MAX_EVENTOS_BLOQUE_DEFECTO)):
+        kwargs.setdefault(clave, opciones.get(clave, defecto))
+    return simular_trafico(margen_db, asignacion.gateway, asignacion.trafico, **kwargs)
+
+
+def resumen_simulacion(resultado):
+    """Líneas de texto con PDR, ocupación de canal y ciclo de trabajo."""
+    horas = resultado.duracion_s / 3600.0
+    lineas = [
+        f"Tiempo simulado: {horas:,.0f} h ({horas / 24:,.1f} días), "
+        f"{resultado.paquetes_sensor.sum():,} mensajes, {resultado.eventos:,} eventos "
+        f"paquete × gateway en {resultado.tiempo_s:.1f} s "
+        f"({resultado.eventos / max(resultado.tiempo_s, 1e-9) / 1e6:.1f} M eventos/s)",
+    ]
+    sf, conteo = np.unique(resultado.spreading_factor[resultado.asignados], return_counts=True)
+    toa = [resultado.tiempo_aire_s[resultado.spreading_factor == s][0] for s in sf]
+    lineas.append("Spreading factor: " + ", ".join(
+        f"SF{s} × {c:,} ({t * 1000:.0f} ms)" for s, c, t in zip(sf, conteo, toa)))
+    lineas.append(f"PDR en el gateway asignado: {resultado.pdr * 100:.2f} % | "
+                  f"en cualquier gateway: {resultado.pdr_cualquiera * 100:.2f} %")
+    lineas.append(f"{'Gateway':<10}{'Mensajes':>14}{'PDR':>9}{'Ocupación canal':>18}")
+    for g in range(resultado.n_gateways):
+        lineas.append(f"{g + 1:<10}{resultado.paquetes_gateway[g]:>14,}"
+                      f"{resultado.pdr_gateway[g] * 100:>8.2f}%"
+                      f"{resultado.ocupacion_gateway[g] * 100:>17.2f}%")
+    ciclo = resultado.ciclo_trabajo
+    if len(ciclo):
+        lineas.append(f"Ciclo de trabajo por sensor: medio {ciclo.mean() * 100:.3f} %, "
+                      f"máximo {ciclo.max() * 100:.3f} % (límite "
+                      f"{resultado.ciclo_trabajo_max * 100:g} %, "
+                      f"{len(resultado.sobre_limite):,} sensores sobre el límite)")
+    if resultado.asignados.any():
+        peor = np.flatnonzero(resultado.asignados)[np.argmin(resultado.pdr_sensor[resultado.asignados])]
+        lineas.append(f"Peor sensor: {peor} con PDR {resultado.pdr_sensor[peor] * 100:.1f} % "
+                      f"(SF{resultado.spreading_factor[peor]}, gateway {resultado.gateway[peor] + 1})")
+    return lineas
+
@@ -0,0 +1,404 @@
+"""
+Modelo de terreno: despeje de Fresnel y pérdida por difracción sobre un MDE
+
+El modelo log-distance supone terreno plano. Con un modelo digital de
+elevación (MDE) cada enlace gateway → punto de demanda agrega la pérdida por
+difracción del obstáculo dominante del perfil (filo de cuchillo único,
+ITU-R P.526), considerando la curvatura terrestre efectiva (factor k) y la
+altura de las antenas de gateway y sensor.
+
+El MDE se guarda por teselas en un .npy mapeado en memoria de forma
+(teselas_y, teselas_x, T, T): leer el perfil de un enlace solo toca las
+páginas de las teselas que atraviesa y el ráster nunca se carga completo.
+
+Los perfiles se extraen por sitio candidato: todos los puntos de demanda
+de un sitio, ordenados por distancia y muestreados en lotes acotados por
+memoria. La pérdida de cada sitio queda en un caché (LRU) y se reutiliza
+en las siguientes matrices que incluyan ese sitio (otros presupuestos,
+rondas de multi-resolución).
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .configuracion import ruta_proyecto
+from .propagacion import ModeloPropagacion
+
+RADIO_TIERRA_M = 6_371_000.0
+FACTOR_K_DEFECTO = 4.0 / 3.0
+VELOCIDAD_LUZ_M_S = 299_792_458.0
+
+TAMANO_TESELA_DEFECTO = 256
+
+# Bytes de memoria temporal por muestra de perfil (posiciones, elevación,
+# distancias, línea de vista, radio de Fresnel, v)
+BYTES_POR_MUESTRA = 64
+
+# Ondas planas del MDE sintético
+_ONDAS_SINTETICAS = 32
+
+
+def perdida_difraccion_db(v):
+    """
+    Pérdida por difracción de filo de cuchillo J(v) en dB (ITU-R P.526).
+
+    Args:
+        v: Parámetro de difracción de Fresnel-Kirchhoff (escalar o array)
+
+    Returns:
+        J(v) >= 0; 0 para v <= -0.78 (primera zona de Fresnel despejada)
+    """
+    v = np.asarray(v, dtype=np.float64)
+    perdida = 6.9 + 20 * np.log10(np.sqrt((v - 0.1) ** 2 + 1) + v - 0.1)
+    return np.where(v > -0.78, perdida, 0.0)
+
+
+class ModeloElevacion:
+    """
+    MDE por teselas mapeado en memoria (solo lectura).
+
+    Archivos: `<ruta>.npy` con forma (teselas_y, teselas_x, T, T) en float32
+    y `<ruta>.json` con resolución, origen, tamaño y huella. La celda
+    (fila, columna) tiene su centro en origen + (columna + 0.5, fila + 0.5) ·
+    resolución; la fila 0 es el borde y = origen_y.
+    """
+
+    def __init__(self, ruta):
+        with open(f"{ruta}.json", 'r', encoding='utf-8') as f:
+            self.metadatos = json.load(f)
+        self.ruta = ruta
+        self.teselas = np.load(f"{ruta}.npy", mmap_mode='r')
+        self.resolucion_m = float(self.metadatos['resolucion_m'])
+        self.origen = tuple(self.metadatos['origen'])
+        self.n_filas = int(self.metadatos['n_filas'])
+        self.n_columnas = int(self.metadatos['n_columnas'])
+        self.tamano_tesela = int(self.metadatos['tamano_tesela'])
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def crear(cls, ruta, n_filas, n_columnas, resolucion_m, elevacion_tesela,
+              tamano_tesela=TAMANO_TESELA_DEFECTO, origen=(0.0, 0.0)):
+        """
+        Escribe un MDE tesela por tesela (sin materializar el ráster completo).
+
+        Los archivos se escriben con nombres temporales propios del proceso y
+        se renombran al final (primero `.npy`, luego `.json`): procesos que
+        crean el mismo MDE a la vez no se pisan, y quien encuentra el `.json`
+        encuentra el `.npy` completo.
+
+        Args:
+            ruta: Ruta base (sin extensión)
+            n_filas, n_columnas: Tamaño del ráster en celdas
+            resolucion_m: Lado de la celda
+            elevacion_tesela: Función (filas, columnas) → array de elevaciones
+                para los índices de celda dados (arrays 1D de la tesela)
+            tamano_tesela: Lado T de cada tesela en celdas
+            origen: Esquina inferior izquierda (x, y)
+
+        Returns:
+            ModeloElevacion
+        """
+        directorio = os.path.dirname(str(ruta))
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        T = int(tamano_tesela)
+        n_ty, n_tx = math.ceil(n_filas / T), math.ceil(n_columnas / T)
+        temporal = f"{ruta}.{os.getpid()}-{threading.get_ident()}.tmp"
+        teselas = np.lib.format.open_memmap(f"{temporal}.npy", mode='w+', dtype=np.float32,
+                                            shape=(n_ty, n_tx, T, T))
+        huella = hashlib.sha256()
+        for ty in range(n_ty):
+            for tx in range(n_tx):
+                # Las celdas fuera del ráster repiten el borde
+                filas = np.minimum(np.arange(ty * T, (ty + 1) * T), n_filas - 1)
+                columnas = np.minimum(np.arange(tx * T, (tx + 1) * T), n_columnas - 1)
+                teselas[ty, tx] = elevacion_tesela(filas, columnas)
+                huella.update(teselas[ty, tx].tobytes())
+        teselas.flush()
+        del teselas
+        metadatos = {'n_filas': int(n_filas), 'n_columnas': int(n_columnas),
+                     'resolucion_m': float(resolucion_m), 'tamano_tesela': T,
+                     'origen': [float(origen[0]), float(origen[1])],
+                     'huella': huella.hexdigest()[:16]}
+        os.replace(f"{temporal}.npy", f"{ruta}.npy")
+        with open(f"{temporal}.json", 'w', encoding='utf-8') as f:
+            json.dump(metadatos, f, indent=1)
+        os.replace(f"{temporal}.json", f"{ruta}.json")
+        return cls(ruta)
+
+    @classmethod
+    def desde_array(cls, ruta, valores, resolucion_m, tamano_tesela=TAMANO_TESELA_DEFECTO,
+                    origen=(0.0, 0.0)):
+        """MDE a partir de un array 2D (o memmap) de elevaciones, fila 0 al sur."""
+        return cls.crear(ruta, valores.shape[0], valores.shape[1], resolucion_m,
+                         lambda f, c: valores[f[0]:f[-1] + 1][:, c][f - f[0]],
+                         tamano_tesela, origen)
+
+    @classmethod
+    def sintetico(cls, ruta, dimension_x_m, dimension_y_m, resolucion_m, elevacion_min_m,
+                  elevacion_mediana_m, elevacion_max_m, longitud_correlacion_m=300.0,
+                  semilla=42, tamano_tesela=TAMANO_TESELA_DEFECTO):
+        """
+        MDE suave con la elevación mínima, mediana y máxima del campo.
+
+        Suma de ondas planas de dirección y fase aleatorias con longitud de
+        onda del orden de `longitud_correlacion_m`, evaluada tesela por
+        tesela; la mitad positiva se escala hacia el máximo y la negativa
+        hacia el mínimo.
+        """
+        rng = np.random.RandomState(semilla)
+        angulo = rng.uniform(0, 2 * np.pi, _ONDAS_SINTETICAS)
+        numero_onda = 2 * np.pi / (longitud_correlacion_m * rng.lognormal(0.5, 0.5, _ONDAS_SINTETICAS))
+        fase = rng.uniform(0, 2 * np.pi, _ONDAS_SINTETICAS)
+        kx, ky = numero_onda * np.cos(angulo), numero_onda * np.sin(angulo)
+        normalizacion = np.sqrt(_ONDAS_SINTETICAS / 2)
+        # z ~ N(0, 1): ±2.5 desviaciones se llevan al mínimo y máximo
+        escala_alta = (elevacion_max_m - elevacion_mediana_m) / 2.5
+        escala_baja = (elevacion_mediana_m - elevacion_min_m) / 2.5
+
+        def elevacion_tesela(filas, columnas):
+            y = (filas[:, None] + 0.5) * resolucion_m
+            x = (columnas[None, :] + 0.5) * resolucion_m
+            z = np.zeros((len(filas), len(columnas)))
+            for k in range(_ONDAS_SINTETICAS):
+                z += np.cos(kx[k] * x + ky[k] * y + fase[k])
+            z /= normalizacion
+            z = elevacion_mediana_m + np.where(z > 0, escala_alta * z, escala_baja * z)
+            return np.clip(z, elevacion_min_m, elevacion_max_m)
+
+        n_filas = max(1, math.ceil(dimension_y_m / resolucion_m))
+        n_columnas = max(1, math.ceil(dimension_x_m / resolucion_m))
+        return cls.crear(ruta, n_filas, n_columnas, resolucion_m, elevacion_tesela,
+                         tamano_tesela)
+
+    # ------------------------------------------------------------------
+    # Acceso
+    # ------------------------------------------------------------------
+
+    @property
+    def huella(self):
+        return self.metadatos['huella']
+
+    def _celdas(self, filas, columnas):
+        T = self.tamano_tesela
+        return self.teselas[filas // T, columnas // T, filas % T, columnas % T]
+
+    def elevacion(self, x, y):
+        """
+        Elevación interpolada bilinealmente en (x, y) (arrays de cualquier forma).
+
+        Fuera del ráster se usa el valor del borde.
+        """
+        u = np.clip((np.asarray(x, dtype=np.float64) - self.origen[0]) / self.resolucion_m - 0.5,
+                    0.0, self.n_columnas - 1)
+        w = np.clip((np.asarray(y, dtype=np.float64) - self.origen[1]) / self.resolucion_m - 0.5,
+                    0.0, self.n_filas - 1)
+        c0 = np.minimum(u.astype(np.int64), max(self.n_columnas - 2, 0))
+        f0 = np.minimum(w.astype(np.int64), max(self.n_filas - 2, 0))
+        fx, fy = u - c0, w - f0
+        c1 = np.minimum(c0 + 1, self.n_columnas - 1)
+        f1 = np.minimum(f0 + 1, self.n_filas - 1)
+        abajo = self._celdas(f0, c0) * (1 - fx) + self._celdas(f0, c1) * fx
+        arriba = self._celdas(f1, c0) * (1 - fx) + self._celdas(f1, c1) * fx
+        return abajo * (1 - fy) + arriba * fy
+
+
+def _huella_coordenadas(coords):
+    return hashlib.sha256(np.ascontiguousarray(coords, dtype='<f8').tobytes()).hexdigest()[:16]
+
+
+class ModeloTerreno:
+    """
+    Pérdida adicional por terreno de los enlaces gateway → punto de demanda.
+
+    Atributos:
+        mde: ModeloElevacion
+        frecuencia_mhz: Frecuencia de la portadora
+        altura_gateway_m, altura_sensor_m: Altura de las antenas sobre el suelo
+        factor_k: Factor de radio terrestre efectivo (4/3 atmósfera estándar)
+        paso_m: Distancia entre muestras del perfil (por defecto, la resolución)
+        muestras_max: Muestras máximas por perfil
+        memoria_cache_mb: Tamaño máximo del caché de pérdidas por sitio
+    """
+
+    def __init__(self, mde, frecuencia_mhz=915.0, altura_gateway_m=4.0, altura_sensor_m=1.0,
+                 factor_k=FACTOR_K_DEFECTO, paso_m=None, muestras_max=256,
+                 memoria_cache_mb=256):
+        self.mde = mde
+        self.frecuencia_mhz = float(frecuencia_mhz)
+        self.altura_gateway_m = float(altura_gateway_m)
+        self.altura_sensor_m = float(altura_sensor_m)
+        self.factor_k = float(factor_k)
+        self.paso_m = float(paso_m) if paso_m else mde.resolucion_m
+        self.muestras_max = int(muestras_max)
+        self.memoria_cache_mb = memoria_cache_mb
+        self._cache = OrderedDict()
+        self._bytes_cache = 0
+        self.aciertos = 0
+        self.fallos = 0
+
+    @classmethod
+    def desde_modelo(cls, mde, modelo, **kwargs):
+        """Toma frecuencia y alturas de antena de un ModeloPropagacion."""
+        return cls(mde, modelo.frecuencia_mhz, modelo.altura_gateway_m, modelo.altura_sensor_m,
+                   **kwargs)
+
+    @property
+    def longitud_onda_m(self):
+        return VELOCIDAD_LUZ_M_S / (self.frecuencia_mhz * 1e6)
+
+    @property
+    def huella(self):
+        """Identifica MDE y parámetros (para claves de caché en disco)."""
+        return hashlib.sha256(json.dumps([
+            self.mde.huella, self.frecuencia_mhz, self.altura_gateway_m, self.altura_sensor_m,
+            self.factor_k, self.paso_m, self.muestras_max]).encode()).hexdigest()[:16]
+
+    def perfil_sitio(self, sitio, J_coords, memoria_max_mb=256):
+        """
+        Pérdida por difracción y despeje de Fresnel de un sitio a todos los puntos.
+
+        Args:
+            sitio: Coordenadas (x, y) del gateway
+            J_coords: Array (n_J, 2) de puntos de demanda
+            memoria_max_mb: Presupuesto de memoria de las muestras por lote
+
+        Returns:
+            (perdida_db, despeje): arrays float32 (n_J,); `despeje` es el mínimo
+            de (distancia a la línea de vista) / (radio de la 1.ª zona de
+            Fresnel) a lo largo del perfil (>= 0.6 se considera despejado)
+        """
+        J_coords = np.asarray(J_coords, dtype=np.float64)
+        sx, sy = float(sitio[0]), float(sitio[1])
+        distancia = np.hypot(J_coords[:, 0] - sx, J_coords[:, 1] - sy)
+        perdida = np.zeros(len(J_coords), dtype=np.float32)
+        despeje = np.full(len(J_coords), np.inf, dtype=np.float32)
+
+        altura_tx = float(self.mde.elevacion(sx, sy)) + self.altura_gateway_m
+        altura_rx = self.mde.elevacion(J_coords[:, 0], J_coords[:, 1]) + self.altura_sensor_m
+        lam = self.longitud_onda_m
+        radio_efectivo = self.factor_k * RADIO_TIERRA_M
+
+        # Enlaces con al menos una muestra interior, de menor a mayor longitud
+        orden = np.argsort(distancia, kind='stable')
+        orden = orden[distancia[orden] > self.paso_m]
+        muestras_enlace = np.minimum(self.muestras_max,
+                                     (distancia[orden] // self.paso_m).astype(np.int64))
+        maximo = max(1, int(memoria_max_mb * 1024 * 1024 // BYTES_POR_MUESTRA))
+        inicio = 0
+        while inicio < len(orden):
+            # Lote con n · K <= maximo, K fijado por el enlace más largo
+            fin = min(len(orden), inicio + max(1, maximo // int(muestras_enlace[inicio])))
+            fin = min(fin, inicio + max(1, maximo // int(muestras_enlace[fin - 1])))
+            muestras = int(muestras_enlace[fin - 1])
+            lote = orden[inicio:fin]
+            t = np.arange(1, muestras + 1) / (muestras + 1)
+            d = distancia[lote][:, None]
+            x = sx + t[None, :] * (J_coords[lote, 0, None] - sx)
+            y = sy + t[None, :] * (J_coords[lote, 1, None] - sy)
+            d1 = t[None, :] * d
+            d2 = d - d1
+            vista = altura_tx + t[None, :] * (altura_rx[lote, None] - altura_tx)
+            # Altura del terreno (con curvatura) sobre la línea de vista
+            h = self.mde.elevacion(x, y) + d1 * d2 / (2 * radio_efectivo) - vista
+            del x, y, vista
+            r1 = np.sqrt(lam * d1 * d2 / d)
+            v_max = (np.sqrt(2) * h / r1).max(axis=1)
+            perdida[lote] = perdida_difraccion_db(v_max)
+            despeje[lote] = -v_max / np.sqrt(2)
+            inicio = fin
+        return perdida, despeje
+
+    def perdidas(self, I_coords, J_coords, memoria_max_mb=256):
+        """
+        Pérdida por terreno (n_I, n_J) en dB, con caché por sitio.
+
+        Args:
+            I_coords: Array (n_I, 2) de sitios candidatos
+            J_coords: Array (n_J, 2) de puntos de demanda
+            memoria_max_mb: Presupuesto de memoria por lote de perfiles
+
+        Returns:
+            Array float32 (n_I, n_J)
+        """
+        I_coords = np.asarray(I_coords, dtype=np.float64).reshape(-1, 2)
+        huella_J = _huella_coordenadas(J_coords)
+        resultado = np.empty((len(I_coords), len(J_coords)), dtype=np.float32)
+        for fila, (x, y) in enumerate(I_coords):
+            clave = (round(x, 2), round(y, 2), huella_J)
+            if clave in self._cache:
+                self._cache.move_to_end(clave)
+                resultado[fila] = self._cache[clave]
+                self.aciertos += 1
+                continue
+            self.fallos += 1
+            perdida, _ = self.perfil_sitio((x, y), J_coords, memoria_max_mb)
+            resultado[fila] = perdida
+            self._guardar_cache(clave, perdida)
+        return resultado
+
+    def _guardar_cache(self, clave, perdida):
+        limite = self.memoria_cache_mb * 1024 * 1024
+        if perdida.nbytes > limite:
+            return
+        self._cache[clave] = perdida
+        self._bytes_cache += perdida.nbytes
+        while self._bytes_cache > limite:
+            _, descartada = self._cache.popitem(last=False)
+            self._bytes_cache -= descartada.nbytes
+
+
+def terreno_desde_config(config, modelo=None):
+    """
+    ModeloTerreno del bloque `terreno` de config.json, o None si no está activo.
+
+    Con `fuente: "sintetico"` el MDE se genera (una vez) a partir de las
+    elevaciones mínima, mediana y máxima de `campo`; con `fuente: "npy"` se
+    convierte a teselas el array 2D de `ruta_npy`. El MDE por teselas se
+    guarda en `<ruta_mde>_<huella de los parámetros>`. Frecuencia y alturas
+    de antena vienen de `propagacion` (ver `ModeloPropagacion`).
+    """
+    opciones = config.get('terreno', {})
+    if not opciones.get('activo', False):
+        return None
+    if modelo is None:
+        modelo = ModeloPropagacion.desde_config(config)
+
+    campo = config['campo']
+    fuente = opciones.get('fuente', 'sintetico')
+    resolucion = opciones.get('resolucion_m', 10.0)
+    tamano = opciones.get('tamano_tesela', TAMANO_TESELA_DEFECTO)
+    if fuente == 'sintetico':
+        parametros = [campo['dimension_x_m'], campo['dimension_y_m'], resolucion,
+                      campo['elevacion_min_m'], campo['elevacion_mediana_m'],
+                      campo['elevacion_max_m'], opciones.get('longitud_correlacion_m', 300.0),
+                      opciones.get('semilla', 42)]
+    elif fuente == 'npy':
+        ruta_npy = ruta_proyecto(opciones['ruta_npy'])
+        parametros = [os.path.abspath(ruta_npy), os.path.getmtime(ruta_npy), resolucion]
+    else:
+        raise ValueError(f"Fuente de MDE desconocida: '{fuente}'")
+    clave = hashlib.sha256(json.dumps([fuente, tamano] + parametros).encode()).hexdigest()[:12]
+    ruta = f"{ruta_proyecto(opciones.get('ruta_mde', 'results/cache/mde'))}_{clave}"
+
+    if os.path.exists(f"{ruta}.json"):
+        mde = ModeloElevacion(ruta)
+    elif fuente == 'sintetico':
+        mde = ModeloElevacion.sintetico(ruta, *parametros[:7], semilla=parametros[7],
+                                        tamano_tesela=tamano)
+    else:
+        mde = ModeloElevacion.desde_array(ruta, np.load(ruta_npy, mmap_mode='r'), resolucion,
+                                          tamano)
+    return ModeloTerreno.desde_modelo(
+        mde, modelo, factor_k=opciones.get('factor_k', FACTOR_K_DEFECTO),
+        paso_m=opciones.get('paso_muestreo_m'), muestras_max=opciones.get('muestras_max', 256),
+        memoria_cache_mb=opciones.get('memoria_cache_mb', 256))
@@ -0,0 +1,353 @@
+"""
+Descomposición espacial en teselas para campos grandes
+
+El modelo monolítico crece como (área / celda²)² porque I = J. Un punto de
+demanda solo puede ser cubierto por candidatos dentro del alcance del enlace,
+así que el campo se divide en teselas de lado >= rango:
+
+1. Cada tesela resuelve el Set Cover de sus propios puntos (núcleo) con los
+   candidatos a distancia <= rango del núcleo (halo, que se solapa con las
+   teselas vecinas). Las teselas se resuelven en procesos de trabajo.
+2. Las soluciones se unen y una pasada global elimina los gateways
+   redundantes: los que solo cubren puntos ya cubiertos por otro elegido
+   (típicamente en los solapes). Aquí cuentan todos los enlaces viables,
+   también los abiertos más largos que el rango.
+
+Cada tesela es de tamaño acotado, de modo que memoria y tiempo crecen
+linealmente con el número de teselas (el área). La obstrucción se sortea
+por coordenadas de enlace (o se obtiene del ráster, con
+`patron_obstruccion: "raster"`) para que un enlace sea el mismo en todas
+las teselas que lo ven.
+
+Cota inferior: dos teselas cuyos núcleos distan más de 2·rango no comparten
+candidatos, así que la suma de sus cotas es una cota del problema con
+enlaces de longitud <= rango (del problema completo si rango = 'abierto').
+Se toma la mejor de las clases de teselas equiespaciadas.
+"""
+
+import math
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .bitset import indices_activos
+from .cobertura import (MEMORIA_MAX_MB_DEFECTO, OBSTRUCCION_COORDENADAS,
+                        calcular_matriz_cobertura_bits, obstruccion_desde_config)
+from .grid import grid_desde_config
+from .paralelo import compartido, ejecutar_tareas, guardar_compartidos
+from .propagacion import ModeloPropagacion
+from .resolucion import resolver_set_cover
+from .terreno import terreno_desde_config
+
+
+@dataclass
+class ResultadoTesela:
+    """Resumen de la resolución de una tesela (ix, iy)."""
+    ix: int
+    iy: int
+    puntos: int
+    candidatos: int
+    n_sitios: int = 0
+    cota_inferior: float = 0.0
+    estado: str = 'Not Solved'
+    tiempo_s: float = 0.0
+    error: str = ''
+
+
+@dataclass
+class ResultadoTeselado:
+    """
+    Cobertura unida de todas las teselas.
+
+    Atributos:
+        seleccion: Índices (en J) de los sitios elegidos tras la limpieza
+        sitios: Coordenadas (N, 2) de los sitios elegidos
+        teselas: Lista de ResultadoTesela
+        sitios_unidos: Sitios antes de la eliminación global de redundantes
+        puntos_sin_cobertura: Puntos no cubiertos (por teselas infactibles o fallidas)
+        cota_inferior: Cota del problema con enlaces de longitud <= rango
+        tamano_tesela_m, rango_m: Geometría de la descomposición
+        tiempo_s: Tiempo total
+    """
+    seleccion: list
+    sitios: np.ndarray
+    teselas: list = field(default_factory=list)
+    sitios_unidos: int = 0
+    puntos_sin_cobertura: int = 0
+    cota_inferior: float = 0.0
+    tamano_tesela_m: float = 0.0
+    rango_m: float = 0.0
+    tiempo_s: float = 0.0
+
+    @property
+    def n_sitios(self):
+        return len(self.seleccion)
+
+    @property
+    def gap(self):
+        """(N - cota) / N respecto del problema restringido al rango."""
+        return max(0.0, (self.n_sitios - self.cota_inferior) / self.n_sitios) if self.n_sitios else 0.0
+
+
+def rango_teselado(modelo, rango='obstruido'):
+    """
+    Alcance usado para dimensionar las teselas.
+
+    Args:
+        modelo: ModeloPropagacion
+        rango: 'obstruido' (alcance garantizado con cualquier obstrucción),
+            'abierto' (alcance máximo) o una distancia en metros
+
+    Returns:
+        Distancia en metros
+    """
+    if rango == 'obstruido':
+        return float(modelo.rango_maximo(modelo.exponente_obstruido))
+    if rango == 'abierto':
+        return float(modelo.rango_maximo(modelo.exponente_abierto))
+    return float(rango)
+
+
+def _distancia_rectangulo(coords, x0, x1, y0, y1):
+    """Distancia de cada punto al rectángulo [x0, x1] × [y0, y1]."""
+    dx = np.maximum(np.maximum(x0 - coords[:, 0], coords[:, 0] - x1), 0)
+    dy = np.maximum(np.maximum(y0 - coords[:, 1], coords[:, 1] - y1), 0)
+    return np.hypot(dx, dy)
+
+
+class _Particion:
+    """
+    Puntos ordenados por tesela: los de la tesela t ocupan
+    [inicios[t], inicios[t + 1]) de `orden`.
+    """
+
+    def __init__(self, coords, lado, n_x, n_y):
+        self.lado, self.n_x, self.n_y = lado, n_x, n_y
+        ix = np.minimum((coords[:, 0] // lado).astype(np.int64), n_x - 1)
+        iy = np.minimum((coords[:, 1] // lado).astype(np.int64), n_y - 1)
+        tesela = iy * n_x + ix
+        self.orden = np.argsort(tesela, kind='stable')
+        self.inicios = np.searchsorted(tesela[self.orden], np.arange(n_x * n_y + 1))
+
+    def limites(self, ix, iy):
+        return (ix * self.lado, (ix + 1) * self.lado, iy * self.lado, (iy + 1) * self.lado)
+
+    def rangos(self, ix, iy, vecinas=False, capas=1):
+        """
+        Tramos (inicio, fin) de `orden` de la tesela y, opcionalmente, de sus
+        vecinas a `capas` teselas o menos (las 8 vecinas con capas=1).
+        """
+        alcance = capas if vecinas else 0
+        tramos = []
+        for jy in range(max(iy - alcance, 0), min(iy + alcance + 1, self.n_y)):
+            for jx in range(max(ix - alcance, 0), min(ix + alcance + 1, self.n_x)):
+                t = jy * self.n_x + jx
+                tramos.append((int(self.inicios[t]), int(self.inicios[t + 1])))
+        return tramos
+
+
+def _indices(orden, tramos):
+    return np.concatenate([orden[i:f] for i, f in tramos]) if tramos else np.empty(0, np.int64)
+
+
+def _tarea_tesela(config, ix, iy, limites, tramos_nucleo, tramos_vecinas, rango):
+    """Set Cover de los puntos del núcleo con los candidatos de su halo."""
+    J = compartido('puntos')
+    orden = compartido('orden')
+    escenario = config['escenario']
+    nucleo = _indices(orden, tramos_nucleo)
+    vecinos = _indices(orden, tramos_vecinas)
+    candidatos = vecinos[_distancia_rectangulo(J[vecinos], *limites) <= rango]
+    cobertura = calcular_matriz_cobertura_bits(
+        J[candidatos], J[nucleo], ModeloPropagacion.desde_config(config),
+        escenario['porcentaje_area_obstruida'], escenario.get('semilla_obstruccion', 42),
+        config.get('calculo', {}).get('memoria_max_mb', MEMORIA_MAX_MB_DEFECTO),
+        obstruccion=obstruccion_desde_config(config, OBSTRUCCION_COORDENADAS),
+        terreno=terreno_desde_config(config))
+    resultado = resolver_set_cover(cobertura.a, config.get('solver'))
+    return {
+        'estado': resultado.estado,
+        'seleccion': [int(candidatos[i]) for i in resultado.seleccion],
+        'cota_inferior': resultado.cota_inferior,
+        'candidatos': len(candidatos),
+    }
+
+
+def _cota_por_clases(cotas, n_x, n_y, paso):
+    """Mejor suma de cotas sobre las clases (ix % paso, iy % paso)."""
+    mejor = 0.0
+    for ox in range(min(paso, n_x)):
+        for oy in range(min(paso, n_y)):
+            mejor = max(mejor, float(cotas[oy::paso, ox::paso].sum()))
+    return mejor
+
+
+def eliminar_redundantes_global(J, seleccion, particion, modelo, porcentaje, semilla,
+                                memoria=MEMORIA_MAX_MB_DEFECTO,
+                                obstruccion=OBSTRUCCION_COORDENADAS, terreno=None):
+    """
+    Quita los sitios cuyos puntos cubiertos están todos cubiertos por otro sitio.
+
+    Cuenta la viabilidad real de cada enlace, sin el límite de rango de las
+    teselas (que solo vale para la cota inferior): un sitio que cubre en
+    campo abierto los puntos de otro permite quitar ese otro. La cobertura
+    se calcula tesela por tesela, contra los sitios a distancia <= alcance
+    abierto del núcleo (ningún enlace más largo es viable), de modo que el
+    costo es lineal en el área cuando el campo es mayor que ese alcance.
+
+    Args:
+        J: Coordenadas de todos los puntos (candidatos = puntos)
+        seleccion: Índices (en J) de la unión de soluciones
+        particion: _Particion de J
+        modelo, porcentaje, semilla: Cobertura
+        memoria: Memoria máxima por bloque de cobertura (MB)
+        obstruccion: 'coordenadas' o un MapaObstruccion (ver `iterar_geometria`)
+        terreno: ModeloTerreno opcional (ver `iterar_bloques`)
+
+    Returns:
+        (seleccion sin redundantes, conteo de sitios que cubren cada punto)
+    """
+    seleccion = np.asarray(sorted(set(seleccion)), dtype=np.int64)
+    conteo = np.zeros(len(J), dtype=np.int32)
+    cubiertos = [[] for _ in seleccion]
+    sitios = J[seleccion]
+    por_tesela = _Particion(sitios, particion.lado, particion.n_x, particion.n_y)
+    alcance = rango_teselado(modelo, 'abierto')
+    capas = math.ceil(alcance / particion.lado)
+    for iy in range(particion.n_y):
+        for ix in range(particion.n_x):
+            nucleo = _indices(particion.orden, particion.rangos(ix, iy))
+            vecinos = _indices(por_tesela.orden, por_tesela.rangos(ix, iy, True, capas))
+            cercanos = vecinos[_distancia_rectangulo(sitios[vecinos], *particion.limites(ix, iy))
+                               <= alcance]
+            if len(nucleo) == 0 or len(cercanos) == 0:
+                continue
+            a = calcular_matriz_cobertura_bits(sitios[cercanos], J[nucleo], modelo, porcentaje,
+                                               semilla, memoria,
+                                               obstruccion=obstruccion, terreno=terreno).a
+            for fila, k in enumerate(cercanos):
+                puntos = nucleo[indices_activos(a.fila(fila), a.n_columnas)]
+                cubiertos[k].append(puntos)
+                conteo[puntos] += 1
+
+    cubiertos = [np.concatenate(c) if c else np.empty(0, np.int64) for c in cubiertos]
+    conservar = np.ones(len(seleccion), dtype=bool)
+    # Primero los que cubren menos, como en heuristica.eliminar_redundantes
+    for k in np.argsort([len(c) for c in cubiertos], kind='stable'):
+        if np.all(conteo[cubiertos[k]] >= 2):
+            conteo[cubiertos[k]] -= 1
+            conservar[k] = False
+    return [int(i) for i in seleccion[conservar]], conteo
+
+
+def resolver_teselado(config, J=None, tamano_en_rangos=2.0, rango='obstruido', procesos=None,
+                      tiempo_limite=None, al_terminar=None):
+    """
+    Resuelve el Set Cover del campo por teselas en paralelo y une las soluciones.
+
+    Args:
+        config: Configuración (campo, discretizacion, propagacion, escenario,
+            calculo, solver)
+        J: Puntos de demanda (por defecto, la grilla de config.json)
+        tamano_en_rangos: Lado de la tesela en múltiplos del rango (>= 1)
+        rango: Alcance de diseño (ver `rango_teselado`)
+        procesos: Procesos de trabajo (por defecto, todos los núcleos)
+        tiempo_limite: Segundos máximos por tesela (None = sin límite)
+        al_terminar: Función (ResultadoTesela) llamada al terminar cada tesela
+
+    Returns:
+        ResultadoTeselado
+    """
+    inicio = time.perf_counter()
+    J = grid_desde_config(config) if J is None else np.asarray(J, dtype=float)
+    modelo = ModeloPropagacion.desde_config(config)
+    escenario = config['escenario']
+    porcentaje = escenario['porcentaje_area_obstruida']
+    semilla = escenario.get('semilla_obstruccion', 42)
+    memoria = config.get('calculo', {}).get('memoria_max_mb', MEMORIA_MAX_MB_DEFECTO)
+    # El MDE se crea aquí, antes de repartir las teselas; los trabajadores lo abren
+    terreno = terreno_desde_config(config, modelo)
+
+    alcance = rango_teselado(modelo, rango)
+    # Con lado >= rango el halo de una tesela cae dentro de sus 8 vecinas
+    lado = max(tamano_en_rangos, 1.0) * alcance
+    n_x = max(1, math.ceil(config['campo']['dimension_x_m'] / lado))
+    n_y = max(1, math.ceil(config['campo']['dimension_y_m'] / lado))
+    particion = _Particion(J, lado, n_x, n_y)
+
+    teselas, tareas = [], []
+    for iy in range(n_y):
+        for ix in range(n_x):
+            nucleo = particion.rangos(ix, iy)
+            puntos = nucleo[0][1] - nucleo[0][0]
+            if puntos == 0:
+                continue
+            teselas.append(ResultadoTesela(ix, iy, puntos, 0))
+            tareas.append((config, ix, iy, particion.limites(ix, iy), nucleo,
+                           particion.rangos(ix, iy, vecinas=True), alcance))
+
+    union = []
+    cotas = np.zeros((n_y, n_x))
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = guardar_compartidos({'puntos': J, 'orden': particion.orden}, tmp)
+        for r in ejecutar_tareas(_tarea_tesela, tareas, procesos, tiempo_limite, rutas):
+            t = teselas[r.indice]
+            t.tiempo_s = r.tiempo_s
+            if not r.exito:
+                t.estado, t.error = 'Error', r.error.strip().splitlines()[0]
+            else:
+                t.estado = r.valor['estado']
+                t.candidatos = r.valor['candidatos']
+                t.n_sitios = len(r.valor['seleccion'])
+                t.cota_inferior = r.valor['cota_inferior']
+                union.extend(r.valor['seleccion'])
+                if t.estado in ('Optimal', 'Feasible') and not math.isnan(t.cota_inferior):
+                    cotas[t.iy, t.ix] = math.ceil(t.cota_inferior - 1e-6)
+            if al_terminar is not None:
+                al_terminar(t)
+
+    seleccion, conteo = eliminar_redundantes_global(
+        J, union, particion, modelo, porcentaje, semilla, memoria,
+        obstruccion_desde_config(config, OBSTRUCCION_COORDENADAS), terreno)
+    # Núcleos a más de 2·rango no comparten candidatos
+    paso = math.floor(2 * alcance / lado) + 2
+    return ResultadoTeselado(
+        seleccion=seleccion, sitios=J[seleccion], teselas=teselas,
+        sitios_unidos=len(set(union)), puntos_sin_cobertura=int(np.count_nonzero(conteo == 0)),
+        cota_inferior=_cota_por_clases(cotas, n_x, n_y, paso), tamano_tesela_m=lado,
+        rango_m=alcance, tiempo_s=time.perf_counter() - inicio)
+
+
+def teselado_desde_config(config, J=None, **kwargs):
+    """
+    Teselado con el bloque `teselado` de config.json (tamano_en_rangos,
+    rango, procesos, tiempo_limite_s); los argumentos explícitos tienen prioridad.
+    """
+    opciones = config.get('teselado', {})
+    kwargs.setdefault('tamano_en_rangos', opciones.get('tamano_en_rangos', 2.0))
+    kwargs.setdefault('rango', opciones.get('rango', 'obstruido'))
+    kwargs.setdefault('procesos', opciones.get('procesos'))
+    kwargs.setdefault('tiempo_limite', opciones.get('tiempo_limite_s'))
+    return resolver_teselado(config, J, **kwargs)
+
+
+def resumen_teselado(resultado):
+    """Líneas de texto con la descomposición, la limpieza y la cota."""
+    n_x = max((t.ix for t in resultado.teselas), default=-1) + 1
+    n_y = max((t.iy for t in resultado.teselas), default=-1) + 1
+    fallidas = [t for t in resultado.teselas if t.estado not in ('Optimal', 'Feasible')]
+    lineas = [
+        f"Rango de diseño: {resultado.rango_m:.0f} m, lado de tesela: {resultado.tamano_tesela_m:.0f} m "
+        f"({n_x} × {n_y} teselas, {len(resultado.teselas)} con puntos)",
+        f"Sitios unidos: {resultado.sitios_unidos}, tras eliminar redundantes: {resultado.n_sitios}",
+        f"Puntos sin cobertura: {resultado.puntos_sin_cobertura}",
+        f"Cota inferior (enlaces <= rango): {resultado.cota_inferior:g}, "
+        f"gap: {100 * resultado.gap:.1f}%",
+        f"Teselas sin solución: {len(fallidas)}",
+    ]
+    for t in fallidas:
+        lineas.append(f"  ({t.ix}, {t.iy}): {t.estado} {t.error}".rstrip())
+    lineas.append(f"Tiempo total: {resultado.tiempo_s:.1f} s")
+    return lineas
@@ -0,0 +1,404 @@
+"""
+Ubicación de sensores de humedad guiada por una superficie de demanda
+
+La grilla regular de espaciado fijo ignora la variabilidad del suelo, la
+obstrucción y los márgenes de enlace. Con una superficie de demanda
+ponderada (un ráster de variabilidad del suelo o muestras puntuales) los
+sensores se ubican con k-means ponderado:
+
+- El campo se discretiza en celdas candidatas de `celda_m`. El peso de cada
+  celda sale del ráster (celda más cercana) o de las muestras (distancia
+  inversa ponderada). Solo cuentan las celdas con margen de enlace
+  >= `margen_min_db` hacia algún gateway (ver `asignacion.margenes_enlace`).
+- K = sensores_por_ha × hectáreas del campo. Las semillas salen de
+  k-means++ sobre una muestra ponderada; siguen iteraciones mini-batch
+  (lotes muestreados en proporción al peso, tasa de aprendizaje 1/conteo
+  por centro) y pasadas de Lloyd ponderado sobre todas las celdas hasta que
+  ningún centro se mueve más de `tolerancia_m`. En esas pasadas cada celda
+  solo se compara con su centro y los `vecinos` centros más próximos a él.
+- Cada centro se lleva a la celda más cercana de su grupo: todo sitio tiene
+  margen aunque el centroide caiga en una zona sin enlace.
+
+Sin datos de demanda se conserva la grilla regular de `espaciado_m`.
+"""
+
+import csv
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .asignacion import margenes_desde_config
+from .configuracion import ruta_proyecto
+from .grid import generar_puntos_demanda
+
+METODO_GRILLA = 'grilla'
+METODO_KMEANS = 'kmeans'
+
+# Demanda constante sobre las celdas con enlace (k-means sin datos de suelo)
+DEMANDA_UNIFORME = 'uniforme'
+
+# Elementos (puntos × centros o muestras) por bloque en los cálculos de distancia
+ELEMENTOS_BLOQUE = 4_000_000
+
+# Celdas muestreadas para las semillas k-means++
+MUESTRA_SEMILLAS = 20_000
+
+
+@dataclass
+class ResultadoUbicacion:
+    """
+    Sitios de los sensores de humedad.
+
+    Atributos:
+        coordenadas: Array (K, 2) de sitios
+        metodo: 'grilla' (espaciado fijo) o 'kmeans' (superficie de demanda)
+        peso: Fracción de la demanda viable que representa cada sensor (K,)
+        margen_db: Mejor margen de enlace de cada sitio a los gateways (K,)
+        celdas: Celdas candidatas evaluadas (0 con grilla)
+        celdas_viables: Celdas con margen >= margen_min_db
+        demanda_sin_enlace: Fracción de la demanda en celdas sin margen
+        iteraciones: Pasadas de Lloyd ponderado
+        desplazamiento_m: Mayor desplazamiento de un centro en la última pasada
+        tiempo_s: Tiempo total
+    """
+    coordenadas: np.ndarray
+    metodo: str
+    peso: np.ndarray
+    margen_db: np.ndarray
+    celdas: int
+    celdas_viables: int
+    demanda_sin_enlace: float
+    iteraciones: int
+    desplazamiento_m: float
+    tiempo_s: float
+
+    @property
+    def n_sensores(self):
+        return len(self.coordenadas)
+
+
+def pesos_raster(raster, dimension_x_m, dimension_y_m, puntos):
+    """
+    Valor del ráster en cada punto (celda más cercana).
+
+    Args:
+        raster: Array 2D que cubre el campo (fila 0 al sur)
+        dimension_x_m, dimension_y_m: Dimensiones del campo
+        puntos: Array (n, 2) de coordenadas
+
+    Returns:
+        Array float64 (n,)
+    """
+    raster = np.asarray(raster)
+    if raster.ndim != 2:
+        raise ValueError(f"El ráster de demanda debe ser 2D, no {raster.shape}")
+    n_filas, n_columnas = raster.shape
+    columna = np.clip((puntos[:, 0] / dimension_x_m * n_columnas).astype(np.int64), 0, n_columnas - 1)
+    fila = np.clip((puntos[:, 1] / dimension_y_m * n_filas).astype(np.int64), 0, n_filas - 1)
+    return raster[fila, columna].astype(np.float64)
+
+
+def pesos_muestras(muestras, valores, puntos, potencia=2.0):
+    """
+    Interpolación por distancia inversa ponderada de muestras puntuales.
+
+    Args:
+        muestras: Array (m, 2) de coordenadas muestreadas
+        valores: Valor de cada muestra (m,)
+        puntos: Array (n, 2) donde interpolar
+        potencia: Exponente de la distancia
+
+    Returns:
+        Array float64 (n,); un punto sobre una muestra toma su valor
+    """
+    muestras = np.asarray(muestras, dtype=np.float64).reshape(-1, 2)
+    valores = np.asarray(valores, dtype=np.float64)
+    pesos = np.empty(len(puntos))
+    paso = max(1, ELEMENTOS_BLOQUE // max(len(muestras), 1))
+    for inicio in range(0, len(puntos), paso):
+        bloque = puntos[inicio:inicio + paso]
+        d2 = ((bloque[:, None, :] - muestras[None, :, :]) ** 2).sum(axis=2)
+        exacto = d2 == 0
+        inversa = np.where(exacto, 0.0, 1.0 / np.maximum(d2, 1e-300) ** (potencia / 2))
+        interpolado = inversa @ valores / inversa.sum(axis=1)
+        coincide = exacto.any(axis=1)
+        interpolado[coincide] = valores[np.argmax(exacto[coincide], axis=1)]
+        pesos[inicio:inicio + paso] = interpolado
+    return pesos
+
+
+def _mas_cercano(puntos, centros):
+    """Centro más cercano de cada punto y su distancia al cuadrado."""
+    etiqueta = np.empty(len(puntos), dtype=np.int64)
+    d2_min = np.empty(len(puntos))
+    norma_c = (centros ** 2).sum(axis=1)
+    paso = max(1, ELEMENTOS_BLOQUE // max(len(centros), 1))
+    for inicio in range(0, len(puntos), paso):
+        bloque = puntos[inicio:inicio + paso]
+        d2 = norma_c[None, :] - 2.0 * (bloque @ centros.T)
+        etiqueta[inicio:inicio + paso] = np.argmin(d2, axis=1)
+        d2_min[inicio:inicio + paso] = np.maximum(
+            d2[np.arange(len(bloque)), etiqueta[inicio:inicio + paso]]
+            + (bloque ** 2).sum(axis=1), 0.0)
+    return etiqueta, d2_min
+
+
+def _reasignar_vecinos(puntos, centros, etiqueta, vecinos):
+    """
+    Centro más cercano entre el actual de cada punto y sus `vecinos` centros
+    más próximos (los centros se mueven poco entre pasadas de Lloyd).
+    """
+    cx, cy = centros[:, 0], centros[:, 1]
+    d2_centros = (cx[:, None] - cx[None, :]) ** 2 + (cy[:, None] - cy[None, :]) ** 2
+    cercanos = np.argpartition(d2_centros, vecinos, axis=1)[:, :vecinos + 1]
+    nueva = np.empty_like(etiqueta)
+    d2_min = np.empty(len(puntos))
+    paso = max(1, ELEMENTOS_BLOQUE // (vecinos + 1))
+    for inicio in range(0, len(puntos), paso):
+        bloque = slice(inicio, inicio + paso)
+        candidatos = cercanos[etiqueta[bloque]]
+        d2 = ((puntos[bloque, 0, None] - cx[candidatos]) ** 2
+              + (puntos[bloque, 1, None] - cy[candidatos]) ** 2)
+        mejor = np.argmin(d2, axis=1)
+        filas = np.arange(len(candidatos))
+        nueva[bloque] = candidatos[filas, mejor]
+        d2_min[bloque] = d2[filas, mejor]
+    return nueva, d2_min
+
+
+def _muestra_ponderada(acumulado, n, rng):
+    """Índices muestreados con probabilidad proporcional al peso (con reemplazo)."""
+    return np.minimum(np.searchsorted(acumulado, rng.random(n) * acumulado[-1], side='right'),
+                      len(acumulado) - 1)
+
+
+def _semillas(puntos, pesos, acumulado, k, rng):
+    """k-means++ ponderado sobre una muestra de las celdas."""
+    muestra = puntos[_muestra_ponderada(acumulado, min(MUESTRA_SEMILLAS, len(puntos)), rng)]
+    centros = np.empty((k, 2))
+    centros[0] = muestra[rng.integers(len(muestra))]
+    d2 = ((muestra - centros[0]) ** 2).sum(axis=1)
+    for c in range(1, k):
+        total = d2.sum()
+        elegido = rng.integers(len(muestra)) if total <= 0 else \
+            min(int(np.searchsorted(np.cumsum(d2), rng.random() * total, side='right')),
+                len(muestra) - 1)
+        centros[c] = muestra[elegido]
+        d2 = np.minimum(d2, ((muestra - centros[c]) ** 2).sum(axis=1))
+    return centros
+
+
+def kmeans_ponderado(puntos, pesos, k, tamano_lote=2048, iteraciones_lote=100,
+                     iteraciones_lloyd=30, tolerancia_m=1.0, vecinos=8, semilla=0):
+    """
+    k-means ponderado: semillas k-means++, mini-batch y refinamiento de Lloyd.
+
+    Args:
+        puntos: Array (n, 2) de coordenadas
+        pesos: Peso no negativo de cada punto (n,), con suma > 0
+        k: Número de centros (<= puntos con peso > 0)
+        tamano_lote: Puntos por lote mini-batch
+        iteraciones_lote: Lotes antes de las pasadas de Lloyd
+        iteraciones_lloyd: Máximo de pasadas de Lloyd sobre todos los puntos
+        tolerancia_m: Desplazamiento máximo de un centro para detenerse
+        vecinos: Centros vecinos evaluados al reasignar cada punto en las
+            pasadas de Lloyd (tras la primera asignación completa)
+        semilla: Semilla del generador aleatorio
+
+    Returns:
+        Tupla (centros (k, 2), etiqueta (n,), iteraciones, desplazamiento_m)
+    """
+    rng = np.random.default_rng(semilla)
+    puntos = np.asarray(puntos, dtype=np.float64)
+    pesos = np.asarray(pesos, dtype=np.float64)
+    acumulado = np.cumsum(pesos)
+    centros = _semillas(puntos, pesos, acumulado, k, rng)
+
+    # Mini-batch (Sculley): cada punto muestreado acerca su centro con tasa
+    # 1/conteo, lo que equivale a la media acumulada de sus muestras
+    conteo = np.zeros(k)
+    for _ in range(iteraciones_lote):
+        lote = puntos[_muestra_ponderada(acumulado, tamano_lote, rng)]
+        etiqueta, _ = _mas_cercano(lote, centros)
+        n = np.bincount(etiqueta, minlength=k).astype(np.float64)
+        suma = np.column_stack([np.bincount(etiqueta, weights=lote[:, e], minlength=k)
+                                for e in range(2)])
+        activos = n > 0
+        centros[activos] = ((conteo[activos, None] * centros[activos] + suma[activos])
+                            / (conteo[activos] + n[activos])[:, None])
+        conteo += n
+
+    # Lloyd ponderado sobre todos los puntos; un centro sin peso se reubica en
+    # el punto con mayor peso × distancia² a su centro. Tras la primera
+    # asignación, cada punto solo compara su centro con los vecinos de este
+    iteraciones, desplazamiento = 0, np.inf
+    etiqueta, d2 = _mas_cercano(puntos, centros)
+    while iteraciones < iteraciones_lloyd and desplazamiento > tolerancia_m:
+        peso_grupo = np.bincount(etiqueta, weights=pesos, minlength=k)
+        nuevos = np.column_stack([np.bincount(etiqueta, weights=pesos * puntos[:, e], minlength=k)
+                                  for e in range(2)])
+        vacios = np.flatnonzero(peso_grupo <= 0)
+        nuevos[peso_grupo > 0] /= peso_grupo[peso_grupo > 0, None]
+        if len(vacios):
+            nuevos[vacios] = puntos[np.argsort(pesos * d2)[::-1][:len(vacios)]]
+        desplazamiento = float(np.sqrt(((nuevos - centros) ** 2).sum(axis=1)).max())
+        centros = nuevos
+        if len(vacios) or vecinos + 1 >= k:
+            etiqueta, d2 = _mas_cercano(puntos, centros)
+        else:
+            etiqueta, d2 = _reasignar_vecinos(puntos, centros, etiqueta, vecinos)
+        iteraciones += 1
+    return centros, etiqueta, iteraciones, desplazamiento
+
+
+def ubicar_sensores(celdas, pesos, margen_db, n_sensores, margen_min_db=0.0, **kwargs):
+    """
+    Sitios de sensores por k-means ponderado sobre las celdas con enlace.
+
+    Args:
+        celdas: Array (n, 2) de celdas candidatas
+        pesos: Demanda de cada celda (n,), no negativa
+        margen_db: Mejor margen de enlace de cada celda a los gateways (n,)
+        n_sensores: Número de sensores K
+        margen_min_db: Margen mínimo de un sitio
+        **kwargs: Opciones de `kmeans_ponderado`
+
+    Returns:
+        ResultadoUbicacion
+    """
+    inicio = time.perf_counter()
+    celdas = np.asarray(celdas, dtype=np.float64)
+    pesos = np.clip(np.nan_to_num(np.asarray(pesos, dtype=np.float64)), 0.0, None)
+    margen_db = np.asarray(margen_db, dtype=np.float64)
+    viable = margen_db >= margen_min_db
+    total = pesos.sum()
+    demanda_sin_enlace = float(pesos[~viable].sum() / total) if total > 0 else 0.0
+
+    # Celdas viables con demanda; si ninguna tiene peso, demanda uniforme
+    candidatas = np.flatnonzero(viable & (pesos > 0))
+    if not len(candidatas):
+        candidatas = np.flatnonzero(viable)
+        pesos = np.ones(len(celdas))
+    k = min(int(n_sensores), len(candidatas))
+    if k == 0:
+        return ResultadoUbicacion(np.empty((0, 2)), METODO_KMEANS, np.empty(0), np.empty(0),
+                                  len(celdas), int(viable.sum()), demanda_sin_enlace, 0, 0.0,
+                                  time.perf_counter() - inicio)
+    puntos, w = celdas[candidatas], pesos[candidatas]
+    centros, etiqueta, iteraciones, desplazamiento = kmeans_ponderado(puntos, w, k, **kwargs)
+
+    # Sitio = celda del grupo más cercana a su centroide
+    d2 = ((puntos - centros[etiqueta]) ** 2).sum(axis=1)
+    orden = np.lexsort((d2, etiqueta))
+    primero = orden[np.r_[True, etiqueta[orden][1:] != etiqueta[orden][:-1]]]
+    peso_grupo = np.bincount(etiqueta, weights=w, minlength=k)
+    return ResultadoUbicacion(coordenadas=puntos[primero], metodo=METODO_KMEANS,
+                              peso=peso_grupo[etiqueta[primero]] / w.sum(),
+                              margen_db=margen_db[candidatas[primero]], celdas=len(celdas),
+                              celdas_viables=int(viable.sum()),
+                              demanda_sin_enlace=demanda_sin_enlace, iteraciones=iteraciones,
+                              desplazamiento_m=desplazamiento,
+                              tiempo_s=time.perf_counter() - inicio)
+
+
+def _leer_demanda(demanda, campo, celdas, potencia):
+    """Pesos de las celdas según `demanda`: 'uniforme', ráster .npy o CSV de muestras."""
+    if isinstance(demanda, str) and demanda == DEMANDA_UNIFORME:
+        return np.ones(len(celdas))
+    if isinstance(demanda, str):
+        ruta = ruta_proyecto(demanda)
+        if os.path.splitext(ruta)[1].lower() == '.csv':
+            with open(ruta, newline='', encoding='utf-8') as f:
+                filas = list(csv.DictReader(f))
+            muestras = np.array([[float(fila['x_m']), float(fila['y_m'])] for fila in filas])
+            valores = np.array([float(fila['peso']) for fila in filas])
+            return pesos_muestras(muestras, valores, celdas, potencia)
+        demanda = np.load(ruta)
+    demanda = np.asarray(demanda, dtype=np.float64)
+    if demanda.ndim == 2 and demanda.shape[1] == 3 and demanda.shape[0] != 3:
+        # Muestras (x_m, y_m, peso)
+        return pesos_muestras(demanda[:, :2], demanda[:, 2], celdas, potencia)
+    return pesos_raster(demanda, campo['dimension_x_m'], campo['dimension_y_m'], celdas)
+
+
+def ubicacion_desde_config(config, gateways, sensores_por_ha=None, espaciado_m=None,
+                           demanda=None):
+    """
+    Ubicación de sensores con el bloque `ubicacion_sensores` de config.json.
+
+    Args:
+        config: Configuración (bloques campo, propagacion, escenario, terreno,
+            ubicacion_sensores)
+        gateways: Coordenadas (G, 2) de los gateways
+        sensores_por_ha: Densidad objetivo (por defecto, la del bloque)
+        espaciado_m: Espaciado de la grilla sin datos (por defecto, el del bloque)
+        demanda: 'uniforme', ruta a un ráster .npy (fila 0 al sur) o a un CSV
+            con columnas x_m, y_m, peso, o un array (ráster 2D o muestras
+            (m, 3)); por defecto, el del bloque. None = grilla regular
+
+    Returns:
+        ResultadoUbicacion
+    """
+    inicio = time.perf_counter()
+    opciones = config.get('ubicacion_sensores', {})
+    campo = config['campo']
+    if sensores_por_ha is None:
+        sensores_por_ha = opciones.get('sensores_por_ha', 0.67)
+    if espaciado_m is None:
+        espaciado_m = opciones.get('espaciado_m', 120)
+    if demanda is None:
+        demanda = opciones.get('demanda')
+    gateways = np.asarray(gateways, dtype=float).reshape(-1, 2)
+
+    if demanda is None:
+        coordenadas = generar_puntos_demanda(campo['dimension_x_m'], campo['dimension_y_m'],
+                                             espaciado_m, espaciado_m)
+        margen, _ = margenes_desde_config(config, coordenadas, gateways)
+        return ResultadoUbicacion(coordenadas=coordenadas, metodo=METODO_GRILLA,
+                                  peso=np.full(len(coordenadas), 1.0 / max(len(coordenadas), 1)),
+                                  margen_db=margen.max(axis=1, initial=-np.inf).astype(np.float64),
+                                  celdas=0, celdas_viables=0, demanda_sin_enlace=0.0,
+                                  iteraciones=0, desplazamiento_m=0.0,
+                                  tiempo_s=time.perf_counter() - inicio)
+
+    celda_m = opciones.get('celda_m', 5.0)
+    celdas = generar_puntos_demanda(campo['dimension_x_m'], campo['dimension_y_m'],
+                                    celda_m, celda_m)
+    pesos = _leer_demanda(demanda, campo, celdas, opciones.get('potencia_idw', 2.0))
+    margen, _ = margenes_desde_config(config, celdas, gateways)
+    n_sensores = int(sensores_por_ha * campo['area_total_m2'] / 10000)
+    resultado = ubicar_sensores(
+        celdas, pesos, margen.max(axis=1, initial=-np.inf), n_sensores,
+        margen_min_db=opciones.get('margen_min_db', 0.0),
+        tamano_lote=opciones.get('tamano_lote', 2048),
+        iteraciones_lote=opciones.get('iteraciones_lote', 100),
+        iteraciones_lloyd=opciones.get('iteraciones_lloyd', 30),
+        tolerancia_m=opciones.get('tolerancia_m', 1.0), vecinos=opciones.get('vecinos', 8),
+        semilla=opciones.get('semilla', 0))
+    resultado.tiempo_s = time.perf_counter() - inicio
+    return resultado
+
+
+def resumen_ubicacion(resultado):
+    """Líneas de texto con el método, la demanda cubierta y los márgenes."""
+    if resultado.metodo == METODO_GRILLA:
+        lineas = [f"Ubicación: grilla regular, {resultado.n_sensores} sensores"]
+    else:
+        lineas = [
+            f"Ubicación: k-means ponderado, {resultado.n_sensores} sensores sobre "
+            f"{resultado.celdas_viables:,} de {resultado.celdas:,} celdas con enlace "
+            f"({resultado.iteraciones} pasadas de Lloyd, último desplazamiento "
+            f"{resultado.desplazamiento_m:.2f} m)",
+            f"Demanda en celdas sin margen de enlace: {resultado.demanda_sin_enlace * 100:.2f} %",
+        ]
+        if resultado.n_sensores:
+            lineas.append(f"Demanda por sensor: mínima {resultado.peso.min() * 100:.2f} %, "
+                          f"máxima {resultado.peso.max() * 100:.2f} %")
+    if resultado.n_sensores:
+        lineas.append(f"Margen de enlace de los sitios: mínimo {resultado.margen_db.min():.1f} dB, "
+                      f"mediano {np.median(resultado.margen_db):.1f} dB "
+                      f"({int((resultado.margen_db < 0).sum())} sitios sin enlace)")
+    lineas.append(f"Tiempo: {resultado.tiempo_s:.2f} s")
+    return lineas
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Gateways adicionales mínimos para un despliegue existente
+Los gateways instalados quedan fijos y solo se resuelve el residuo sin cobertura
+
+Uso (desde la raíz del repositorio):
+    python scripts/ampliar_despliegue.py
+    python scripts/ampliar_despliegue.py --gateways "1525,525;225,675" --sensores sensores.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planificador.ampliacion import ampliacion_desde_config, resumen_ampliacion
+from planificador.configuracion import cargar_config
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--config', default=None, help='Ruta a config.json')
+parser.add_argument('--gateways', default=None,
+                    help='Gateways instalados "x,y;x,y" en metros '
+                         '(por defecto, ampliacion.gateways_instalados)')
+parser.add_argument('--sensores', default=None,
+                    help='CSV opcional con columnas x_m, y_m de sensores a cubrir')
+parser.add_argument('--directorio', default='results/reports', help='Carpeta de salida')
+args = parser.parse_args()
+
+config = cargar_config(args.config)
+gateways = None
+if args.gateways:
+    gateways = [[float(v) for v in par.split(',')] for par in args.gateways.split(';')]
+sensores = None
+if args.sensores:
+    with open(args.sensores, newline='', encoding='utf-8') as f:
+        sensores = np.array([[float(fila['x_m']), float(fila['y_m'])] for fila in csv.DictReader(f)])
+
+print("=" * 80)
+print("AMPLIACIÓN DE DESPLIEGUE")
+print("=" * 80)
+
+resultado = ampliacion_desde_config(config, gateways, sensores)
+lineas = resumen_ampliacion(resultado)
+for linea in lineas:
+    print(linea)
+
+os.makedirs(args.directorio, exist_ok=True)
+ruta_resumen = os.path.join(args.directorio, 'ampliacion.txt')
+with open(ruta_resumen, 'w', encoding='utf-8') as f:
+    f.write('\n'.join(lineas) + '\n')
+ruta_sitios = os.path.join(args.directorio, 'ampliacion_sitios.csv')
+with open(ruta_sitios, 'w', newline='', encoding='utf-8') as f:
+    escritor = csv.writer(f)
+    escritor.writerow(['sitio', 'tipo', 'x_m', 'y_m'])
+    for k, (x, y) in enumerate(resultado.fijos, 1):
+        escritor.writerow([k, 'instalado', f"{x:.2f}", f"{y:.2f}"])
+    for k, (x, y) in enumerate(resultado.nuevos, len(resultado.fijos) + 1):
+        escritor.writerow([k, 'nuevo', f"{x:.2f}", f"{y:.2f}"])
+print(f"\n✓ Resumen guardado en '{ruta_resumen}'")
+print(f"✓ Sitios guardados en '{ruta_sitios}'")
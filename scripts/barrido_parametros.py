@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Barrido de parámetros del Set Cover LoRa en paralelo
+N_optimo vs potencia TX, margen de desvanecimiento, obstrucción y tamaño de celda
+
+Uso (desde la raíz del repositorio):
+    python scripts/barrido_parametros.py
+    python scripts/barrido_parametros.py --param potencia_tx_dbm=14,17,20 \\
+        --param celda_m=50,100 --procesos 4 --salida results/reports/barrido.csv
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planificador.barrido import ALIAS, barrido_desde_config, expandir_escenarios
+from planificador.configuracion import cargar_config
+
+
+def leer_parametro(texto):
+    """'nombre=v1,v2,...' → (nombre, [v1, v2, ...]) con valores JSON (números)."""
+    nombre, _, valores = texto.partition('=')
+    if not valores:
+        raise argparse.ArgumentTypeError(f"Formato esperado nombre=v1,v2,...: '{texto}'")
+    return nombre.strip(), [json.loads(v) for v in valores.split(',')]
+
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--config', default=None, help='Ruta a config.json')
+parser.add_argument('--param', action='append', type=leer_parametro, default=[],
+                    help=f"Grilla nombre=v1,v2,... (nombres: {', '.join(ALIAS)} "
+                         "o rutas como propagacion.potencia_tx_dbm); reemplaza barrido.parametros")
+parser.add_argument('--salida', default=None, help='Archivo CSV de resultados')
+parser.add_argument('--procesos', type=int, default=None, help='Procesos de trabajo')
+parser.add_argument('--tiempo-limite', type=float, default=None,
+                    help='Segundos máximos por escenario')
+parser.add_argument('--cache', default=None, help='Carpeta del caché de matrices de pérdidas')
+args = parser.parse_args()
+
+config = cargar_config(args.config)
+grilla = dict(args.param) or config['barrido']['parametros']
+n_escenarios = len(expandir_escenarios(config, grilla))
+
+print("=" * 80)
+print("BARRIDO DE PARÁMETROS")
+print("=" * 80)
+for nombre, valores in grilla.items():
+    print(f"  {nombre}: {valores}")
+print(f"Escenarios: {n_escenarios}\n")
+
+kwargs = {'grilla': grilla, 'directorio_cache': args.cache}
+if args.procesos is not None:
+    kwargs['procesos'] = args.procesos
+if args.tiempo_limite is not None:
+    kwargs['tiempo_limite'] = args.tiempo_limite
+
+
+def mostrar(fila):
+    parametros = ', '.join(f"{n}={fila[n]}" for n in grilla)
+    if fila['estado'] == 'Error':
+        print(f"  [{fila['escenario']:3d}] {parametros}: ERROR {fila['error']}", flush=True)
+    else:
+        print(f"  [{fila['escenario']:3d}] {parametros}: N = {fila['N_optimo']} "
+              f"({fila['estado']}, {fila.get('t_total_s', 0.0):.2f} s)", flush=True)
+
+
+inicio = time.perf_counter()
+filas = barrido_desde_config(config, args.salida, al_terminar=mostrar, **kwargs)
+ruta_salida = args.salida or config['barrido']['salida']
+
+print(f"\nTiempo total: {time.perf_counter() - inicio:.1f} s")
+print(f"Escenarios con error: {sum(f['estado'] == 'Error' for f in filas)} de {len(filas)}")
+print(f"✓ Resultados guardados en '{ruta_salida}'")
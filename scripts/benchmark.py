@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escalado por etapas con historial entre revisiones
+Tiempo y pico de memoria de pérdidas, cobertura, modelo, resolución, asignación,
+exportación, reporte y figuras en campos sintéticos de 840 a 130.000 puntos de demanda
+
+Uso (desde la raíz del repositorio):
+    python scripts/benchmark.py
+    python scripts/benchmark.py --escala 50 --escala 10:50 --obstruccion 35 --sin-memoria
+    python scripts/benchmark.py --etapas cobertura modelo_mps resolucion
+    python scripts/benchmark.py --analizar                  # solo leer el historial
+    python scripts/benchmark.py --analizar --base 5d511b0
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planificador.benchmark import (ETAPAS_BENCHMARK, HISTORIAL_DEFECTO,
+                                    UMBRAL_REGRESION_DEFECTO, cargar_historial,
+                                    comparar_revisiones, ejecutar_benchmark, expandir_escenarios,
+                                    resumen_benchmark, resumen_comparacion, resumen_exponentes)
+from planificador.configuracion import cargar_config
+
+
+def leer_escala(texto):
+    """'celda[:candidatos]' → [celda, candidatos o None]."""
+    celda, _, candidatos = texto.partition(':')
+    try:
+        return [float(celda), float(candidatos) if candidatos else None]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Formato esperado celda[:candidatos]: '{texto}'")
+
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--config', default=None, help='Ruta a config.json')
+parser.add_argument('--escala', action='append', type=leer_escala, default=None,
+                    help='Celda de demanda y de candidatos en metros, p. ej. 10:50 '
+                         '(sin candidatos, I = J); reemplaza benchmark.escalas')
+parser.add_argument('--obstruccion', default=None,
+                    help='Porcentajes de obstrucción separados por comas (p. ej. 20,50)')
+parser.add_argument('--etapas', nargs='+', choices=ETAPAS_BENCHMARK, default=None,
+                    help='Etapas a medir (por defecto, todas)')
+parser.add_argument('--sin-memoria', action='store_true',
+                    help='No medir memoria (tracemalloc encarece las etapas de Python puro)')
+parser.add_argument('--sin-calentamiento', action='store_true',
+                    help='No ejecutar el escenario de calentamiento previo (sin registrar)')
+parser.add_argument('--historial', default=None,
+                    help=f'Archivo JSON lines del historial (por defecto, {HISTORIAL_DEFECTO})')
+parser.add_argument('--analizar', action='store_true',
+                    help='No ejecutar: comparar revisiones y ajustar exponentes del historial')
+parser.add_argument('--revision', default=None,
+                    help='Revisión a analizar (por defecto, la última del historial)')
+parser.add_argument('--base', default=None,
+                    help='Revisión de referencia (por defecto, la anterior a --revision)')
+args = parser.parse_args()
+
+config = cargar_config(args.config)
+opciones = config.get('benchmark', {})
+ruta_historial = args.historial or opciones.get('historial', HISTORIAL_DEFECTO)
+umbral = opciones.get('umbral_regresion', UMBRAL_REGRESION_DEFECTO)
+
+print("=" * 80)
+print("BENCHMARK DE ESCALADO")
+print("=" * 80)
+
+revision = args.revision
+if not args.analizar:
+    escalas = args.escala or opciones.get('escalas')
+    porcentajes = ([float(p) for p in args.obstruccion.split(',')] if args.obstruccion
+                   else opciones.get('porcentajes_obstruccion'))
+    n_escenarios = len(expandir_escenarios(config, escalas, porcentajes))
+    print(f"Escalas (celda, candidatos): {escalas}")
+    print(f"Obstrucción: {porcentajes}%")
+    print(f"Escenarios: {n_escenarios}\n")
+
+    def mostrar(registro):
+        if 'error' in registro:
+            print(f"  {registro['escenario']:<24} ERROR {registro['error']}", flush=True)
+        else:
+            print(f"  {registro['escenario']:<24} n_J = {registro['n_J']:>7,} "
+                  f"| {registro.get('estado', '-')}, {registro.get('n_gateways', '-')} gateways "
+                  f"| {registro['tiempo_total_s']:.1f} s", flush=True)
+
+    inicio = time.perf_counter()
+    registros = ejecutar_benchmark(config, escalas, porcentajes, args.etapas,
+                                   memoria=not args.sin_memoria, ruta_historial=ruta_historial,
+                                   al_terminar=mostrar,
+                                   calentamiento=False if args.sin_calentamiento else None)
+    print(f"\nTiempo total: {time.perf_counter() - inicio:.1f} s\n")
+    for linea in resumen_benchmark(registros):
+        print(linea)
+    revision = registros[0]['revision'] if registros else None
+    print(f"\n✓ Historial actualizado: '{ruta_historial}'")
+
+historial = cargar_historial(ruta_historial)
+if not historial:
+    print(f"El historial '{ruta_historial}' está vacío")
+    sys.exit(0)
+
+print()
+for linea in resumen_comparacion(*comparar_revisiones(historial, revision, args.base, umbral),
+                                 umbral=umbral):
+    print(linea)
+print("\nExponentes de escalado (t ∝ n^b):")
+for linea in resumen_exponentes(historial, revision):
+    print(linea)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Cobertura máxima con presupuesto de k gateways (curva cobertura-vs-k)
+Greedy perezoso en una sola pasada para k = 1..K y refinamiento ILP opcional
+
+Uso (desde la raíz del repositorio):
+    python scripts/cobertura_maxima.py
+    python scripts/cobertura_maxima.py --k-max 6 --refinar 2,3 --sensores sensores.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planificador.cobertura_maxima import cobertura_maxima_desde_config, resumen_cobertura_maxima
+from planificador.configuracion import cargar_config
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--config', default=None, help='Ruta a config.json')
+parser.add_argument('--k-max', type=int, default=None,
+                    help='Presupuesto máximo K (por defecto, cobertura_maxima.k_max)')
+parser.add_argument('--refinar', default=None,
+                    help='Presupuestos a resolver con ILP, separados por comas '
+                         '(por defecto, cobertura_maxima.k_refinar)')
+parser.add_argument('--sensores', default=None,
+                    help='CSV opcional con columnas x_m, y_m para ponderar la demanda')
+parser.add_argument('--directorio', default='results/reports', help='Carpeta de salida')
+args = parser.parse_args()
+
+config = cargar_config(args.config)
+k_refinar = [int(k) for k in args.refinar.split(',') if k] if args.refinar is not None else None
+sensores = None
+if args.sensores:
+    with open(args.sensores, newline='', encoding='utf-8') as f:
+        sensores = np.array([[float(fila['x_m']), float(fila['y_m'])] for fila in csv.DictReader(f)])
+
+print("=" * 80)
+print("COBERTURA MÁXIMA CON PRESUPUESTO")
+print("=" * 80)
+
+resultado = cobertura_maxima_desde_config(config, sensores, k_max=args.k_max, k_refinar=k_refinar)
+lineas = resumen_cobertura_maxima(resultado)
+for linea in lineas:
+    print(linea)
+
+os.makedirs(args.directorio, exist_ok=True)
+ruta_resumen = os.path.join(args.directorio, 'cobertura_maxima.txt')
+with open(ruta_resumen, 'w', encoding='utf-8') as f:
+    f.write('\n'.join(lineas) + '\n')
+ruta_curva = os.path.join(args.directorio, 'cobertura_maxima_curva.csv')
+with open(ruta_curva, 'w', newline='', encoding='utf-8') as f:
+    escritor = csv.writer(f)
+    escritor.writerow(['k', 'x_m', 'y_m', 'cubierto', 'fraccion', 'puntos_cubiertos', 'cota_superior'])
+    for k, (x, y) in enumerate(resultado.sitios, 1):
+        escritor.writerow([k, f"{x:.2f}", f"{y:.2f}", f"{resultado.curva[k - 1]:g}",
+                           f"{resultado.fraccion(k):.4f}", resultado.puntos_cubiertos[k - 1],
+                           f"{resultado.cota_superior[k - 1]:g}"])
+ruta_sitios = os.path.join(args.directorio, 'cobertura_maxima_sitios.csv')
+with open(ruta_sitios, 'w', newline='', encoding='utf-8') as f:
+    escritor = csv.writer(f)
+    escritor.writerow(['k', 'sitio', 'x_m', 'y_m', 'estado'])
+    for refinamiento in resultado.refinamientos:
+        for sitio, (x, y) in enumerate(resultado.coordenadas[refinamiento.seleccion], 1):
+            escritor.writerow([refinamiento.k, sitio, f"{x:.2f}", f"{y:.2f}", refinamiento.estado])
+print(f"\n✓ Resumen guardado en '{ruta_resumen}'")
+print(f"✓ Curva guardada en '{ruta_curva}'")
+print(f"✓ Sitios refinados guardados en '{ruta_sitios}'")
@@ -2,14 +2,53 @@
 """
 Análisis de Deployment de Sensores de Humedad
 Two-Tier Architecture: Pocos Gateways LoRa + Muchos Sensores de Humedad
+
+Uso (desde la raíz del repositorio):
+    python scripts/humidity_sensor_deployment.py
+    python scripts/humidity_sensor_deployment.py --previsualizacion
+    python scripts/humidity_sensor_deployment.py --gateways "1525,525;225,675"
+    python scripts/humidity_sensor_deployment.py --perfilar ubicacion asignacion
+
+Los gateways son los de la etapa 'resolucion' del pipeline (python -m
+planificador); el Set Cover solo se resuelve si su configuración cambió.
 """
 
-import json
+import argparse
+import os
+import sys
 import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
-from matplotlib.patches import Circle
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planificador.ampliacion import ampliacion_desde_config, resumen_ampliacion
+from planificador.asignacion import SIN_ASIGNAR, asignacion_desde_config, resumen_asignacion
+from planificador.configuracion import cargar_config
+from planificador.exportacion import (exportacion_desde_config, opciones_exportacion,
+                                      resumen_tabla, tabla_desde_asignacion)
+from planificador.instrumentacion import (MODOS_PERFIL, instrumentacion_desde_config,
+                                          registrar, registrar_arreglo)
+from planificador.pipeline import gateways_desde_config
+from planificador.propagacion import ModeloPropagacion
+from planificador.renderizado import (MODO_PREVISUALIZACION, UMBRAL_RASTER_DEFECTO, capa_campo,
+                                      dibujar_circulos, dibujar_puntos, dpi_desde_config)
+from planificador.simulacion import simulacion_desde_config, resumen_simulacion
+from planificador.ubicacion import METODO_GRILLA, ubicacion_desde_config, resumen_ubicacion
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--gateways', default=None,
+                    help='Gateways "x,y;x,y" en metros (por defecto, la solución del Set Cover)')
+parser.add_argument('--previsualizacion', action='store_true',
+                    help='Guardar la figura a baja resolución (visualizacion.dpi_previsualizacion)')
+parser.add_argument('--perfilar', nargs='*', metavar='etapa', default=None,
+                    help='Perfilar estas etapas (gateways, ubicacion, asignacion, simulacion, '
+                         'exportacion, figuras, guia; sin nombres: todas)')
+parser.add_argument('--perfil', choices=MODOS_PERFIL, default=None,
+                    help='Perfilador: cprofile o muestreo de la pila')
+args = parser.parse_args()
+
 # ============================================================================
 # 1. CARGAR CONFIGURACIÓN Y RESULTADOS DE OPTIMIZACIÓN
 # ============================================================================
@@ -20,22 +59,37 @@ print("="*80)
 print(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
 # Cargar configuración
-with open('config.json', 'r', encoding='utf-8') as f:
-    config = json.load(f)
+config = cargar_config()
+
+# Una etapa medida por sección (eventos en instrumentacion.archivo)
+perfilar = None
+if args.perfilar is not None:
+    perfilar = args.perfilar or True
+instrumentacion = instrumentacion_desde_config(config, origen='humidity_sensor_deployment',
+                                               perfilar=perfilar, modo_perfil=args.perfil)
 
 L_x = config['campo']['dimension_x_m']
 L_y = config['campo']['dimension_y_m']
 A_total = config['campo']['area_total_m2']
 
-# Resultados de la optimización LoRa (del notebook ejecutado)
-N_gateways = 2
-gateway_coords = [
-    (1525.0, 525.0),  # Gateway 1
-    (225.0, 675.0)     # Gateway 2
-]
+# Resultados de la optimización LoRa (etapa 'resolucion' del pipeline, en caché)
+instrumentacion.iniciar('gateways', desde_argumentos=bool(args.gateways))
+if args.gateways:
+    gateway_coords = [tuple(float(v) for v in par.split(',')) for par in args.gateways.split(';')]
+else:
+    gateway_coords = [tuple(g) for g in gateways_desde_config(config)]
+N_gateways = len(gateway_coords)
+registrar(n_gateways=N_gateways)
+instrumentacion.terminar()
+
+# Altura de antena del gateway (entrada del modelo de propagación con terreno)
+altura_gateway_m = config['propagacion'].get('altura_gateway_m', 4.0)
 
-# Rango efectivo de LoRa (conservador, considerando obstrucciones)
-R_lora_efectivo = 750  # metros (rango típico en zona con obstrucciones)
+# Alcance del modelo path-loss del notebook: garantizado aun con el enlace
+# obstruido, y máximo en campo abierto
+modelo = ModeloPropagacion.desde_config(config)
+R_lora_obstruido = float(modelo.rango_maximo(modelo.exponente_obstruido))
+R_lora_abierto = float(modelo.rango_maximo(modelo.exponente_abierto))
 
 print("RESULTADOS DE OPTIMIZACIÓN LoRa:")
 print("-"*80)
@@ -43,7 +97,8 @@ print(f"Número de Gateways LoRa: {N_gateways}")
 print(f"Coordenadas de Gateways:")
 for idx, (x, y) in enumerate(gateway_coords, 1):
     print(f"  Gateway {idx}: ({x:.1f} m, {y:.1f} m)")
-print(f"\nRango efectivo por gateway: {R_lora_efectivo} m")
+print(f"\nAlcance por gateway: {R_lora_obstruido:.0f} m con obstrucción, "
+      f"{R_lora_abierto:,.0f} m en campo abierto")
 print(f"Área del campo: {A_total:,.0f} m² ({A_total/10000:.1f} hectáreas)")
 
 # ============================================================================
@@ -116,29 +171,33 @@ print(f"Total sensores de humedad: {N_sensores}")
 print("="*80)
 
 # ============================================================================
-# 3. GENERAR GRID DE SENSORES DE HUMEDAD
+# 3. UBICAR SENSORES DE HUMEDAD
 # ============================================================================
 
-print("\nGenerando grid de sensores de humedad...")
-
-# Crear grid regular de sensores de humedad
-sensor_coords = []
-x_offset = spacing_sensores / 2
-y_offset = spacing_sensores / 2
-
-y = y_offset
-while y < L_y:
-    x = x_offset
-    while x < L_x:
-        sensor_coords.append((x, y))
-        x += spacing_sensores
-    y += spacing_sensores
-
-sensor_coords = np.array(sensor_coords)
+print("\nUbicando sensores de humedad...")
+
+# Sin superficie de demanda: grilla regular con el espaciado de la estrategia.
+# Con demanda (bloque "ubicacion_sensores" de config.json: ráster de
+# variabilidad del suelo o muestras), k-means ponderado con la densidad de la
+# estrategia y solo en celdas con margen de enlace a algún gateway
+instrumentacion.iniciar('ubicacion')
+ubicacion = ubicacion_desde_config(config, gateway_coords,
+                                   sensores_por_ha=estrategia_seleccionada['sensores_por_ha'],
+                                   espaciado_m=spacing_sensores)
+sensor_coords = ubicacion.coordenadas
 N_sensores_real = len(sensor_coords)
+registrar_arreglo('sensores', sensor_coords)
+registrar(metodo=ubicacion.metodo)
+instrumentacion.terminar()
+if ubicacion.metodo == METODO_GRILLA:
+    descripcion_ubicacion = f"grilla regular de {spacing_sensores} m"
+else:
+    descripcion_ubicacion = (f"k-means ponderado por demanda (espaciado medio "
+                             f"~{np.sqrt(A_total / max(N_sensores_real, 1)):.0f} m)")
 
 print(f"Sensores de humedad generados: {N_sensores_real}")
-print(f"Espaciado del grid: {spacing_sensores} m")
+for linea in resumen_ubicacion(ubicacion):
+    print(f"  {linea}")
 
 # ============================================================================
 # 4. ASIGNAR SENSORES A GATEWAYS
@@ -146,50 +205,70 @@ print(f"Espaciado del grid: {spacing_sensores} m")
 
 print("\nAsignando sensores a gateways...")
 
-def calcular_distancia(p1, p2):
-    """Calcula distancia euclidiana entre dos puntos."""
-    return np.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
-
-# Asignar cada sensor al gateway más cercano
-asignaciones = []
-sensores_por_gateway = {i: [] for i in range(N_gateways)}
-sensores_fuera_rango = []
-
-for idx, (sx, sy) in enumerate(sensor_coords):
-    distancias = [calcular_distancia((sx, sy), gw) for gw in gateway_coords]
-    gateway_mas_cercano = np.argmin(distancias)
-    distancia_minima = distancias[gateway_mas_cercano]
-
-    asignaciones.append({
-        'sensor_id': idx,
-        'coords': (sx, sy),
-        'gateway': gateway_mas_cercano,
-        'distancia': distancia_minima,
-        'dentro_rango': distancia_minima <= R_lora_efectivo
-    })
-
-    if distancia_minima <= R_lora_efectivo:
-        sensores_por_gateway[gateway_mas_cercano].append(idx)
-    else:
-        sensores_fuera_rango.append(idx)
+# Márgenes de enlace de todos los pares sensor-gateway con el modelo path-loss
+# (misma obstrucción y terreno que la cobertura) y asignación con límite de
+# capacidad por gateway (bloque "asignacion" de config.json)
+instrumentacion.iniciar('asignacion')
+asignacion = asignacion_desde_config(config, sensor_coords, gateway_coords)
+registrar_arreglo('margen_db', asignacion.margen_db)
+registrar(rondas_subasta=asignacion.rondas)
+sensores_por_gateway = {i: asignacion.sensores_de(i) for i in range(N_gateways)}
+sensores_fuera_rango = asignacion.sin_cobertura
+sensores_sin_capacidad = asignacion.sin_capacidad
 
 print("\nRESULTADO DE ASIGNACIONES:")
 print("-"*80)
-for gw_id in range(N_gateways):
-    n_asignados = len(sensores_por_gateway[gw_id])
-    print(f"Gateway {gw_id + 1}: {n_asignados} sensores asignados")
+for linea in resumen_asignacion(asignacion):
+    print(linea)
 
-if sensores_fuera_rango:
-    print(f"\n⚠️  ADVERTENCIA: {len(sensores_fuera_rango)} sensores fuera del rango de {R_lora_efectivo}m")
+ampliacion = None
+if len(sensores_fuera_rango):
+    print(f"\n⚠️  ADVERTENCIA: {len(sensores_fuera_rango)} sensores sin enlace viable a ningún gateway")
     print("   Considere: aumentar potencia LoRa o agregar gateway adicional")
-else:
-    print(f"\n✓ Todos los {N_sensores_real} sensores están dentro del rango de cobertura")
+    # Set Cover solo del residuo, con los gateways actuales fijos
+    ampliacion = ampliacion_desde_config(config, gateway_coords, sensor_coords)
+    print("\n   GATEWAYS ADICIONALES SUGERIDOS:")
+    for linea in resumen_ampliacion(ampliacion):
+        print(f"   {linea}")
+if len(sensores_sin_capacidad):
+    print(f"\n⚠️  ADVERTENCIA: {len(sensores_sin_capacidad)} sensores sin capacidad disponible")
+    print("   Considere: reducir mensajes por hora o agregar gateway adicional")
+if not len(sensores_fuera_rango) and not len(sensores_sin_capacidad):
+    print(f"\n✓ Todos los {N_sensores_real} sensores tienen enlace viable y capacidad asignada")
+registrar(sin_cobertura=len(sensores_fuera_rango), sin_capacidad=len(sensores_sin_capacidad))
+instrumentacion.terminar()
+
+# Validación de la capacidad con el tráfico simulado: colisiones ALOHA y
+# captura por gateway, canal y SF (bloque "simulacion" de config.json)
+print("\nSimulando tráfico de subida...")
+instrumentacion.iniciar('simulacion')
+simulacion = simulacion_desde_config(config, asignacion, sensor_coords, gateway_coords)
+registrar(pdr=simulacion.pdr)
+instrumentacion.terminar()
+for linea in resumen_simulacion(simulacion):
+    print(linea)
+
+# Tabla completa del despliegue (un arreglo por columna) exportada por bloques
+# de filas; la guía de instalación es un resumen de esta misma tabla
+print("\nExportando sensores y gateways...")
+instrumentacion.iniciar('exportacion')
+opciones_export = opciones_exportacion(config)
+tabla = tabla_desde_asignacion(asignacion, sensor_coords, gateway_coords, simulacion,
+                               origen_wgs84=opciones_export['origen_wgs84'])
+rutas_exportadas = exportacion_desde_config(config, tabla)
+instrumentacion.terminar()
+# Las columnas .npy de cada tabla son una carpeta
+archivos_exportados = [os.path.relpath(r) + ('/' if os.path.isdir(r) else '')
+                       for rutas in rutas_exportadas.values() for r in rutas]
+print(f"✓ {tabla.n_sensores} sensores y {tabla.n_gateways} gateways exportados "
+      f"({', '.join(rutas_exportadas)}) en '{opciones_export['directorio']}'")
 
 # ============================================================================
 # 5. VISUALIZACIÓN - TWO-TIER ARCHITECTURE
 # ============================================================================
 
 print("\nGenerando visualización...")
+instrumentacion.iniciar('figuras')
 
 fig, ax = plt.subplots(figsize=(18, 14))
 
@@ -198,33 +277,28 @@ ax.set_xlim(-50, L_x + 50)
 ax.set_ylim(-50, L_y + 50)
 ax.set_aspect('equal')
 
-# Dibujar contorno del campo
-from matplotlib.patches import Rectangle
-ax.add_patch(Rectangle((0, 0), L_x, L_y,
-                        fill=False, edgecolor='black', linewidth=3))
+# Contorno del campo (capa estática cacheada en results/cache/capas)
+capa_campo(ax, L_x, L_y, ancho_contorno=3)
 
-# Colores para cada gateway
-colores_gw = ['#FF6B6B', '#4ECDC4']
+# Colores para cada gateway (más allá del segundo, los de la paleta tab10)
+colores_gw = ['#FF6B6B', '#4ECDC4'] + [matplotlib.colors.to_hex(c)
+                                       for c in plt.get_cmap('tab10').colors]
 
-# Dibujar círculos de cobertura de gateways
-for idx, (gx, gy) in enumerate(gateway_coords):
-    circle = Circle((gx, gy), R_lora_efectivo,
-                   color=colores_gw[idx], alpha=0.08,
-                   linestyle='--', linewidth=2, zorder=1)
-    ax.add_patch(circle)
-
-# Dibujar sensores de humedad (pequeños puntos)
-for asig in asignaciones:
-    sx, sy = asig['coords']
-    gw_id = asig['gateway']
-    dentro_rango = asig['dentro_rango']
-
-    if dentro_rango:
-        ax.scatter(sx, sy, c=colores_gw[gw_id], s=20, alpha=0.6,
-                  edgecolors='none', zorder=3)
-    else:
-        ax.scatter(sx, sy, c='gray', s=20, alpha=0.4,
-                  marker='x', zorder=3)
+# Círculos de alcance garantizado (enlace obstruido) de los gateways, en una colección
+dibujar_circulos(ax, gateway_coords, R_lora_obstruido,
+                 facecolors=colores_gw[:N_gateways], edgecolors=colores_gw[:N_gateways],
+                 alpha=0.08, linestyle='--', linewidth=2, zorder=1)
+
+# Sensores de humedad (pequeños puntos): un solo artista por gateway, estampado
+# como imagen cuando la clase es densa
+umbral_raster = config['visualizacion'].get('umbral_raster', UMBRAL_RASTER_DEFECTO)
+for gw_id in range(N_gateways):
+    dibujar_puntos(ax, sensor_coords[sensores_por_gateway[gw_id]], colores_gw[gw_id],
+                   s=20, alpha=0.6, edgecolors='none', zorder=3, umbral_raster=umbral_raster)
+sin_asignar = asignacion.gateway == SIN_ASIGNAR
+if sin_asignar.any():
+    dibujar_puntos(ax, sensor_coords[sin_asignar], 'gray', s=20, alpha=0.4, marker='x',
+                   zorder=3, umbral_raster=umbral_raster)
 
 # Dibujar gateways LoRa (estrellas grandes)
 for idx, (gx, gy) in enumerate(gateway_coords):
@@ -254,19 +328,21 @@ legend_elements = [
     Line2D([0], [0], marker='*', color='w', markerfacecolor='red',
            markeredgecolor='darkred', markeredgewidth=2,
            markersize=20, label=f'Gateways LoRa (N={N_gateways})'),
-    Line2D([0], [0], marker='o', color='w', markerfacecolor=colores_gw[0],
-           markersize=8, alpha=0.7, label=f'Sensores Humedad GW1 ({len(sensores_por_gateway[0])})'),
-    Line2D([0], [0], marker='o', color='w', markerfacecolor=colores_gw[1],
-           markersize=8, alpha=0.7, label=f'Sensores Humedad GW2 ({len(sensores_por_gateway[1])})'),
+] + [
+    Line2D([0], [0], marker='o', color='w', markerfacecolor=colores_gw[gw_id],
+           markersize=8, alpha=0.7,
+           label=f'Sensores Humedad GW{gw_id + 1} ({len(sensores_por_gateway[gw_id])})')
+    for gw_id in range(N_gateways)
+] + [
     Patch(facecolor='gray', alpha=0.2, linestyle='--',
-          label=f'Cobertura LoRa ({R_lora_efectivo}m)')
+          label=f'Alcance con obstrucción ({R_lora_obstruido:.0f}m)')
 ]
 
-if sensores_fuera_rango:
+if sin_asignar.any():
     legend_elements.append(
         Line2D([0], [0], marker='x', color='gray',
                markersize=8, linestyle='None',
-               label=f'Fuera de rango ({len(sensores_fuera_rango)})')
+               label=f'Sin asignar ({np.count_nonzero(sin_asignar)})')
     )
 
 ax.legend(handles=legend_elements, loc='upper right', fontsize=12,
@@ -277,14 +353,18 @@ plt.tight_layout()
 
 # Guardar en nueva ubicacion organizada
 output_path = 'results/visualizations/two_tier_architecture.png'
-plt.savefig(output_path, dpi=300, bbox_inches='tight')
-print(f"✓ Visualización guardada como '{output_path}'")
+modo = MODO_PREVISUALIZACION if args.previsualizacion else None
+dpi = dpi_desde_config(config, modo)
+plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
+instrumentacion.terminar()
+print(f"✓ Visualización guardada como '{output_path}' ({dpi} dpi)")
 
 # ============================================================================
 # 6. GENERAR REPORTE DE DEPLOYMENT
 # ============================================================================
 
 print("\nGenerando reporte de deployment...")
+instrumentacion.iniciar('guia')
 
 # Guardar en nueva ubicacion organizada
 output_path = 'results/reports/deployment_guide.txt'
@@ -320,13 +400,16 @@ with open(output_path, 'w', encoding='utf-8') as f:
     f.write("  • Módulo LoRa (915 MHz, potencia configurada 14 dBm)\n")
     f.write("  • Antena omnidireccional 3-5 dBi\n")
     f.write("  • Alimentación: Panel solar + batería o conexión AC\n")
-    f.write("  • Altura de instalación recomendada: 3-5 metros\n")
+    f.write(f"  • Altura de instalación: {altura_gateway_m:g} metros "
+            f"(propagacion.altura_gateway_m, entrada del modelo de terreno)\n")
     f.write("  • Conectividad: WiFi/Ethernet/Celular para uplink a cloud\n\n")
 
     f.write("-"*80 + "\n")
-    f.write("3. GRID DE SENSORES DE HUMEDAD\n")
+    f.write("3. UBICACIÓN DE SENSORES DE HUMEDAD\n")
     f.write("-"*80 + "\n")
-    f.write(f"Espaciado del grid: {spacing_sensores} m\n")
+    f.write(f"Ubicación: {descripcion_ubicacion}\n")
+    for linea in resumen_ubicacion(ubicacion)[1:-1]:
+        f.write(f"  {linea}\n")
     f.write(f"Total de sensores: {N_sensores_real}\n")
     f.write(f"Profundidad de medición: 20-30 cm (zona radicular)\n\n")
 
@@ -342,28 +425,26 @@ with open(output_path, 'w', encoding='utf-8') as f:
     f.write("4. ASIGNACIÓN SENSOR → GATEWAY\n")
     f.write("-"*80 + "\n")
 
-    for gw_id in range(N_gateways):
-        f.write(f"\nGateway {gw_id + 1} ({gateway_coords[gw_id][0]:.1f}, {gateway_coords[gw_id][1]:.1f}):\n")
-        f.write(f"  Sensores asignados: {len(sensores_por_gateway[gw_id])}\n")
-        f.write(f"  Primeros 10 sensores:\n")
-
-        for i, sensor_id in enumerate(sensores_por_gateway[gw_id][:10]):
-            asig = asignaciones[sensor_id]
-            sx, sy = asig['coords']
-            dist = asig['distancia']
-            f.write(f"    Sensor {sensor_id:3d}: ({sx:7.1f}, {sy:7.1f}) - {dist:6.1f}m\n")
-
-        if len(sensores_por_gateway[gw_id]) > 10:
-            f.write(f"    ... y {len(sensores_por_gateway[gw_id]) - 10} sensores más\n")
-
-    if sensores_fuera_rango:
-        f.write(f"\n⚠️  SENSORES FUERA DE RANGO ({len(sensores_fuera_rango)}):\n")
-        for sensor_id in sensores_fuera_rango[:5]:
-            asig = asignaciones[sensor_id]
-            sx, sy = asig['coords']
-            dist = asig['distancia']
-            f.write(f"    Sensor {sensor_id:3d}: ({sx:7.1f}, {sy:7.1f}) - {dist:6.1f}m del gateway más cercano\n")
-        f.write("  ACCIÓN: Considerar agregar gateway adicional o aumentar potencia TX\n")
+    for linea in resumen_asignacion(asignacion):
+        f.write(linea + "\n")
+
+    # Resumen de la tabla exportada: estadísticas por gateway y sensores críticos
+    f.write("\n")
+    f.write("".join(linea + "\n"
+                    for linea in resumen_tabla(tabla, opciones_export['sensores_criticos'])))
+    f.write("\nLISTA COMPLETA DE SENSORES Y GATEWAYS (posición, gateway, distancia, margen):\n")
+    f.write("".join(f"  • {ruta}\n" for ruta in archivos_exportados))
+
+    if len(sensores_fuera_rango):
+        f.write("\n⚠️  SENSORES SIN ENLACE VIABLE: "
+                "considerar agregar gateway adicional o aumentar potencia TX\n")
+        f.write("  GATEWAYS ADICIONALES SUGERIDOS (gateways actuales fijos):\n")
+        for linea in resumen_ampliacion(ampliacion):
+            f.write(f"    {linea}\n")
+
+    if len(sensores_sin_capacidad):
+        f.write("\n⚠️  SENSORES SIN CAPACIDAD EN SUS GATEWAYS: "
+                "reducir mensajes por hora o agregar gateway adicional\n")
 
     f.write("\n" + "-"*80 + "\n")
     f.write("5. PROTOCOLO DE INSTALACIÓN\n")
@@ -397,8 +478,17 @@ with open(output_path, 'w', encoding='utf-8') as f:
     f.write("Bandwidth (BW): 125 kHz\n")
     f.write("Coding Rate (CR): 4/5\n")
     f.write("Potencia TX: 14 dBm (gateways), 14 dBm (sensores)\n")
-    f.write("Tiempo en aire: ~50-200ms por mensaje\n")
-    f.write("Payload: 20-30 bytes (ID + humedad + batería + temperatura)\n\n")
+    f.write("Tiempo en aire: ~50-200ms por mensaje "
+            f"({asignacion.trafico.tiempo_en_aire_s * 1000:.0f} ms con SF{asignacion.trafico.spreading_factor} "
+            f"y {asignacion.trafico.payload_bytes} bytes, base de la capacidad por gateway)\n")
+    f.write("Payload: 20-30 bytes (ID + humedad + batería + temperatura)\n")
+    f.write(f"Intervalo de reporte: {60 / asignacion.trafico.mensajes_por_hora:g} min "
+            f"({asignacion.trafico.mensajes_por_hora:g} mensajes/hora, "
+            f"{asignacion.trafico.canales} canales)\n\n")
+    f.write("VALIDACIÓN POR SIMULACIÓN DE TRÁFICO (ALOHA + efecto captura):\n")
+    for linea in resumen_simulacion(simulacion):
+        f.write(f"  {linea}\n")
+    f.write("\n")
 
     f.write("-"*80 + "\n")
     f.write("7. ESTIMACIÓN DE COSTOS (USD)\n")
@@ -421,6 +511,7 @@ with open(output_path, 'w', encoding='utf-8') as f:
     f.write("FIN DEL REPORTE\n")
     f.write("="*80 + "\n")
 
+instrumentacion.terminar()
 print(f"✓ Reporte de deployment guardado como '{output_path}'")
 
 # ============================================================================
@@ -438,18 +529,28 @@ print(f"   Función: Recibir datos y enviar a cloud")
 print(f"\n💧 TIER 2 - SENSORES DE HUMEDAD:")
 print(f"   Cantidad: {N_sensores_real} sensores")
 print(f"   Densidad: {estrategia_seleccionada['sensores_por_ha']:.2f} sensores/hectárea")
-print(f"   Espaciado: {spacing_sensores} m")
+print(f"   Ubicación: {descripcion_ubicacion}")
 print(f"   Función: Medir humedad a nivel radicular (20-30cm)")
 
 print(f"\n📊 ASIGNACIONES:")
 for gw_id in range(N_gateways):
     print(f"   Gateway {gw_id + 1}: {len(sensores_por_gateway[gw_id])} sensores")
 
+print(f"\n📶 TRÁFICO SIMULADO ({simulacion.duracion_s / 3600:,.0f} h):")
+print(f"   PDR: {simulacion.pdr * 100:.2f} % en el gateway asignado, "
+      f"{simulacion.pdr_cualquiera * 100:.2f} % en cualquiera")
+print(f"   Ciclo de trabajo máximo: {simulacion.ciclo_trabajo.max() * 100:.3f} % "
+      f"(límite {simulacion.ciclo_trabajo_max * 100:g} %)")
+
 print(f"\n💰 COSTO ESTIMADO: ${total_costo:,.0f}")
 
 print(f"\n📁 ARCHIVOS GENERADOS:")
 print("   • results/visualizations/two_tier_architecture.png (mapa visual)")
 print("   • results/reports/deployment_guide.txt (guía completa de instalación)")
+for ruta in archivos_exportados:
+    print(f"   • {ruta} (exportación completa)")
+if instrumentacion.activa and instrumentacion.archivo:
+    print(f"   • {os.path.relpath(instrumentacion.archivo)} (instrumentación por etapa)")
 
 print("\n" + "="*80)
 print("✅ ANÁLISIS COMPLETADO")
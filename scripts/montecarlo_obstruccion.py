@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Robustez de la ubicación de gateways frente a la realización de obstrucciones
+Monte Carlo: probabilidad de cobertura por punto y por ubicación, y N_optimo
+re-resuelto en un subconjunto de realizaciones
+
+Uso (desde la raíz del repositorio):
+    python scripts/montecarlo_obstruccion.py
+    python scripts/montecarlo_obstruccion.py --realizaciones 5000 --resolver 32 --procesos 4
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planificador.configuracion import cargar_config
+from planificador.grid import grid_desde_config
+from planificador.montecarlo import (guardar_probabilidades, montecarlo_desde_config,
+                                     resumen_montecarlo)
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--config', default=None, help='Ruta a config.json')
+parser.add_argument('--realizaciones', type=int, default=None,
+                    help='Realizaciones evaluadas (por defecto, montecarlo.realizaciones)')
+parser.add_argument('--resolver', type=int, default=None,
+                    help='Realizaciones re-resueltas con el Set Cover (por defecto, montecarlo.resolver)')
+parser.add_argument('--semilla', type=int, default=None, help='Semilla de la SeedSequence')
+parser.add_argument('--procesos', type=int, default=None, help='Procesos de trabajo')
+parser.add_argument('--directorio', default='results/reports', help='Carpeta de salida')
+args = parser.parse_args()
+
+config = cargar_config(args.config)
+J_coords = grid_desde_config(config)
+
+print("=" * 80)
+print("MONTE CARLO SOBRE REALIZACIONES DE OBSTRUCCIÓN")
+print("=" * 80)
+print(f"Puntos de demanda: {len(J_coords)}")
+print(f"Porcentaje de obstrucción: {config['escenario']['porcentaje_area_obstruida']}%\n")
+
+
+def mostrar(fila):
+    if fila['estado'] == 'Error':
+        print(f"  Realización {fila['realizacion']}: ERROR {fila['error']}", flush=True)
+    else:
+        print(f"  Realización {fila['realizacion']}: N = {fila['N_optimo']} "
+              f"({fila['estado']}, {fila['t_total_s']:.2f} s)", flush=True)
+
+
+inicio = time.perf_counter()
+resultado = montecarlo_desde_config(config, J_coords, realizaciones=args.realizaciones,
+                                    resolver=args.resolver, semilla=args.semilla,
+                                    procesos=args.procesos, al_terminar=mostrar)
+print(f"\nTiempo total: {time.perf_counter() - inicio:.1f} s\n")
+
+lineas = resumen_montecarlo(resultado)
+for linea in lineas:
+    print(linea)
+
+os.makedirs(args.directorio, exist_ok=True)
+ruta_puntos = os.path.join(args.directorio, 'montecarlo_cobertura_puntos.csv')
+guardar_probabilidades(resultado, ruta_puntos)
+ruta_resumen = os.path.join(args.directorio, 'montecarlo_resumen.txt')
+with open(ruta_resumen, 'w', encoding='utf-8') as f:
+    f.write('\n'.join(lineas) + '\n')
+print(f"\n✓ Probabilidad por punto guardada en '{ruta_puntos}'")
+print(f"✓ Resumen guardado en '{ruta_resumen}'")
+
+if resultado.resoluciones:
+    ruta_resoluciones = os.path.join(args.directorio, 'montecarlo_resoluciones.csv')
+    columnas = ['realizacion', 'estado', 'N_optimo', 'cota_inferior', 'densidad', 't_total_s',
+                'sensores', 'error']
+    with open(ruta_resoluciones, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.DictWriter(f, fieldnames=columnas, extrasaction='ignore')
+        escritor.writeheader()
+        escritor.writerows(resultado.resoluciones)
+    print(f"✓ Re-resoluciones guardadas en '{ruta_resoluciones}'")
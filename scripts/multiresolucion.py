@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Set Cover en grillas finas por refinamiento sucesivo (grueso a fino)
+Cada nivel parte de la solución del anterior y se verifica contra todos sus puntos
+
+Uso (desde la raíz del repositorio):
+    python scripts/multiresolucion.py
+    python scripts/multiresolucion.py --celdas 50,25,10,5 --sin-cota
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planificador.configuracion import cargar_config
+from planificador.multiresolucion import multiresolucion_desde_config, resumen_multiresolucion
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--config', default=None, help='Ruta a config.json')
+parser.add_argument('--celdas', default=None,
+                    help='Tamaños de celda de grueso a fino, separados por comas '
+                         '(por defecto, multiresolucion.celdas_m)')
+parser.add_argument('--sin-cota', action='store_true',
+                    help='No calcular la cota inferior del problema fino completo')
+parser.add_argument('--directorio', default='results/reports', help='Carpeta de salida')
+args = parser.parse_args()
+
+config = cargar_config(args.config)
+celdas = [float(c) for c in args.celdas.split(',')] if args.celdas else None
+
+print("=" * 80)
+print("SET COVER MULTI-RESOLUCIÓN")
+print("=" * 80)
+
+
+def mostrar(nivel):
+    print(f"  Celda {nivel.celda_m:g} m: N = {nivel.n_sitios} ({nivel.estado}), "
+          f"{nivel.puntos_modelo:,}/{nivel.puntos_totales:,} puntos en el modelo, "
+          f"{nivel.candidatos:,} candidatos, {nivel.rondas} rondas, {nivel.tiempo_s:.1f} s",
+          flush=True)
+
+
+opciones = {'celdas_m': celdas, 'al_nivel': mostrar}
+if args.sin_cota:
+    opciones['max_puntos_cota'] = 0
+resultado = multiresolucion_desde_config(config, **opciones)
+
+lineas = resumen_multiresolucion(resultado)
+print()
+for linea in lineas:
+    print(linea)
+
+os.makedirs(args.directorio, exist_ok=True)
+ruta_resumen = os.path.join(args.directorio, 'multiresolucion.txt')
+with open(ruta_resumen, 'w', encoding='utf-8') as f:
+    f.write('\n'.join(lineas) + '\n')
+ruta_sitios = os.path.join(args.directorio, 'multiresolucion_sitios.csv')
+with open(ruta_sitios, 'w', newline='', encoding='utf-8') as f:
+    escritor = csv.writer(f)
+    escritor.writerow(['sitio', 'x_m', 'y_m'])
+    for k, (x, y) in enumerate(resultado.sitios, 1):
+        escritor.writerow([k, f"{x:.2f}", f"{y:.2f}"])
+print(f"\n✓ Resumen guardado en '{ruta_resumen}'")
+print(f"✓ Sitios guardados en '{ruta_sitios}'")
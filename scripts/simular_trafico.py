@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Simulación de eventos discretos del tráfico LoRa de un despliegue
+Asigna los sensores a los gateways y simula colisiones ALOHA con efecto captura
+
+Uso (desde la raíz del repositorio):
+    python scripts/simular_trafico.py
+    python scripts/simular_trafico.py --sensores 100000 --duracion-h 168 --sf adr
+    python scripts/simular_trafico.py --gateways "1525,525;225,675" --sensores sensores.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planificador.asignacion import asignacion_desde_config, margenes_desde_config, resumen_asignacion
+from planificador.configuracion import cargar_config
+from planificador.pipeline import gateways_desde_config
+from planificador.simulacion import simulacion_desde_config, resumen_simulacion
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--config', default=None, help='Ruta a config.json')
+parser.add_argument('--gateways', default=None,
+                    help='Gateways "x,y;x,y" en metros (por defecto, la solución del Set Cover '
+                         'de la etapa resolucion del pipeline)')
+parser.add_argument('--sensores', default='1000',
+                    help='Número de sensores uniformes en el campo o CSV con columnas x_m, y_m')
+parser.add_argument('--duracion-h', type=float, default=None,
+                    help='Horas a simular (por defecto, simulacion.duracion_h)')
+parser.add_argument('--llegadas', choices=['poisson', 'periodico'], default=None,
+                    help='Proceso de llegadas (por defecto, simulacion.llegadas)')
+parser.add_argument('--sf', default=None,
+                    help="Spreading factor fijo o 'adr' (por defecto, simulacion.spreading_factor)")
+parser.add_argument('--semilla', type=int, default=0, help='Semilla de los sensores sintéticos')
+parser.add_argument('--directorio', default='results/reports', help='Carpeta de salida')
+args = parser.parse_args()
+
+config = cargar_config(args.config)
+if args.gateways:
+    gateways = np.array([[float(v) for v in par.split(',')] for par in args.gateways.split(';')])
+else:
+    gateways = gateways_desde_config(config)
+if os.path.isfile(args.sensores):
+    with open(args.sensores, newline='', encoding='utf-8') as f:
+        sensores = np.array([[float(fila['x_m']), float(fila['y_m'])] for fila in csv.DictReader(f)])
+else:
+    rng = np.random.default_rng(args.semilla)
+    sensores = rng.random((int(args.sensores), 2)) * [config['campo']['dimension_x_m'],
+                                                      config['campo']['dimension_y_m']]
+opciones = {}
+if args.duracion_h is not None:
+    opciones['duracion_s'] = args.duracion_h * 3600.0
+if args.llegadas is not None:
+    opciones['llegadas'] = args.llegadas
+if args.sf is not None:
+    opciones['spreading_factor'] = args.sf if args.sf == 'adr' else int(args.sf)
+
+print("=" * 80)
+print("SIMULACIÓN DE TRÁFICO LoRa")
+print("=" * 80)
+print(f"{len(sensores):,} sensores, {len(gateways)} gateways\n")
+
+margen, _ = margenes_desde_config(config, sensores, gateways)
+asignacion = asignacion_desde_config(config, sensores, gateways)
+lineas = resumen_asignacion(asignacion) + [""]
+simulacion = simulacion_desde_config(config, asignacion, sensores, gateways, margen_db=margen,
+                                     **opciones)
+lineas += resumen_simulacion(simulacion)
+for linea in lineas:
+    print(linea)
+
+os.makedirs(args.directorio, exist_ok=True)
+ruta_resumen = os.path.join(args.directorio, 'simulacion_trafico.txt')
+with open(ruta_resumen, 'w', encoding='utf-8') as f:
+    f.write('\n'.join(lineas) + '\n')
+ruta_sensores = os.path.join(args.directorio, 'simulacion_trafico_sensores.csv')
+with open(ruta_sensores, 'w', newline='', encoding='utf-8') as f:
+    escritor = csv.writer(f)
+    escritor.writerow(['sensor', 'x_m', 'y_m', 'gateway', 'sf', 'mensajes', 'entregados', 'pdr',
+                       'ciclo_trabajo'])
+    pdr = simulacion.pdr_sensor
+    ciclo = simulacion.ciclo_trabajo
+    for s, (x, y) in enumerate(sensores):
+        escritor.writerow([s, f"{x:.2f}", f"{y:.2f}",
+                           simulacion.gateway[s] + 1 if simulacion.asignados[s] else '',
+                           simulacion.spreading_factor[s], simulacion.paquetes_sensor[s],
+                           simulacion.entregados_sensor[s], f"{pdr[s]:.4f}", f"{ciclo[s]:.6f}"])
+print(f"\n✓ Resumen guardado en '{ruta_resumen}'")
+print(f"✓ Resultados por sensor guardados en '{ruta_sensores}'")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Set Cover de campos grandes por teselas resueltas en paralelo
+Las soluciones de las teselas se unen y se eliminan los gateways redundantes
+
+Uso (desde la raíz del repositorio):
+    python scripts/teselado.py
+    python scripts/teselado.py --campo 20000x8000 --procesos 8
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planificador.configuracion import cargar_config
+from planificador.teselado import resumen_teselado, teselado_desde_config
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--config', default=None, help='Ruta a config.json')
+parser.add_argument('--campo', default=None,
+                    help='Dimensiones del campo LxA en metros (por defecto, las de config.json)')
+parser.add_argument('--procesos', type=int, default=None, help='Procesos de trabajo')
+parser.add_argument('--tiempo-limite', type=float, default=None,
+                    help='Segundos máximos por tesela')
+parser.add_argument('--directorio', default='results/reports', help='Carpeta de salida')
+args = parser.parse_args()
+
+config = cargar_config(args.config)
+if args.campo:
+    ancho, alto = (float(v) for v in args.campo.lower().split('x'))
+    config['campo']['dimension_x_m'], config['campo']['dimension_y_m'] = ancho, alto
+
+print("=" * 80)
+print("SET COVER POR TESELAS")
+print("=" * 80)
+print(f"Campo: {config['campo']['dimension_x_m']:g} m × {config['campo']['dimension_y_m']:g} m\n")
+
+
+def mostrar(tesela):
+    detalle = tesela.error or f"N = {tesela.n_sitios}, {tesela.candidatos:,} candidatos"
+    print(f"  Tesela ({tesela.ix}, {tesela.iy}): {tesela.puntos:,} puntos, {detalle} "
+          f"({tesela.estado}, {tesela.tiempo_s:.1f} s)", flush=True)
+
+
+opciones = {'al_terminar': mostrar}
+if args.procesos is not None:
+    opciones['procesos'] = args.procesos
+if args.tiempo_limite is not None:
+    opciones['tiempo_limite'] = args.tiempo_limite
+resultado = teselado_desde_config(config, **opciones)
+
+lineas = resumen_teselado(resultado)
+print()
+for linea in lineas:
+    print(linea)
+
+os.makedirs(args.directorio, exist_ok=True)
+ruta_resumen = os.path.join(args.directorio, 'teselado.txt')
+with open(ruta_resumen, 'w', encoding='utf-8') as f:
+    f.write('\n'.join(lineas) + '\n')
+ruta_sitios = os.path.join(args.directorio, 'teselado_sitios.csv')
+with open(ruta_sitios, 'w', newline='', encoding='utf-8') as f:
+    escritor = csv.writer(f)
+    escritor.writerow(['sitio', 'indice_J', 'x_m', 'y_m'])
+    for k, (i, (x, y)) in enumerate(zip(resultado.seleccion, resultado.sitios), 1):
+        escritor.writerow([k, i, f"{x:.2f}", f"{y:.2f}"])
+print(f"\n✓ Resumen guardado en '{ruta_resumen}'")
+print(f"✓ Sitios guardados en '{ruta_sitios}'")
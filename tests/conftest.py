@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Paquete planificador importable desde la raíz del repositorio, como en scripts/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
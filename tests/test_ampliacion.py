@@ -0,0 +1,27 @@
+import numpy as np
+
+from planificador.ampliacion import ampliar_despliegue
+from planificador.asignacion import margenes_desde_config
+from planificador.configuracion import cargar_config
+from planificador.grid import grid_desde_config
+
+
+def test_residuo_con_la_obstruccion_de_la_asignacion():
+    config = cargar_config()
+    J = grid_desde_config(config)[::5]
+    # Un gateway sobre un candidato (fila de la matriz en caché) y otro fuera
+    # de la grilla (cálculo directo)
+    fijos = np.array([J[0], J[len(J) // 2] + [3.0, 7.0]])
+    resultado = ampliar_despliegue(config, fijos, sensores=J, directorio=False,
+                                   opciones_solver={'metodo': 'heuristica'},
+                                   I_coords=J, J_coords=J)
+    margen, _ = margenes_desde_config(config, J, fijos)
+    sin_enlace = np.flatnonzero(~np.any(margen >= 0, axis=1))
+    assert len(sin_enlace)
+    # Sensores en los puntos de demanda: ambos residuos son el mismo conjunto
+    np.testing.assert_array_equal(resultado.sensores_residuales, sin_enlace)
+    np.testing.assert_array_equal(resultado.puntos_residuales, sin_enlace)
+
+    gateways = np.concatenate([fijos, resultado.nuevos])
+    margen, _ = margenes_desde_config(config, J, gateways)
+    assert np.all(np.any(margen >= 0, axis=1))
@@ -0,0 +1,71 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from planificador.asignacion import SIN_ASIGNAR, subasta
+from planificador.mps import ruta_cbc
+
+
+def _instancia(semilla, n_sensores, n_gateways):
+    rng = np.random.default_rng(semilla)
+    beneficio = rng.uniform(1, 10, (n_sensores, n_gateways))
+    beneficio[rng.random(beneficio.shape) < 0.3] = -np.inf
+    capacidad = rng.integers(0, max(2, n_sensores // n_gateways) + 1, n_gateways)
+    return beneficio, capacidad
+
+
+def _verificar(beneficio, capacidad, gateway):
+    asignados = gateway != SIN_ASIGNAR
+    assert np.all(np.isfinite(beneficio[asignados, gateway[asignados]]))
+    assert np.all(np.bincount(gateway[asignados], minlength=len(capacidad)) <= capacidad)
+    return beneficio[asignados, gateway[asignados]].sum()
+
+
+def _optimo_fuerza_bruta(beneficio, capacidad):
+    n_S, n_G = beneficio.shape
+    mejor = 0.0
+    for opcion in itertools.product(range(-1, n_G), repeat=n_S):
+        opcion = np.array(opcion)
+        asignados = opcion >= 0
+        if np.any(np.bincount(opcion[asignados], minlength=n_G) > capacidad):
+            continue
+        valor = beneficio[asignados, opcion[asignados]].sum()
+        if np.isfinite(valor):
+            mejor = max(mejor, valor)
+    return mejor
+
+
+def _optimo_lp(beneficio, capacidad):
+    pulp = pytest.importorskip('pulp')
+    modelo = pulp.LpProblem('asignacion', pulp.LpMaximize)
+    pares = list(zip(*np.nonzero(np.isfinite(beneficio))))
+    # PuLP 3 crea las variables desde el modelo; PuLP 2.x (requirements.txt) no
+    variable = getattr(modelo, 'add_variable', pulp.LpVariable)
+    x = {(s, g): variable(f"x_{s}_{g}", 0, 1) for s, g in pares}
+    modelo += pulp.lpSum(beneficio[s, g] * v for (s, g), v in x.items())
+    for s in range(beneficio.shape[0]):
+        modelo += pulp.lpSum(v for (t, _), v in x.items() if t == s) <= 1
+    for g in range(beneficio.shape[1]):
+        modelo += pulp.lpSum(v for (_, h), v in x.items() if h == g) <= int(capacidad[g])
+    modelo.solve(pulp.COIN_CMD(path=ruta_cbc(), msg=False))
+    return pulp.value(modelo.objective) or 0.0
+
+
+@pytest.mark.parametrize('semilla', range(8))
+def test_subasta_frente_a_fuerza_bruta(semilla):
+    beneficio, capacidad = _instancia(semilla, 6, 3)
+    epsilon = 1e-4
+    gateway, _, _ = subasta(beneficio, capacidad, epsilon=epsilon)
+    valor = _verificar(beneficio, capacidad, gateway)
+    assert valor >= _optimo_fuerza_bruta(beneficio, capacidad) - len(beneficio) * epsilon
+
+
+@pytest.mark.parametrize('semilla', range(4))
+def test_subasta_frente_al_optimo_lp(semilla):
+    # Con capacidades enteras el LP de asignación tiene óptimo entero
+    beneficio, capacidad = _instancia(100 + semilla, 60, 5)
+    epsilon = 1e-4
+    gateway, _, _ = subasta(beneficio, capacidad, epsilon=epsilon)
+    valor = _verificar(beneficio, capacidad, gateway)
+    assert valor == pytest.approx(_optimo_lp(beneficio, capacidad), abs=len(beneficio) * epsilon)
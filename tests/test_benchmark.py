@@ -0,0 +1,37 @@
+import math
+
+from planificador.benchmark import exponentes_escalado, resumen_benchmark
+
+
+def _registro(n_J, tiempos):
+    return {'revision': 'abc', 'escenario': f"celda_{n_J}", 'n_J': n_J,
+            'enlaces_totales': 840 * n_J,
+            'etapas': {etapa: {'tiempo_s': t} for etapa, t in tiempos.items()}}
+
+
+def test_exponentes_descartan_tiempos_cortos_y_piden_tres_tamanos():
+    registros = [_registro(n, {'perdidas': 1e-3 * n, 'asignacion': 0.01, 'figuras': 0.2 * n})
+                 for n in (1000, 4000, 16000)]
+    registros.append(_registro(500, {'figuras': 0.2 * 500}))
+    exponentes = exponentes_escalado(registros)
+    assert math.isclose(exponentes['perdidas'][0], 1.0)
+    assert exponentes['perdidas'][1] == 3
+    # Bajo TIEMPO_MINIMO_COMPARACION_S: ningún punto, exponente NaN
+    assert math.isnan(exponentes['asignacion'][0]) and exponentes['asignacion'][1] == 0
+    assert math.isclose(exponentes['figuras'][0], 1.0)
+
+
+def test_exponente_nan_con_dos_tamanos():
+    registros = [_registro(n, {'perdidas': 1e-3 * n}) for n in (1000, 4000)]
+    assert math.isnan(exponentes_escalado(registros)['perdidas'][0])
+
+
+def test_resumen_alinea_memoria_con_tiempos():
+    registro = _registro(4000, {'perdidas': 1.5, 'figuras': 12.25})
+    registro.update(n_I=840, enlaces_viables=123456, memoria_medida=True)
+    registro['etapas']['perdidas']['memoria_pico_mb'] = 1234
+    registro['etapas']['figuras']['memoria_pico_mb'] = 56
+    _, tiempos, memoria = resumen_benchmark([registro])
+    # Cada celda de memoria termina en la misma columna que su tiempo
+    for celda_t, celda_m in (('1.50s', '1234MB'), ('12.25s', '56MB')):
+        assert tiempos.index(celda_t) + len(celda_t) == memoria.index(celda_m) + len(celda_m)
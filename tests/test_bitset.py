@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from planificador.bitset import MatrizBits, indices_activos
+
+
+@pytest.fixture
+def densa():
+    # 70 columnas: dos palabras por fila, la segunda con relleno
+    return np.random.default_rng(0).random((23, 70)) < 0.3
+
+
+def test_empaquetado_ida_y_vuelta(densa):
+    a = MatrizBits.desde_denso(densa)
+    np.testing.assert_array_equal(a.a_denso(dtype=bool), densa)
+    assert a.total() == densa.sum()
+    np.testing.assert_array_equal(indices_activos(a.fila(4), a.n_columnas),
+                                  np.flatnonzero(densa[4]))
+
+
+def test_operaciones_coinciden_con_densa(densa):
+    a = MatrizBits.desde_denso(densa)
+    filas = [1, 5, 8, 20]
+    np.testing.assert_array_equal(a.conteo_columnas(filas), densa[filas].sum(axis=0))
+    np.testing.assert_array_equal(a.contar_cubiertos(), densa.sum(axis=1))
+    no_cubiertas = MatrizBits.desde_denso(~densa[:1]).fila(0)
+    np.testing.assert_array_equal(a.contar_cubiertos(no_cubiertas), (densa & ~densa[0]).sum(axis=1))
+    np.testing.assert_array_equal(a.columnas_sin_cobertura(filas),
+                                  np.flatnonzero(~densa[filas].any(axis=0)))
+    assert a.cubre_todo() == densa.any(axis=0).all()
+    v = np.arange(70, dtype=float)
+    np.testing.assert_allclose(a.producto(v, filas), densa[filas] @ v)
+    np.testing.assert_array_equal(a.subconjunto(filas, [0, 3, 69]).a_denso(dtype=bool),
+                                  densa[filas][:, [0, 3, 69]])
+    np.testing.assert_array_equal(a.transpuesta().a_denso(dtype=bool), densa.T)
+
+
+def test_guardar_y_cargar(densa, tmp_path):
+    a = MatrizBits.desde_denso(densa)
+    a.guardar(tmp_path / 'a')
+    cargada = MatrizBits.cargar(tmp_path / 'a')
+    assert cargada.shape == densa.shape
+    np.testing.assert_array_equal(cargada.a_denso(dtype=bool), densa)
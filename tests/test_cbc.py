@@ -0,0 +1,45 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from planificador.bitset import MatrizBits
+from planificador.mps import leer_solucion_cbc, resolver_cbc_anytime
+
+pytest.importorskip('pulp')
+
+
+def _tamano_optimo(densa):
+    for k in range(1, len(densa) + 1):
+        if any(densa[list(filas)].any(axis=0).all()
+               for filas in itertools.combinations(range(len(densa)), k)):
+            return k
+
+
+@pytest.mark.parametrize('arranque', [True, False])
+def test_anytime_alcanza_el_optimo(arranque):
+    densa = np.random.default_rng(5).random((14, 30)) < 0.2
+    densa[0, ~densa.any(axis=0)] = True
+    resultado = resolver_cbc_anytime(MatrizBits.desde_denso(densa), arranque=arranque,
+                                     tiempo_limite=60)
+    assert resultado.estado == 'Optimal'
+    assert densa[resultado.seleccion].any(axis=0).all()
+    assert len(resultado.seleccion) == resultado.objetivo == _tamano_optimo(densa)
+    assert resultado.gap == 0.0
+    assert resultado.incumbentes
+
+
+@pytest.mark.parametrize('cabecera, estado', [
+    ('Optimal - objective value 3.00000000', 'Optimal'),
+    ('Stopped on time - objective value 4.00000000', 'Feasible'),
+    ('Stopped on time (no integer solution - continuous used) - objective value 2.5',
+     'Not Solved'),
+    ('Infeasible - objective value 0.00000000', 'Infeasible'),
+])
+def test_leer_solucion(tmp_path, cabecera, estado):
+    ruta = tmp_path / 'solucion.txt'
+    ruta.write_text(f"{cabecera}\n      0 x_0  1  0\n      1 x_5  0  1\n"
+                    "      2 x_9  1  0\n", encoding='utf-8')
+    leido, objetivo, seleccion = leer_solucion_cbc(ruta, ['x_0', 'x_5', 'x_9'])
+    assert leido == estado
+    assert seleccion == ([] if estado == 'Not Solved' else [0, 2])
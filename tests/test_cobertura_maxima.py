@@ -0,0 +1,74 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from planificador.bitset import MatrizBits
+from planificador.cobertura_maxima import greedy_perezoso, refinar_ilp
+
+K_MAX = 4
+
+
+def _instancia(semilla, n_I=12, n_J=40):
+    rng = np.random.default_rng(semilla)
+    densa = rng.random((n_I, n_J)) < rng.uniform(0.08, 0.25)
+    return densa, rng.uniform(0.5, 3.0, n_J)
+
+
+def _greedy(densa, k_max, pesos):
+    """Greedy sin cola de prioridad: recalcula todas las ganancias en cada paso."""
+    cubierto = np.zeros(densa.shape[1], dtype=bool)
+    orden, curva = [], []
+    for _ in range(k_max):
+        ganancias = (densa & ~cubierto) @ pesos
+        i = int(np.argmax(ganancias))
+        if ganancias[i] <= 0:
+            break
+        orden.append(i)
+        cubierto |= densa[i]
+        curva.append(float(pesos[cubierto].sum()))
+    return orden, np.array(curva)
+
+
+def _optimos(densa, k_max, pesos):
+    """Mayor peso cubierto con k sitios, k = 1..k_max (fuerza bruta)."""
+    return np.array([max(float(pesos[densa[list(filas)].any(axis=0)].sum())
+                         for filas in itertools.combinations(range(densa.shape[0]), k))
+                     for k in range(1, k_max + 1)])
+
+
+@pytest.mark.parametrize('ponderado', [False, True])
+@pytest.mark.parametrize('semilla', range(10))
+def test_greedy_perezoso(semilla, ponderado):
+    densa, pesos = _instancia(semilla)
+    if not ponderado:
+        pesos = np.ones(densa.shape[1])
+    r = greedy_perezoso(MatrizBits.desde_denso(densa), K_MAX, pesos if ponderado else None)
+    orden, curva = _greedy(densa, K_MAX, pesos)
+    np.testing.assert_allclose(r.curva, curva)
+    if ponderado:
+        assert r.orden == orden
+    assert np.all(np.diff(r.curva) > 0)
+    assert np.all(np.diff(r.puntos_cubiertos) >= 0)
+
+    optimos = _optimos(densa, len(r.curva), pesos)
+    assert np.all(np.diff(optimos) >= -1e-9)
+    assert np.all(r.curva <= optimos + 1e-9)
+    assert np.all(r.cota_superior >= optimos - 1e-9)
+
+
+@pytest.mark.parametrize('semilla', range(6))
+def test_refinamiento_nunca_empeora(semilla):
+    pytest.importorskip('pulp')
+    densa, pesos = _instancia(semilla)
+    A = MatrizBits.desde_denso(densa)
+    r = greedy_perezoso(A, K_MAX, pesos)
+    optimos = _optimos(densa, len(r.curva), pesos)
+    for k in range(1, len(r.curva) + 1):
+        refinado = refinar_ilp(A, k, pesos, inicial=r.orden[:k])
+        assert len(refinado.seleccion) <= k
+        assert refinado.valor == pytest.approx(float(pesos[densa[refinado.seleccion]
+                                                            .any(axis=0)].sum()))
+        assert refinado.valor >= r.curva[k - 1] - 1e-9
+        assert refinado.estado == 'Optimal'
+        assert refinado.valor == pytest.approx(optimos[k - 1])
@@ -0,0 +1,63 @@
+from planificador.mps import estadisticas_cbc
+
+SALIDA_OPTIMA = """\
+Continuous objective value is 36.25 - 0.01 seconds
+Cgl0004I processed model has 35 rows, 33 columns (33 integer (33 of which binary)) and 96 elements
+Cbc0012I Integer solution of 38 found by feasibility pump after 0 iterations and 0 nodes (0.00 seconds)
+Cbc0012I Integer solution of 37 found by DiveCoefficient after 52 iterations and 3 nodes (0.02 seconds)
+Cbc0001I Search completed - best objective 37, took 118 iterations and 9 nodes (0.03 seconds)
+Cuts at root node changed objective from 36.25 to 36.5
+
+Result - Optimal solution found
+
+Objective value:                37.00000000
+Enumerated nodes:               9
+Total iterations:               118
+Time (CPU seconds):             0.03
+Time (Wallclock seconds):       0.04
+"""
+
+# Raíz resuelta sin cortes: CBC informa -DBL_MAX como objetivo tras cortes
+SALIDA_SIN_CORTES = """\
+Continuous objective value is 2 - 0.00 seconds
+Cuts at root node changed objective from 2 to -1.79769e+308
+
+Result - Optimal solution found
+
+Enumerated nodes:               0
+Total iterations:               0
+Time (CPU seconds):             0.00
+"""
+
+# Proceso terminado por el límite duro antes del resumen final
+SALIDA_CORTADA = """\
+Continuous objective value is 1.2e+01 - 0.40 seconds
+Cbc0010I After 0 nodes, 1 on tree, 1e+50 best solution, best possible 12 (0.85 seconds)
+Cbc0012I Integer solution of 14 found by rounding after 345 iterations and 17 nodes (3.10 seconds)
+Cbc0010I After 100 nodes, 54 on tree, 14 best solution, best possible 12.5 (6.00 seconds)
+Cbc0005I Partial search - best objective 14 (best possible 12.5), took 2210 iterations and 143 nodes (8.21 seconds)
+"""
+
+
+def test_resumen_completo():
+    assert estadisticas_cbc(SALIDA_OPTIMA) == {
+        'resultado': 'Optimal solution found', 'nodos': 9, 'iteraciones': 118,
+        'tiempo_cpu_s': 0.03, 'cota_raiz_lp': 36.25, 'cota_raiz_cortes': 36.5}
+
+
+def test_cota_infinita_tras_cortes_es_none():
+    estadisticas = estadisticas_cbc(SALIDA_SIN_CORTES)
+    assert estadisticas['cota_raiz_lp'] == 2.0
+    assert estadisticas['cota_raiz_cortes'] is None
+
+
+def test_busqueda_cortada_usa_la_ultima_linea_de_progreso():
+    estadisticas = estadisticas_cbc(SALIDA_CORTADA)
+    assert estadisticas['resultado'] is None
+    assert (estadisticas['iteraciones'], estadisticas['nodos']) == (2210, 143)
+    assert estadisticas['cota_raiz_lp'] == 12.0
+    assert estadisticas['tiempo_cpu_s'] is None and estadisticas['cota_raiz_cortes'] is None
+
+
+def test_salida_vacia():
+    assert set(estadisticas_cbc('').values()) == {None}
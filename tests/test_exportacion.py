@@ -0,0 +1,75 @@
+import csv
+import json
+import os
+
+import numpy as np
+import pytest
+
+from planificador.asignacion import SIN_ASIGNAR
+from planificador.exportacion import ESTADOS, exportar_despliegue, tabla_despliegue
+
+
+@pytest.fixture
+def tabla():
+    rng = np.random.default_rng(2)
+    sensores = rng.uniform(0, 2000, (7, 2))
+    gateways = np.array([[500.0, 500.0], [1500.0, 520.0], [1000.0, 100.0]])
+    # El gateway 3 queda sin sensores: sus estadísticas son NaN
+    gateway = np.array([0, 1, SIN_ASIGNAR, 0, 1, SIN_ASIGNAR, 1])
+    margen = np.array([12.5, 3.25, -4.0, 8.0, 0.5, 2.0, 7.75])
+    distancia = np.hypot(*(sensores - gateways[np.maximum(gateway, 0)]).T)
+    return tabla_despliegue(sensores, gateways, gateway, margen, distancia,
+                            mejor_gateway=np.maximum(gateway, 0), capacidad=[2, 3, 4],
+                            spreading_factor=[7, 8, 9, 7, 10, 12, 7],
+                            pdr=rng.uniform(0.8, 1.0, 7), origen_wgs84=(-71.5, -33.4))
+
+
+def _rechazar_constante(nombre):
+    raise ValueError(f"Constante no JSON: {nombre}")
+
+
+def test_csv_y_geojson_se_leen_de_vuelta(tabla, tmp_path):
+    rutas = exportar_despliegue(tabla, tmp_path, formatos=('csv', 'geojson'),
+                                filas_por_bloque=3)
+    sensores, gateways = tabla.sensores, tabla.gateways
+
+    with open(rutas['csv'][0], newline='', encoding='utf-8') as f:
+        filas = list(csv.DictReader(f))
+    assert len(filas) == tabla.n_sensores
+    assert list(filas[0]) == list(sensores)
+    assert [int(f['gateway']) for f in filas] == [1, 2, 0, 1, 2, 0, 2]
+    assert [f['estado'] for f in filas] == [ESTADOS[e] for e in sensores['estado']]
+    assert [f['estado'] for f in filas][2::3] == ['sin_cobertura', 'sin_capacidad']
+    np.testing.assert_allclose([float(f['x_m']) for f in filas], sensores['x_m'], atol=0.005)
+    np.testing.assert_allclose([float(f['lat']) for f in filas], sensores['lat'], atol=5e-8)
+    np.testing.assert_allclose([float(f['pdr']) for f in filas], sensores['pdr'], atol=5e-5)
+
+    with open(rutas['csv'][1], newline='', encoding='utf-8') as f:
+        filas_g = list(csv.DictReader(f))
+    assert [int(f['sensores']) for f in filas_g] == [2, 3, 0]
+    assert filas_g[2]['margen_min_db'] == 'nan'
+
+    with open(rutas['geojson'][0], encoding='utf-8') as f:
+        geojson = json.load(f, parse_constant=_rechazar_constante)
+    assert geojson['type'] == 'FeatureCollection'
+    assert geojson['sistema_coordenadas'] == 'WGS84'
+    features = geojson['features']
+    assert [f['properties']['tipo'] for f in features] == ['gateway'] * 3 + ['sensor'] * 7
+    assert features[5]['properties']['estado'] == 'sin_cobertura'
+    assert features[2]['properties']['margen_min_db'] is None
+    np.testing.assert_allclose([f['geometry']['coordinates'] for f in features[3:]],
+                               np.column_stack([sensores['lon'], sensores['lat']]), atol=5e-8)
+    assert [f['properties']['gateway'] for f in features[:3]] == list(gateways['gateway'])
+
+
+def test_npy_conserva_tipos_y_esquema(tabla, tmp_path):
+    rutas = exportar_despliegue(tabla, tmp_path, formatos=('npy',), filas_por_bloque=2)
+    directorio = rutas['npy'][0]
+    with open(os.path.join(directorio, 'esquema.json'), encoding='utf-8') as f:
+        esquema = json.load(f)
+    assert esquema['filas'] == tabla.n_sensores
+    assert esquema['categorias'] == {'estado': list(ESTADOS)}
+    for nombre, columna in tabla.sensores.items():
+        leida = np.load(os.path.join(directorio, f"{nombre}.npy"))
+        assert esquema['columnas'][nombre] == str(leida.dtype) == str(columna.dtype)
+        np.testing.assert_array_equal(leida, columna)
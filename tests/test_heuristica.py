@@ -0,0 +1,53 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from planificador import heuristica
+from planificador.heuristica import resolver_lagrangiano
+
+
+def _optimo(densa):
+    """Tamaño de la menor cobertura (fuerza bruta)."""
+    for k in range(1, densa.shape[0] + 1):
+        for filas in itertools.combinations(range(densa.shape[0]), k):
+            if densa[list(filas)].any(axis=0).all():
+                return k
+    return None
+
+
+def _instancia(semilla, n_I=12, n_J=30):
+    rng = np.random.default_rng(semilla)
+    densa = rng.random((n_I, n_J)) < rng.uniform(0.1, 0.35)
+    for j in np.flatnonzero(~densa.any(axis=0)):
+        densa[rng.integers(n_I), j] = True
+    return densa
+
+
+@pytest.mark.parametrize('denso', [True, False])
+@pytest.mark.parametrize('semilla', range(15))
+def test_cota_no_supera_el_optimo(semilla, denso, monkeypatch):
+    if not denso:
+        monkeypatch.setattr(heuristica, 'MAX_ENLACES_DENSO', 0)
+    densa = _instancia(semilla)
+    optimo = _optimo(densa)
+    r = resolver_lagrangiano(densa, max_iteraciones=300)
+    assert densa[r.seleccion].any(axis=0).all()
+    assert r.cota_inferior <= optimo <= r.valor
+    if r.optimo:
+        assert r.valor == optimo
+
+
+def test_cota_exacta_en_particion():
+    # Bloques disjuntos: la relajación es entera y L alcanza el óptimo sin
+    # margen; un error de redondeo por encima daría una cota de 5
+    densa = np.kron(np.eye(4, dtype=bool), np.ones((3, 7), dtype=bool))
+    r = resolver_lagrangiano(densa, max_iteraciones=500)
+    assert r.cota_inferior == 4
+    assert r.valor == 4 and r.optimo
+
+
+def test_infactible():
+    densa = np.array([[1, 0, 0], [1, 1, 0]], dtype=bool)
+    r = resolver_lagrangiano(densa)
+    assert r.seleccion == [] and r.cota_inferior == float('inf')
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from planificador.bitset import MatrizBits
+from planificador.instrumentacion import Instrumentacion, registrar, resumen_instrumentacion
+from planificador.resolucion import resolver_set_cover
+
+
+def test_resumen_con_incumbente_infinito():
+    # CBC sin arranque emite primero un incumbente infinito, que se registra como None
+    instrumentacion = Instrumentacion(origen='prueba')
+    with instrumentacion.etapa('resolucion'):
+        registrar(solver={'metodo': 'cbc_mps', 'estado': 'Optimal',
+                          'cbc': {'resultado': 'Optimal solution found', 'nodos': 0,
+                                  'iteraciones': 12, 'cota_raiz_lp': None,
+                                  'cota_raiz_cortes': None},
+                          'incumbentes': [[0.0059, None, None], [0.4, 18.32, 17.5]]})
+    lineas = resumen_instrumentacion(instrumentacion.medidas)
+    linea = next(l for l in lineas if 'incumbentes' in l)
+    assert linea == "  resolucion: incumbentes - a 0.01 s, 18.32 a 0.40 s"
+    assert any('cota raíz LP -, tras cortes -' in l for l in lineas)
+
+
+def test_registrar_fuera_de_etapa_no_hace_nada():
+    instrumentacion = Instrumentacion(origen='prueba')
+    registrar(densidad=0.5)
+    assert instrumentacion.medidas == {}
+
+
+def test_resumen_de_cbc_sin_arranque():
+    pytest.importorskip('pulp')
+    # Sin MIP start, el primer evento de CBC es la cota de la raíz sin incumbente
+    densa = np.random.default_rng(1).random((60, 300)) < 0.2
+    instrumentacion = Instrumentacion(origen='prueba')
+    with instrumentacion.etapa('resolucion'):
+        resolver_set_cover(MatrizBits.desde_denso(densa),
+                           {'metodo': 'cbc_mps', 'bnb': {'max_elementos': 0},
+                            'arranque_heuristico': False, 'tiempo_limite_s': 1})
+    incumbentes = instrumentacion.medidas['resolucion']['metricas']['solver']['incumbentes']
+    assert incumbentes[0][1] is None
+    lineas = resumen_instrumentacion(instrumentacion.medidas)
+    assert any(linea.startswith('  resolucion: incumbentes - a ') for linea in lineas)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from planificador.mapa_obstruccion import MapaObstruccion
+
+
+def _fraccion_ingenua(mapa, I_coords, J_coords):
+    """Muestreo enlace por enlace, sin rectángulos envolventes ni lotes."""
+    n_filas, n_columnas = mapa.valores.shape
+    ci, cj = mapa._a_celdas(I_coords), mapa._a_celdas(J_coords)
+    fraccion = np.zeros((len(ci), len(cj)))
+    for i, (x0, y0) in enumerate(ci):
+        for j, (x1, y1) in enumerate(cj):
+            longitud = np.hypot(x1 - x0, y1 - y0) * mapa.resolucion_m
+            muestras = max(1, int(np.ceil(longitud / mapa.paso_m)))
+            t = np.minimum((np.arange(muestras) + 0.5) / muestras, 1.0)
+            columnas = np.minimum((x0 + t * (x1 - x0)).astype(int), n_columnas - 1)
+            filas = np.minimum((y0 + t * (y1 - y0)).astype(int), n_filas - 1)
+            fraccion[i, j] = mapa.valores[filas, columnas].mean()
+    return fraccion
+
+
+def test_fraccion_trayecto_coincide_con_muestreo_ingenuo():
+    mapa = MapaObstruccion.sintetico(1000, 600, 10, 35, longitud_correlacion_m=60, semilla=3,
+                                     paso_m=7)
+    rng = np.random.default_rng(0)
+    I = rng.uniform((0, 0), (1000, 600), (23, 2))
+    J = rng.uniform((0, 0), (1000, 600), (41, 2))
+    # Presupuesto de ~10 kB: bloques de 3 filas y lotes de ~260 muestras
+    fraccion = mapa.fraccion_trayecto(I, J, memoria_max_mb=0.01)
+    ingenua = _fraccion_ingenua(mapa, I, J)
+    mixtos = (ingenua > 0) & (ingenua < 1)
+    assert 0.1 < mixtos.mean() < 0.9
+    np.testing.assert_allclose(fraccion, ingenua, atol=1e-6)
+    np.testing.assert_array_equal(mapa.fraccion_trayecto(I, J), fraccion)
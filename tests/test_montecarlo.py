@@ -0,0 +1,35 @@
+import numpy as np
+
+from planificador.bitset import desempaquetar
+from planificador.cobertura import (OBSTRUCCION_COORDENADAS, calcular_matriz_cobertura_bits,
+                                    obstruccion_enlaces, obstruccion_por_coordenadas)
+from planificador.configuracion import cargar_config
+from planificador.grid import grid_desde_config
+from planificador.montecarlo import evaluar_ubicacion, semilla_realizacion
+from planificador.propagacion import ModeloPropagacion
+
+
+def test_obstruccion_enlaces_coincide_con_mascara_por_coordenadas():
+    rng = np.random.default_rng(0)
+    I, J = rng.uniform(0, 2000, (12, 2)), rng.uniform(0, 2000, (20, 2))
+    filas, columnas = np.indices((12, 20)).reshape(2, -1)
+    mascaras = obstruccion_enlaces(I[filas], J[columnas], 35, [5, 9])
+    for mascara, semilla in zip(mascaras, [5, 9]):
+        np.testing.assert_array_equal(mascara.reshape(12, 20),
+                                      obstruccion_por_coordenadas(I, J, 35, semilla))
+
+
+def test_evaluacion_y_resolucion_ven_el_mismo_sorteo():
+    config = cargar_config()
+    puntos = grid_desde_config(config)[::7]
+    modelo = ModeloPropagacion.desde_config(config)
+    porcentaje = config['escenario']['porcentaje_area_obstruida']
+    sitios = [3, len(puntos) // 2]
+    evaluacion = evaluar_ubicacion(puntos[sitios], puntos, modelo, porcentaje, 4, semilla=11)
+    for r in range(4):
+        cobertura = calcular_matriz_cobertura_bits(
+            puntos, puntos, modelo, porcentaje, semilla=semilla_realizacion(11, r),
+            obstruccion=OBSTRUCCION_COORDENADAS)
+        cubiertos = desempaquetar(cobertura.a.subconjunto(sitios).palabras,
+                                  len(puntos)).any(axis=0)
+        assert evaluacion.fraccion_cubierta[r] == cubiertos.mean()
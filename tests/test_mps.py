@@ -0,0 +1,58 @@
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+from planificador.bitset import MatrizBits
+from planificador.mps import escribir_mps, iterar_no_ceros, nombres_variables, ruta_cbc
+
+pulp = pytest.importorskip('pulp')
+
+
+@pytest.fixture
+def densa():
+    a = np.random.default_rng(3).random((15, 11)) < 0.3
+    a[:, ~a.any(axis=0)] = True
+    a[4] = False  # candidato sin cobertura: solo aparece en el objetivo
+    return a
+
+
+def test_iterar_no_ceros_por_bloques(densa):
+    pares = [np.concatenate(p) for p in zip(*iterar_no_ceros(MatrizBits.desde_denso(densa),
+                                                             no_ceros_por_bloque=20))]
+    np.testing.assert_array_equal(pares, np.nonzero(densa))
+
+
+@pytest.mark.parametrize('empaquetada', [False, True])
+def test_mps_se_lee_como_el_modelo_set_cover(densa, empaquetada, tmp_path):
+    ruta = str(tmp_path / 'set_cover.mps')
+    a = MatrizBits.desde_denso(densa) if empaquetada else densa
+    # Índices originales (como tras el presolve): el orden por nombre difiere del de filas
+    indices = np.arange(len(densa)) * 7 + 3
+    assert escribir_mps(ruta, a, nombres_variables(len(densa), indices)) == densa.sum()
+
+    variables, modelo = pulp.LpProblem.fromMPS(ruta)
+    assert modelo.sense == pulp.LpMinimize
+    assert {v.name: c for v, c in modelo.objective.items()} == \
+        {f"x_{i}": 1 for i in indices}
+    assert all(v.cat == pulp.LpInteger and (v.lowBound, v.upBound) == (0, 1)
+               for v in variables.values())
+    # PuLP >= 3 devuelve las restricciones como lista al llamar constraints()
+    restricciones = modelo.constraints
+    restricciones = ({c.name: c for c in restricciones()} if callable(restricciones)
+                     else dict(restricciones))
+    for j in range(densa.shape[1]):
+        restriccion = restricciones[f"Cobertura_punto_{j}"]
+        assert restriccion.sense == pulp.LpConstraintGE and -restriccion.constant == 1
+        assert sorted(v.name for v in restriccion) == \
+            sorted(f"x_{indices[i]}" for i in np.flatnonzero(densa[:, j]))
+
+
+def test_ruta_cbc_sin_avisos_de_pulp():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        ruta = ruta_cbc()
+    if ruta == 'cbc':
+        pytest.skip('CBC no está instalado')
+    assert os.access(ruta, os.X_OK)
@@ -0,0 +1,19 @@
+import numpy as np
+
+from planificador import pipeline
+from planificador.asignacion import asignacion_desde_config
+from planificador.configuracion import cargar_config
+
+
+def test_sensores_en_puntos_de_demanda_tienen_enlace(tmp_path, monkeypatch):
+    config = cargar_config()
+    monkeypatch.setattr(pipeline, 'DIRECTORIO_PERDIDAS', str(tmp_path / 'perdidas'))
+    artefactos = pipeline.ejecutar_pipeline(config, ['resolucion'], str(tmp_path / 'pipeline'),
+                                            publicar=False)
+    resolucion = artefactos['resolucion']
+    assert resolucion.metadatos['estado'] == 'Optimal'
+    gateways = pipeline.gateways_de(resolucion)
+    J = np.load(artefactos['grilla'].ruta('puntos.npy'))
+    # Lo que el Set Cover certifica como cubierto es lo que la asignación ve viable
+    asignacion = asignacion_desde_config(config, J, gateways)
+    assert len(asignacion.sin_cobertura) == 0
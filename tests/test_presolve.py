@@ -0,0 +1,41 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from planificador.presolve import presolve
+
+
+def _optimo(densa):
+    """Menor subconjunto de filas que cubre todas las columnas (fuerza bruta)."""
+    if densa.shape[1] == 0:
+        return []
+    for k in range(1, densa.shape[0] + 1):
+        for filas in itertools.combinations(range(densa.shape[0]), k):
+            if densa[list(filas)].any(axis=0).all():
+                return list(filas)
+    return None
+
+
+@pytest.mark.parametrize('semilla', range(12))
+def test_reconstruccion_conserva_el_optimo(semilla):
+    rng = np.random.default_rng(semilla)
+    densa = rng.random((12, 18)) < rng.uniform(0.25, 0.5)
+    # Columnas sin cobertura: se asigna un candidato al azar. Las densidades
+    # dejan instancias resueltas por completo y otras con un núcleo reducido
+    for j in np.flatnonzero(~densa.any(axis=0)):
+        densa[rng.integers(12), j] = True
+    pre = presolve(densa)
+    assert pre.factible
+    reducida = pre.matriz.a_denso(dtype=bool)
+    assert reducida.shape == (len(pre.candidatos), len(pre.puntos))
+    seleccion = pre.reconstruir(_optimo(reducida))
+    assert densa[seleccion].any(axis=0).all()
+    assert len(seleccion) == len(_optimo(densa))
+
+
+def test_detecta_puntos_sin_cobertura():
+    densa = np.array([[1, 1, 0, 0], [0, 1, 0, 1]], dtype=bool)
+    pre = presolve(densa)
+    assert not pre.factible
+    assert list(pre.puntos_sin_cobertura) == [2]
@@ -0,0 +1,61 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from planificador.bitset import MatrizBits
+from planificador.ramificacion import resolver_bnb
+from planificador.resolucion import resolver_set_cover
+
+
+def _optimo(densa):
+    """Tamaño de la menor cobertura (fuerza bruta)."""
+    for k in range(1, densa.shape[0] + 1):
+        for filas in itertools.combinations(range(densa.shape[0]), k):
+            if densa[list(filas)].any(axis=0).all():
+                return k
+    return None
+
+
+def _instancia(semilla, n_I=14, n_J=30):
+    rng = np.random.default_rng(semilla)
+    densa = rng.random((n_I, n_J)) < rng.uniform(0.1, 0.3)
+    for j in np.flatnonzero(~densa.any(axis=0)):
+        densa[rng.integers(n_I), j] = True
+    return densa
+
+
+@pytest.mark.parametrize('semilla', range(20))
+def test_coincide_con_fuerza_bruta(semilla):
+    densa = _instancia(semilla)
+    r = resolver_bnb(MatrizBits.desde_denso(densa))
+    assert r.estado == 'Optimal'
+    assert densa[r.seleccion].any(axis=0).all()
+    assert len(r.seleccion) == r.cota_inferior == _optimo(densa)
+
+
+def test_infactible():
+    densa = _instancia(0)
+    densa[:, 7] = False
+    r = resolver_bnb(MatrizBits.desde_denso(densa))
+    assert r.estado == 'Infeasible' and r.seleccion == []
+    assert resolver_set_cover(MatrizBits.desde_denso(densa)).estado == 'Infeasible'
+
+
+def test_limite_de_nodos():
+    # La búsqueda local se queda en 6; el óptimo es 5
+    densa = _instancia(35)
+    optimo = _optimo(densa)
+    r = resolver_bnb(MatrizBits.desde_denso(densa), max_nodos=1)
+    assert r.estado == 'Feasible'
+    assert densa[r.seleccion].any(axis=0).all()
+    assert r.cota_inferior <= optimo < len(r.seleccion)
+
+    # resolver_set_cover pasa la incumbente a CBC, que prueba el óptimo
+    pytest.importorskip('pulp')
+    resultado = resolver_set_cover(MatrizBits.desde_denso(densa),
+                                   {'presolve': False, 'bnb': {'max_nodos': 1}})
+    assert resultado.estadisticas['bnb']['estado'] == 'Feasible'
+    assert resultado.solver == 'cbc_mps' and resultado.estado == 'Optimal'
+    assert len(resultado.seleccion) == optimo
+    assert densa[resultado.seleccion].any(axis=0).all()
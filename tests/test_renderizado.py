@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+renderizado = pytest.importorskip('planificador.renderizado')
+
+
+def test_capas_en_memoria_acotadas(monkeypatch):
+    monkeypatch.setattr(renderizado, 'MEMORIA_CAPAS_MB', 1)
+    monkeypatch.setattr(renderizado, '_CAPAS_EN_MEMORIA', type(renderizado._CAPAS_EN_MEMORIA)())
+    monkeypatch.setattr(renderizado, '_bytes_capas', 0)
+    imagen = lambda: np.zeros((256, 256, 4), dtype=np.uint8)  # 256 kB
+    for clave in 'abcd':
+        renderizado._guardar_en_memoria(clave, imagen())
+    assert renderizado._capa_en_memoria('a') is not None
+    # 'a' pasó a ser la más reciente: se descarta 'b'
+    renderizado._guardar_en_memoria('e', imagen())
+    assert list(renderizado._CAPAS_EN_MEMORIA) == ['c', 'd', 'a', 'e']
+    assert renderizado._bytes_capas <= 1024 * 1024
+    # Una capa mayor que el límite no se guarda
+    renderizado._guardar_en_memoria('f', np.zeros((1024, 1024, 4), dtype=np.uint8))
+    assert 'f' not in renderizado._CAPAS_EN_MEMORIA
@@ -0,0 +1,37 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from planificador.asignacion import ParametrosTrafico
+from planificador.simulacion import simular_trafico
+
+SENSORES = 200
+
+
+def _aloha(carga, canales, paquetes):
+    """Tráfico con carga ofrecida `carga` por canal y ~`paquetes` mensajes en total."""
+    trafico = ParametrosTrafico(canales=canales)
+    tasa = carga * canales / (SENSORES * trafico.tiempo_en_aire_s)
+    trafico = dataclasses.replace(trafico, mensajes_por_hora=tasa * 3600)
+    return trafico, paquetes / (SENSORES * tasa)
+
+
+@pytest.mark.parametrize('canales, paquetes, max_eventos_bloque', [
+    (8, 40_000, 500_000),
+    # Bloques de 1 s con paquetes de ~0,2 s: el arrastre del borde decide
+    # casi la mitad de las colisiones
+    (1, 8_000, 1),
+])
+def test_aloha_puro_sin_captura(canales, paquetes, max_eventos_bloque):
+    carga = 0.25
+    trafico, duracion = _aloha(carga, canales, paquetes)
+    # Un gateway y la misma potencia para todos: ninguna colisión se captura
+    margen = np.full((SENSORES, 1), 20.0)
+    gateway = np.zeros(SENSORES, dtype=np.int64)
+    r = simular_trafico(margen, gateway, trafico, duracion, semilla=1,
+                        max_eventos_bloque=max_eventos_bloque)
+    assert r.paquetes_sensor.sum() == pytest.approx(paquetes, rel=0.05)
+    assert r.pdr == pytest.approx(np.exp(-2 * carga), abs=0.03)
+    assert r.pdr_cualquiera == r.pdr
+    assert r.ocupacion_gateway[0] == pytest.approx(carga, rel=0.05)
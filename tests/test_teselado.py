@@ -0,0 +1,30 @@
+import numpy as np
+
+from planificador.cobertura import OBSTRUCCION_COORDENADAS, calcular_matriz_cobertura_bits
+from planificador.configuracion import cargar_config
+from planificador.grid import grid_desde_config
+from planificador.propagacion import ModeloPropagacion
+from planificador.teselado import _Particion, eliminar_redundantes_global, rango_teselado
+
+
+def test_limpieza_con_enlaces_mas_largos_que_el_rango():
+    config = cargar_config()
+    config['campo'].update(dimension_x_m=4000, dimension_y_m=2000)
+    config['discretizacion'].update(celda_x_m=100, celda_y_m=100)
+    J = grid_desde_config(config)
+    modelo = ModeloPropagacion.desde_config(config)
+    porcentaje = config['escenario']['porcentaje_area_obstruida']
+    lado = rango_teselado(modelo)
+    particion = _Particion(J, lado, int(np.ceil(4000 / lado)), int(np.ceil(2000 / lado)))
+    # Un sitio cada ~600 m: cobertura factible y con muchos redundantes
+    union = [int(i) for i in np.flatnonzero((J[:, 0] % 600 == 50) & (J[:, 1] % 600 == 50))]
+    seleccion, conteo = eliminar_redundantes_global(J, union, particion, modelo, porcentaje, 42,
+                                                    obstruccion=OBSTRUCCION_COORDENADAS)
+    a = calcular_matriz_cobertura_bits(J[seleccion], J, modelo, porcentaje, 42,
+                                       obstruccion=OBSTRUCCION_COORDENADAS).a.a_denso(dtype=bool)
+    np.testing.assert_array_equal(conteo, a.sum(axis=0))
+    assert a.any(axis=0).all()
+    # Ningún sitio conservado es redundante con todos los enlaces viables
+    for fila in a:
+        assert np.any(fila & (a.sum(axis=0) == 1))
+    assert len(seleccion) < len(union)